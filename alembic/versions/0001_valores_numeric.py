@@ -0,0 +1,125 @@
+#Emprestimo-Facil\alembic\versions\0001_valores_numeric.py
+"""Colunas de valores de Float para Numeric
+
+Revision ID: 0001_valores_numeric
+Revises:
+Create Date: 2026-10-18
+
+No PostgreSQL a conversão é feita sem travar as tabelas durante a cópia: cada coluna ganha
+uma nova coluna Numeric, mantida em dia por um gatilho enquanto as linhas existentes são
+copiadas em lotes por faixa de id (um commit por lote). Só a troca final dos nomes acontece
+sob lock, e é instantânea. No SQLite (desenvolvimento e testes) as tabelas são recriadas.
+
+Os valores são arredondados para a escala do tipo novo: centavos em Dinheiro e 4 casas em
+Taxa (Numeric(7, 4)). Uma taxa_juros gravada com mais de 4 casas decimais muda de valor
+(1.23456 passa a 1.2346), e com ela os juros calculados dali em diante; taxas de 1000% ou
+mais não cabem na precisão e fazem a migração falhar. Vale conferir essas linhas antes.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0001_valores_numeric"
+down_revision = None
+branch_labels = None
+depends_on = None
+
+# Linhas copiadas por transação durante o preenchimento das novas colunas
+TAMANHO_LOTE = 10000
+
+DINHEIRO = sa.Numeric(14, 2)
+TAXA = sa.Numeric(7, 4)
+VALOR_APROPRIADO = sa.Numeric(18, 6)
+
+# tabela: [(coluna, tipo, nullable)]
+COLUNAS = {
+    "emprestimos": [
+        ("valor", DINHEIRO, False),
+        ("taxa_juros", TAXA, False),
+        ("valor_total", DINHEIRO, True),
+        ("valor_pago", DINHEIRO, True),
+    ],
+    "pagamentos": [("valor", DINHEIRO, False)],
+    "garantias": [("valor", DINHEIRO, False)],
+    "parcelas": [
+        ("valor_principal", DINHEIRO, False),
+        ("valor_juros", DINHEIRO, False),
+        ("valor", DINHEIRO, False),
+        ("valor_pago", DINHEIRO, False),
+    ],
+    "apropriacoes_juros": [
+        ("saldo_principal", VALOR_APROPRIADO, False),
+        ("juros_acumulados", VALOR_APROPRIADO, False),
+        ("mora_acumulada", VALOR_APROPRIADO, False),
+    ],
+}
+
+def _colunas_float(tabela: str) -> list:
+    # Bancos criados depois do modelo já têm as colunas em Numeric; só o que ainda é Float é convertido
+    inspetor = sa.inspect(op.get_bind())
+    if not inspetor.has_table(tabela):
+        return []
+    tipos = {coluna["name"]: coluna["type"] for coluna in inspetor.get_columns(tabela)}
+    return [
+        (coluna, tipo, nullable) for coluna, tipo, nullable in COLUNAS[tabela]
+        if isinstance(tipos.get(coluna), sa.Float)
+    ]
+
+def upgrade():
+    converter = _converter_postgresql if op.get_bind().dialect.name == "postgresql" else _converter_recriando
+    for tabela in COLUNAS:
+        colunas = _colunas_float(tabela)
+        if colunas:
+            converter(tabela, colunas)
+
+def downgrade():
+    # Volta para Float de uma vez, sem cópia em lotes
+    for tabela, colunas in COLUNAS.items():
+        with op.batch_alter_table(tabela) as batch:
+            for coluna, tipo, nullable in colunas:
+                batch.alter_column(coluna, type_=sa.Float(), existing_type=tipo, existing_nullable=nullable)
+
+def _converter_recriando(tabela: str, colunas: list):
+    with op.batch_alter_table(tabela) as batch:
+        for coluna, tipo, nullable in colunas:
+            batch.alter_column(coluna, type_=tipo, existing_type=sa.Float(), existing_nullable=nullable)
+
+def _converter_postgresql(tabela: str, colunas: list):
+    for coluna, tipo, nullable in colunas:
+        op.add_column(tabela, sa.Column(f"{coluna}_novo", tipo, nullable=True))
+
+    # Escritas feitas durante a cópia já gravam a nova coluna
+    funcao = f"{tabela}_valores_numeric"
+    atribuicoes = " ".join(
+        f"NEW.{coluna}_novo := round(NEW.{coluna}::numeric, {tipo.scale});" for coluna, tipo, _ in colunas
+    )
+    op.execute(f"CREATE FUNCTION {funcao}() RETURNS trigger AS $$ BEGIN {atribuicoes} RETURN NEW; END $$ LANGUAGE plpgsql")
+    op.execute(f"CREATE TRIGGER {funcao} BEFORE INSERT OR UPDATE ON {tabela} FOR EACH ROW EXECUTE PROCEDURE {funcao}()")
+
+    copia = sa.text(
+        f"UPDATE {tabela} SET "
+        + ", ".join(f"{coluna}_novo = round({coluna}::numeric, {tipo.scale})" for coluna, tipo, _ in colunas)
+        + " WHERE id > :inicio AND id <= :fim"
+    )
+    with op.get_context().autocommit_block():
+        bind = op.get_bind()
+        inicio, fim = bind.execute(sa.text(f"SELECT COALESCE(MIN(id), 1) - 1, COALESCE(MAX(id), 0) FROM {tabela}")).one()
+        while inicio < fim:
+            bind.execute(copia, {"inicio": inicio, "fim": inicio + TAMANHO_LOTE})
+            inicio += TAMANHO_LOTE
+
+        # NOT NULL validado antes da troca, sem bloquear escritas; o SET NOT NULL abaixo reaproveita a validação
+        for coluna, _, nullable in colunas:
+            if not nullable:
+                bind.execute(sa.text(f"ALTER TABLE {tabela} ADD CONSTRAINT ck_{tabela}_{coluna}_novo CHECK ({coluna}_novo IS NOT NULL) NOT VALID"))
+                bind.execute(sa.text(f"ALTER TABLE {tabela} VALIDATE CONSTRAINT ck_{tabela}_{coluna}_novo"))
+
+    # Troca dos nomes: uma transação curta sob lock
+    op.execute(f"LOCK TABLE {tabela} IN ACCESS EXCLUSIVE MODE")
+    op.execute(f"DROP TRIGGER {funcao} ON {tabela}")
+    op.execute(f"DROP FUNCTION {funcao}()")
+    for coluna, _, nullable in colunas:
+        op.drop_column(tabela, coluna)
+        op.alter_column(tabela, f"{coluna}_novo", new_column_name=coluna)
+        if not nullable:
+            op.alter_column(tabela, coluna, nullable=False)
+            op.drop_constraint(f"ck_{tabela}_{coluna}_novo", tabela, type_="check")
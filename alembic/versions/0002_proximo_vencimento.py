@@ -0,0 +1,44 @@
+#Emprestimo-Facil\alembic\versions\0002_proximo_vencimento.py
+"""Coluna emprestimos.proximo_vencimento e índice (status, proximo_vencimento)
+
+Revision ID: 0002_proximo_vencimento
+Revises: 0001_valores_numeric
+Create Date: 2026-10-18
+
+A coluna entra vazia: os empréstimos em aberto ganham o próximo vencimento quando a tarefa
+gerar_parcelas_faltantes grava o cronograma deles. No PostgreSQL o índice é criado com
+CONCURRENTLY, sem bloquear escritas em emprestimos.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0002_proximo_vencimento"
+down_revision = "0001_valores_numeric"
+branch_labels = None
+depends_on = None
+
+INDICE = "idx_status_proximo_vencimento"
+
+def _existentes():
+    # Bancos criados depois do modelo já têm a coluna e o índice
+    inspetor = sa.inspect(op.get_bind())
+    colunas = {coluna["name"] for coluna in inspetor.get_columns("emprestimos")}
+    indices = {indice["name"] for indice in inspetor.get_indexes("emprestimos")}
+    return colunas, indices
+
+def upgrade():
+    colunas, indices = _existentes()
+    if "proximo_vencimento" not in colunas:
+        op.add_column("emprestimos", sa.Column("proximo_vencimento", sa.Date(), nullable=True))
+    if INDICE in indices:
+        return
+    if op.get_bind().dialect.name == "postgresql":
+        with op.get_context().autocommit_block():
+            op.create_index(INDICE, "emprestimos", ["status", "proximo_vencimento"], postgresql_concurrently=True)
+    else:
+        op.create_index(INDICE, "emprestimos", ["status", "proximo_vencimento"])
+
+def downgrade():
+    op.drop_index(INDICE, table_name="emprestimos")
+    with op.batch_alter_table("emprestimos") as batch:
+        batch.drop_column("proximo_vencimento")
\ No newline at end of file
@@ -0,0 +1,39 @@
+#Emprestimo-Facil\alembic\versions\0003_chave_idempotencia.py
+"""Coluna pagamentos.chave_idempotencia com restrição de unicidade
+
+Revision ID: 0003_chave_idempotencia
+Revises: 0002_proximo_vencimento
+Create Date: 2026-10-18
+
+Pagamentos antigos ficam com a chave nula; a unicidade ignora nulos. No PostgreSQL o índice
+único é criado com CONCURRENTLY e só então vira a restrição, sem bloquear escritas em pagamentos
+durante a construção. No SQLite a tabela é recriada.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0003_chave_idempotencia"
+down_revision = "0002_proximo_vencimento"
+branch_labels = None
+depends_on = None
+
+RESTRICAO = "uq_pagamentos_chave_idempotencia"
+
+def upgrade():
+    inspetor = sa.inspect(op.get_bind())
+    # Bancos criados depois do modelo já têm a coluna com a unicidade
+    if "chave_idempotencia" in {coluna["name"] for coluna in inspetor.get_columns("pagamentos")}:
+        return
+    op.add_column("pagamentos", sa.Column("chave_idempotencia", sa.String(100), nullable=True))
+    if op.get_bind().dialect.name == "postgresql":
+        with op.get_context().autocommit_block():
+            op.create_index(RESTRICAO, "pagamentos", ["chave_idempotencia"], unique=True, postgresql_concurrently=True)
+        op.execute(f"ALTER TABLE pagamentos ADD CONSTRAINT {RESTRICAO} UNIQUE USING INDEX {RESTRICAO}")
+    else:
+        with op.batch_alter_table("pagamentos") as batch:
+            batch.create_unique_constraint(RESTRICAO, ["chave_idempotencia"])
+
+def downgrade():
+    with op.batch_alter_table("pagamentos") as batch:
+        batch.drop_constraint(RESTRICAO, type_="unique")
+        batch.drop_column("chave_idempotencia")
\ No newline at end of file
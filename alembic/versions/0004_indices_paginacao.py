@@ -0,0 +1,58 @@
+#Emprestimo-Facil\alembic\versions\0004_indices_paginacao.py
+"""Índices da paginação por cursor: (data_vencimento, id) e (data_solicitacao, id)
+
+Revision ID: 0004_indices_paginacao
+Revises: 0003_chave_idempotencia
+Create Date: 2026-10-18
+
+idx_data_vencimento passa a incluir o id, o desempate do cursor. No PostgreSQL o índice novo
+é criado com CONCURRENTLY sob outro nome e troca de lugar com o antigo, que é removido também
+com CONCURRENTLY: as listagens e as escritas seguem usando emprestimos durante a troca.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0004_indices_paginacao"
+down_revision = "0003_chave_idempotencia"
+branch_labels = None
+depends_on = None
+
+# nome: (colunas atuais, colunas anteriores ou None se o índice é novo)
+INDICES = {
+    "idx_data_vencimento": (["data_vencimento", "id"], ["data_vencimento"]),
+    "idx_data_solicitacao": (["data_solicitacao", "id"], None),
+}
+
+def _colunas_indices() -> dict:
+    inspetor = sa.inspect(op.get_bind())
+    return {indice["name"]: indice["column_names"] for indice in inspetor.get_indexes("emprestimos")}
+
+def _recriar(nome: str, colunas: list, existentes: dict):
+    if existentes.get(nome) == colunas:
+        return
+    if op.get_bind().dialect.name != "postgresql":
+        if nome in existentes:
+            op.drop_index(nome, table_name="emprestimos")
+        op.create_index(nome, "emprestimos", colunas)
+        return
+    with op.get_context().autocommit_block():
+        if nome not in existentes:
+            op.create_index(nome, "emprestimos", colunas, postgresql_concurrently=True)
+            return
+        novo = f"{nome}_novo"
+        op.create_index(novo, "emprestimos", colunas, postgresql_concurrently=True)
+        op.drop_index(nome, table_name="emprestimos", postgresql_concurrently=True)
+        op.execute(f"ALTER INDEX {novo} RENAME TO {nome}")
+
+def upgrade():
+    existentes = _colunas_indices()
+    for nome, (colunas, _) in INDICES.items():
+        _recriar(nome, colunas, existentes)
+
+def downgrade():
+    existentes = _colunas_indices()
+    for nome, (_, anteriores) in INDICES.items():
+        if anteriores is None:
+            op.drop_index(nome, table_name="emprestimos")
+        else:
+            _recriar(nome, anteriores, existentes)
\ No newline at end of file
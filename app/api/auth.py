@@ -2,14 +2,14 @@
 
 from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordRequestForm
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from datetime import timedelta
 from app.core.logger import get_logger
 from app.core.config import settings
 from app.core.security import create_access_token
-from app.db.database import get_db
+from app.db.async_database import get_async_db
 from app.schemas.usuario import Token, UsuarioOut, UsuarioCreate
-from app.services import usuario_service
+from app.services.usuario_service_async import UsuarioServiceAsync
 from app.core.security import rate_limited
 
 router = APIRouter()
@@ -17,8 +17,9 @@ logger = get_logger(__name__)
 
 @router.post("/login", response_model=Token)
 @rate_limited(max_calls=5, time_frame=60)
-def login_for_access_token(form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depends(get_db)):
-    usuario = usuario_service.autenticar_usuario(db, form_data.username, form_data.password)
+async def login_for_access_token(form_data: OAuth2PasswordRequestForm = Depends(), db: AsyncSession = Depends(get_async_db)):
+    service = UsuarioServiceAsync(db)
+    usuario = await service.autenticar_usuario(form_data.username, form_data.password)
     if not usuario:
         logger.warning(f"Tentativa de login mal-sucedida para o usuário: {form_data.username}")
         raise HTTPException(
@@ -31,17 +32,18 @@ def login_for_access_token(form_data: OAuth2PasswordRequestForm = Depends(), db:
     access_token = create_access_token(
         subject=str(usuario.id), expires_delta=access_token_expires
     )
-    usuario_service.atualizar_ultimo_login(db, usuario)
+    await service.atualizar_ultimo_login(usuario)
     logger.info(f"Login bem-sucedido para o usuário: {usuario.email}")
     return {"access_token": access_token, "token_type": "bearer"}
 
 @router.post("/register", response_model=UsuarioOut)
 @rate_limited(max_calls=3, time_frame=60)
-def register_user(usuario: UsuarioCreate, db: Session = Depends(get_db)):
-    db_usuario = usuario_service.obter_usuario_por_email(db, email=usuario.email)
+async def register_user(usuario: UsuarioCreate, db: AsyncSession = Depends(get_async_db)):
+    service = UsuarioServiceAsync(db)
+    db_usuario = await service.obter_usuario_por_email(usuario.email)
     if db_usuario:
         logger.warning(f"Tentativa de registro com e-mail já existente: {usuario.email}")
         raise HTTPException(status_code=400, detail="Email já registrado")
-    new_user = usuario_service.criar_usuario(db=db, usuario=usuario)
+    new_user = await service.criar_usuario(usuario)
     logger.info(f"Novo usuário registrado: {new_user.email}")
     return new_user
\ No newline at end of file
@@ -1,13 +1,14 @@
 #Emprestimo-Facil\app\api\clientes.py
 
 from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List
-from app.db.database import get_db
+from app.db.async_database import get_async_db
 from app.schemas.cliente import Cliente, ClienteCreate, ClienteUpdate
 from app.schemas.usuario import Usuario
-from app.services import cliente_service
-from app.api.deps import get_current_user
+from app.services.cliente_service_async import ClienteServiceAsync
+from app.schemas.base import Pagina
+from app.api.deps import get_current_user_async
 from app.core.security import rate_limited
 from app.core.logger import get_logger
 
@@ -16,64 +17,75 @@ logger = get_logger(__name__)
 
 @router.post("/", response_model=Cliente)
 @rate_limited(max_calls=10, time_frame=60)
-def criar_cliente(
+async def criar_cliente(
     cliente: ClienteCreate, 
-    db: Session = Depends(get_db),
-    current_user: Usuario = Depends(get_current_user)
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Usuario = Depends(get_current_user_async)
 ):
     if not current_user.is_admin:
         raise HTTPException(status_code=403, detail="Apenas administradores podem criar novos clientes")
-    new_cliente = cliente_service.criar_cliente(db=db, cliente=cliente)
+    new_cliente = await ClienteServiceAsync(db).criar_cliente(cliente)
     logger.info(f"Novo cliente criado por {current_user.email}: {new_cliente.id}")
     return new_cliente
 
 @router.get("/", response_model=List[Cliente])
-def listar_clientes(
+async def listar_clientes(
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=100), 
-    db: Session = Depends(get_db),
-    current_user: Usuario = Depends(get_current_user)
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Usuario = Depends(get_current_user_async)
 ):
-    clientes = cliente_service.listar_clientes(db, skip=skip, limit=limit)
+    clientes = await ClienteServiceAsync(db).listar_clientes(per_page=limit, skip=skip)
     logger.info(f"Lista de clientes acessada por {current_user.email}")
     return clientes
 
+@router.get("/pagina", response_model=Pagina[Cliente])
+async def listar_clientes_cursor(
+    cursor: str = Query(None),
+    por_pagina: int = Query(20, ge=1, le=100),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Usuario = Depends(get_current_user_async)
+):
+    pagina = await ClienteServiceAsync(db).listar_clientes_cursor(cursor, por_pagina)
+    logger.info(f"Página de clientes acessada por {current_user.email}")
+    return pagina
+
 @router.get("/{cliente_id}", response_model=Cliente)
-def obter_cliente(
+async def obter_cliente(
     cliente_id: int, 
-    db: Session = Depends(get_db),
-    current_user: Usuario = Depends(get_current_user)
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Usuario = Depends(get_current_user_async)
 ):
-    db_cliente = cliente_service.obter_cliente(db, cliente_id=cliente_id)
+    db_cliente = await ClienteServiceAsync(db).obter_cliente(cliente_id)
     if db_cliente is None:
         raise HTTPException(status_code=404, detail="Cliente não encontrado")
     logger.info(f"Cliente {cliente_id} acessado por {current_user.email}")
     return db_cliente
 
 @router.put("/{cliente_id}", response_model=Cliente)
-def atualizar_cliente(
+async def atualizar_cliente(
     cliente_id: int, 
     cliente: ClienteUpdate, 
-    db: Session = Depends(get_db),
-    current_user: Usuario = Depends(get_current_user)
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Usuario = Depends(get_current_user_async)
 ):
     if not current_user.is_admin:
         raise HTTPException(status_code=403, detail="Apenas administradores podem atualizar clientes")
-    db_cliente = cliente_service.atualizar_cliente(db, cliente_id=cliente_id, cliente=cliente)
+    db_cliente = await ClienteServiceAsync(db).atualizar_cliente(cliente_id, cliente)
     if db_cliente is None:
         raise HTTPException(status_code=404, detail="Cliente não encontrado")
     logger.info(f"Cliente {cliente_id} atualizado por {current_user.email}")
     return db_cliente
 
 @router.delete("/{cliente_id}", response_model=Cliente)
-def deletar_cliente(
+async def deletar_cliente(
     cliente_id: int, 
-    db: Session = Depends(get_db),
-    current_user: Usuario = Depends(get_current_user)
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Usuario = Depends(get_current_user_async)
 ):
     if not current_user.is_admin:
         raise HTTPException(status_code=403, detail="Apenas administradores podem deletar clientes")
-    db_cliente = cliente_service.deletar_cliente(db, cliente_id=cliente_id)
+    db_cliente = await ClienteServiceAsync(db).deletar_cliente(cliente_id)
     if db_cliente is None:
         raise HTTPException(status_code=404, detail="Cliente não encontrado")
     logger.info(f"Cliente {cliente_id} deletado por {current_user.email}")
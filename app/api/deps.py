@@ -4,23 +4,28 @@ from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 from jose import jwt, JWTError
 from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from datetime import datetime
 from typing import List
 
 from app.core.config import settings
 from app.core.security import get_user_by_id
 from app.db.database import get_db
+from app.db.async_database import get_async_db
 from app.schemas.token import TokenData
-from app.models.usuario import TipoUsuario
+from app.models.usuario import TipoUsuario, Usuario
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl=f"{settings.API_V1_STR}/login")
 
-def get_current_user(db: Session = Depends(get_db), token: str = Depends(oauth2_scheme)):
-    credentials_exception = HTTPException(
+def _credenciais_invalidas() -> HTTPException:
+    return HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Token inválido ou expirado",
         headers={"WWW-Authenticate": "Bearer"},
     )
+
+def _id_do_token(token: str) -> int:
+    credentials_exception = _credenciais_invalidas()
     try:
         payload = jwt.decode(token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM])
         user_id: str = payload.get("sub")
@@ -32,11 +37,20 @@ def get_current_user(db: Session = Depends(get_db), token: str = Depends(oauth2_
             raise credentials_exception
     except JWTError:
         raise credentials_exception
-    user = get_user_by_id(db, user_id=token_data.id)
+    return token_data.id
+
+def _usuario_ou_401(user):
     if user is None:
-        raise credentials_exception
+        raise _credenciais_invalidas()
     return user
 
+def get_current_user(db: Session = Depends(get_db), token: str = Depends(oauth2_scheme)):
+    return _usuario_ou_401(get_user_by_id(db, user_id=_id_do_token(token)))
+
+async def get_current_user_async(db: AsyncSession = Depends(get_async_db), token: str = Depends(oauth2_scheme)):
+    # Mesma validação de get_current_user, para rotas que usam a sessão assíncrona
+    return _usuario_ou_401(await db.get(Usuario, _id_do_token(token)))
+
 def get_current_active_user(current_user = Depends(get_current_user)):
     if not current_user.is_active:
         raise HTTPException(status_code=400, detail="Usuário inativo")
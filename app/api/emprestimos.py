@@ -1,87 +1,236 @@
 #Emprestimo-Facil\app\api\emprestimos.py
 
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List
 from app.core.logger import get_logger
-from app.db.database import get_db
-from app.schemas.emprestimo import Emprestimo, EmprestimoCreate, EmprestimoUpdate
-from app.services import emprestimo_service
-from app.api.deps import get_current_user
+from app.db.database import get_db, get_db_leitura, SessionLocal, roteador_leitura
+from app.db.async_database import get_async_db
+from app.schemas.emprestimo import Emprestimo, EmprestimoCreate, EmprestimoUpdate, Parcela, PagamentoLote
+from app.api.deps import get_current_user, get_current_user_async
 from app.schemas.usuario import Usuario
+from app.schemas.base import Pagina
 from app.core.security import rate_limited
-from app.services.estatistica_service import EstatisticaService
-from typing import Dict, Any
+from app.services.estatistica_service import EstatisticaService, ESQUEMA_FILTRADAS
+from app.services.emprestimo_service import EmprestimoService
+from app.services.emprestimo_service_async import EmprestimoServiceAsync
+from app.services.calculo_juros import TipoJuros, RegraRecorrente
+from app.services.simulacao_service import SimulacaoService
+from app.schemas.simulacao import SimulacaoLote
+from app.services.exportacao import FormatoExportacao, FormatoColunar, TIPOS_MIDIA, formatar, formatar_colunar
+from app.services.conciliacao_service import ConciliacaoService
+from app.services.projecao_caixa_service import GranularidadeProjecao
+from app.services.cnab import ErroArquivoCnab
+import io
+import tempfile
+import json
+from typing import Dict, Any, Union
+from datetime import date
 
 router = APIRouter()
 logger = get_logger(__name__)
 
+def _exportar(gerar_linhas, formato: Union[FormatoExportacao, FormatoColunar], nome_arquivo: str, esquema=None) -> StreamingResponse:
+    # A sessão da exportação é da própria resposta: a sessão da requisição pode ser
+    # fechada antes de o corpo terminar de ser enviado. Exportações só leem: vão para a réplica.
+    # Nos formatos colunares, gerar_linhas devolve record batches com o `esquema`
+    def corpo():
+        db = roteador_leitura.sessao()
+        try:
+            if isinstance(formato, FormatoColunar):
+                yield from formatar_colunar(gerar_linhas(db), esquema, formato)
+            else:
+                yield from formatar(gerar_linhas(db), formato)
+        finally:
+            db.close()
+
+    return StreamingResponse(
+        corpo(),
+        media_type=TIPOS_MIDIA[formato],
+        headers={"Content-Disposition": f'attachment; filename="{nome_arquivo}.{formato.value}"'}
+    )
+
 @router.post("/", response_model=Emprestimo)
 @rate_limited(max_calls=5, time_frame=60)
-def criar_emprestimo(
+async def criar_emprestimo(
     emprestimo: EmprestimoCreate,
-    db: Session = Depends(get_db),
-    current_user: Usuario = Depends(get_current_user)
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Usuario = Depends(get_current_user_async)
 ):
-    new_emprestimo = emprestimo_service.criar_emprestimo(db=db, emprestimo=emprestimo, user_id=current_user.id)
+    new_emprestimo = await EmprestimoServiceAsync(db).criar_emprestimo(emprestimo)
     logger.info(f"Novo empréstimo criado por {current_user.email}: {new_emprestimo.id}")
     return new_emprestimo
 
+@router.post("/simulacoes")
+def simular_emprestimos(
+    simulacao: SimulacaoLote,
+    current_user: Usuario = Depends(get_current_user)
+):
+    service = SimulacaoService()
+    service.validar_tamanho(simulacao.tamanho)
+    regra = RegraRecorrente(simulacao.intervalo, simulacao.unidade)
+    logger.info(f"Simulação com {simulacao.tamanho} cenários solicitada por {current_user.email}")
+    resultados = service.simular(simulacao.expandir(), regra, simulacao.incluir_parcelas)
+    return StreamingResponse((json.dumps(r) + "\n" for r in resultados), media_type="application/x-ndjson")
+
+@router.post("/pagamentos/lote", response_model=Dict[str, Any])
+def registrar_pagamentos(
+    lote: PagamentoLote,
+    db: Session = Depends(get_db),
+    current_user: Usuario = Depends(get_current_user)
+):
+    service = EmprestimoService(db)
+    resultados = service.registrar_pagamentos(lote.pagamentos)
+    totais = {status: sum(1 for r in resultados if r["status"] == status) for status in ("registrado", "duplicado", "rejeitado")}
+    logger.info(f"Lote de {len(resultados)} pagamentos enviado por {current_user.email}: {totais}")
+    return {**totais, "resultados": resultados}
+
+@router.post("/pagamentos/cnab", response_model=Dict[str, Any])
+async def importar_retorno_cnab(
+    request: Request,
+    current_user: Usuario = Depends(get_current_user)
+):
+    # O corpo é o próprio arquivo de retorno; acima de 1 MB ele vai para disco, não para a memória
+    arquivo = tempfile.SpooledTemporaryFile(max_size=1024 * 1024)
+    async for pedaco in request.stream():
+        arquivo.write(pedaco)
+    arquivo.seek(0)
+
+    def processar():
+        db = SessionLocal()
+        try:
+            return ConciliacaoService(db).processar_retorno(io.TextIOWrapper(arquivo, encoding="latin-1"))
+        finally:
+            db.close()
+            arquivo.close()
+
+    try:
+        relatorio = await run_in_threadpool(processar)
+    except ErroArquivoCnab as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    logger.info(f"Retorno CNAB importado por {current_user.email}: {relatorio['registrados']} pagamentos registrados")
+    return relatorio
+
+@router.get("/relatorios/exportar")
+def exportar_relatorio_emprestimos(
+    data_inicio: date = Query(...),
+    data_fim: date = Query(None),
+    formato: FormatoExportacao = Query(FormatoExportacao.CSV),
+    current_user: Usuario = Depends(get_current_user)
+):
+    logger.info(f"Exportação do relatório de empréstimos ({formato.value}) solicitada por {current_user.email}")
+    return _exportar(
+        lambda db: EmprestimoService(db).exportar_relatorio_emprestimos(data_inicio, data_fim),
+        formato,
+        f"relatorio-emprestimos-{data_inicio}"
+    )
+
+@router.get("/parcelas/vencimentos", response_model=List[Parcela])
+def listar_vencimentos(
+    data_inicio: date = Query(None),
+    data_fim: date = Query(None),
+    db: Session = Depends(get_db),
+    current_user: Usuario = Depends(get_current_user)
+):
+    service = EmprestimoService(db)
+    return service.listar_vencimentos(data_inicio, data_fim)
+
 @router.get("/", response_model=List[Emprestimo])
-def listar_emprestimos(
+async def listar_emprestimos(
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=100),
-    db: Session = Depends(get_db),
-    current_user: Usuario = Depends(get_current_user)
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Usuario = Depends(get_current_user_async)
 ):
-    emprestimos = emprestimo_service.listar_emprestimos(db, skip=skip, limit=limit, user_id=current_user.id)
+    emprestimos = await EmprestimoServiceAsync(db).listar_emprestimos(per_page=limit, skip=skip)
     logger.info(f"Lista de empréstimos acessada por {current_user.email}")
     return emprestimos
 
+@router.get("/pagina", response_model=Pagina[Emprestimo])
+async def listar_emprestimos_cursor(
+    cursor: str = Query(None),
+    por_pagina: int = Query(20, ge=1, le=100),
+    ordenar_por: str = Query("id", pattern="^(id|data_solicitacao|data_vencimento)$"),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Usuario = Depends(get_current_user_async)
+):
+    service = EmprestimoServiceAsync(db)
+    pagina = await service.listar_emprestimos_cursor(cursor, por_pagina, ordenar_por)
+    logger.info(f"Página de empréstimos acessada por {current_user.email}")
+    return pagina
+
 @router.get("/{emprestimo_id}", response_model=Emprestimo)
-def obter_emprestimo(
+async def obter_emprestimo(
     emprestimo_id: int,
-    db: Session = Depends(get_db),
-    current_user: Usuario = Depends(get_current_user)
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Usuario = Depends(get_current_user_async)
 ):
-    db_emprestimo = emprestimo_service.obter_emprestimo(db, emprestimo_id=emprestimo_id, user_id=current_user.id)
+    db_emprestimo = await EmprestimoServiceAsync(db).obter_emprestimo(emprestimo_id)
     if db_emprestimo is None:
         raise HTTPException(status_code=404, detail="Empréstimo não encontrado ou não autorizado")
     logger.info(f"Empréstimo {emprestimo_id} acessado por {current_user.email}")
     return db_emprestimo
 
-@router.put("/{emprestimo_id}", response_model=Emprestimo)
-def atualizar_emprestimo(
+@router.get("/{emprestimo_id}/cronograma", response_model=Dict[str, Any])
+def obter_cronograma(
     emprestimo_id: int,
-    emprestimo: EmprestimoUpdate,
+    page: int = Query(1, ge=1),
+    per_page: int = Query(12, ge=1, le=120),
+    tipo_juros: TipoJuros = Query(TipoJuros.COMPOSTO),
+    num_parcelas: int = Query(None, ge=1, le=600),
     db: Session = Depends(get_db),
     current_user: Usuario = Depends(get_current_user)
 ):
-    db_emprestimo = emprestimo_service.atualizar_emprestimo(db, emprestimo_id=emprestimo_id, emprestimo=emprestimo, user_id=current_user.id)
+    service = EmprestimoService(db)
+    cronograma = service.obter_cronograma(emprestimo_id, page, per_page, tipo_juros, num_parcelas)
+    logger.info(f"Cronograma do empréstimo {emprestimo_id} acessado por {current_user.email}")
+    return cronograma
+
+@router.get("/{emprestimo_id}/saldo", response_model=Dict[str, Any])
+def obter_saldo(
+    emprestimo_id: int,
+    data_referencia: date = Query(None),
+    db: Session = Depends(get_db),
+    current_user: Usuario = Depends(get_current_user)
+):
+    service = EmprestimoService(db)
+    return service.obter_saldo(emprestimo_id, data_referencia)
+
+@router.put("/{emprestimo_id}", response_model=Emprestimo)
+async def atualizar_emprestimo(
+    emprestimo_id: int,
+    emprestimo: EmprestimoUpdate,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Usuario = Depends(get_current_user_async)
+):
+    db_emprestimo = await EmprestimoServiceAsync(db).atualizar_emprestimo(emprestimo_id, emprestimo)
     if db_emprestimo is None:
         raise HTTPException(status_code=404, detail="Empréstimo não encontrado ou não autorizado")
     logger.info(f"Empréstimo {emprestimo_id} atualizado por {current_user.email}")
     return db_emprestimo
 
 @router.delete("/{emprestimo_id}", response_model=Emprestimo)
-def deletar_emprestimo(
+async def deletar_emprestimo(
     emprestimo_id: int,
-    db: Session = Depends(get_db),
-    current_user: Usuario = Depends(get_current_user)
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Usuario = Depends(get_current_user_async)
 ):
-    db_emprestimo = emprestimo_service.deletar_emprestimo(db, emprestimo_id=emprestimo_id, user_id=current_user.id)
+    db_emprestimo = await EmprestimoServiceAsync(db).deletar_emprestimo(emprestimo_id)
     if db_emprestimo is None:
         raise HTTPException(status_code=404, detail="Empréstimo não encontrado ou não autorizado")
     logger.info(f"Empréstimo {emprestimo_id} deletado por {current_user.email}")
     return db_emprestimo
 
 @router.get("/estatisticas/gerais", response_model=Dict[str, Any])
-def obter_estatisticas_gerais(db: Session = Depends(get_db), current_user: Usuario = Depends(get_current_user)):
+def obter_estatisticas_gerais(db: Session = Depends(get_db_leitura), current_user: Usuario = Depends(get_current_user)):
     estatistica_service = EstatisticaService(db)
     return estatistica_service.obter_estatisticas_gerais()
 
 @router.get("/estatisticas/cliente/{cliente_id}", response_model=Dict[str, Any])
-def obter_estatisticas_cliente(cliente_id: int, db: Session = Depends(get_db), current_user: Usuario = Depends(get_current_user)):
+def obter_estatisticas_cliente(cliente_id: int, db: Session = Depends(get_db_leitura), current_user: Usuario = Depends(get_current_user)):
     estatistica_service = EstatisticaService(db)
     return estatistica_service.obter_estatisticas_cliente(cliente_id)
 
@@ -89,7 +238,7 @@ def obter_estatisticas_cliente(cliente_id: int, db: Session = Depends(get_db), c
 def obter_ranking_clientes(
     limite: int = Query(10, ge=1, le=100),
     ordem: str = Query("desc", regex="^(asc|desc)$"),
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_db_leitura),
     current_user: Usuario = Depends(get_current_user)
 ):
     estatistica_service = EstatisticaService(db)
@@ -102,7 +251,7 @@ def obter_estatisticas_filtradas(
     data_inicio: str = Query(None),
     data_fim: str = Query(None),
     status: str = Query(None),
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_db_leitura),
     current_user: Usuario = Depends(get_current_user)
 ):
     filtros = {
@@ -116,10 +265,42 @@ def obter_estatisticas_filtradas(
     estatistica_service = EstatisticaService(db)
     return estatistica_service.obter_estatisticas_filtradas(filtros)
 
+@router.get("/estatisticas/filtradas/exportar")
+def exportar_estatisticas_filtradas(
+    valor_min: float = Query(None, ge=0),
+    valor_max: float = Query(None, ge=0),
+    data_inicio: str = Query(None),
+    data_fim: str = Query(None),
+    status: str = Query(None),
+    formato: Union[FormatoExportacao, FormatoColunar] = Query(FormatoExportacao.CSV),
+    current_user: Usuario = Depends(get_current_user)
+):
+    filtros = {
+        "valor_min": valor_min,
+        "valor_max": valor_max,
+        "data_inicio": data_inicio,
+        "data_fim": data_fim,
+        "status": status
+    }
+    filtros = {k: v for k, v in filtros.items() if v is not None}
+    logger.info(f"Exportação de estatísticas filtradas ({formato.value}) solicitada por {current_user.email}")
+    if isinstance(formato, FormatoColunar):
+        return _exportar(
+            lambda db: EstatisticaService(db).exportar_estatisticas_filtradas_em_lotes(filtros),
+            formato,
+            "emprestimos-filtrados",
+            ESQUEMA_FILTRADAS
+        )
+    return _exportar(
+        lambda db: EstatisticaService(db).exportar_estatisticas_filtradas(filtros),
+        formato,
+        "emprestimos-filtrados"
+    )
+
 @router.get("/estatisticas/bons-pagadores", response_model=List[Dict[str, Any]])
 def identificar_bons_pagadores(
     limite: int = Query(10, ge=1, le=100),
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_db_leitura),
     current_user: Usuario = Depends(get_current_user)
 ):
     estatistica_service = EstatisticaService(db)
@@ -128,7 +309,7 @@ def identificar_bons_pagadores(
 @router.get("/estatisticas/maus-pagadores", response_model=List[Dict[str, Any]])
 def identificar_maus_pagadores(
     limite: int = Query(10, ge=1, le=100),
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_db_leitura),
     current_user: Usuario = Depends(get_current_user)
 ):
     estatistica_service = EstatisticaService(db)
@@ -137,17 +318,27 @@ def identificar_maus_pagadores(
 @router.get("/estatisticas/projecao-caixa", response_model=Dict[str, Any])
 def projetar_fluxo_caixa(
     periodo_dias: int = Query(30, ge=1, le=365),
-    db: Session = Depends(get_db),
+    granularidade: GranularidadeProjecao = Query(GranularidadeProjecao.DIA),
+    db: Session = Depends(get_db_leitura),
     current_user: Usuario = Depends(get_current_user)
 ):
     estatistica_service = EstatisticaService(db)
-    return estatistica_service.projetar_fluxo_caixa(periodo_dias)
+    return estatistica_service.projetar_fluxo_caixa(periodo_dias, granularidade)
 
 @router.get("/estatisticas/tendencias", response_model=List[Dict[str, Any]])
 def analisar_tendencias(
     periodo_meses: int = Query(12, ge=1, le=60),
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_db_leitura),
+    current_user: Usuario = Depends(get_current_user)
+):
+    estatistica_service = EstatisticaService(db)
+    return estatistica_service.analisar_tendencias(periodo_meses)
+
+@router.get("/estatisticas/tendencias/diarias", response_model=List[Dict[str, Any]])
+def analisar_tendencias_diarias(
+    periodo_dias: int = Query(30, ge=1, le=60),
+    db: Session = Depends(get_db_leitura),
     current_user: Usuario = Depends(get_current_user)
 ):
     estatistica_service = EstatisticaService(db)
-    return estatistica_service.analisar_tendencias(periodo_meses)
\ No newline at end of file
+    return estatistica_service.analisar_tendencias_diarias(periodo_dias)
\ No newline at end of file
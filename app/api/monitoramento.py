@@ -0,0 +1,16 @@
+#Emprestimo-Facil\app\api\monitoramento.py
+
+from fastapi import APIRouter, Depends, HTTPException
+from typing import Any, Dict
+from app.api.deps import get_current_user_async
+from app.db.pool import obter_metricas_pools
+from app.schemas.usuario import Usuario
+
+router = APIRouter()
+
+# Autenticação pela sessão assíncrona: o endpoint continua respondendo com o pool síncrono esgotado
+@router.get("/pool", response_model=Dict[str, Any])
+async def obter_metricas_pool(current_user: Usuario = Depends(get_current_user_async)):
+    if not current_user.is_admin:
+        raise HTTPException(status_code=403, detail="Não autorizado")
+    return obter_metricas_pools()
\ No newline at end of file
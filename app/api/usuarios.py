@@ -1,40 +1,54 @@
 #Emprestimo-Facil\app\api\usuarios.py
 
 from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List
 from app.core.logger import get_logger
-from app.db.database import get_db
+from app.db.async_database import get_async_db
 from app.schemas.usuario import UsuarioOut, UsuarioUpdate
-from app.services import usuario_service
-from app.api.deps import get_current_user
+from app.services.usuario_service_async import UsuarioServiceAsync
+from app.schemas.base import Pagina
+from app.api.deps import get_current_user_async
 from app.core.security import rate_limited
 
 router = APIRouter()
 logger = get_logger(__name__)
 
 @router.get("/", response_model=List[UsuarioOut])
-def listar_usuarios(
+async def listar_usuarios(
     skip: int = Query(0, ge=0),
     limit: int = Query(100, ge=1, le=100), 
-    db: Session = Depends(get_db),
-    current_user: UsuarioOut = Depends(get_current_user)
+    db: AsyncSession = Depends(get_async_db),
+    current_user: UsuarioOut = Depends(get_current_user_async)
 ):
     if not current_user.is_admin:
         raise HTTPException(status_code=403, detail="Não autorizado")
-    usuarios = usuario_service.listar_usuarios(db, skip=skip, limit=limit)
+    usuarios = await UsuarioServiceAsync(db).listar_usuarios(per_page=limit, skip=skip)
     logger.info(f"Lista de usuários acessada por {current_user.email}")
     return usuarios
 
+@router.get("/pagina", response_model=Pagina[UsuarioOut])
+async def listar_usuarios_cursor(
+    cursor: str = Query(None),
+    por_pagina: int = Query(None, ge=1, le=100),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: UsuarioOut = Depends(get_current_user_async)
+):
+    if not current_user.is_admin:
+        raise HTTPException(status_code=403, detail="Não autorizado")
+    pagina = await UsuarioServiceAsync(db).listar_usuarios_cursor(cursor, por_pagina)
+    logger.info(f"Página de usuários acessada por {current_user.email}")
+    return pagina
+
 @router.get("/{user_id}", response_model=UsuarioOut)
-def obter_usuario(
+async def obter_usuario(
     user_id: int, 
-    db: Session = Depends(get_db),
-    current_user: UsuarioOut = Depends(get_current_user)
+    db: AsyncSession = Depends(get_async_db),
+    current_user: UsuarioOut = Depends(get_current_user_async)
 ):
     if not current_user.is_admin and current_user.id != user_id:
         raise HTTPException(status_code=403, detail="Não autorizado")
-    db_usuario = usuario_service.obter_usuario(db, usuario_id=user_id)
+    db_usuario = await UsuarioServiceAsync(db).obter_usuario(user_id)
     if db_usuario is None:
         raise HTTPException(status_code=404, detail="Usuário não encontrado")
     logger.info(f"Usuário {user_id} acessado por {current_user.email}")
@@ -42,29 +56,29 @@ def obter_usuario(
 
 @router.put("/{user_id}", response_model=UsuarioOut)
 @rate_limited(max_calls=5, time_frame=60)
-def atualizar_usuario(
+async def atualizar_usuario(
     user_id: int,
     usuario: UsuarioUpdate,
-    db: Session = Depends(get_db),
-    current_user: UsuarioOut = Depends(get_current_user)
+    db: AsyncSession = Depends(get_async_db),
+    current_user: UsuarioOut = Depends(get_current_user_async)
 ):
     if not current_user.is_admin and current_user.id != user_id:
         raise HTTPException(status_code=403, detail="Não autorizado")
-    db_usuario = usuario_service.atualizar_usuario(db, user_id, usuario)
+    db_usuario = await UsuarioServiceAsync(db).atualizar_usuario(user_id, usuario)
     if db_usuario is None:
         raise HTTPException(status_code=404, detail="Usuário não encontrado")
     logger.info(f"Usuário {user_id} atualizado por {current_user.email}")
     return db_usuario
 
 @router.delete("/{user_id}", response_model=UsuarioOut)
-def deletar_usuario(
+async def deletar_usuario(
     user_id: int,
-    db: Session = Depends(get_db),
-    current_user: UsuarioOut = Depends(get_current_user)
+    db: AsyncSession = Depends(get_async_db),
+    current_user: UsuarioOut = Depends(get_current_user_async)
 ):
     if not current_user.is_admin:
         raise HTTPException(status_code=403, detail="Não autorizado")
-    db_usuario = usuario_service.deletar_usuario(db, user_id)
+    db_usuario = await UsuarioServiceAsync(db).deletar_usuario(user_id)
     if db_usuario is None:
         raise HTTPException(status_code=404, detail="Usuário não encontrado")
     logger.info(f"Usuário {user_id} deletado por {current_user.email}")
@@ -1,8 +1,10 @@
 # Emprestimo-Facil\app\core\celery_app.py
 
 from celery import Celery
+from celery.schedules import crontab
 from app.core.config import settings
 from app.services.notification_service import NotificationFactory
+from app.services.calculo_juros import definir_aritmetica_padrao
 import logging
 
 logger = logging.getLogger(__name__)
@@ -22,6 +24,37 @@ celery_app.conf.update(
     enable_utc=True,
 )
 
+definir_aritmetica_padrao(settings.aritmetica_calculo)
+
+celery_app.conf.beat_schedule = {
+    "apropriar-juros-diario": {
+        "task": "app.tasks.apropriar_juros_diario",
+        "schedule": crontab(hour=1, minute=0),
+    },
+    # Relay do outbox de notificações: o atraso máximo de uma notificação é este intervalo
+    "publicar-outbox": {
+        "task": "app.tasks.publicar_outbox",
+        "schedule": 5.0,
+    },
+    "limpar-outbox": {
+        "task": "app.tasks.limpar_outbox",
+        "schedule": crontab(hour=3, minute=0),
+    },
+    "reconciliar-contadores": {
+        "task": "app.tasks.reconciliar_contadores",
+        "schedule": crontab(minute=15),
+    },
+    "reconstruir-estatisticas-clientes": {
+        "task": "app.tasks.reconstruir_estatisticas_clientes",
+        "schedule": crontab(hour=4, minute=0),
+    },
+    # Rankings no Redis refeitos de estatisticas_clientes; as leituras nunca reconstroem
+    "reconstruir-rankings": {
+        "task": "app.tasks.reconstruir_rankings",
+        "schedule": crontab(minute="*/15"),
+    },
+}
+
 # Exemplo de tarefa:
 @celery_app.task
 def exemplo_tarefa_assincrona(param1, param2):
@@ -33,6 +66,11 @@ def exemplo_tarefa_assincrona(param1, param2):
 # from app.core.celery_app import exemplo_tarefa_assincrona
 # resultado = exemplo_tarefa_assincrona.delay(10, 20)
 
+@celery_app.task
+def enviar_notificacoes_async(notificacoes: list):
+    # Uma mensagem no broker para várias notificações; cada item tem to, message e notification_type
+    return sum(1 for notificacao in notificacoes if enviar_notificacao_async(**notificacao))
+
 @celery_app.task
 def enviar_notificacao_async(to: str, message: str, notification_type: str):
     try:
@@ -15,6 +15,13 @@ class Environment:
     TESTING = "testing"
     PRODUCTION = "production"
 
+# Pool de conexões por ambiente; os campos db_pool_* de Settings, quando definidos, têm precedência
+POOL_PADRAO = {
+    Environment.DEVELOPMENT: {"pool_size": 5, "max_overflow": 5, "pool_timeout": 10, "pool_recycle": 1800, "statement_timeout_ms": 0},
+    Environment.TESTING: {"pool_size": 2, "max_overflow": 2, "pool_timeout": 5, "pool_recycle": 1800, "statement_timeout_ms": 0},
+    Environment.PRODUCTION: {"pool_size": 20, "max_overflow": 10, "pool_timeout": 30, "pool_recycle": 1800, "statement_timeout_ms": 30000},
+}
+
 class BaseConfig(ABC, BaseSettings):
     @abstractmethod
     def get_database_settings(self) -> Dict[str, Any]:
@@ -56,6 +63,18 @@ class Settings(BaseConfig):
     
     # Banco de dados
     database_url: str
+    # Réplicas de leitura usadas por estatísticas e relatórios; vazio mantém tudo no principal
+    database_replica_urls: List[str] = []
+    # Atraso de replicação tolerado (segundos) e intervalo entre medições do atraso de cada réplica
+    replica_max_lag: float = 5.0
+    replica_intervalo_verificacao: float = 2.0
+    # Pool de conexões (None usa o padrão do ambiente em POOL_PADRAO); statement timeout em ms, 0 desliga
+    db_pool_size: Optional[int] = None
+    db_max_overflow: Optional[int] = None
+    db_pool_timeout: Optional[float] = None
+    db_pool_recycle: Optional[int] = None
+    db_pool_pre_ping: bool = True
+    db_statement_timeout_ms: Optional[int] = None
     
     # Rate limiting
     rate_limit_max_calls: int
@@ -99,6 +118,9 @@ class Settings(BaseConfig):
     # URL do Redis específica para cache (opcional)
     redis_cache_url: Optional[str] = None
 
+    # URL do Redis dos rankings de clientes (opcional, usa redis_url); sem Redis, ficam em memória
+    redis_ranking_url: Optional[str] = None
+
     # Celery
     CELERY_BROKER_URL: str = "redis://localhost:6379/0"
     CELERY_RESULT_BACKEND: str = "redis://localhost:6379/0"
@@ -106,6 +128,14 @@ class Settings(BaseConfig):
     # Alembic
     alembic_config: str = "alembic.ini"
 
+    # Cálculo de juros: "decimal" ou "centavos" (ver app.services.calculo_juros.Aritmetica)
+    aritmetica_calculo: str = "decimal"
+
+    # Simulações em lote
+    simulacao_max_cenarios: int = 5000
+    simulacao_timeout_cenario: float = 5.0
+    simulacao_processos: Optional[int] = None
+
     class Config:
         env_file = ".env"
         case_sensitive = True
@@ -130,7 +160,24 @@ class Settings(BaseConfig):
         return {
             "url": self.database_url,
             "echo": self.is_development,
+            "replicas": self.database_replica_urls,
+            "replica_max_lag": self.replica_max_lag,
+            "replica_intervalo_verificacao": self.replica_intervalo_verificacao,
+            "pool": self.get_pool_settings(),
+        }
+
+    def get_pool_settings(self) -> Dict[str, Any]:
+        pool = dict(POOL_PADRAO.get(self.environment.lower(), POOL_PADRAO[Environment.DEVELOPMENT]))
+        sobrescritos = {
+            "pool_size": self.db_pool_size,
+            "max_overflow": self.db_max_overflow,
+            "pool_timeout": self.db_pool_timeout,
+            "pool_recycle": self.db_pool_recycle,
+            "statement_timeout_ms": self.db_statement_timeout_ms,
         }
+        pool.update({chave: valor for chave, valor in sobrescritos.items() if valor is not None})
+        pool["pool_pre_ping"] = self.db_pool_pre_ping
+        return pool
 
     def get_redis_settings(self) -> Optional[Dict[str, Any]]:
         if self.redis_url:
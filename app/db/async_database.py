@@ -0,0 +1,58 @@
+#Emprestimo-Facil\app\db\async_database.py
+
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+from functools import lru_cache
+from app.core.config import settings
+from app.core.logger import get_logger
+from app.db.pool import opcoes_pool, preparar_metricas, registrar_metricas
+import traceback
+
+logger = get_logger(__name__)
+
+# Driver assíncrono de cada banco; a URL configurada continua a do driver síncrono (Celery, Alembic)
+DRIVERS_ASSINCRONOS = {
+    "postgresql": "asyncpg",
+    "sqlite": "aiosqlite",
+}
+
+def url_assincrona(url: str) -> str:
+    url = make_url(url)
+    banco = url.get_backend_name()
+    if banco not in DRIVERS_ASSINCRONOS:
+        raise ValueError(f"Banco sem driver assíncrono configurado: {banco}")
+    return url.set(drivername=f"{banco}+{DRIVERS_ASSINCRONOS[banco]}").render_as_string(hide_password=False)
+
+# Criados sob demanda: os workers do Celery importam os modelos e nunca precisam dos drivers assíncronos
+@lru_cache()
+def obter_engine_assincrona():
+    db_settings = settings.get_database_settings()
+    opcoes = opcoes_pool(db_settings["url"], db_settings["pool"])
+    if "connect_args" in opcoes:
+        # asyncpg recebe parâmetros do servidor por server_settings, não pela string de opções do libpq
+        opcoes["connect_args"] = {"server_settings": {"statement_timeout": str(int(db_settings["pool"]["statement_timeout_ms"]))}}
+    # Mesmo pool medido do engine síncrono, com a fila adaptada ao asyncio; aparece em /metricas/pool
+    metricas = preparar_metricas("principal_assincrono", opcoes, AsyncAdaptedQueuePool)
+    engine = create_async_engine(url_assincrona(db_settings["url"]), echo=db_settings["echo"], **opcoes)
+    registrar_metricas(metricas, engine.sync_engine)
+    return engine
+
+@lru_cache()
+def obter_fabrica_sessoes():
+    # expire_on_commit=False: atributos lidos depois do commit (na resposta) não disparam I/O implícito
+    return async_sessionmaker(bind=obter_engine_assincrona(), class_=AsyncSession, autoflush=False, expire_on_commit=False)
+
+async def get_async_db():
+    async with obter_fabrica_sessoes()() as db:
+        try:
+            yield db
+        except Exception as e:
+            logger.error(f"Database error: {str(e)}")
+            logger.error(traceback.format_exc())
+            await db.rollback()
+            raise
+
+async def fechar_engine_assincrona():
+    if obter_engine_assincrona.cache_info().currsize:
+        await obter_engine_assincrona().dispose()
\ No newline at end of file
@@ -1,26 +1,28 @@
 #Emprestimo-Facil\app\db\database.py
 
-from sqlalchemy import create_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
-from sqlalchemy.pool import QueuePool
-from contextlib import contextmanager
 from app.core.config import settings
 from app.core.logger import get_logger
+from app.db.pool import criar_engine
+from app.db.replicas import RoteadorLeitura
 import traceback
 
 logger = get_logger(__name__)
 
 db_settings = settings.get_database_settings()
-engine = create_engine(db_settings["url"], echo=db_settings["echo"])
+engine = criar_engine(db_settings["url"], db_settings)
 
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Sessões somente leitura (estatísticas, relatórios): réplica quando houver uma em dia
+roteador_leitura = RoteadorLeitura.configurar(engine, db_settings)
+
 Base = declarative_base()
 
-@contextmanager
 def get_db():
+    # Dependência das rotas síncronas: o FastAPI consome o gerador e fecha a sessão no fim
     db = SessionLocal()
     try:
         yield db
@@ -32,6 +34,14 @@ def get_db():
     finally:
         db.close()
 
+def get_db_leitura():
+    # Dependência das rotas GET que só consultam; nunca usar para escrita
+    db = roteador_leitura.sessao()
+    try:
+        yield db
+    finally:
+        db.close()
+
 def init_db():
     try:
         Base.metadata.create_all(bind=engine)
@@ -0,0 +1,158 @@
+#Emprestimo-Facil\app\db\pool.py
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Engine, make_url
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import QueuePool
+from collections import deque
+from typing import Dict, Optional, Type
+from app.core.logger import get_logger
+import threading
+import time
+
+logger = get_logger(__name__)
+
+# Amostras mais recentes usadas nos percentis de espera e de tempo em uso
+AMOSTRAS_METRICAS = 1000
+
+class MetricasPool:
+    """
+    Métricas de um pool de conexões: ocupação atual (lida do pool) e, pelos eventos de
+    checkout/checkin, quanto tempo as requisições esperam por uma conexão e quanto tempo
+    cada conexão fica emprestada. Timeouts registram o estado do pool no log.
+    """
+    def __init__(self, nome: str):
+        self.nome = nome
+        self.engine: Optional[Engine] = None
+        self.capacidade: Optional[int] = None
+        self._esperas = deque(maxlen=AMOSTRAS_METRICAS)
+        self._usos = deque(maxlen=AMOSTRAS_METRICAS)
+        self._contadores = {"checkouts": 0, "conexoes_abertas": 0, "invalidadas": 0, "timeouts": 0}
+        self._lock = threading.Lock()
+
+    def instalar(self, engine: Engine) -> None:
+        self.engine = engine
+        event.listen(engine, "checkout", self._ao_emprestar)
+        event.listen(engine, "checkin", self._ao_devolver)
+        event.listen(engine, "connect", self._ao_conectar)
+        event.listen(engine, "invalidate", self._ao_invalidar)
+
+    def _incrementar(self, contador: str):
+        with self._lock:
+            self._contadores[contador] += 1
+
+    def _ao_emprestar(self, conexao_dbapi, registro, proxy):
+        registro.info["emprestada_em"] = time.perf_counter()
+        self._incrementar("checkouts")
+
+    def _ao_devolver(self, conexao_dbapi, registro):
+        emprestada_em = registro.info.pop("emprestada_em", None)
+        if emprestada_em is not None:
+            with self._lock:
+                self._usos.append(time.perf_counter() - emprestada_em)
+
+    def _ao_conectar(self, conexao_dbapi, registro):
+        self._incrementar("conexoes_abertas")
+
+    def _ao_invalidar(self, conexao_dbapi, registro, excecao):
+        self._incrementar("invalidadas")
+
+    def registrar_espera(self, segundos: float):
+        with self._lock:
+            self._esperas.append(segundos)
+
+    def registrar_timeout(self):
+        self._incrementar("timeouts")
+        logger.warning(f"Timeout ao obter conexão do pool {self.nome}: {self.engine.pool.status() if self.engine else ''}")
+
+    @staticmethod
+    def _percentis(amostras) -> Dict[str, float]:
+        if not amostras:
+            return {"p50_ms": 0.0, "p95_ms": 0.0, "max_ms": 0.0}
+        ordenadas = sorted(amostras)
+        def percentil(p):
+            return round(ordenadas[min(int(p * len(ordenadas)), len(ordenadas) - 1)] * 1000, 3)
+        return {"p50_ms": percentil(0.5), "p95_ms": percentil(0.95), "max_ms": round(ordenadas[-1] * 1000, 3)}
+
+    def resumo(self) -> Dict[str, object]:
+        pool = self.engine.pool
+        with self._lock:
+            esperas, usos, contadores = list(self._esperas), list(self._usos), dict(self._contadores)
+        ocupacao = {}
+        if isinstance(pool, QueuePool):
+            ocupacao = {
+                "tamanho": pool.size(),
+                "em_uso": pool.checkedout(),
+                "livres": pool.checkedin(),
+                "overflow": max(pool.overflow(), 0),
+                "capacidade": self.capacidade,
+            }
+        return {
+            "pool": self.nome,
+            **ocupacao,
+            **contadores,
+            "espera_checkout": self._percentis(esperas),
+            "tempo_em_uso": self._percentis(usos),
+        }
+
+class QueuePoolMedido(QueuePool):
+    # O pool não tem evento antes do checkout; a espera (fila + conexão nova) é medida aqui.
+    # Cada engine recebe uma subclasse com suas métricas, preservada quando o pool é recriado
+    metricas: MetricasPool = None
+
+    def connect(self):
+        inicio = time.perf_counter()
+        try:
+            return super().connect()
+        except PoolTimeoutError:
+            self.metricas.registrar_timeout()
+            raise
+        finally:
+            self.metricas.registrar_espera(time.perf_counter() - inicio)
+
+# Métricas de todos os engines criados por criar_engine, por nome
+metricas_pools: Dict[str, MetricasPool] = {}
+
+def opcoes_pool(url: str, pool: dict) -> dict:
+    url = make_url(url)
+    opcoes = {"pool_pre_ping": pool["pool_pre_ping"]}
+    if url.get_backend_name() == "sqlite" and url.database in (None, "", ":memory:"):
+        # SQLite em memória usa um pool próprio, sem tamanho configurável
+        return opcoes
+    opcoes.update(
+        pool_size=pool["pool_size"],
+        max_overflow=pool["max_overflow"],
+        pool_timeout=pool["pool_timeout"],
+        pool_recycle=pool["pool_recycle"],
+    )
+    if pool["statement_timeout_ms"] and url.get_backend_name() == "postgresql":
+        opcoes["connect_args"] = {"options": f"-c statement_timeout={int(pool['statement_timeout_ms'])}"}
+    return opcoes
+
+def preparar_metricas(nome: str, opcoes: dict, pool_base: Type[QueuePool] = QueuePool) -> MetricasPool:
+    """
+    Cria as métricas do pool `nome` e, se `opcoes` configuram um pool com tamanho, troca a
+    poolclass pela versão medida de `pool_base` (AsyncAdaptedQueuePool nos engines assíncronos).
+    Depois de criado o engine, chame registrar_metricas.
+    """
+    metricas = MetricasPool(nome)
+    if "pool_size" in opcoes:
+        bases = (QueuePoolMedido,) if pool_base is QueuePool else (QueuePoolMedido, pool_base)
+        opcoes["poolclass"] = type("QueuePoolMedido", bases, {"metricas": metricas})
+        metricas.capacidade = opcoes["pool_size"] + opcoes["max_overflow"]
+    return metricas
+
+def registrar_metricas(metricas: MetricasPool, engine: Engine) -> None:
+    # Engines assíncronos expõem os eventos e o pool pelo sync_engine
+    metricas.instalar(engine)
+    metricas_pools[metricas.nome] = metricas
+
+def criar_engine(url: str, db_settings: dict, nome: str = "principal") -> Engine:
+    opcoes = opcoes_pool(url, db_settings["pool"])
+    metricas = preparar_metricas(nome, opcoes)
+    engine = create_engine(url, echo=db_settings["echo"], **opcoes)
+    registrar_metricas(metricas, engine)
+    return engine
+
+def obter_metricas_pools() -> Dict[str, Dict[str, object]]:
+    return {nome: metricas.resumo() for nome, metricas in metricas_pools.items()}
\ No newline at end of file
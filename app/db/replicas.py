@@ -0,0 +1,82 @@
+#Emprestimo-Facil\app\db\replicas.py
+
+from sqlalchemy import text
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import sessionmaker, Session
+from typing import Dict, List, Optional, Tuple
+from app.core.logger import get_logger
+from app.db.pool import criar_engine
+import itertools
+import threading
+import time
+
+logger = get_logger(__name__)
+
+# Atraso de replicação em segundos; zero quando a réplica já aplicou tudo o que recebeu
+# (sem isso, um principal sem escritas pareceria uma réplica atrasada)
+CONSULTAS_ATRASO = {
+    "postgresql": text(
+        "SELECT CASE WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0 "
+        "ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0) END"
+    ),
+}
+
+class RoteadorLeitura:
+    """
+    Escolhe o banco das sessões somente leitura: as réplicas em rodízio, pulando as que estão
+    fora do ar ou com atraso acima de `atraso_maximo`; sem réplica saudável, o principal. O
+    atraso de cada réplica é medido no máximo uma vez por `intervalo_verificacao`.
+    """
+    def __init__(self, primario: Engine, replicas: List[Engine], atraso_maximo: float = 5.0, intervalo_verificacao: float = 2.0):
+        self.fabrica_primario = sessionmaker(autocommit=False, autoflush=False, bind=primario)
+        self.replicas = [(replica, sessionmaker(autocommit=False, autoflush=False, bind=replica)) for replica in replicas]
+        self.atraso_maximo = atraso_maximo
+        self.intervalo_verificacao = intervalo_verificacao
+        self._medicoes: Dict[Engine, Tuple[float, Optional[float]]] = {}
+        self._rodizio = itertools.count()
+        self._lock = threading.Lock()
+
+    @classmethod
+    def configurar(cls, primario: Engine, db_settings: dict) -> "RoteadorLeitura":
+        replicas = [criar_engine(url, db_settings, nome=f"replica_{i}") for i, url in enumerate(db_settings["replicas"], start=1)]
+        return cls(primario, replicas, db_settings["replica_max_lag"], db_settings["replica_intervalo_verificacao"])
+
+    def _medir_atraso(self, replica: Engine) -> float:
+        consulta = CONSULTAS_ATRASO.get(replica.dialect.name)
+        if consulta is None:
+            # Sem consulta de atraso para o banco (ex.: SQLite nos testes): trata como em dia
+            with replica.connect() as conexao:
+                conexao.execute(text("SELECT 1"))
+            return 0.0
+        with replica.connect() as conexao:
+            return float(conexao.execute(consulta).scalar() or 0)
+
+    def atraso(self, replica: Engine) -> Optional[float]:
+        # None quando a réplica não respondeu na última medição
+        agora = time.monotonic()
+        with self._lock:
+            medicao = self._medicoes.get(replica)
+            if medicao and agora - medicao[0] < self.intervalo_verificacao:
+                return medicao[1]
+        try:
+            atraso = self._medir_atraso(replica)
+        except Exception as e:
+            logger.warning(f"Réplica {replica.url.render_as_string()} indisponível: {str(e)}")
+            atraso = None
+        with self._lock:
+            self._medicoes[replica] = (agora, atraso)
+        return atraso
+
+    def fabrica(self) -> sessionmaker:
+        if self.replicas:
+            inicio = next(self._rodizio)
+            for deslocamento in range(len(self.replicas)):
+                replica, fabrica = self.replicas[(inicio + deslocamento) % len(self.replicas)]
+                atraso = self.atraso(replica)
+                if atraso is not None and atraso <= self.atraso_maximo:
+                    return fabrica
+            logger.warning("Nenhuma réplica disponível dentro do atraso tolerado; lendo do banco principal")
+        return self.fabrica_primario
+
+    def sessao(self) -> Session:
+        return self.fabrica()()
\ No newline at end of file
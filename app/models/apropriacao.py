@@ -0,0 +1,34 @@
+#Emprestimo-Facil\app\models\apropriacao.py
+
+from sqlalchemy import Column, Integer, Date, DateTime, ForeignKey, Enum, Index
+from sqlalchemy.orm import relationship
+from sqlalchemy.sql import func
+from app.db.database import Base
+from app.models.tipos import ValorApropriado
+import enum
+
+class OrigemApropriacao(enum.Enum):
+    DIARIA = "diaria"
+    PAGAMENTO = "pagamento"
+
+# Ponto de controle do saldo de um empréstimo: principal e encargos acumulados até a data
+class ApropriacaoJuros(Base):
+    __tablename__ = "apropriacoes_juros"
+
+    id = Column(Integer, primary_key=True, index=True)
+    emprestimo_id = Column(Integer, ForeignKey("emprestimos.id"), nullable=False)
+    data_referencia = Column(Date, nullable=False)
+    saldo_principal = Column(ValorApropriado, nullable=False)
+    juros_acumulados = Column(ValorApropriado, nullable=False, default=0)
+    mora_acumulada = Column(ValorApropriado, nullable=False, default=0)
+    origem = Column(Enum(OrigemApropriacao), nullable=False)
+    criado_em = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+
+    emprestimo = relationship("Emprestimo")
+
+    __table_args__ = (
+        Index('idx_apropriacao_emprestimo_data', 'emprestimo_id', 'data_referencia'),
+    )
+
+    def __repr__(self):
+        return f"<ApropriacaoJuros(emprestimo_id={self.emprestimo_id}, data_referencia={self.data_referencia}, saldo_principal={self.saldo_principal})>"
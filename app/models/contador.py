@@ -0,0 +1,17 @@
+#Emprestimo-Facil\app\models\contador.py
+
+from sqlalchemy import Column, Integer, String, Numeric
+from app.db.database import Base
+
+# Totais da carteira para o painel, mantidos pelas escritas de empréstimos e pagamentos. Cada
+# total é dividido em fatias: escritas simultâneas atualizam linhas diferentes em vez de
+# disputarem o lock de uma só, e a leitura soma as fatias de cada chave
+class ContadorCarteira(Base):
+    __tablename__ = "contadores_carteira"
+
+    chave = Column(String(50), primary_key=True)
+    fatia = Column(Integer, primary_key=True)
+    valor = Column(Numeric(18, 2), nullable=False, default=0)
+
+    def __repr__(self):
+        return f"<ContadorCarteira(chave='{self.chave}', fatia={self.fatia}, valor={self.valor})>"
\ No newline at end of file
@@ -1,11 +1,14 @@
 #Emprestimo-Facil\app\models\emprestimo.py
 
-from sqlalchemy import Column, Integer, Float, Date, ForeignKey, String, DateTime, Enum, Index
-from sqlalchemy.orm import relationship
+from sqlalchemy import Column, Integer, Date, ForeignKey, String, DateTime, Enum, Index
+from sqlalchemy.orm import relationship, validates
 from sqlalchemy.sql import func
 from app.db.database import Base
 import enum
 from app.models.mixins import TimestampMixin
+from app.models.tipos import Dinheiro, Taxa, como_decimal
+from app.models.pagamento import Pagamento
+from app.models.parcela import Parcela
 
 class StatusEmprestimo(enum.Enum):
     PENDENTE = "pendente"
@@ -21,14 +24,17 @@ class Emprestimo(Base, TimestampMixin):
 
     id = Column(Integer, primary_key=True, index=True)
     cliente_id = Column(Integer, ForeignKey("clientes.id"), nullable=False)
-    valor = Column(Float, nullable=False)
-    taxa_juros = Column(Float, nullable=False)
+    valor = Column(Dinheiro, nullable=False)
+    # Taxa nominal anual em % (12 = 12% a.a.), proporcional aos dias corridos em base 365
+    # (DIAS_BASE_TAXA_ANUAL): vale para os juros apropriados e para o cronograma de parcelas
+    taxa_juros = Column(Taxa, nullable=False)
     data_solicitacao = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
     data_aprovacao = Column(DateTime(timezone=True))
     data_vencimento = Column(Date, nullable=False)
+    proximo_vencimento = Column(Date)
     status = Column(Enum(StatusEmprestimo), default=StatusEmprestimo.PENDENTE, nullable=False)
-    valor_total = Column(Float)
-    valor_pago = Column(Float, default=0)
+    valor_total = Column(Dinheiro)
+    valor_pago = Column(Dinheiro, default=0)
     observacoes = Column(String(500))
     criado_em = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
     atualizado_em = Column(DateTime(timezone=True), onupdate=func.now())
@@ -36,25 +42,18 @@ class Emprestimo(Base, TimestampMixin):
     cliente = relationship("Cliente", back_populates="emprestimos")
     pagamentos = relationship("Pagamento", back_populates="emprestimo", cascade="all, delete-orphan")
     garantias = relationship("Garantia", back_populates="emprestimo", cascade="all, delete-orphan")
+    parcelas = relationship("Parcela", back_populates="emprestimo", cascade="all, delete-orphan", order_by="Parcela.numero")
 
     __table_args__ = (
         Index('idx_cliente_status', 'cliente_id', 'status'),
-        Index('idx_data_vencimento', 'data_vencimento'),
+        Index('idx_data_vencimento', 'data_vencimento', 'id'),
+        Index('idx_data_solicitacao', 'data_solicitacao', 'id'),
+        Index('idx_status_proximo_vencimento', 'status', 'proximo_vencimento'),
     )
 
-    def __repr__(self):
-        return f"<Emprestimo(id={self.id}, cliente_id={self.cliente_id}, valor={self.valor}, status='{self.status.value}')>"
-
-class Pagamento(Base):
-    __tablename__ = "pagamentos"
-
-    id = Column(Integer, primary_key=True, index=True)
-    emprestimo_id = Column(Integer, ForeignKey("emprestimos.id"), nullable=False)
-    valor = Column(Float, nullable=False)
-    data_pagamento = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
-    metodo_pagamento = Column(String(50), nullable=False)
-
-    emprestimo = relationship("Emprestimo", back_populates="pagamentos")
+    @validates('valor', 'taxa_juros', 'valor_total', 'valor_pago')
+    def _validar_valor(self, chave, valor):
+        return como_decimal(valor)
 
     def __repr__(self):
-        return f"<Pagamento(id={self.id}, emprestimo_id={self.emprestimo_id}, valor={self.valor})>"
\ No newline at end of file
+        return f"<Emprestimo(id={self.id}, cliente_id={self.cliente_id}, valor={self.valor}, status='{self.status.value}')>"
\ No newline at end of file
@@ -0,0 +1,19 @@
+#Emprestimo-Facil\app\models\estatistica_cliente.py
+
+from sqlalchemy import Column, Integer, ForeignKey, Numeric
+from app.db.database import Base
+
+# Estatísticas de um cliente já agregadas: criada com o cliente (ou pelo backfill) e atualizada
+# na transação de cada escrita nos seus empréstimos. Sem a linha, a leitura agrega os empréstimos
+class EstatisticaCliente(Base):
+    __tablename__ = "estatisticas_clientes"
+
+    cliente_id = Column(Integer, ForeignKey("clientes.id", ondelete="CASCADE"), primary_key=True)
+    total_emprestimos = Column(Integer, nullable=False, default=0)
+    valor_total_emprestado = Column(Numeric(18, 2), nullable=False, default=0)
+    valor_total_pago = Column(Numeric(18, 2), nullable=False, default=0)
+    emprestimos_ativos = Column(Integer, nullable=False, default=0)
+    emprestimos_atrasados = Column(Integer, nullable=False, default=0)
+
+    def __repr__(self):
+        return f"<EstatisticaCliente(cliente_id={self.cliente_id}, total_emprestimos={self.total_emprestimos})>"
\ No newline at end of file
@@ -1,7 +1,8 @@
-from sqlalchemy import Column, Integer, String, Float, ForeignKey, Enum
-from sqlalchemy.orm import relationship
+from sqlalchemy import Column, Integer, String, ForeignKey, Enum
+from sqlalchemy.orm import relationship, validates
 from app.db.database import Base
 from app.models.mixins import TimestampMixin
+from app.models.tipos import Dinheiro, como_decimal
 import enum
 
 class TipoGarantia(enum.Enum):
@@ -17,9 +18,13 @@ class Garantia(Base, TimestampMixin):
     emprestimo_id = Column(Integer, ForeignKey("emprestimos.id"), nullable=False)
     tipo = Column(Enum(TipoGarantia), nullable=False)
     descricao = Column(String(500), nullable=False)
-    valor = Column(Float, nullable=False)
+    valor = Column(Dinheiro, nullable=False)
 
     emprestimo = relationship("Emprestimo", back_populates="garantias")
 
+    @validates('valor')
+    def _validar_valor(self, chave, valor):
+        return como_decimal(valor)
+
     def __repr__(self):
         return f"<Garantia(id={self.id}, tipo='{self.tipo.value}', valor={self.valor})>"
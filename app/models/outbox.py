@@ -0,0 +1,25 @@
+#Emprestimo-Facil\app\models\outbox.py
+
+from sqlalchemy import Column, Integer, String, DateTime, Index
+from sqlalchemy.sql import func
+from app.db.database import Base
+
+# Notificação gravada na mesma transação da alteração que a originou; o relay
+# (OutboxService.publicar_pendentes) publica no broker e preenche enviado_em
+class NotificacaoOutbox(Base):
+    __tablename__ = "notificacoes_outbox"
+
+    id = Column(Integer, primary_key=True, index=True)
+    destinatario = Column(String(100), nullable=False)
+    mensagem = Column(String(1000), nullable=False)
+    tipo = Column(String(20), nullable=False, default="email")
+    tentativas = Column(Integer, nullable=False, default=0)
+    criado_em = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    enviado_em = Column(DateTime(timezone=True))
+
+    __table_args__ = (
+        Index('idx_outbox_pendentes', 'enviado_em', 'id'),
+    )
+
+    def __repr__(self):
+        return f"<NotificacaoOutbox(id={self.id}, destinatario='{self.destinatario}', enviado_em={self.enviado_em})>"
\ No newline at end of file
@@ -1,18 +1,29 @@
-from sqlalchemy import Column, Integer, Float, DateTime, ForeignKey, String, func
-from sqlalchemy.orm import relationship
+from sqlalchemy import Column, Integer, DateTime, ForeignKey, String, UniqueConstraint, func
+from sqlalchemy.orm import relationship, validates
 from app.db.database import Base
 from app.models.mixins import TimestampMixin
+from app.models.tipos import Dinheiro, como_decimal
 
 class Pagamento(Base, TimestampMixin):
     __tablename__ = "pagamentos"
 
     id = Column(Integer, primary_key=True, index=True)
     emprestimo_id = Column(Integer, ForeignKey("emprestimos.id"), nullable=False)
-    valor = Column(Float, nullable=False)
+    valor = Column(Dinheiro, nullable=False)
     data_pagamento = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
     metodo_pagamento = Column(String(50), nullable=False)
+    # Enviada pelo parceiro de cobrança; reenvios com a mesma chave não geram novo pagamento
+    chave_idempotencia = Column(String(100))
 
     emprestimo = relationship("Emprestimo", back_populates="pagamentos")
 
+    __table_args__ = (
+        UniqueConstraint('chave_idempotencia', name='uq_pagamentos_chave_idempotencia'),
+    )
+
+    @validates('valor')
+    def _validar_valor(self, chave, valor):
+        return como_decimal(valor)
+
     def __repr__(self):
         return f"<Pagamento(id={self.id}, emprestimo_id={self.emprestimo_id}, valor={self.valor})>"
@@ -0,0 +1,37 @@
+#Emprestimo-Facil\app\models\parcela.py
+
+from sqlalchemy import Column, Integer, Date, DateTime, ForeignKey, Enum, Index
+from sqlalchemy.orm import relationship
+from app.db.database import Base
+from app.models.tipos import Dinheiro
+import enum
+
+class StatusParcela(enum.Enum):
+    PENDENTE = "pendente"
+    ATRASADA = "atrasada"
+    PAGA = "paga"
+
+# Parcela do cronograma gravada na criação do empréstimo; pagamentos abatem valor_pago
+class Parcela(Base):
+    __tablename__ = "parcelas"
+
+    id = Column(Integer, primary_key=True, index=True)
+    emprestimo_id = Column(Integer, ForeignKey("emprestimos.id"), nullable=False)
+    numero = Column(Integer, nullable=False)
+    data_vencimento = Column(Date, nullable=False)
+    valor_principal = Column(Dinheiro, nullable=False)
+    valor_juros = Column(Dinheiro, nullable=False)
+    valor = Column(Dinheiro, nullable=False)
+    valor_pago = Column(Dinheiro, nullable=False, default=0)
+    status = Column(Enum(StatusParcela), default=StatusParcela.PENDENTE, nullable=False)
+    pago_em = Column(DateTime(timezone=True))
+
+    emprestimo = relationship("Emprestimo", back_populates="parcelas")
+
+    __table_args__ = (
+        Index('idx_parcela_vencimento_status', 'data_vencimento', 'status'),
+        Index('idx_parcela_emprestimo_numero', 'emprestimo_id', 'numero', unique=True),
+    )
+
+    def __repr__(self):
+        return f"<Parcela(emprestimo_id={self.emprestimo_id}, numero={self.numero}, data_vencimento={self.data_vencimento}, status='{self.status.value}')>"
\ No newline at end of file
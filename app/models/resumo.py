@@ -0,0 +1,31 @@
+#Emprestimo-Facil\app\models\resumo.py
+
+from sqlalchemy import Column, Integer, Date, Enum, Numeric
+from app.db.database import Base
+from app.models.emprestimo import StatusEmprestimo
+import enum
+
+class GranularidadeResumo(enum.Enum):
+    MES = "mes"
+    DIA = "dia"
+
+# Empréstimos solicitados em um mês ou dia (pela data de solicitação): uma linha por período,
+# mantida pelas escritas de empréstimos e reconstruível por ResumoService.reconstruir
+class ResumoEmprestimos(Base):
+    __tablename__ = "resumos_emprestimos"
+
+    granularidade = Column(Enum(GranularidadeResumo), primary_key=True)
+    inicio = Column(Date, primary_key=True)
+    total_emprestimos = Column(Integer, nullable=False, default=0)
+    valor_total = Column(Numeric(18, 2), nullable=False, default=0)
+    # Soma das taxas, para a taxa média do período (soma_taxas / total_emprestimos)
+    soma_taxas = Column(Numeric(18, 4), nullable=False, default=0)
+    emprestimos_pendentes = Column(Integer, nullable=False, default=0)
+    emprestimos_aprovados = Column(Integer, nullable=False, default=0)
+    emprestimos_ativos = Column(Integer, nullable=False, default=0)
+    emprestimos_quitados = Column(Integer, nullable=False, default=0)
+    emprestimos_atrasados = Column(Integer, nullable=False, default=0)
+    emprestimos_cancelados = Column(Integer, nullable=False, default=0)
+
+    def __repr__(self):
+        return f"<ResumoEmprestimos(granularidade='{self.granularidade.value}', inicio={self.inicio}, total_emprestimos={self.total_emprestimos})>"
\ No newline at end of file
@@ -0,0 +1,18 @@
+#Emprestimo-Facil\app\models\tipos.py
+
+from sqlalchemy import Numeric
+from decimal import Decimal
+
+# Valores em reais: o banco guarda centavos exatos e devolve Decimal, então SUM não acumula erro de float
+Dinheiro = Numeric(14, 2)
+# Taxas em %, com 4 casas (2.5 = 2,5%). O período é o da coluna: taxa_juros do empréstimo é
+# nominal anual, proporcional aos dias corridos em base 365 (DIAS_BASE_TAXA_ANUAL)
+Taxa = Numeric(7, 4)
+# Saldos do livro de apropriação, que carregam frações de centavo entre um ponto de controle e outro
+ValorApropriado = Numeric(18, 6)
+
+def como_decimal(valor):
+    # Os schemas recebem float; o valor entra no modelo já como Decimal, uma única vez
+    if valor is None or isinstance(valor, Decimal):
+        return valor
+    return Decimal(str(valor))
\ No newline at end of file
@@ -2,10 +2,18 @@
 
 from pydantic import BaseModel, ConfigDict
 from datetime import datetime
-from typing import Optional
+from typing import Generic, List, Optional, TypeVar
+
+T = TypeVar('T')
 
 class TimestampedModel(BaseModel):
     criado_em: datetime
     atualizado_em: Optional[datetime] = None
     
-    model_config = ConfigDict(from_attributes=True)
\ No newline at end of file
+    model_config = ConfigDict(from_attributes=True)
+
+# Página da paginação por cursor; "proximo" e "anterior" são None nas pontas da listagem
+class Pagina(BaseModel, Generic[T]):
+    itens: List[T]
+    proximo: Optional[str] = None
+    anterior: Optional[str] = None
\ No newline at end of file
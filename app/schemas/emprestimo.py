@@ -1,9 +1,10 @@
 #Emprestimo-Facil\app\schemas\emprestimo.py
 
-from pydantic import BaseModel, Field, field_validator
+from pydantic import BaseModel, ConfigDict, Field, field_validator
 from datetime import date, datetime
-from typing import Optional, List
+from typing import Optional, List, Dict, Any
 from app.models.emprestimo import StatusEmprestimo
+from app.models.parcela import StatusParcela
 from .base import TimestampedModel
 from app.schemas.garantia import Garantia
 
@@ -15,6 +16,9 @@ class EmprestimoBase(BaseModel):
 
 class EmprestimoCreate(EmprestimoBase):
     cliente_id: int
+    # Itens {"tipo": "fixo", "dia", "mes"} ou {"tipo": "recorrente", "intervalo", "unidade"};
+    # sem regras, as parcelas vencem todo mês no dia de data_vencimento
+    regras_pagamento: List[Dict[str, Any]] = []
 
     @field_validator('data_vencimento')
     def data_vencimento_futura(cls, v):
@@ -61,6 +65,17 @@ class PagamentoBase(BaseModel):
 
 class PagamentoCreate(PagamentoBase):
     emprestimo_id: int
+    chave_idempotencia: Optional[str] = Field(None, max_length=100)
+    # Data da liquidação (ex.: informada pelo banco); sem ela vale a data do registro
+    data_pagamento: Optional[date] = None
+
+class PagamentoLoteItem(PagamentoBase):
+    emprestimo_id: int
+    chave_idempotencia: str = Field(..., min_length=1, max_length=100)
+    data_pagamento: Optional[date] = None
+
+class PagamentoLote(BaseModel):
+    pagamentos: List[PagamentoLoteItem] = Field(..., min_length=1, max_length=50000)
 
 class Pagamento(PagamentoBase, TimestampedModel):
     id: int
@@ -68,4 +83,18 @@ class Pagamento(PagamentoBase, TimestampedModel):
     data_pagamento: datetime
 
     class Config:
-        orm_mode = True
\ No newline at end of file
+        orm_mode = True
+
+class Parcela(BaseModel):
+    id: int
+    emprestimo_id: int
+    numero: int
+    data_vencimento: date
+    valor_principal: float
+    valor_juros: float
+    valor: float
+    valor_pago: float
+    status: StatusParcela
+    pago_em: Optional[datetime] = None
+
+    model_config = ConfigDict(from_attributes=True)
\ No newline at end of file
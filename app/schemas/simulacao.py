@@ -0,0 +1,49 @@
+#Emprestimo-Facil\app\schemas\simulacao.py
+
+from pydantic import BaseModel, Field, model_validator
+from itertools import product
+from typing import Optional, List
+from app.services.calculo_juros import TipoJuros, RegraRecorrente
+
+class CenarioSimulacao(BaseModel):
+    valor_principal: float = Field(..., gt=0)
+    taxa_juros: float = Field(..., ge=0, le=100)
+    num_parcelas: int = Field(..., ge=1, le=600)
+    tipo_juros: TipoJuros = TipoJuros.COMPOSTO
+    valor_maximo: Optional[float] = Field(None, gt=0)
+
+class GradeSimulacao(BaseModel):
+    valores: List[float] = Field(..., min_length=1, max_length=100)
+    taxas: List[float] = Field(..., min_length=1, max_length=100)
+    prazos: List[int] = Field(..., min_length=1, max_length=100)
+    tipos: List[TipoJuros] = [TipoJuros.SIMPLES, TipoJuros.COMPOSTO]
+
+    @property
+    def tamanho(self) -> int:
+        return len(self.valores) * len(self.taxas) * len(self.prazos) * len(self.tipos)
+
+    def cenarios(self):
+        for valor, taxa, prazo, tipo in product(self.valores, self.taxas, self.prazos, self.tipos):
+            yield CenarioSimulacao(valor_principal=valor, taxa_juros=taxa, num_parcelas=prazo, tipo_juros=tipo)
+
+class SimulacaoLote(BaseModel):
+    cenarios: List[CenarioSimulacao] = []
+    grade: Optional[GradeSimulacao] = None
+    intervalo: int = Field(1, ge=1)
+    unidade: str = "meses"
+    incluir_parcelas: bool = False
+
+    @model_validator(mode='after')
+    def cenarios_ou_grade(self):
+        if bool(self.cenarios) == (self.grade is not None):
+            raise ValueError('Informe uma lista de cenários ou uma grade, não ambos')
+        if self.unidade not in RegraRecorrente.UNIDADES:
+            raise ValueError(f'Unidade de tempo inválida: {self.unidade}')
+        return self
+
+    @property
+    def tamanho(self) -> int:
+        return self.grade.tamanho if self.grade else len(self.cenarios)
+
+    def expandir(self):
+        return self.grade.cenarios() if self.grade else iter(self.cenarios)
\ No newline at end of file
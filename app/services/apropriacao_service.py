@@ -0,0 +1,104 @@
+#Emprestimo-Facil\app\services\apropriacao_service.py
+
+from sqlalchemy import func, insert, Select
+from sqlalchemy.orm import Session
+from app.models.apropriacao import ApropriacaoJuros, OrigemApropriacao
+from datetime import date
+from decimal import Decimal
+from typing import Dict, List, Optional, Union
+from .base_service import BaseService
+
+# Limite de ids por cláusula IN ao buscar pontos de controle de vários empréstimos
+TAMANHO_LOTE_CONSULTA = 500
+
+class ApropriacaoService(BaseService):
+    def obter_checkpoint(self, emprestimo_id: int, data_referencia: date) -> Optional[ApropriacaoJuros]:
+        return self.db.query(ApropriacaoJuros).filter(
+            ApropriacaoJuros.emprestimo_id == emprestimo_id,
+            ApropriacaoJuros.data_referencia <= data_referencia
+        ).order_by(ApropriacaoJuros.data_referencia.desc(), ApropriacaoJuros.id.desc()).first()
+
+    def obter_checkpoints(self, emprestimo_ids: Union[List[int], Select], data_referencia: date) -> Dict[int, ApropriacaoJuros]:
+        # Com um SELECT de ids no lugar da lista, a busca sai em uma única consulta
+        if isinstance(emprestimo_ids, Select):
+            lotes = [emprestimo_ids]
+        else:
+            lotes = [emprestimo_ids[i:i + TAMANHO_LOTE_CONSULTA] for i in range(0, len(emprestimo_ids), TAMANHO_LOTE_CONSULTA)]
+
+        checkpoints = {}
+        for lote in lotes:
+            ordem = func.row_number().over(
+                partition_by=ApropriacaoJuros.emprestimo_id,
+                order_by=(ApropriacaoJuros.data_referencia.desc(), ApropriacaoJuros.id.desc())
+            ).label("ordem")
+            recentes = self.db.query(ApropriacaoJuros.id, ordem).filter(
+                ApropriacaoJuros.emprestimo_id.in_(lote),
+                ApropriacaoJuros.data_referencia <= data_referencia
+            ).subquery()
+            query = self.db.query(ApropriacaoJuros).join(recentes, ApropriacaoJuros.id == recentes.c.id).filter(recentes.c.ordem == 1)
+            checkpoints.update((c.emprestimo_id, c) for c in query)
+        return checkpoints
+
+    def datas_ultimo_pagamento(self, emprestimo_ids: List[int]) -> Dict[int, date]:
+        # Data do último pagamento lançado no livro de cada empréstimo
+        if not emprestimo_ids:
+            return {}
+        return dict(self.db.query(ApropriacaoJuros.emprestimo_id, func.max(ApropriacaoJuros.data_referencia)).filter(
+            ApropriacaoJuros.emprestimo_id.in_(emprestimo_ids),
+            ApropriacaoJuros.origem == OrigemApropriacao.PAGAMENTO
+        ).group_by(ApropriacaoJuros.emprestimo_id).all())
+
+    def descartar_diarios(self, datas: Dict[int, date]) -> None:
+        """
+        Remove os pontos de controle diários posteriores à data de cada empréstimo ({id: data}).
+        Um pagamento lançado com data retroativa não está neles; a apropriação seguinte os refaz.
+        """
+        por_data = {}
+        for emprestimo_id, data in datas.items():
+            por_data.setdefault(data, []).append(emprestimo_id)
+        for data, emprestimo_ids in por_data.items():
+            self.db.query(ApropriacaoJuros).filter(
+                ApropriacaoJuros.emprestimo_id.in_(emprestimo_ids),
+                ApropriacaoJuros.origem == OrigemApropriacao.DIARIA,
+                ApropriacaoJuros.data_referencia > data
+            ).delete(synchronize_session=False)
+
+    def registrar_checkpoint(self, emprestimo_id: int, posicao: dict, origem: OrigemApropriacao) -> ApropriacaoJuros:
+        checkpoint = ApropriacaoJuros(
+            emprestimo_id=emprestimo_id,
+            data_referencia=posicao["data_referencia"],
+            saldo_principal=posicao["saldo_principal"],
+            juros_acumulados=posicao["juros"],
+            mora_acumulada=posicao["mora"],
+            origem=origem
+        )
+        self.db.add(checkpoint)
+        return checkpoint
+
+    def registrar_checkpoints(self, posicoes: Dict[int, dict], origem: OrigemApropriacao) -> None:
+        # Um único INSERT para vários empréstimos; posicoes é {emprestimo_id: posição}
+        if not posicoes:
+            return
+        self.db.execute(insert(ApropriacaoJuros), [
+            {
+                "emprestimo_id": emprestimo_id,
+                "data_referencia": posicao["data_referencia"],
+                "saldo_principal": posicao["saldo_principal"],
+                "juros_acumulados": posicao["juros"],
+                "mora_acumulada": posicao["mora"],
+                "origem": origem
+            }
+            for emprestimo_id, posicao in posicoes.items()
+        ])
+
+    @staticmethod
+    def abater_pagamento(posicao: dict, valor: Decimal) -> dict:
+        # O pagamento quita primeiro a mora, depois os juros e só então o principal
+        restante = valor
+        nova_posicao = dict(posicao)
+        for chave in ("mora", "juros", "saldo_principal"):
+            abatido = min(restante, nova_posicao[chave])
+            nova_posicao[chave] -= abatido
+            restante -= abatido
+        nova_posicao["total"] = nova_posicao["saldo_principal"] + nova_posicao["juros"] + nova_posicao["mora"]
+        return nova_posicao
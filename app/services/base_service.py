@@ -1,9 +1,13 @@
 # app/services/base_service.py
 
-from typing import List, TypeVar, Generic
+from typing import List, TypeVar, Generic, Optional
+from sqlalchemy import tuple_
 from sqlalchemy.orm import Session
 from fastapi import HTTPException, Query
 from app.core.logger import get_logger
+from datetime import date, datetime
+import base64
+import json
 
 logger = get_logger(__name__)
 
@@ -13,7 +17,7 @@ T = TypeVar('T')
 class BaseService(Generic[T]):
     def __init__(self, db: Session):
         self.db = db
-        self.logger = logger(self.__class__.__name__)
+        self.logger = get_logger(self.__class__.__name__)
 
     def handle_not_found(self, message: str):
         self.logger.warning(message)
@@ -26,3 +30,80 @@ class BaseService(Generic[T]):
     def paginate(self, query, page: int = Query(1, ge=1), per_page: int = Query(20, le=100)) -> List[T]:
         return query.offset((page - 1) * per_page).limit(per_page).all()
 
+    def paginate_cursor(self, query, coluna, chave, cursor: Optional[str] = None, per_page: int = 20) -> dict:
+        """
+        Paginação por chave (keyset): a página seguinte começa depois do último (coluna, chave) visto,
+        então o custo não cresce com a profundidade e inserções concorrentes não repetem nem pulam
+        itens. `chave` desempata valores iguais de `coluna` (normalmente o id); o par deve ter índice.
+        Devolve {"itens", "proximo", "anterior"}, com os cursores opacos das páginas vizinhas.
+        """
+        query, direcao = self._consulta_cursor(query, coluna, chave, cursor, per_page)
+        return self._montar_pagina(query.all(), direcao, coluna, chave, cursor, per_page)
+
+    def _consulta_cursor(self, query, coluna, chave, cursor: Optional[str], per_page: int):
+        # Vale para Query e para select(): os dois têm filter, order_by e limit
+        direcao, valor, ultimo = "proximo", None, None
+        if cursor:
+            direcao, valor, ultimo = self._ler_cursor(cursor, coluna)
+
+        if direcao == "proximo":
+            if cursor:
+                query = query.filter(tuple_(coluna, chave) > tuple_(valor, ultimo))
+            query = query.order_by(coluna.asc(), chave.asc())
+        else:
+            query = query.filter(tuple_(coluna, chave) < tuple_(valor, ultimo)).order_by(coluna.desc(), chave.desc())
+        return query.limit(per_page + 1), direcao
+
+    def _montar_pagina(self, itens: list, direcao: str, coluna, chave, cursor: Optional[str], per_page: int) -> dict:
+        ha_mais = len(itens) > per_page
+        itens = list(itens[:per_page])
+        if direcao == "anterior":
+            itens.reverse()
+
+        def cursor_de(item, sentido):
+            return self._gerar_cursor(sentido, coluna, getattr(item, coluna.key), getattr(item, chave.key))
+
+        tem_proxima = ha_mais if direcao == "proximo" else bool(cursor)
+        tem_anterior = bool(cursor) if direcao == "proximo" else ha_mais
+        return {
+            "itens": itens,
+            "proximo": cursor_de(itens[-1], "proximo") if itens and tem_proxima else None,
+            "anterior": cursor_de(itens[0], "anterior") if itens and tem_anterior else None
+        }
+
+    @staticmethod
+    def _gerar_cursor(direcao: str, coluna, valor, chave) -> str:
+        if isinstance(valor, (date, datetime)):
+            valor = valor.isoformat()
+        dados = json.dumps({"d": direcao, "c": coluna.key, "v": valor, "k": chave}, separators=(",", ":"))
+        return base64.urlsafe_b64encode(dados.encode()).decode().rstrip("=")
+
+    def _ler_cursor(self, cursor: str, coluna) -> tuple:
+        try:
+            dados = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+            if dados["c"] != coluna.key or dados["d"] not in ("proximo", "anterior"):
+                raise ValueError("cursor gerado para outra ordenação")
+            tipo = coluna.type.python_type
+            valor = tipo.fromisoformat(dados["v"]) if tipo in (date, datetime) else tipo(dados["v"])
+            return dados["d"], valor, int(dados["k"])
+        except (ValueError, KeyError, TypeError, json.JSONDecodeError) as e:
+            self.handle_exception(ValueError(f"Cursor inválido: {str(e)}"), 400)
+
+
+
+class BaseServiceAsync(BaseService[T]):
+    """
+    Base dos serviços usados pelas rotas assíncronas; `db` é uma AsyncSession. As consultas
+    recebem select() em vez de Query, que não existe na sessão assíncrona.
+    """
+    async def paginate(self, query, page: int = 1, per_page: int = 20, skip: Optional[int] = None) -> List[T]:
+        # `skip` é o deslocamento exato das rotas (?skip=&limit=); sem ele, vale a página
+        if skip is None:
+            skip = (page - 1) * per_page
+        resultado = await self.db.execute(query.offset(skip).limit(per_page))
+        return list(resultado.scalars().unique())
+
+    async def paginate_cursor(self, query, coluna, chave, cursor: Optional[str] = None, per_page: int = 20) -> dict:
+        query, direcao = self._consulta_cursor(query, coluna, chave, cursor, per_page)
+        resultado = await self.db.execute(query)
+        return self._montar_pagina(list(resultado.scalars().unique()), direcao, coluna, chave, cursor, per_page)
\ No newline at end of file
@@ -2,10 +2,21 @@
 
 from abc import ABC, abstractmethod
 from datetime import date, timedelta
-from dateutil.relativedelta import relativedelta
-from typing import List, Optional
+from functools import lru_cache
+from itertools import count, islice
+from typing import Iterator, List, Optional, Tuple, Union
 from decimal import Decimal, ROUND_HALF_UP
 from enum import Enum
+import math
+import numpy as np
+
+# taxa_juros dos empréstimos é nominal anual, em %, proporcional aos dias corridos nesta base:
+# a apropriação diária e a taxa por parcela da amortização partem da mesma conversão
+DIAS_BASE_TAXA_ANUAL = 365
+
+# Cada calendário guarda a próxima data de vencimento para todos os dias de um ano
+# (~3 KB), então o cache completo fica em torno de 12 MB.
+TAMANHO_CACHE_CALENDARIOS = 4096
 
 class TipoJuros(Enum):
     SIMPLES = "simples"
@@ -20,45 +31,229 @@ class TipoRegra(Enum):
     FIXO = "fixo"
     RECORRENTE = "recorrente"
 
+# Taxas (em %) são lidas com CASAS_TAXA casas decimais; no modo CENTAVOS viram inteiros nesta escala
+CASAS_TAXA = 9
+ESCALA_TAXA = 10 ** CASAS_TAXA
+_QUANTUM_TAXA = Decimal(1).scaleb(-CASAS_TAXA)
+
+class Aritmetica(Enum):
+    DECIMAL = "decimal"
+    CENTAVOS = "centavos"
+
+_aritmetica_padrao = Aritmetica.DECIMAL
+
+def definir_aritmetica_padrao(aritmetica: Aritmetica) -> None:
+    global _aritmetica_padrao
+    _aritmetica_padrao = Aritmetica(aritmetica)
+
+def obter_aritmetica_padrao() -> Aritmetica:
+    return _aritmetica_padrao
+
+def _centavos(valor: Decimal) -> Decimal:
+    return valor.quantize(Decimal('.01'), rounding=ROUND_HALF_UP)
+
+def _para_centavos(valor) -> int:
+    return int(_centavos(Decimal(str(valor))).scaleb(2))
+
+def _taxa_decimal(taxa) -> Decimal:
+    # Taxa em % na escala fixa, igual nos dois modos de aritmética
+    return Decimal(str(taxa)).quantize(_QUANTUM_TAXA, rounding=ROUND_HALF_UP)
+
+@lru_cache(maxsize=1024)
+def _taxa_escalada(taxa) -> int:
+    return int(_taxa_decimal(taxa).scaleb(CASAS_TAXA))
+
+def _arredondar_divisao(numerador: int, denominador: int) -> int:
+    # ROUND_HALF_UP do Decimal: empates se afastam do zero
+    quociente, resto = divmod(abs(numerador), denominador)
+    if 2 * resto >= denominador:
+        quociente += 1
+    return quociente if numerador >= 0 else -quociente
+
+def _de_centavos(centavos: int) -> Decimal:
+    return Decimal(centavos).scaleb(-2)
+
+def _dias_no_mes(meses: np.ndarray) -> np.ndarray:
+    return ((meses + 1).astype('datetime64[D]') - meses.astype('datetime64[D]')).astype(np.int64)
+
+def _dia_no_mes(meses: np.ndarray, dia) -> np.ndarray:
+    # Dias inexistentes no mês (ex.: 31 em fevereiro) caem no último dia do mês
+    return meses.astype('datetime64[D]') + (np.minimum(dia, _dias_no_mes(meses)) - 1)
+
+def _somar_meses(datas: np.ndarray, meses: int) -> np.ndarray:
+    mes_atual = datas.astype('datetime64[M]')
+    dia = (datas - mes_atual.astype('datetime64[D]')).astype(np.int64) + 1
+    return _dia_no_mes(mes_atual + meses, dia)
+
+@lru_cache(maxsize=TAMANHO_CACHE_CALENDARIOS)
+def _calendario(regra: 'BaseRegra', ano: int) -> np.ndarray:
+    inicio = np.datetime64(f'{ano:04d}-01-01', 'D')
+    dias = np.arange(inicio, np.datetime64(f'{ano + 1:04d}-01-01', 'D'))
+    proximas = regra._calcular_proximas_datas(dias)
+    proximas.flags.writeable = False
+    return proximas
+
+@lru_cache(maxsize=TAMANHO_CACHE_CALENDARIOS)
+def _calendario_escalar(regra: 'BaseRegra', ano: int) -> tuple:
+    # Mesma tabela de _calendario em objetos date, para consultas de uma data por vez
+    return date(ano, 1, 1).toordinal(), _calendario(regra, ano).astype(object).tolist()
+
+@lru_cache(maxsize=TAMANHO_CACHE_CALENDARIOS)
+def _periodos_escalar(regra: 'BaseRegra', ano: int) -> tuple:
+    # Dias até o próximo vencimento para cada dia do ano, usado pelo backend em centavos
+    inicio = np.datetime64(f'{ano:04d}-01-01', 'D')
+    dias = np.arange(inicio, np.datetime64(f'{ano + 1:04d}-01-01', 'D'))
+    return date(ano, 1, 1).toordinal(), (_calendario(regra, ano) - dias).astype(np.int64).tolist()
+
+def _meses_entre(inicio: date, fim: date) -> int:
+    return (fim.year - inicio.year) * 12 + fim.month - inicio.month
+
+def _periodo_base(regra: 'BaseRegra', data_base: date) -> int:
+    inicio_ano, periodos = _periodos_escalar(regra, data_base.year)
+    return periodos[data_base.toordinal() - inicio_ano]
+
 class BaseRegra(ABC):
+    """
+    Regras são valores imutáveis e comparáveis, o que permite compartilhar entre todos os
+    empréstimos o calendário de vencimentos de cada regra distinta (ver _calendario).
+    """
+    __slots__ = ('_hash',)
+
+    def _congelar(self, **parametros):
+        for nome, valor in parametros.items():
+            object.__setattr__(self, nome, valor)
+        object.__setattr__(self, '_hash', hash((type(self).__name__, self._parametros())))
+
     @abstractmethod
-    def proxima_data(self, data_base: date) -> date:
+    def _parametros(self) -> tuple:
+        pass
+
+    @abstractmethod
+    def _calcular_proximas_datas(self, datas: np.ndarray) -> np.ndarray:
         pass
 
+    def proxima_data(self, data_base: date) -> date:
+        inicio_ano, calendario = _calendario_escalar(self, data_base.year)
+        return calendario[data_base.toordinal() - inicio_ano]
+
+    @abstractmethod
+    def enesima_data(self, data_base: date, n: int) -> date:
+        """n-ésima data da regra depois de data_base (n >= 1), sem percorrer as anteriores."""
+
+    @abstractmethod
+    def contar_datas(self, data_base: date, data_fim: date) -> int:
+        """Quantas datas da regra caem depois de data_base e até data_fim, inclusive."""
+
+    def proximas_datas(self, datas: np.ndarray) -> np.ndarray:
+        datas = np.asarray(datas, dtype='datetime64[D]')
+        anos = datas.astype('datetime64[Y]')
+        proximas = np.empty_like(datas)
+        for ano in np.unique(anos):
+            do_ano = anos == ano
+            inicio_ano = ano.astype('datetime64[D]')
+            calendario = _calendario(self, int(str(ano)))
+            proximas[do_ano] = calendario[(datas[do_ano] - inicio_ano).astype(np.int64)]
+        return proximas
+
+    def __setattr__(self, nome, valor):
+        raise AttributeError(f"{type(self).__name__} é imutável")
+
+    def __delattr__(self, nome):
+        raise AttributeError(f"{type(self).__name__} é imutável")
+
+    def __eq__(self, outra):
+        if type(outra) is not type(self):
+            return NotImplemented
+        return self._hash == outra._hash and self._parametros() == outra._parametros()
+
+    def __hash__(self):
+        return self._hash
+
+    def __reduce__(self):
+        return (type(self), self._parametros())
+
+    def __repr__(self):
+        return f"{type(self).__name__}{self._parametros()}"
+
 class RegraFixa(BaseRegra):
+    __slots__ = ('dia', 'mes')
+
     def __init__(self, dia: int, mes: Optional[int] = None):
-        self.dia = dia
-        self.mes = mes
+        if not 1 <= dia <= 31:
+            raise ValueError(f"Dia inválido: {dia}")
+        if mes is not None and not 1 <= mes <= 12:
+            raise ValueError(f"Mês inválido: {mes}")
+        self._congelar(dia=dia, mes=mes)
 
-    def proxima_data(self, data_base: date) -> date:
+    def _parametros(self) -> tuple:
+        return (self.dia, self.mes)
+
+    def _calcular_proximas_datas(self, datas: np.ndarray) -> np.ndarray:
         if self.mes:
             # Regra anual
-            prox_data = date(data_base.year, self.mes, self.dia)
-            if prox_data <= data_base:
-                prox_data = date(data_base.year + 1, self.mes, self.dia)
-        else:
-            # Regra mensal
-            prox_data = data_base.replace(day=self.dia)
-            if prox_data <= data_base:
-                prox_data += relativedelta(months=1)
-        return prox_data
+            anos = datas.astype('datetime64[Y]')
+            meses = anos.astype('datetime64[M]') + (self.mes - 1)
+            prox_data = _dia_no_mes(meses, self.dia)
+            return np.where(prox_data <= datas, _dia_no_mes(meses + 12, self.dia), prox_data)
+        # Regra mensal
+        meses = datas.astype('datetime64[M]')
+        prox_data = _dia_no_mes(meses, self.dia)
+        return np.where(prox_data <= datas, _dia_no_mes(meses + 1, self.dia), prox_data)
+
+    def enesima_data(self, data_base: date, n: int) -> date:
+        # A partir da primeira data, a n-ésima cai n - 1 meses (ou anos) depois, no mesmo dia
+        mes = np.datetime64(self.proxima_data(data_base), 'M') + (n - 1) * (12 if self.mes else 1)
+        return _dia_no_mes(mes, self.dia).item()
+
+    def contar_datas(self, data_base: date, data_fim: date) -> int:
+        primeira = self.proxima_data(data_base)
+        if primeira > data_fim:
+            return 0
+        n = _meses_entre(primeira, data_fim) // (12 if self.mes else 1) + 1
+        return n if self.enesima_data(data_base, n) <= data_fim else n - 1
 
 class RegraRecorrente(BaseRegra):
+    __slots__ = ('intervalo', 'unidade')
+
+    UNIDADES = ('dias', 'semanas', 'meses', 'anos')
+
     def __init__(self, intervalo: int, unidade: str):
-        self.intervalo = intervalo
-        self.unidade = unidade
+        if unidade not in self.UNIDADES:
+            raise ValueError(f"Unidade de tempo inválida: {unidade}")
+        if intervalo < 1:
+            raise ValueError(f"Intervalo inválido: {intervalo}")
+        self._congelar(intervalo=intervalo, unidade=unidade)
 
-    def proxima_data(self, data_base: date) -> date:
+    def _parametros(self) -> tuple:
+        return (self.intervalo, self.unidade)
+
+    def _calcular_proximas_datas(self, datas: np.ndarray) -> np.ndarray:
         if self.unidade == 'dias':
-            return data_base + timedelta(days=self.intervalo)
+            return datas + self.intervalo
         elif self.unidade == 'semanas':
-            return data_base + timedelta(weeks=self.intervalo)
+            return datas + 7 * self.intervalo
         elif self.unidade == 'meses':
-            return data_base + relativedelta(months=self.intervalo)
-        elif self.unidade == 'anos':
-            return data_base + relativedelta(years=self.intervalo)
+            return _somar_meses(datas, self.intervalo)
         else:
-            raise ValueError(f"Unidade de tempo inválida: {self.unidade}")
+            return _somar_meses(datas, 12 * self.intervalo)
+
+    def _passo_dias(self) -> int:
+        return self.intervalo if self.unidade == 'dias' else 7 * self.intervalo
+
+    def _passo_meses(self) -> int:
+        return self.intervalo if self.unidade == 'meses' else 12 * self.intervalo
+
+    def enesima_data(self, data_base: date, n: int) -> date:
+        # Contada sempre de data_base: um vencimento no dia 31 volta ao dia 31 depois de fevereiro
+        if self.unidade in ('dias', 'semanas'):
+            return data_base + timedelta(days=n * self._passo_dias())
+        return _somar_meses(np.datetime64(data_base, 'D'), n * self._passo_meses()).item()
+
+    def contar_datas(self, data_base: date, data_fim: date) -> int:
+        if self.unidade in ('dias', 'semanas'):
+            return max((data_fim - data_base).days // self._passo_dias(), 0)
+        n = max(_meses_entre(data_base, data_fim) // self._passo_meses(), 0)
+        return n if n == 0 or self.enesima_data(data_base, n) <= data_fim else n - 1
 
 class CalculoJuros:
     @staticmethod
@@ -67,8 +262,19 @@ class CalculoJuros:
         return (proxima_data - data_base).days
 
     @staticmethod
-    def calcular_juros(valor_principal: Decimal, taxa_juros: Decimal, data_inicio: date, data_fim: date, regra: BaseRegra, tipo_juros: TipoJuros) -> Decimal:
-        periodo_base = CalculoJuros.calcular_periodo_base(regra, data_inicio)
+    def calcular_periodos_base(regra: BaseRegra, datas: np.ndarray) -> np.ndarray:
+        datas = np.asarray(datas, dtype='datetime64[D]')
+        return (regra.proximas_datas(datas) - datas).astype(np.int64)
+
+    @staticmethod
+    def calcular_proximo_vencimento(regras: List[BaseRegra], data_base: date) -> date:
+        return min(regra.proxima_data(data_base) for regra in set(regras))
+
+    @staticmethod
+    def calcular_juros(valor_principal: Decimal, taxa_juros: Decimal, data_inicio: date, data_fim: date, regra: BaseRegra, tipo_juros: TipoJuros, data_periodo: date = None) -> Decimal:
+        # data_periodo fixa o período da taxa (a abertura do empréstimo): retomar de um ponto de
+        # controle não muda a taxa diária
+        periodo_base = CalculoJuros.calcular_periodo_base(regra, data_periodo or data_inicio)
         dias = (data_fim - data_inicio).days
         taxa_ajustada = taxa_juros * (Decimal(dias) / Decimal(periodo_base))
         
@@ -80,8 +286,8 @@ class CalculoJuros:
             raise ValueError("Tipo de juros não suportado")
 
     @staticmethod
-    def calcular_mora(valor_principal: Decimal, taxa_mora: Decimal, data_vencimento: date, data_pagamento: date, regra: BaseRegra, tipo_mora: TipoMora) -> Decimal:
-        periodo_base = CalculoJuros.calcular_periodo_base(regra, data_vencimento)
+    def calcular_mora(valor_principal: Decimal, taxa_mora: Decimal, data_vencimento: date, data_pagamento: date, regra: BaseRegra, tipo_mora: TipoMora, data_periodo: date = None) -> Decimal:
+        periodo_base = CalculoJuros.calcular_periodo_base(regra, data_periodo or data_vencimento)
         dias_atraso = (data_pagamento - data_vencimento).days
         if dias_atraso <= 0:
             return Decimal('0')
@@ -104,19 +310,60 @@ class CalculoJuros:
         data_inicio: date,
         data_calculo: date,
         regras_juros: List[dict],
-        regras_mora: List[dict]
+        regras_mora: List[dict],
+        aritmetica: Optional[Aritmetica] = None
     ) -> Decimal:
+        """
+        Principal mais encargos, arredondado uma única vez para centavos (ROUND_HALF_UP) a
+        partir do total sem arredondamento, nos dois modos de aritmética.
+        """
+        if (aritmetica or _aritmetica_padrao) == Aritmetica.CENTAVOS:
+            principal, juros, mora, denominador = CalculoJuros._encargos_centavos(valor_principal, data_inicio, data_calculo, regras_juros, regras_mora)
+            return _de_centavos(_arredondar_divisao(principal * denominador + juros + mora, denominador))
+
+        total_juros, total_mora = CalculoJuros.calcular_encargos(
+            valor_principal, data_inicio, data_calculo, regras_juros, regras_mora, Aritmetica.DECIMAL, arredondar=False
+        )
+        return _centavos(CalculoJuros.calcular_total_devido(_centavos(valor_principal), total_juros, total_mora))
+
+    @staticmethod
+    def calcular_encargos(
+        valor_principal: Decimal,
+        data_inicio: date,
+        data_calculo: date,
+        regras_juros: List[dict],
+        regras_mora: List[dict],
+        aritmetica: Optional[Aritmetica] = None,
+        arredondar: bool = True
+    ) -> Tuple[Decimal, Decimal]:
+        """
+        Juros e mora de data_inicio a data_calculo. A chave opcional 'data_periodo' de cada regra
+        é a data cujo período define a taxa diária (abertura do empréstimo, vencimento original da
+        mora); sem ela vale data_inicio, ou o 'data_vencimento' da mora.
+
+        Nos dois modos o principal é lido em centavos e as taxas com CASAS_TAXA casas; juros e
+        mora são arredondados uma única vez para centavos, ao final. Com arredondar=False saem
+        sem arredondamento, para acumular em pontos de controle.
+        """
+        if (aritmetica or _aritmetica_padrao) == Aritmetica.CENTAVOS:
+            _, juros, mora, denominador = CalculoJuros._encargos_centavos(valor_principal, data_inicio, data_calculo, regras_juros, regras_mora)
+            if not arredondar:
+                return Decimal(juros) / (denominador * 100), Decimal(mora) / (denominador * 100)
+            return _de_centavos(_arredondar_divisao(juros, denominador)), _de_centavos(_arredondar_divisao(mora, denominador))
+
+        valor_principal = _centavos(Decimal(str(valor_principal)))
         total_juros = Decimal('0')
         total_mora = Decimal('0')
 
         for regra_juros in regras_juros:
             juros = CalculoJuros.calcular_juros(
                 valor_principal,
-                Decimal(str(regra_juros['taxa'])),
+                _taxa_decimal(regra_juros['taxa']),
                 data_inicio,
                 data_calculo,
                 regra_juros['regra'],
-                regra_juros['tipo']
+                regra_juros['tipo'],
+                regra_juros.get('data_periodo')
             )
             total_juros += juros
 
@@ -124,15 +371,62 @@ class CalculoJuros:
             if data_calculo > regra_mora['data_vencimento']:
                 mora = CalculoJuros.calcular_mora(
                     valor_principal,
-                    Decimal(str(regra_mora['taxa'])),
+                    _taxa_decimal(regra_mora['taxa']),
                     regra_mora['data_vencimento'],
                     data_calculo,
                     regra_mora['regra'],
-                    regra_mora['tipo']
+                    regra_mora['tipo'],
+                    regra_mora.get('data_periodo')
                 )
                 total_mora += mora
 
-        return CalculoJuros.calcular_total_devido(valor_principal, total_juros, total_mora)
+        if not arredondar:
+            return total_juros, total_mora
+        return _centavos(total_juros), _centavos(total_mora)
+
+    @staticmethod
+    def _encargos_centavos(
+        valor_principal: Union[Decimal, int],
+        data_inicio: date,
+        data_calculo: date,
+        regras_juros: List[dict],
+        regras_mora: List[dict]
+    ) -> Tuple[int, int, int, int]:
+        """
+        Backend inteiro de calcular_encargos: principal em centavos e taxas na escala ESCALA_TAXA.
+        Devolve (principal, juros, mora, denominador), com juros e mora em centavos multiplicados
+        por `denominador`, sem nenhum arredondamento. Cada parcela de juros ou mora vale
+        principal * taxa * dias / (período * 100), tanto no regime simples quanto no composto ou
+        diário, exatamente como no caminho Decimal.
+        """
+        # Pares (taxa escalada * dias, período) de cada regra
+        termos_juros, termos_mora = [], []
+        dias = (data_calculo - data_inicio).days
+        for regra_juros in regras_juros:
+            if not isinstance(regra_juros['tipo'], TipoJuros):
+                raise ValueError("Tipo de juros não suportado")
+            periodo = _periodo_base(regra_juros['regra'], regra_juros.get('data_periodo') or data_inicio)
+            termos_juros.append((_taxa_escalada(regra_juros['taxa']) * dias, periodo))
+
+        for regra_mora in regras_mora:
+            dias_atraso = (data_calculo - regra_mora['data_vencimento']).days
+            if dias_atraso <= 0:
+                continue
+            if not isinstance(regra_mora['tipo'], TipoMora):
+                raise ValueError("Tipo de mora não suportado")
+            periodo = _periodo_base(regra_mora['regra'], regra_mora.get('data_periodo') or regra_mora['data_vencimento'])
+            termos_mora.append((_taxa_escalada(regra_mora['taxa']) * dias_atraso, periodo))
+
+        # Denominador comum: o mmc dos períodos, vezes 100 (taxa em %) e a escala das taxas
+        periodos = math.lcm(*(periodo for _, periodo in termos_juros + termos_mora))
+        principal = _para_centavos(valor_principal)
+        juros = principal * sum(termo * (periodos // periodo) for termo, periodo in termos_juros)
+        mora = principal * sum(termo * (periodos // periodo) for termo, periodo in termos_mora)
+        return principal, juros, mora, periodos * 100 * ESCALA_TAXA
+
+    @staticmethod
+    def calcular_total_devido(valor_principal: Decimal, total_juros: Decimal, total_mora: Decimal) -> Decimal:
+        return valor_principal + total_juros + total_mora
 
     @staticmethod
     def calcular_parcelas(valor_total: Decimal, num_parcelas: int) -> List[Decimal]:
@@ -143,59 +437,122 @@ class CalculoJuros:
 
     @staticmethod
     def calcular_amortizacao(valor_principal: Decimal, taxa_juros: Decimal, num_parcelas: int, regra: BaseRegra, tipo_juros: TipoJuros) -> List[dict]:
+        return list(CalculoJuros.gerar_cronograma(valor_principal, taxa_juros, num_parcelas, regra, tipo_juros))
+
+    @staticmethod
+    def gerar_cronograma(
+        valor_principal: Decimal,
+        taxa_juros: Decimal,
+        num_parcelas: int,
+        regra: BaseRegra,
+        tipo_juros: TipoJuros,
+        parcela_inicial: int = 1
+    ) -> Iterator[dict]:
+        """
+        Gera as parcelas sob demanda, a partir de `parcela_inicial` (1 = primeira parcela).
+        O saldo devedor anterior à parcela inicial vem da fórmula fechada, sem percorrer as
+        parcelas anteriores.
+        """
+        if not 1 <= parcela_inicial <= num_parcelas + 1:
+            raise ValueError(f"Parcela inicial inválida: {parcela_inicial}")
+        taxa = CalculoJuros._taxa_periodo_amortizacao(taxa_juros, regra)
         if tipo_juros == TipoJuros.SIMPLES:
-            return CalculoJuros._amortizacao_sac(valor_principal, taxa_juros, num_parcelas, regra)
+            return CalculoJuros._cronograma_sac(valor_principal, taxa, num_parcelas, parcela_inicial)
         elif tipo_juros == TipoJuros.COMPOSTO:
-            return CalculoJuros._amortizacao_price(valor_principal, taxa_juros, num_parcelas, regra)
+            return CalculoJuros._cronograma_price(valor_principal, taxa, num_parcelas, parcela_inicial)
         else:
             raise ValueError("Tipo de juros não suportado para amortização")
 
     @staticmethod
-    def _amortizacao_price(valor_principal: Decimal, taxa_juros: Decimal, num_parcelas: int, regra: BaseRegra) -> List[dict]:
+    def gerar_vencimentos(regras: List[BaseRegra], data_base: date, inicio: int = 1) -> Iterator[date]:
+        """
+        Vencimentos depois de data_base, a partir do `inicio`-ésimo. Com uma única regra cada
+        data é calculada diretamente de data_base; com várias, cada vencimento parte do anterior.
+        """
+        regras = set(regras)
+        if len(regras) == 1:
+            regra, = regras
+            return (regra.enesima_data(data_base, n) for n in count(inicio))
+        return islice(CalculoJuros._intercalar_vencimentos(regras, data_base), inicio - 1, None)
+
+    @staticmethod
+    def _intercalar_vencimentos(regras: set, data_base: date) -> Iterator[date]:
+        while True:
+            data_base = min(regra.proxima_data(data_base) for regra in regras)
+            yield data_base
+
+    @staticmethod
+    def contar_vencimentos(regras: List[BaseRegra], data_base: date, data_fim: date) -> int:
+        regras = set(regras)
+        if len(regras) == 1:
+            regra, = regras
+            return regra.contar_datas(data_base, data_fim)
+        total = 0
+        for data in CalculoJuros._intercalar_vencimentos(regras, data_base):
+            if data > data_fim:
+                return total
+            total += 1
+
+    @staticmethod
+    def saldo_devedor_price(valor_principal: Decimal, taxa: Decimal, parcela: Decimal, parcelas_pagas: int) -> Decimal:
+        if not taxa:
+            return valor_principal - parcela * parcelas_pagas
+        fator = (1 + taxa) ** parcelas_pagas
+        return valor_principal * fator - parcela * (fator - 1) / taxa
+
+    @staticmethod
+    def saldo_devedor_sac(valor_principal: Decimal, amortizado: Decimal, parcelas_pagas: int) -> Decimal:
+        return valor_principal - amortizado * parcelas_pagas
+
+    @staticmethod
+    def _taxa_periodo_amortizacao(taxa_juros: Decimal, regra: BaseRegra) -> Decimal:
         periodo_base = CalculoJuros.calcular_periodo_base(regra, date.today())
-        taxa = (taxa_juros / Decimal('100')) * (Decimal(periodo_base) / Decimal(365))
-        parcela = valor_principal * (taxa * (1 + taxa) ** num_parcelas) / ((1 + taxa) ** num_parcelas - 1)
-        saldo_devedor = valor_principal
-        amortizacao = []
+        return (taxa_juros / Decimal('100')) * (Decimal(periodo_base) / Decimal(DIAS_BASE_TAXA_ANUAL))
 
-        for _ in range(num_parcelas):
+    @staticmethod
+    def _cronograma_price(valor_principal: Decimal, taxa: Decimal, num_parcelas: int, parcela_inicial: int) -> Iterator[dict]:
+        if taxa:
+            fator = (1 + taxa) ** num_parcelas
+            parcela = valor_principal * (taxa * fator) / (fator - 1)
+        else:
+            parcela = valor_principal / num_parcelas
+        parcela_arredondada = _centavos(parcela)
+        saldo_devedor = CalculoJuros.saldo_devedor_price(valor_principal, taxa, parcela, parcela_inicial - 1)
+
+        for numero in range(parcela_inicial, num_parcelas + 1):
             juros = saldo_devedor * taxa
             amortizado = parcela - juros
             saldo_devedor -= amortizado
-            amortizacao.append({
-                "parcela": parcela.quantize(Decimal('.01'), rounding=ROUND_HALF_UP),
-                "juros": juros.quantize(Decimal('.01'), rounding=ROUND_HALF_UP),
-                "amortizado": amortizado.quantize(Decimal('.01'), rounding=ROUND_HALF_UP),
-                "saldo_devedor": saldo_devedor.quantize(Decimal('.01'), rounding=ROUND_HALF_UP)
-            })
-
-        return amortizacao
+            yield {
+                "numero": numero,
+                "parcela": parcela_arredondada,
+                "juros": _centavos(juros),
+                "amortizado": _centavos(amortizado),
+                "saldo_devedor": _centavos(saldo_devedor)
+            }
 
     @staticmethod
-    def _amortizacao_sac(valor_principal: Decimal, taxa_juros: Decimal, num_parcelas: int, regra: BaseRegra) -> List[dict]:
-        periodo_base = CalculoJuros.calcular_periodo_base(regra, date.today())
-        taxa = (taxa_juros / Decimal('100')) * (Decimal(periodo_base) / Decimal(365))
+    def _cronograma_sac(valor_principal: Decimal, taxa: Decimal, num_parcelas: int, parcela_inicial: int) -> Iterator[dict]:
         amortizado = valor_principal / num_parcelas
-        saldo_devedor = valor_principal
-        amortizacao = []
+        amortizado_arredondado = _centavos(amortizado)
+        saldo_devedor = CalculoJuros.saldo_devedor_sac(valor_principal, amortizado, parcela_inicial - 1)
 
-        for _ in range(num_parcelas):
+        for numero in range(parcela_inicial, num_parcelas + 1):
             juros = saldo_devedor * taxa
             parcela = amortizado + juros
             saldo_devedor -= amortizado
-            amortizacao.append({
-                "parcela": parcela.quantize(Decimal('.01'), rounding=ROUND_HALF_UP),
-                "juros": juros.quantize(Decimal('.01'), rounding=ROUND_HALF_UP),
-                "amortizado": amortizado.quantize(Decimal('.01'), rounding=ROUND_HALF_UP),
-                "saldo_devedor": saldo_devedor.quantize(Decimal('.01'), rounding=ROUND_HALF_UP)
-            })
-
-        return amortizacao
+            yield {
+                "numero": numero,
+                "parcela": _centavos(parcela),
+                "juros": _centavos(juros),
+                "amortizado": amortizado_arredondado,
+                "saldo_devedor": _centavos(saldo_devedor)
+            }
 
     @staticmethod
     def calcular_prazo_maximo(valor_principal: Decimal, taxa_juros: Decimal, valor_maximo: Decimal, regra: BaseRegra, tipo_juros: TipoJuros) -> int:
         periodo_base = CalculoJuros.calcular_periodo_base(regra, date.today())
-        taxa_ajustada = taxa_juros * (Decimal(periodo_base) / Decimal(365))
+        taxa_ajustada = taxa_juros * (Decimal(periodo_base) / Decimal(DIAS_BASE_TAXA_ANUAL))
         if tipo_juros == TipoJuros.SIMPLES:
             return int((valor_maximo / valor_principal - 1) / (taxa_ajustada / Decimal('100')))
         elif tipo_juros == TipoJuros.COMPOSTO:
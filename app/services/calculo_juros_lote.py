@@ -0,0 +1,131 @@
+# app/services/calculo_juros_lote.py
+
+from datetime import date, datetime
+from typing import Dict, Sequence, Union
+import numpy as np
+from app.services.calculo_juros import BaseRegra, CalculoJuros, TipoJuros, TipoMora
+
+# O caminho escalar trabalha com Decimal; aqui usamos float64, então o arredondamento
+# ROUND_HALF_UP aceita uma tolerância relativa para não perder empates exatos (ex.: x,xx5).
+_TOLERANCIA_RELATIVA = 1e-12
+
+_TIPOS_JUROS = frozenset(TipoJuros)
+_TIPOS_MORA = frozenset(TipoMora)
+
+DataOuColuna = Union[date, datetime, np.ndarray, Sequence[date]]
+
+
+def _como_datas(valores: DataOuColuna) -> np.ndarray:
+    datas = np.asarray(valores)
+    if datas.dtype.kind != 'M':
+        datas = datas.astype(object)
+    return datas.astype('datetime64[D]')
+
+
+def _arredondar_centavos(valores: np.ndarray) -> np.ndarray:
+    centavos = valores * 100
+    centavos = np.floor(centavos + 0.5 + np.abs(centavos) * _TOLERANCIA_RELATIVA)
+    return centavos / 100
+
+
+def _periodos_base(regras: Sequence[BaseRegra], datas: np.ndarray) -> np.ndarray:
+    """Equivalente vetorizado de CalculoJuros.calcular_periodo_base para pares (regra, data)."""
+    periodos = np.empty(len(regras), dtype=np.int64)
+    grupos: Dict[BaseRegra, list] = {}
+    for posicao, regra in enumerate(regras):
+        grupos.setdefault(regra, []).append(posicao)
+
+    for regra, posicoes in grupos.items():
+        posicoes = np.asarray(posicoes, dtype=np.intp)
+        periodos[posicoes] = CalculoJuros.calcular_periodos_base(regra, datas[posicoes])
+    return periodos
+
+
+class CalculoJurosLote:
+    """
+    Versão em lote de CalculoJuros.calcular_valor_total_devido.
+
+    Os empréstimos são passados em colunas (uma posição por empréstimo) e as regras em
+    formato longo: cada regra traz o 'indice' do empréstimo a que pertence, além das
+    mesmas chaves usadas no caminho escalar ('taxa', 'regra', 'tipo', a opcional 'data_periodo'
+    e, para mora, 'data_vencimento'). Um empréstimo pode ter qualquer número de regras.
+    """
+
+    @staticmethod
+    def calcular_juros(
+        valor_principal: np.ndarray,
+        data_inicio: np.ndarray,
+        data_calculo: np.ndarray,
+        regras_juros: Dict[str, Sequence]
+    ) -> np.ndarray:
+        total = np.zeros(valor_principal.shape[0])
+        indices = np.asarray(regras_juros['indice'], dtype=np.intp)
+        if indices.size == 0:
+            return total
+        if not set(regras_juros['tipo']) <= _TIPOS_JUROS:
+            raise ValueError("Tipo de juros não suportado")
+
+        taxas = np.asarray(regras_juros['taxa'], dtype=np.float64)
+        inicio = data_inicio[indices]
+        # Período da taxa pela data de abertura, quando informada (ver CalculoJuros.calcular_encargos)
+        datas_periodo = _como_datas(regras_juros['data_periodo']) if 'data_periodo' in regras_juros else inicio
+        periodos = _periodos_base(regras_juros['regra'], datas_periodo)
+        dias = (data_calculo[indices] - inicio).astype(np.int64)
+        # Juros simples e compostos resultam na mesma expressão no caminho escalar.
+        juros = valor_principal[indices] * taxas * dias / (periodos * 100)
+        return np.bincount(indices, weights=juros, minlength=total.shape[0])
+
+    @staticmethod
+    def calcular_mora(
+        valor_principal: np.ndarray,
+        data_calculo: np.ndarray,
+        regras_mora: Dict[str, Sequence]
+    ) -> np.ndarray:
+        total = np.zeros(valor_principal.shape[0])
+        indices = np.asarray(regras_mora['indice'], dtype=np.intp)
+        if indices.size == 0:
+            return total
+        if not set(regras_mora['tipo']) <= _TIPOS_MORA:
+            raise ValueError("Tipo de mora não suportado")
+
+        taxas = np.asarray(regras_mora['taxa'], dtype=np.float64)
+        vencimentos = _como_datas(regras_mora['data_vencimento'])
+        dias_atraso = (data_calculo[indices] - vencimentos).astype(np.int64)
+        em_atraso = dias_atraso > 0
+        if not em_atraso.any():
+            return total
+
+        datas_periodo = _como_datas(regras_mora['data_periodo']) if 'data_periodo' in regras_mora else vencimentos
+        indices, taxas, dias_atraso, datas_periodo = indices[em_atraso], taxas[em_atraso], dias_atraso[em_atraso], datas_periodo[em_atraso]
+        regras = [regra for regra, atrasada in zip(regras_mora['regra'], em_atraso) if atrasada]
+        periodos = _periodos_base(regras, datas_periodo)
+        # Mora simples, composta e diária também coincidem algebricamente.
+        mora = valor_principal[indices] * taxas * dias_atraso / (periodos * 100)
+        return np.bincount(indices, weights=mora, minlength=total.shape[0])
+
+    @staticmethod
+    def calcular_valor_total_devido(
+        valor_principal: Sequence[float],
+        data_inicio: DataOuColuna,
+        data_calculo: DataOuColuna,
+        regras_juros: Dict[str, Sequence],
+        regras_mora: Dict[str, Sequence],
+        encargos_acumulados: Sequence[float] = None
+    ) -> Dict[str, np.ndarray]:
+        principal = np.asarray(valor_principal, dtype=np.float64)
+        quantidade = principal.shape[0]
+        inicio = np.broadcast_to(_como_datas(data_inicio), (quantidade,))
+        calculo = np.broadcast_to(_como_datas(data_calculo), (quantidade,))
+
+        juros = CalculoJurosLote.calcular_juros(principal, inicio, calculo, regras_juros)
+        mora = CalculoJurosLote.calcular_mora(principal, calculo, regras_mora)
+        total = principal + juros + mora
+        if encargos_acumulados is not None:
+            # Juros e mora já apropriados antes de data_inicio (ver ApropriacaoJuros)
+            total = total + np.asarray(encargos_acumulados, dtype=np.float64)
+
+        return {
+            "juros": _arredondar_centavos(juros),
+            "mora": _arredondar_centavos(mora),
+            "total": _arredondar_centavos(total),
+        }
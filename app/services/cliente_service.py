@@ -5,6 +5,7 @@ from app.models.cliente import Cliente
 from app.schemas.cliente import ClienteCreate, ClienteUpdate
 from datetime import datetime
 from .base_service import BaseService
+from .estatistica_cliente_service import EstatisticaClienteService
 from typing import List
 
 class ClienteService(BaseService):
@@ -12,6 +13,8 @@ class ClienteService(BaseService):
         try:
             db_cliente = Cliente(**cliente.model_dump())
             self.db.add(db_cliente)
+            self.db.flush()
+            EstatisticaClienteService(self.db).criar(db_cliente.id)
             self.db.commit()
             self.db.refresh(db_cliente)
             self.logger.info(f"Cliente criado com sucesso: {db_cliente.id}")
@@ -26,6 +29,10 @@ class ClienteService(BaseService):
         query = self.db.query(Cliente).filter(Cliente.ativo == True)
         return self.paginate(query, page, per_page)
 
+    def listar_clientes_cursor(self, cursor: str = None, per_page: int = 20) -> dict:
+        query = self.db.query(Cliente).filter(Cliente.ativo == True)
+        return self.paginate_cursor(query, Cliente.id, Cliente.id, cursor, per_page)
+
     def atualizar_cliente(db: Session, cliente_id: int, cliente: ClienteUpdate):
         db_cliente = db.query(Cliente).filter(Cliente.id == cliente_id, Cliente.ativo == True).first()
         if db_cliente:
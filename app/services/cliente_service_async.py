@@ -0,0 +1,55 @@
+#Emprestimo-Facil\app\services\cliente_service_async.py
+
+from sqlalchemy import select
+from app.models.cliente import Cliente
+from app.schemas.cliente import ClienteCreate, ClienteUpdate
+from datetime import datetime
+from .base_service import BaseServiceAsync
+from .estatistica_cliente_service import EstatisticaClienteService
+from typing import List, Optional
+
+# Versão de ClienteService para as rotas assíncronas (AsyncSession); os workers usam a síncrona
+class ClienteServiceAsync(BaseServiceAsync):
+    async def criar_cliente(self, cliente: ClienteCreate):
+        try:
+            db_cliente = Cliente(**cliente.model_dump())
+            self.db.add(db_cliente)
+            await self.db.flush()
+            await self.db.run_sync(lambda sessao: EstatisticaClienteService(sessao).criar(db_cliente.id))
+            await self.db.commit()
+            await self.db.refresh(db_cliente)
+            self.logger.info(f"Cliente criado com sucesso: {db_cliente.id}")
+            return db_cliente
+        except Exception as e:
+            await self.db.rollback()
+            self.handle_exception(e, 400)
+
+    async def obter_cliente(self, cliente_id: int) -> Optional[Cliente]:
+        resultado = await self.db.execute(select(Cliente).where(Cliente.id == cliente_id, Cliente.ativo == True))
+        return resultado.scalar_one_or_none()
+
+    async def listar_clientes(self, page: int = 1, per_page: int = 20, skip: int = None) -> List[Cliente]:
+        query = select(Cliente).where(Cliente.ativo == True).order_by(Cliente.id)
+        return await self.paginate(query, page, per_page, skip)
+
+    async def listar_clientes_cursor(self, cursor: str = None, per_page: int = 20) -> dict:
+        query = select(Cliente).where(Cliente.ativo == True)
+        return await self.paginate_cursor(query, Cliente.id, Cliente.id, cursor, per_page)
+
+    async def atualizar_cliente(self, cliente_id: int, cliente: ClienteUpdate) -> Optional[Cliente]:
+        db_cliente = await self.obter_cliente(cliente_id)
+        if db_cliente:
+            for key, value in cliente.model_dump(exclude_unset=True).items():
+                setattr(db_cliente, key, value)
+            db_cliente.atualizado_em = datetime.utcnow()
+            await self.db.commit()
+            await self.db.refresh(db_cliente)
+        return db_cliente
+
+    async def deletar_cliente(self, cliente_id: int) -> Optional[Cliente]:
+        db_cliente = await self.obter_cliente(cliente_id)
+        if db_cliente:
+            db_cliente.ativo = False
+            db_cliente.atualizado_em = datetime.utcnow()
+            await self.db.commit()
+        return db_cliente
\ No newline at end of file
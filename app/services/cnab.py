@@ -0,0 +1,111 @@
+#Emprestimo-Facil\app\services\cnab.py
+
+from dataclasses import dataclass
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Iterable, Iterator, NamedTuple, Optional
+
+# Códigos de ocorrência/movimento que representam dinheiro recebido
+OCORRENCIAS_LIQUIDACAO = frozenset({"06", "15", "17"})
+
+class LayoutCnab400(NamedTuple):
+    # Posições (base zero) do registro de detalhe; padrão do retorno Bradesco
+    nosso_numero: slice = slice(70, 82)
+    ocorrencia: slice = slice(108, 110)
+    data_ocorrencia: slice = slice(110, 116)
+    valor_pago: slice = slice(253, 266)
+    sequencial: slice = slice(394, 400)
+    # No header: número do aviso bancário, sequencial por arquivo gerado
+    nsa: slice = slice(108, 113)
+
+class LayoutCnab240(NamedTuple):
+    # Segmento T traz o título e o movimento; o segmento U seguinte traz valores e datas (FEBRABAN)
+    lote: slice = slice(3, 7)
+    sequencial: slice = slice(8, 13)
+    movimento: slice = slice(15, 17)
+    nosso_numero: slice = slice(37, 57)
+    valor_pago: slice = slice(77, 92)
+    data_ocorrencia: slice = slice(137, 145)
+    # No header de arquivo: número sequencial do arquivo (NSA)
+    nsa: slice = slice(157, 163)
+
+@dataclass(frozen=True)
+class RegistroRetorno:
+    linha: int
+    nosso_numero: str
+    ocorrencia: str
+    valor_pago: Decimal
+    data_pagamento: Optional[date]
+    # NSA do arquivo e número sequencial do registro nele: juntos identificam a liquidação
+    nsa: str = ""
+    sequencial: str = ""
+
+    @property
+    def liquidacao(self) -> bool:
+        return self.ocorrencia in OCORRENCIAS_LIQUIDACAO
+
+class ErroArquivoCnab(ValueError):
+    pass
+
+def _valor(campo: str) -> Decimal:
+    return Decimal(int(campo or 0)).scaleb(-2)
+
+def _data(campo: str, formato: str) -> Optional[date]:
+    if not campo.strip("0 "):
+        return None
+    return datetime.strptime(campo, formato).date()
+
+def ler_retorno(linhas: Iterable[str], layout_400: LayoutCnab400 = LayoutCnab400(), layout_240: LayoutCnab240 = LayoutCnab240()) -> Iterator[RegistroRetorno]:
+    """
+    Lê um arquivo de retorno CNAB 400 ou 240 linha a linha e devolve um registro por título.
+    O formato sai do tamanho do header; nada além da linha atual (e, no 240, do segmento T
+    pendente) fica em memória.
+    """
+    formato = None
+    nsa = ""
+    segmento_t = None
+    for numero, linha in enumerate(linhas, start=1):
+        linha = linha.rstrip("\r\n")
+        if not linha:
+            continue
+        if formato is None:
+            formato = len(linha)
+            if formato not in (240, 400):
+                raise ErroArquivoCnab(f"Linha {numero}: tamanho {formato} não corresponde a CNAB 240 nem 400")
+        elif len(linha) != formato:
+            raise ErroArquivoCnab(f"Linha {numero}: esperado {formato} caracteres, encontrado {len(linha)}")
+
+        try:
+            if formato == 400:
+                if linha[0] == "0":
+                    nsa = linha[layout_400.nsa].strip()
+                if linha[0] != "1":
+                    continue
+                yield RegistroRetorno(
+                    linha=numero,
+                    nosso_numero=linha[layout_400.nosso_numero].strip(),
+                    ocorrencia=linha[layout_400.ocorrencia],
+                    valor_pago=_valor(linha[layout_400.valor_pago]),
+                    data_pagamento=_data(linha[layout_400.data_ocorrencia], "%d%m%y"),
+                    nsa=nsa,
+                    sequencial=linha[layout_400.sequencial].strip()
+                )
+            elif linha[7] == "0":
+                nsa = linha[layout_240.nsa].strip()
+            elif linha[7] == "3":
+                if linha[13] == "T":
+                    segmento_t = (numero, linha)
+                elif linha[13] == "U" and segmento_t is not None:
+                    numero_t, linha_t = segmento_t
+                    segmento_t = None
+                    yield RegistroRetorno(
+                        linha=numero_t,
+                        nosso_numero=linha_t[layout_240.nosso_numero].strip(),
+                        ocorrencia=linha_t[layout_240.movimento],
+                        valor_pago=_valor(linha[layout_240.valor_pago]),
+                        data_pagamento=_data(linha[layout_240.data_ocorrencia], "%d%m%Y"),
+                        nsa=nsa,
+                        sequencial=f"{linha_t[layout_240.lote]}-{linha_t[layout_240.sequencial]}".replace(" ", "")
+                    )
+        except ValueError as e:
+            raise ErroArquivoCnab(f"Linha {numero}: {str(e)}") from e
\ No newline at end of file
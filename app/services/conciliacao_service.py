@@ -0,0 +1,129 @@
+#Emprestimo-Facil\app\services\conciliacao_service.py
+
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+from app.models.emprestimo import Emprestimo, StatusEmprestimo
+from app.schemas.emprestimo import PagamentoLoteItem
+from app.services.cnab import LayoutCnab240, LayoutCnab400, RegistroRetorno, ler_retorno
+from app.services.emprestimo_service import EmprestimoService
+from app.core.logger import get_logger
+from decimal import Decimal
+from typing import Iterable, List, Optional
+import numpy as np
+
+logger = get_logger(__name__)
+
+# Liquidações enviadas a registrar_pagamentos por vez (que as divide em transações menores)
+TAMANHO_LOTE_CONCILIACAO = 2000
+METODO_PAGAMENTO_CNAB = "boleto"
+
+def emprestimo_do_nosso_numero(nosso_numero: str) -> Optional[int]:
+    # O nosso número dos boletos emitidos é o id do empréstimo com zeros à esquerda
+    return int(nosso_numero) if nosso_numero.isdigit() and int(nosso_numero) > 0 else None
+
+class ConciliacaoService:
+    def __init__(self, db: Session, layout_400: LayoutCnab400 = LayoutCnab400(), layout_240: LayoutCnab240 = LayoutCnab240()):
+        self.db = db
+        self.emprestimo_service = EmprestimoService(db)
+        self.layout_400 = layout_400
+        self.layout_240 = layout_240
+        self._indice = None
+
+    def _carregar_indice(self) -> np.ndarray:
+        # Ids ordenados dos empréstimos que aceitam pagamento: 8 bytes por empréstimo, consulta por busca binária
+        if self._indice is None:
+            ids = self.db.execute(
+                select(Emprestimo.id).where(Emprestimo.status.in_([StatusEmprestimo.ATIVO, StatusEmprestimo.ATRASADO]))
+            ).scalars()
+            self._indice = np.sort(np.fromiter(ids, dtype=np.int64))
+        return self._indice
+
+    def _em_aberto(self, emprestimo_ids: List[int]) -> np.ndarray:
+        indice = self._carregar_indice()
+        ids = np.asarray(emprestimo_ids, dtype=np.int64)
+        posicoes = np.minimum(np.searchsorted(indice, ids), max(len(indice) - 1, 0))
+        return indice[posicoes] == ids if len(indice) else np.zeros(len(ids), dtype=bool)
+
+    def processar_retorno(self, linhas: Iterable[str], tamanho_lote: int = TAMANHO_LOTE_CONCILIACAO) -> dict:
+        """
+        Aplica as liquidações de um arquivo de retorno CNAB e devolve o relatório de conciliação.
+        O arquivo é lido em fluxo e aplicado em lotes; só os itens que precisam de atenção
+        (não encontrados, duplicados e rejeitados) ficam no relatório.
+        """
+        relatorio = {
+            "registros": 0,
+            "liquidacoes": 0,
+            "ignorados": 0,
+            "registrados": 0,
+            "valor_registrado": Decimal("0"),
+            "nao_encontrados": [],
+            "duplicados": [],
+            "rejeitados": []
+        }
+
+        lote = []
+        for registro in ler_retorno(linhas, self.layout_400, self.layout_240):
+            relatorio["registros"] += 1
+            if not registro.liquidacao:
+                relatorio["ignorados"] += 1
+                continue
+            relatorio["liquidacoes"] += 1
+            lote.append(registro)
+            if len(lote) >= tamanho_lote:
+                self._aplicar_lote(lote, relatorio)
+                lote = []
+        if lote:
+            self._aplicar_lote(lote, relatorio)
+
+        logger.info(
+            f"Retorno CNAB conciliado: {relatorio['registrados']} de {relatorio['liquidacoes']} liquidações registradas, "
+            f"{len(relatorio['nao_encontrados'])} não encontradas, {len(relatorio['duplicados'])} duplicadas"
+        )
+        return relatorio
+
+    def _aplicar_lote(self, registros: List[RegistroRetorno], relatorio: dict):
+        emprestimo_ids = [emprestimo_do_nosso_numero(r.nosso_numero) or 0 for r in registros]
+        encontrados = self._em_aberto(emprestimo_ids)
+
+        itens, origem = [], []
+        for registro, emprestimo_id, encontrado in zip(registros, emprestimo_ids, encontrados):
+            if not encontrado:
+                relatorio["nao_encontrados"].append(self._item_relatorio(registro, "Nosso número sem empréstimo em aberto"))
+                continue
+            itens.append(PagamentoLoteItem(
+                emprestimo_id=emprestimo_id,
+                valor=float(registro.valor_pago),
+                metodo_pagamento=METODO_PAGAMENTO_CNAB,
+                chave_idempotencia=self._chave(registro),
+                data_pagamento=registro.data_pagamento
+            ))
+            origem.append(registro)
+        if not itens:
+            return
+
+        for registro, resultado in zip(origem, self.emprestimo_service.registrar_pagamentos(itens)):
+            if resultado["status"] == "registrado":
+                relatorio["registrados"] += 1
+                relatorio["valor_registrado"] += registro.valor_pago
+            elif resultado["status"] == "duplicado":
+                relatorio["duplicados"].append(self._item_relatorio(registro))
+            else:
+                relatorio["rejeitados"].append(self._item_relatorio(registro, resultado.get("erro")))
+
+    @staticmethod
+    def _chave(registro: RegistroRetorno) -> str:
+        # Estável entre reenvios do mesmo arquivo e única por liquidação: o nosso número é o do
+        # empréstimo, então duas parcelas pagas no mesmo dia e valor só se distinguem pelo registro
+        return f"cnab:{registro.nsa or '-'}:{registro.sequencial or registro.linha}:{registro.nosso_numero}"
+
+    @staticmethod
+    def _item_relatorio(registro: RegistroRetorno, erro: str = None) -> dict:
+        item = {
+            "linha": registro.linha,
+            "nosso_numero": registro.nosso_numero,
+            "valor_pago": registro.valor_pago,
+            "data_pagamento": registro.data_pagamento
+        }
+        if erro:
+            item["erro"] = erro
+        return item
\ No newline at end of file
@@ -0,0 +1,174 @@
+#Emprestimo-Facil\app\services\contador_service.py
+
+from sqlalchemy import select, update, insert, func, case, bindparam
+from app.models.contador import ContadorCarteira
+from app.models.emprestimo import Emprestimo, StatusEmprestimo
+from app.models.pagamento import Pagamento
+from app.core.logger import get_logger
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Dict, List, NamedTuple, Optional, Tuple
+from .base_service import BaseService
+import random
+
+logger = get_logger(__name__)
+
+# Linhas de contadores_carteira por total
+FATIAS_CONTADOR = 8
+
+CHAVES_CONTADOR = (
+    "total_emprestimos",
+    "valor_total_emprestado",
+    "valor_total_recebido",
+    "emprestimos_ativos",
+    "emprestimos_atrasados",
+)
+
+# Não é um total: conta as escritas que mudam as parcelas a receber (parcelas gravadas ou
+# abatidas, empréstimos que entram ou saem de curso) e versiona leituras guardadas em cache,
+# como a projeção de caixa. Só cresce; a reconciliação cria as fatias, mas não o recalcula
+CHAVE_VERSAO_PARCELAS = "versao_parcelas"
+# Parcelas de empréstimos pendentes, quitados ou cancelados não entram em vencimentos e projeções
+STATUS_EMPRESTIMO_EM_CURSO = (StatusEmprestimo.ATIVO, StatusEmprestimo.ATRASADO)
+
+# Campos de um empréstimo que entram nos totais e resumos, antes e depois de uma alteração
+class EstadoEmprestimo(NamedTuple):
+    cliente_id: int
+    status: StatusEmprestimo
+    valor: Decimal
+    valor_pago: Decimal
+    taxa_juros: Decimal
+    data_solicitacao: date
+
+    @classmethod
+    def de(cls, emprestimo: Emprestimo) -> "EstadoEmprestimo":
+        data_solicitacao = emprestimo.data_solicitacao
+        if isinstance(data_solicitacao, datetime):
+            data_solicitacao = data_solicitacao.date()
+        return cls(
+            emprestimo.cliente_id, emprestimo.status, emprestimo.valor, emprestimo.valor_pago, emprestimo.taxa_juros, data_solicitacao
+        )
+
+# (anterior, atual); anterior é None na criação
+AlteracaoEmprestimo = Tuple[Optional[EstadoEmprestimo], Optional[EstadoEmprestimo]]
+
+class ContadorService(BaseService):
+    @staticmethod
+    def _contribuicao(estado: Optional[EstadoEmprestimo]) -> Dict[str, Decimal]:
+        if estado is None:
+            return {}
+        return {
+            "total_emprestimos": 1,
+            "valor_total_emprestado": estado.valor,
+            "emprestimos_ativos": int(estado.status == StatusEmprestimo.ATIVO),
+            "emprestimos_atrasados": int(estado.status == StatusEmprestimo.ATRASADO),
+        }
+
+    def registrar_emprestimos(self, alteracoes: List[AlteracaoEmprestimo]) -> None:
+        deltas = {}
+        for anterior, atual in alteracoes:
+            for chave, valor in self._contribuicao(atual).items():
+                deltas[chave] = deltas.get(chave, 0) + valor
+            for chave, valor in self._contribuicao(anterior).items():
+                deltas[chave] = deltas.get(chave, 0) - valor
+        if any(self._em_curso(anterior) != self._em_curso(atual) for anterior, atual in alteracoes):
+            deltas[CHAVE_VERSAO_PARCELAS] = 1
+        self.ajustar(deltas)
+
+    @staticmethod
+    def _em_curso(estado: Optional[EstadoEmprestimo]) -> bool:
+        return estado is not None and estado.status in STATUS_EMPRESTIMO_EM_CURSO
+
+    def registrar_parcelas(self) -> None:
+        # Chamado por ParcelaService a cada escrita que muda os saldos das parcelas
+        self.ajustar({CHAVE_VERSAO_PARCELAS: 1})
+
+    def versao_parcelas(self) -> Optional[Decimal]:
+        # None enquanto a reconciliação não criou as fatias: sem versão, nada deve ser guardado em cache
+        return self.db.execute(
+            select(func.sum(ContadorCarteira.valor)).where(ContadorCarteira.chave == CHAVE_VERSAO_PARCELAS)
+        ).scalar()
+
+    def registrar_recebimento(self, valor: Decimal) -> None:
+        self.ajustar({"valor_total_recebido": valor})
+
+    def ajustar(self, deltas: Dict[str, Decimal]) -> None:
+        """
+        Soma `deltas` aos contadores de uma fatia sorteada, na transação corrente e sem commit.
+        As chaves são atualizadas sempre na mesma ordem, então duas transações na mesma fatia
+        esperam uma pela outra sem deadlock.
+        """
+        deltas = {chave: delta for chave, delta in deltas.items() if delta}
+        if not deltas:
+            return
+        tabela = ContadorCarteira.__table__
+        fatia = random.randrange(FATIAS_CONTADOR)
+        self.db.execute(
+            update(tabela)
+            .where(tabela.c.chave == bindparam("b_chave"), tabela.c.fatia == fatia)
+            .values(valor=tabela.c.valor + bindparam("b_delta")),
+            [{"b_chave": chave, "b_delta": deltas[chave]} for chave in sorted(deltas)]
+        )
+
+    def calcular(self) -> Dict[str, Decimal]:
+        # Agregado completo em uma única consulta, com contagens condicionais por status
+        recebido = select(func.coalesce(func.sum(Pagamento.valor), 0)).scalar_subquery()
+        linha = self.db.execute(select(
+            func.count(Emprestimo.id).label("total_emprestimos"),
+            func.coalesce(func.sum(Emprestimo.valor), 0).label("valor_total_emprestado"),
+            recebido.label("valor_total_recebido"),
+            func.count(case((Emprestimo.status == StatusEmprestimo.ATIVO, 1))).label("emprestimos_ativos"),
+            func.count(case((Emprestimo.status == StatusEmprestimo.ATRASADO, 1))).label("emprestimos_atrasados"),
+        )).one()
+        return {chave: Decimal(linha._mapping[chave]) for chave in CHAVES_CONTADOR}
+
+    def obter(self) -> Dict[str, Decimal]:
+        # Lê no máximo FATIAS_CONTADOR linhas por total, qualquer que seja o tamanho da carteira
+        totais = dict(self.db.execute(
+            select(ContadorCarteira.chave, func.sum(ContadorCarteira.valor)).group_by(ContadorCarteira.chave)
+        ).all())
+        if not set(CHAVES_CONTADOR) <= set(totais):
+            # Contadores ainda não reconciliados (base nova ou recém-migrada)
+            return self.calcular()
+        return {chave: totais[chave] for chave in CHAVES_CONTADOR}
+
+    def reconciliar(self) -> Dict[str, Decimal]:
+        """
+        Regrava os contadores com o agregado completo, corrigindo desvios de escritas feitas
+        fora dos serviços (cargas em massa, correções manuais), e devolve as diferenças. As
+        fatias são bloqueadas antes do agregado e atualizadas no lugar: uma escrita concorrente
+        espera o commit e soma seu delta sobre o valor novo, sem se perder nem contar duas vezes.
+        """
+        linhas = self.db.execute(
+            select(ContadorCarteira.chave, ContadorCarteira.fatia, ContadorCarteira.valor)
+            .order_by(ContadorCarteira.chave, ContadorCarteira.fatia)
+            .with_for_update()
+        ).all()
+        atuais = {}
+        for linha in linhas:
+            atuais[linha.chave] = atuais.get(linha.chave, 0) + linha.valor
+
+        totais = self.calcular()
+        divergencias = {chave: totais[chave] - atuais.get(chave, 0) for chave in CHAVES_CONTADOR if totais[chave] != atuais.get(chave, 0)}
+
+        existentes = {(linha.chave, linha.fatia) for linha in linhas}
+        valores = [
+            {"chave": chave, "fatia": fatia, "valor": totais[chave] if fatia == 0 else Decimal('0')}
+            for chave in CHAVES_CONTADOR
+            for fatia in range(FATIAS_CONTADOR)
+        ]
+        atualizados = [v for v in valores if (v["chave"], v["fatia"]) in existentes]
+        novos = [v for v in valores if (v["chave"], v["fatia"]) not in existentes] + [
+            {"chave": CHAVE_VERSAO_PARCELAS, "fatia": fatia, "valor": Decimal('0')}
+            for fatia in range(FATIAS_CONTADOR)
+            if (CHAVE_VERSAO_PARCELAS, fatia) not in existentes
+        ]
+        if atualizados:
+            self.db.execute(update(ContadorCarteira), atualizados)
+        if novos:
+            self.db.execute(insert(ContadorCarteira), novos)
+        self.db.commit()
+
+        if divergencias and existentes:
+            logger.warning(f"Contadores da carteira corrigidos pela reconciliação: {divergencias}")
+        return divergencias
\ No newline at end of file
@@ -1,158 +1,720 @@
 #Emprestimo-Facil\app\services\emprestimo_service.py
 
-from sqlalchemy.orm import Session
+from sqlalchemy import select, update, insert, and_, exists, Select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session, contains_eager, joinedload, selectinload, raiseload
 from app.models.emprestimo import Emprestimo, StatusEmprestimo, Pagamento
-from app.schemas.emprestimo import EmprestimoCreate, EmprestimoUpdate, PagamentoCreate
-from datetime import datetime, date
+from app.models.cliente import Cliente
+from app.schemas.emprestimo import EmprestimoCreate, EmprestimoUpdate, PagamentoCreate, PagamentoLoteItem
+from datetime import datetime, date, timedelta
 from .base_service import BaseService
-from typing import List
+from typing import Iterator, List, Optional
+from itertools import islice
 from app.core.config import settings
 from app.services.notification_service import NotificationFactory
-from app.services.calculo_juros import CalculoJuros, TipoJuros, TipoMora, RegraFixa, RegraRecorrente
-from decimal import Decimal
-from app.services.cache import cache, cache_decorator
-from app.core.celery_app import enviar_notificacao_async
+from app.services.calculo_juros import CalculoJuros, TipoJuros, TipoMora, RegraFixa, RegraRecorrente, DIAS_BASE_TAXA_ANUAL
+from app.services.calculo_juros_lote import CalculoJurosLote
+from app.services.apropriacao_service import ApropriacaoService
+from app.models.apropriacao import OrigemApropriacao
+from app.models.parcela import Parcela
+from app.services.parcela_service import ParcelaService
+from decimal import Decimal, ROUND_HALF_UP
+import numpy as np
+from app.services.outbox_service import OutboxService
+from app.services.contador_service import ContadorService, EstadoEmprestimo, AlteracaoEmprestimo
+from app.services.resumo_service import ResumoService
+from app.services.estatistica_cliente_service import EstatisticaClienteService
+from app.services.ranking_service import RankingService
 from app.core.logger import get_logger
 from app.services.garantia_service import GarantiaService
 from app.schemas.garantia import GarantiaCreate
 
 logger = get_logger(__name__)
 
+# verificar_atrasos: empréstimos marcados por transação
+TAMANHO_LOTE_ATRASOS = 1000
+# registrar_pagamentos: pagamentos (e empréstimos bloqueados) por transação
+TAMANHO_LOTE_PAGAMENTOS = 500
+# Exportação: linhas lidas do cursor do servidor por vez
+TAMANHO_LOTE_EXPORTACAO = 1000
+
+# Colunas aceitas em listar_emprestimos_cursor; cada uma tem índice composto com o id
+ORDENACOES_EMPRESTIMO = {
+    "id": Emprestimo.id,
+    "data_solicitacao": Emprestimo.data_solicitacao,
+    "data_vencimento": Emprestimo.data_vencimento,
+}
+
+# Relacionamentos carregados pela listagem (schema Emprestimo) e pelo relatório: o cliente no
+# mesmo SELECT, pagamentos e garantias em um SELECT ... IN cada. As regras de pagamento e de
+# juros não são relacionamentos (vêm das colunas do empréstimo) e não têm o que carregar.
+# Qualquer outro acesso preguiçoso no relatório gera erro em vez de uma consulta por empréstimo.
+# São funções porque montar as opções configura os mapeamentos, o que exige todos os modelos importados
+def _opcoes_listagem():
+    return (joinedload(Emprestimo.cliente), selectinload(Emprestimo.pagamentos), selectinload(Emprestimo.garantias))
+
+def _opcoes_relatorio():
+    return (*_opcoes_listagem(), raiseload('*'))
+
+# Empréstimos sem regras de juros próprias usam a taxa cadastrada como taxa anual simples: um
+# período fixo de DIAS_BASE_TAXA_ANUAL dias, a mesma base de _taxa_periodo_amortizacao
+REGRA_JUROS_PADRAO = RegraRecorrente(DIAS_BASE_TAXA_ANUAL, 'dias')
+
+def _como_data(valor):
+    return valor.date() if isinstance(valor, datetime) else valor
+
+def _momento_pagamento(data_pagamento: Optional[date], agora: datetime) -> datetime:
+    # Data da liquidação informada com o pagamento ou, sem ela, o momento do registro
+    return datetime.combine(data_pagamento, datetime.min.time()) if data_pagamento else agora
+
 class EmprestimoService(BaseService):
     def __init__(self, db: Session):
         super().__init__(db)
         self.notification_factory = NotificationFactory()
         self.calculo_juros = CalculoJuros()
+        self.apropriacao = ApropriacaoService(db)
+        self.parcelas = ParcelaService(db)
+        # Notificações vão para o outbox na transação da alteração; o relay publica no broker
+        self.outbox = OutboxService(db)
+        # Totais do painel, resumos por período e estatísticas por cliente, atualizados na
+        # mesma transação das escritas
+        self.contadores = ContadorService(db)
+        self.resumos = ResumoService(db)
+        self.estatisticas_clientes = EstatisticaClienteService(db)
+        # Rankings de clientes: pontuações lidas na transação e publicadas no commit
+        self.rankings = RankingService(db)
+        # Valores devidos já calculados nesta requisição, por (emprestimo_id, data)
+        self._valores_devidos = {}
 
     def criar_emprestimo(self, emprestimo: EmprestimoCreate):
         try:
             db_emprestimo = Emprestimo(**emprestimo.model_dump(exclude={'regras_pagamento'}))
             db_emprestimo.regras_pagamento = self._criar_regras_pagamento(emprestimo.regras_pagamento)
-            db_emprestimo.proximo_vencimento = self._calcular_proximo_vencimento(db_emprestimo)
+            cronograma = self._gerar_cronograma(db_emprestimo, date.today())
+            db_emprestimo.proximo_vencimento = cronograma[0]["data_vencimento"]
             self.db.add(db_emprestimo)
+            self.db.flush()
+            self.parcelas.inserir_parcelas(db_emprestimo.id, cronograma)
+            self._registrar_alteracoes([(None, EstadoEmprestimo.de(db_emprestimo))])
+            self._notificar_cliente(db_emprestimo, "criacao")
             self.db.commit()
             self.db.refresh(db_emprestimo)
-            self._notificar_cliente(db_emprestimo, "criacao")
             logger.info(f"Empréstimo criado com sucesso: ID {db_emprestimo.id}")
             return db_emprestimo
         except Exception as e:
             logger.error(f"Erro ao criar empréstimo: {str(e)}")
             self.handle_exception(e, 400)
 
-    @cache_decorator(expire_time=3600)
-    async def obter_emprestimo(self, emprestimo_id: int):
-        emprestimo = await self.db.query(Emprestimo).filter(Emprestimo.id == emprestimo_id).first()
+    def obter_emprestimo(self, emprestimo_id: int) -> Emprestimo:
+        # Sem cache: a sessão devolve o objeto vivo, que as alterações abaixo modificam e gravam.
+        # As rotas leem por EmprestimoServiceAsync
+        return self._buscar_emprestimo(emprestimo_id)
+
+    def _buscar_emprestimo(self, emprestimo_id: int, bloquear: bool = False) -> Emprestimo:
+        query = self.db.query(Emprestimo).filter(Emprestimo.id == emprestimo_id)
+        if bloquear:
+            query = query.with_for_update().populate_existing()
+        emprestimo = query.first()
         if not emprestimo:
             self.handle_not_found(f"Empréstimo com id {emprestimo_id} não encontrado")
         return emprestimo
 
-    def listar_emprestimos(self, page: int = 1, per_page: int = 20, filtros: dict = None):
-        query = self.db.query(Emprestimo)
+    def _consulta_listagem(self, filtros: dict = None):
+        query = self.db.query(Emprestimo).options(*_opcoes_listagem())
         if filtros:
             if 'status' in filtros:
                 query = query.filter(Emprestimo.status == filtros['status'])
             if 'cliente_id' in filtros:
                 query = query.filter(Emprestimo.cliente_id == filtros['cliente_id'])
-        return self.paginate(query, page, per_page)
+        return query
+
+    def listar_emprestimos(self, page: int = 1, per_page: int = 20, filtros: dict = None):
+        return self.paginate(self._consulta_listagem(filtros), page, per_page)
+
+    def listar_emprestimos_cursor(self, cursor: str = None, per_page: int = 20, ordenar_por: str = "id", filtros: dict = None) -> dict:
+        # Paginação por cursor para percorrer a carteira inteira sem o custo crescente do OFFSET
+        if ordenar_por not in ORDENACOES_EMPRESTIMO:
+            self.handle_exception(ValueError(f"Ordenação inválida: {ordenar_por}"), 400)
+        coluna = ORDENACOES_EMPRESTIMO[ordenar_por]
+        return self.paginate_cursor(self._consulta_listagem(filtros), coluna, Emprestimo.id, cursor, per_page)
 
-    async def atualizar_emprestimo(self, emprestimo_id: int, emprestimo_update: EmprestimoUpdate):
-        db_emprestimo = await self.obter_emprestimo(emprestimo_id)
+    def atualizar_emprestimo(self, emprestimo_id: int, emprestimo_update: EmprestimoUpdate):
+        db_emprestimo = self.obter_emprestimo(emprestimo_id)
+        anterior = EstadoEmprestimo.de(db_emprestimo)
         for key, value in emprestimo_update.model_dump(exclude_unset=True).items():
             setattr(db_emprestimo, key, value)
         db_emprestimo.atualizado_em = datetime.utcnow()
+        self._registrar_alteracoes([(anterior, EstadoEmprestimo.de(db_emprestimo))])
+        self._notificar_cliente(db_emprestimo, "atualizacao")
         self.db.commit()
         self.db.refresh(db_emprestimo)
-        self._notificar_cliente(db_emprestimo, "atualizacao")
-        await cache.delete(f"emprestimo:{emprestimo_id}")
-        await cache.delete("lista_emprestimos")
+        self._valores_devidos.clear()
         return db_emprestimo
 
-    async def deletar_emprestimo(self, emprestimo_id: int):
-        db_emprestimo = await self.obter_emprestimo(emprestimo_id)
+    def deletar_emprestimo(self, emprestimo_id: int):
+        db_emprestimo = self.obter_emprestimo(emprestimo_id)
+        anterior = EstadoEmprestimo.de(db_emprestimo)
         db_emprestimo.status = StatusEmprestimo.CANCELADO
         db_emprestimo.atualizado_em = datetime.utcnow()
-        self.db.commit()
+        self._registrar_alteracoes([(anterior, EstadoEmprestimo.de(db_emprestimo))])
         self._notificar_cliente(db_emprestimo, "cancelamento")
-        await cache.delete(f"emprestimo:{emprestimo_id}")
-        await cache.delete("lista_emprestimos")
+        self.db.commit()
+        self._valores_devidos.clear()
         return db_emprestimo
 
     def registrar_pagamento(self, emprestimo_id: int, pagamento: PagamentoCreate):
-        emprestimo = self.obter_emprestimo(emprestimo_id)
-        valor_devido = self.calcular_valor_total_devido(emprestimo)
+        # O empréstimo fica bloqueado até o commit: pagamentos simultâneos são aplicados um após o outro
+        emprestimo = self._buscar_emprestimo(emprestimo_id, bloquear=True)
+        if pagamento.chave_idempotencia and self._chaves_registradas([pagamento.chave_idempotencia]):
+            self.db.rollback()
+            logger.info(f"Pagamento {pagamento.chave_idempotencia} já registrado para o empréstimo {emprestimo_id}")
+            return emprestimo
+
+        data_liquidacao = self._datas_liquidacao({emprestimo.id: pagamento.data_pagamento}, {emprestimo.id: emprestimo})[emprestimo.id]
+        posicao = self.calcular_posicao(emprestimo, data_liquidacao)
+        valor_devido = posicao["total"].quantize(Decimal('.01'), rounding=ROUND_HALF_UP)
+        valor_pagamento = Decimal(str(pagamento.valor))
 
-        if pagamento.valor > valor_devido:
-            raise ValueError("O valor do pagamento excede o valor devido")
+        if valor_pagamento > valor_devido:
+            # Encerra a transação para liberar o bloqueio do empréstimo antes de responder
+            self.db.rollback()
+            self.handle_exception(ValueError("O valor do pagamento excede o valor devido"), 400)
 
         novo_pagamento = Pagamento(
             emprestimo_id=emprestimo.id,
             valor=pagamento.valor,
-            data_pagamento=datetime.utcnow(),
-            metodo_pagamento=pagamento.metodo_pagamento
+            data_pagamento=_momento_pagamento(pagamento.data_pagamento, datetime.utcnow()),
+            metodo_pagamento=pagamento.metodo_pagamento,
+            chave_idempotencia=pagamento.chave_idempotencia
         )
-        self.db.add(novo_pagamento)
-
-        if pagamento.valor >= valor_devido:
-            emprestimo.status = StatusEmprestimo.QUITADO
-            emprestimo.valor = Decimal('0')
-        else:
-            emprestimo.valor -= pagamento.valor
+        try:
+            self.db.add(novo_pagamento)
 
-        emprestimo.proximo_vencimento = self._calcular_proximo_vencimento(emprestimo)
-        emprestimo.atualizado_em = datetime.utcnow()
+            posicao_anterior, posicao = posicao, self._aplicar_pagamento(posicao, valor_pagamento, valor_devido)
+            self.apropriacao.descartar_diarios({emprestimo.id: data_liquidacao})
+            self.apropriacao.registrar_checkpoint(emprestimo.id, posicao, OrigemApropriacao.PAGAMENTO)
+            proximo_vencimento = self.parcelas.abater_pagamento(
+                emprestimo.id, self._valor_das_parcelas(posicao_anterior, posicao), quitado=posicao["total"] == 0
+            )
+            anterior = EstadoEmprestimo.de(emprestimo)
+            self._atualizar_apos_pagamento(emprestimo, posicao, valor_pagamento, proximo_vencimento)
+            self._registrar_alteracoes([(anterior, EstadoEmprestimo.de(emprestimo))], valor_pagamento)
+            self._notificar_cliente(emprestimo, "pagamento", posicao["total"])
 
-        self.db.commit()
+            self.db.commit()
+        except IntegrityError:
+            # Outra requisição gravou a mesma chave entre a checagem e o INSERT: o pagamento já existe
+            self.db.rollback()
+            existente = self._pagamento_por_chave(pagamento.chave_idempotencia)
+            if existente is None:
+                raise
+            logger.info(f"Pagamento {pagamento.chave_idempotencia} já registrado para o empréstimo {existente.emprestimo_id}")
+            return self._buscar_emprestimo(existente.emprestimo_id)
         self.db.refresh(emprestimo)
-        self._notificar_cliente(emprestimo, "pagamento")
+        self._valores_devidos.clear()
         return emprestimo
 
-    def calcular_valor_total_devido(self, emprestimo: Emprestimo, data_calculo: date = None):
+    def registrar_pagamentos(self, pagamentos: List[PagamentoLoteItem], tamanho_lote: int = TAMANHO_LOTE_PAGAMENTOS) -> List[dict]:
+        """
+        Registra pagamentos em lote e devolve um resultado por item, na ordem recebida. Cada lote
+        é uma transação que bloqueia (SELECT ... FOR UPDATE) os empréstimos envolvidos em ordem
+        de id, para que workers em paralelo não percam atualizações nem entrem em deadlock.
+        Itens com chave de idempotência já registrada voltam como "duplicado".
+        """
+        resultados = []
+        for inicio in range(0, len(pagamentos), tamanho_lote):
+            lote = pagamentos[inicio:inicio + tamanho_lote]
+            chaves = [p.chave_idempotencia for p in lote]
+            chaves_registradas = self._chaves_registradas(chaves)
+            while True:
+                try:
+                    resultados_lote = self._registrar_lote_pagamentos(lote, set(chaves_registradas))
+                    break
+                except IntegrityError:
+                    # Outro worker gravou chaves do lote entre a checagem e o INSERT: elas são relidas e
+                    # voltam como "duplicado". Cada conflito acrescenta ao menos uma chave registrada;
+                    # sem chave nova, o erro não veio da idempotência
+                    self.db.rollback()
+                    relidas = self._chaves_registradas(chaves)
+                    if relidas <= chaves_registradas:
+                        raise
+                    chaves_registradas = relidas
+            resultados.extend(resultados_lote)
+
+        self._valores_devidos.clear()
+        registrados = sum(1 for r in resultados if r["status"] == "registrado")
+        logger.info(f"Lote de pagamentos processado: {registrados} de {len(resultados)} registrados")
+        return resultados
+
+    def _registrar_lote_pagamentos(self, lote: List[PagamentoLoteItem], chaves_registradas: set) -> List[dict]:
+        hoje = date.today()
+        agora = datetime.utcnow()
+        emprestimos = {
+            e.id: e
+            for e in self.db.execute(
+                select(Emprestimo)
+                .where(Emprestimo.id.in_({p.emprestimo_id for p in lote}))
+                .order_by(Emprestimo.id)
+                .with_for_update()
+                .execution_options(populate_existing=True)
+            ).scalars()
+        }
+        # A posição de cada empréstimo parte da data do seu primeiro pagamento no lote
+        primeiras = {}
+        for item in lote:
+            if item.emprestimo_id in emprestimos and item.chave_idempotencia not in chaves_registradas:
+                primeiras.setdefault(item.emprestimo_id, item.data_pagamento)
+        datas_base = self._datas_liquidacao(primeiras, emprestimos, hoje)
+        por_data, checkpoints = {}, {}
+        for emprestimo_id, data in datas_base.items():
+            por_data.setdefault(data, []).append(emprestimo_id)
+        for data, emprestimo_ids in por_data.items():
+            checkpoints.update(self.apropriacao.obter_checkpoints(emprestimo_ids, data))
+
+        # Vários pagamentos do mesmo empréstimo no lote são aplicados em sequência sobre a mesma
+        # posição, avançada até a data de cada um (nunca para trás)
+        posicoes, valores_pagos, valores_parcelas = {}, {}, {}
+        novos_pagamentos, resultados = [], []
+        for item in lote:
+            resultado = {"chave_idempotencia": item.chave_idempotencia, "emprestimo_id": item.emprestimo_id}
+            resultados.append(resultado)
+            emprestimo = emprestimos.get(item.emprestimo_id)
+            if item.chave_idempotencia in chaves_registradas:
+                resultado["status"] = "duplicado"
+                continue
+            if emprestimo is None:
+                resultado.update(status="rejeitado", erro=f"Empréstimo com id {item.emprestimo_id} não encontrado")
+                continue
+
+            posicao = posicoes.get(emprestimo.id) or self._calcular_posicao(emprestimo, datas_base[emprestimo.id], checkpoints.get(emprestimo.id))
+            data_liquidacao = min(item.data_pagamento or hoje, hoje)
+            if data_liquidacao > posicao["data_referencia"]:
+                posicao = self._calcular_posicao(emprestimo, data_liquidacao, posicao)
+            posicoes[emprestimo.id] = posicao
+            valor_devido = posicoes[emprestimo.id]["total"].quantize(Decimal('.01'), rounding=ROUND_HALF_UP)
+            valor_pagamento = Decimal(str(item.valor))
+            if valor_pagamento > valor_devido:
+                resultado.update(status="rejeitado", erro="O valor do pagamento excede o valor devido")
+                continue
+
+            chaves_registradas.add(item.chave_idempotencia)
+            posicoes[emprestimo.id] = self._aplicar_pagamento(posicao, valor_pagamento, valor_devido)
+            valores_pagos[emprestimo.id] = valores_pagos.get(emprestimo.id, Decimal('0')) + valor_pagamento
+            valores_parcelas[emprestimo.id] = (
+                valores_parcelas.get(emprestimo.id, Decimal('0')) + self._valor_das_parcelas(posicao, posicoes[emprestimo.id])
+            )
+            novos_pagamentos.append({
+                "emprestimo_id": emprestimo.id,
+                "valor": item.valor,
+                "data_pagamento": _momento_pagamento(item.data_pagamento, agora),
+                "metodo_pagamento": item.metodo_pagamento,
+                "chave_idempotencia": item.chave_idempotencia
+            })
+            resultado["status"] = "registrado"
+
+        if not novos_pagamentos:
+            self.db.rollback()
+            return resultados
+
+        self.db.execute(insert(Pagamento), novos_pagamentos)
+        self.apropriacao.descartar_diarios({i: datas_base[i] for i in valores_pagos})
+        self.apropriacao.registrar_checkpoints({i: posicoes[i] for i in valores_pagos}, OrigemApropriacao.PAGAMENTO)
+        proximos_vencimentos = self.parcelas.abater_pagamentos(
+            valores_parcelas, [i for i in valores_pagos if posicoes[i]["total"] == 0]
+        )
+        # UPDATE em lote pela chave primária; os objetos da sessão expiram no commit logo abaixo
+        alteracoes = [
+            self._alteracoes_apos_pagamento(emprestimos[i], posicoes[i], valor_pago, proximos_vencimentos[i], agora)
+            for i, valor_pago in valores_pagos.items()
+        ]
+        anteriores = {i: EstadoEmprestimo.de(emprestimos[i]) for i in valores_pagos}
+        self.db.execute(update(Emprestimo), alteracoes)
+        self._registrar_alteracoes(
+            [(anteriores[a["id"]], anteriores[a["id"]]._replace(status=a["status"], valor_pago=a["valor_pago"])) for a in alteracoes],
+            sum(valores_pagos.values())
+        )
+
+        emails = dict(self.db.execute(
+            select(Emprestimo.id, Cliente.email).join(Emprestimo.cliente).where(Emprestimo.id.in_(list(valores_pagos)))
+        ).all())
+        self.outbox.enfileirar([
+            {
+                "to": emails[emprestimo_id],
+                "message": self._criar_mensagem_notificacao(emprestimos[emprestimo_id], "pagamento", posicoes[emprestimo_id]["total"]),
+                "notification_type": "email"
+            }
+            for emprestimo_id in valores_pagos if emprestimo_id in emails
+        ])
+        self.db.commit()
+        return resultados
+
+    def _chaves_registradas(self, chaves: List[str]) -> set:
+        chaves = [c for c in chaves if c]
+        if not chaves:
+            return set()
+        return set(self.db.execute(
+            select(Pagamento.chave_idempotencia).where(Pagamento.chave_idempotencia.in_(chaves))
+        ).scalars())
+
+    def _pagamento_por_chave(self, chave: str) -> Optional[Pagamento]:
+        if not chave:
+            return None
+        return self.db.execute(
+            select(Pagamento).where(Pagamento.chave_idempotencia == chave)
+        ).scalar_one_or_none()
+
+    @staticmethod
+    def _aplicar_pagamento(posicao: dict, valor_pagamento: Decimal, valor_devido: Decimal) -> dict:
+        if valor_pagamento >= valor_devido:
+            return dict(posicao, saldo_principal=Decimal('0'), juros=Decimal('0'), mora=Decimal('0'), total=Decimal('0'))
+        return ApropriacaoService.abater_pagamento(posicao, valor_pagamento)
+
+    @staticmethod
+    def _valor_das_parcelas(anterior: dict, posicao: dict) -> Decimal:
+        # Parte do pagamento que o livro aplicou a juros e principal, a única que paga parcelas:
+        # a mora não está no cronograma
+        abatido = anterior["juros"] + anterior["saldo_principal"] - posicao["juros"] - posicao["saldo_principal"]
+        return abatido.quantize(Decimal('.01'), rounding=ROUND_HALF_UP)
+
+    def _atualizar_apos_pagamento(self, emprestimo: Emprestimo, posicao: dict, valor_pagamento: Decimal, proximo_vencimento: date = None):
+        alteracoes = self._alteracoes_apos_pagamento(emprestimo, posicao, valor_pagamento, proximo_vencimento)
+        for chave, valor in alteracoes.items():
+            if chave != "id":
+                setattr(emprestimo, chave, valor)
+
+    def _alteracoes_apos_pagamento(self, emprestimo: Emprestimo, posicao: dict, valor_pagamento: Decimal, proximo_vencimento: date = None, agora: datetime = None) -> dict:
+        status = StatusEmprestimo.QUITADO if posicao["total"] == 0 else emprestimo.status
+        if proximo_vencimento is None and status != StatusEmprestimo.QUITADO:
+            # Empréstimo sem parcelas gravadas, ou com encargos além do cronograma
+            proximo_vencimento = self._calcular_proximo_vencimento(emprestimo)
+        return {
+            "id": emprestimo.id,
+            "status": status,
+            "valor_pago": (emprestimo.valor_pago or 0) + valor_pagamento,
+            "proximo_vencimento": proximo_vencimento,
+            "atualizado_em": agora or datetime.utcnow()
+        }
+
+    def calcular_valor_total_devido(self, emprestimo: Emprestimo, data_calculo: date = None) -> Decimal:
+        if data_calculo is None:
+            data_calculo = date.today()
+        chave = (emprestimo.id, data_calculo)
+        if chave not in self._valores_devidos:
+            total = self.calcular_posicao(emprestimo, data_calculo)["total"]
+            self._valores_devidos[chave] = total.quantize(Decimal('.01'), rounding=ROUND_HALF_UP)
+        return self._valores_devidos[chave]
+
+    def calcular_posicao(self, emprestimo: Emprestimo, data_calculo: date = None) -> dict:
+        """
+        Saldo do empréstimo em `data_calculo`: parte do último ponto de controle do livro de
+        apropriação (ou da abertura do empréstimo) e soma apenas os encargos desde então.
+        """
         if data_calculo is None:
             data_calculo = date.today()
+        checkpoint = self.apropriacao.obter_checkpoint(emprestimo.id, data_calculo)
+        return self._calcular_posicao(emprestimo, data_calculo, checkpoint)
+
+    def _calcular_posicao(self, emprestimo: Emprestimo, data_calculo: date, checkpoint) -> dict:
+        data_base, saldo_principal, juros, mora = self._posicao_base(emprestimo, checkpoint)
+        novos_juros, nova_mora = self.calculo_juros.calcular_encargos(
+            saldo_principal,
+            data_base,
+            data_calculo,
+            self._regras_juros(emprestimo),
+            self._regras_mora(emprestimo, data_base),
+            arredondar=False
+        )
+        juros += novos_juros
+        mora += nova_mora
+
+        return {
+            "data_referencia": data_calculo,
+            "saldo_principal": saldo_principal,
+            "juros": juros,
+            "mora": mora,
+            "total": self.calculo_juros.calcular_total_devido(saldo_principal, juros, mora)
+        }
+
+    def obter_saldo(self, emprestimo_id: int, data_calculo: date = None) -> dict:
+        emprestimo = self._buscar_emprestimo(emprestimo_id)
+        return self.calcular_posicao(emprestimo, data_calculo)
 
-        valor_principal = Decimal(str(emprestimo.valor))
-        
-        regras_juros = [
+    def apropriar_juros(self, data_referencia: date = None, tamanho_lote: int = 1000) -> int:
+        if data_referencia is None:
+            data_referencia = date.today()
+
+        query = self.db.query(Emprestimo).filter(
+            Emprestimo.status.in_([StatusEmprestimo.ATIVO, StatusEmprestimo.ATRASADO])
+        ).order_by(Emprestimo.id)
+
+        total_apropriado = 0
+        ultimo_id = 0
+        while True:
+            lote = query.filter(Emprestimo.id > ultimo_id).limit(tamanho_lote).all()
+            if not lote:
+                break
+            ultimo_id = lote[-1].id
+            checkpoints = self.apropriacao.obter_checkpoints([e.id for e in lote], data_referencia)
+            for emprestimo in lote:
+                checkpoint = checkpoints.get(emprestimo.id)
+                if checkpoint is not None and checkpoint.data_referencia == data_referencia:
+                    continue
+                posicao = self._calcular_posicao(emprestimo, data_referencia, checkpoint)
+                self.apropriacao.registrar_checkpoint(emprestimo.id, posicao, OrigemApropriacao.DIARIA)
+                total_apropriado += 1
+            self.db.commit()
+            self.db.expunge_all()
+        self._valores_devidos.clear()
+
+        logger.info(f"Apropriação de juros em {data_referencia}: {total_apropriado} empréstimos")
+        return total_apropriado
+
+    def _datas_liquidacao(self, liquidacoes: dict, emprestimos: dict, hoje: date = None) -> dict:
+        """
+        Data em que cada pagamento ({emprestimo_id: data informada ou None}) entra no livro de
+        apropriação: a da liquidação, limitada a hoje, e nunca antes da abertura do empréstimo
+        nem do último pagamento já lançado, que teria de ser refeito.
+        """
+        hoje = hoje or date.today()
+        ultimos = self.apropriacao.datas_ultimo_pagamento(list(liquidacoes))
+        return {
+            emprestimo_id: max(
+                min(data or hoje, hoje),
+                _como_data(emprestimos[emprestimo_id].data_solicitacao),
+                ultimos.get(emprestimo_id, date.min)
+            )
+            for emprestimo_id, data in liquidacoes.items()
+        }
+
+    def _posicao_base(self, emprestimo: Emprestimo, checkpoint) -> tuple:
+        if isinstance(checkpoint, dict):
+            # Posição já calculada na mesma transação (pagamentos seguintes de um lote)
+            return checkpoint["data_referencia"], checkpoint["saldo_principal"], checkpoint["juros"], checkpoint["mora"]
+        if checkpoint is None:
+            return _como_data(emprestimo.data_solicitacao), emprestimo.valor, Decimal('0'), Decimal('0')
+        return (
+            checkpoint.data_referencia,
+            checkpoint.saldo_principal,
+            checkpoint.juros_acumulados,
+            checkpoint.mora_acumulada
+        )
+
+    def calcular_valores_devidos(self, emprestimos: List[Emprestimo], data_calculo: date = None, filtro_ids: Select = None) -> np.ndarray:
+        """
+        Valores devidos de vários empréstimos pelo motor em lote. `filtro_ids` é um SELECT que
+        devolve (ao menos) os ids de `emprestimos`; com ele os pontos de controle saem em uma
+        única consulta, em vez de uma por lote de ids.
+        """
+        if data_calculo is None:
+            data_calculo = date.today()
+
+        pendentes = [e for e in emprestimos if (e.id, data_calculo) not in self._valores_devidos]
+        if pendentes:
+            totais = self._calcular_valores_devidos(pendentes, data_calculo, filtro_ids)
+            for emprestimo, total in zip(pendentes, totais):
+                self._valores_devidos[(emprestimo.id, data_calculo)] = Decimal(str(total))
+        return np.array([float(self._valores_devidos[(e.id, data_calculo)]) for e in emprestimos])
+
+    def _calcular_valores_devidos(self, emprestimos: List[Emprestimo], data_calculo: date, filtro_ids: Select = None) -> np.ndarray:
+        checkpoints = self.apropriacao.obter_checkpoints(
+            filtro_ids if filtro_ids is not None else [e.id for e in emprestimos], data_calculo
+        )
+        principais, datas_base, encargos_acumulados = [], [], []
+        regras_juros = {'indice': [], 'taxa': [], 'regra': [], 'tipo': [], 'data_periodo': []}
+        regras_mora = {'indice': [], 'taxa': [], 'data_vencimento': [], 'regra': [], 'tipo': [], 'data_periodo': []}
+        for indice, emprestimo in enumerate(emprestimos):
+            data_base, saldo_principal, juros, mora = self._posicao_base(emprestimo, checkpoints.get(emprestimo.id))
+            principais.append(saldo_principal)
+            datas_base.append(data_base)
+            encargos_acumulados.append(juros + mora)
+            for regra in self._regras_juros(emprestimo):
+                regras_juros['indice'].append(indice)
+                for chave in ('taxa', 'regra', 'tipo', 'data_periodo'):
+                    regras_juros[chave].append(regra[chave])
+            for regra in self._regras_mora(emprestimo, data_base):
+                regras_mora['indice'].append(indice)
+                for chave in ('taxa', 'data_vencimento', 'regra', 'tipo', 'data_periodo'):
+                    regras_mora[chave].append(regra[chave])
+
+        resultado = CalculoJurosLote.calcular_valor_total_devido(
+            principais,
+            datas_base,
+            data_calculo,
+            regras_juros,
+            regras_mora,
+            encargos_acumulados
+        )
+        return resultado["total"]
+
+    def _regras_juros(self, emprestimo: Emprestimo) -> List[dict]:
+        # O período da taxa é contado da abertura, mesmo quando o cálculo parte de um ponto de controle
+        data_abertura = _como_data(emprestimo.data_solicitacao)
+        regras = getattr(emprestimo, 'regras_juros', None)
+        if not regras:
+            return [{'taxa': emprestimo.taxa_juros, 'regra': REGRA_JUROS_PADRAO, 'tipo': TipoJuros.SIMPLES, 'data_periodo': data_abertura}]
+        return [
             {
                 'taxa': regra.taxa_juros,
                 'regra': regra,
-                'tipo': regra.tipo_juros
+                'tipo': regra.tipo_juros,
+                'data_periodo': data_abertura
             }
-            for regra in emprestimo.regras_juros
+            for regra in regras
         ]
-        
-        regras_mora = [
+
+    def _regras_mora(self, emprestimo: Emprestimo, data_base: date = None) -> List[dict]:
+        # A mora anterior a data_base já está no ponto de controle; a taxa diária segue o período
+        # do vencimento original
+        return [
             {
                 'taxa': regra.taxa_mora,
-                'data_vencimento': regra.data_vencimento,
+                'data_vencimento': max(regra.data_vencimento, data_base) if data_base else regra.data_vencimento,
                 'regra': regra,
-                'tipo': regra.tipo_mora
+                'tipo': regra.tipo_mora,
+                'data_periodo': regra.data_vencimento
             }
-            for regra in emprestimo.regras_mora
+            for regra in getattr(emprestimo, 'regras_mora', None) or []
         ]
 
-        return self.calculo_juros.calcular_valor_total_devido(
-            valor_principal,
-            emprestimo.data_solicitacao,
-            data_calculo,
-            regras_juros,
-            regras_mora
+    def obter_cronograma(self, emprestimo_id: int, page: int = 1, per_page: int = 12, tipo_juros: TipoJuros = TipoJuros.COMPOSTO, num_parcelas: int = None):
+        emprestimo = self._buscar_emprestimo(emprestimo_id)
+        regras = self._regras_pagamento(emprestimo)
+        data_inicio = _como_data(emprestimo.data_solicitacao)
+        if num_parcelas is None:
+            num_parcelas = self._contar_parcelas(regras, data_inicio, emprestimo.data_vencimento)
+
+        inicio = (page - 1) * per_page
+        parcelas = []
+        if inicio < num_parcelas:
+            cronograma = self.calculo_juros.gerar_cronograma(
+                emprestimo.valor,
+                emprestimo.taxa_juros,
+                num_parcelas,
+                regras[0],
+                tipo_juros,
+                parcela_inicial=inicio + 1
+            )
+            vencimentos = self.calculo_juros.gerar_vencimentos(regras, data_inicio, inicio + 1)
+            for parcela, data_vencimento in zip(islice(cronograma, per_page), vencimentos):
+                parcela["data_vencimento"] = data_vencimento
+                parcelas.append(parcela)
+
+        return {
+            "emprestimo_id": emprestimo.id,
+            "tipo_juros": tipo_juros.value,
+            "total_parcelas": num_parcelas,
+            "page": page,
+            "per_page": per_page,
+            "parcelas": parcelas
+        }
+
+    def _regras_pagamento(self, emprestimo: Emprestimo) -> List:
+        # Sem regras cadastradas, as parcelas vencem todo mês no dia do vencimento final
+        return getattr(emprestimo, 'regras_pagamento', None) or [RegraFixa(emprestimo.data_vencimento.day)]
+
+    def _gerar_cronograma(self, emprestimo: Emprestimo, data_inicio: date, tipo_juros: TipoJuros = TipoJuros.COMPOSTO) -> List[dict]:
+        # Cronograma completo com vencimentos, no formato gravado por ParcelaService.inserir_parcelas
+        regras = self._regras_pagamento(emprestimo)
+        num_parcelas = self._contar_parcelas(regras, data_inicio, emprestimo.data_vencimento)
+        cronograma = []
+        parcelas = self.calculo_juros.gerar_cronograma(
+            emprestimo.valor, emprestimo.taxa_juros, num_parcelas, regras[0], tipo_juros
         )
+        for parcela, data_vencimento in zip(parcelas, self.calculo_juros.gerar_vencimentos(regras, data_inicio)):
+            parcela["data_vencimento"] = data_vencimento
+            cronograma.append(parcela)
+        # A última parcela absorve a diferença de arredondamento do principal
+        cronograma[-1]["amortizado"] = emprestimo.valor - sum(p["amortizado"] for p in cronograma[:-1])
+        return cronograma
+
+    def gerar_parcelas_faltantes(self, tamanho_lote: int = 1000) -> int:
+        """
+        Grava o cronograma dos empréstimos em aberto criados antes da tabela de parcelas.
+        O valor já pago é abatido das parcelas mais antigas, como em registrar_pagamento; sem
+        a divisão de cada pagamento antigo entre mora, juros e principal, ele entra inteiro.
+        """
+        sem_parcelas = ~exists().where(Parcela.emprestimo_id == Emprestimo.id)
+        query = self.db.query(Emprestimo).filter(
+            Emprestimo.status.in_([StatusEmprestimo.PENDENTE, StatusEmprestimo.APROVADO, StatusEmprestimo.ATIVO, StatusEmprestimo.ATRASADO]),
+            sem_parcelas
+        ).order_by(Emprestimo.id)
+
+        total = 0
+        ultimo_id = 0
+        while True:
+            lote = query.filter(Emprestimo.id > ultimo_id).limit(tamanho_lote).all()
+            if not lote:
+                break
+            ultimo_id = lote[-1].id
+            for emprestimo in lote:
+                self.parcelas.inserir_parcelas(emprestimo.id, self._gerar_cronograma(emprestimo, _como_data(emprestimo.data_solicitacao)))
+                proximo_vencimento = self.parcelas.abater_pagamento(emprestimo.id, emprestimo.valor_pago or Decimal('0'))
+                emprestimo.proximo_vencimento = proximo_vencimento or emprestimo.proximo_vencimento
+            total += len(lote)
+            self.db.commit()
+            self.db.expunge_all()
+
+        logger.info(f"Parcelas geradas para {total} empréstimos")
+        return total
+
+    def listar_vencimentos(self, data_inicio: date = None, data_fim: date = None) -> List[Parcela]:
+        if data_inicio is None:
+            data_inicio = date.today()
+        if data_fim is None:
+            data_fim = data_inicio + timedelta(days=7)
+        return self.parcelas.listar_vencimentos(data_inicio, data_fim)
+
+    def _contar_parcelas(self, regras: List, data_inicio: date, data_vencimento: date) -> int:
+        return max(self.calculo_juros.contar_vencimentos(regras, data_inicio, data_vencimento), 1)
+
+    def verificar_atrasos(self, data_referencia: date = None, tamanho_lote: int = TAMANHO_LOTE_ATRASOS) -> List[Emprestimo]:
+        if data_referencia is None:
+            data_referencia = date.today()
+
+        self.parcelas.marcar_atrasadas(data_referencia, tamanho_lote)
+
+        emprestimos_atrasados = []
+        while True:
+            # Cada lote é marcado em uma transação curta; o índice (status, proximo_vencimento) cobre o filtro
+            lote = select(Emprestimo.id).where(
+                Emprestimo.status == StatusEmprestimo.ATIVO,
+                Emprestimo.proximo_vencimento < data_referencia
+            ).order_by(Emprestimo.id).limit(tamanho_lote).scalar_subquery()
+            ids = self.db.execute(
+                update(Emprestimo)
+                .where(Emprestimo.id.in_(lote))
+                .values(status=StatusEmprestimo.ATRASADO, atualizado_em=datetime.utcnow())
+                .returning(Emprestimo.id)
+                .execution_options(synchronize_session=False)
+            ).scalars().all()
+            if not ids:
+                break
+
+            emprestimos = self.db.query(Emprestimo).join(Emprestimo.cliente).options(
+                contains_eager(Emprestimo.cliente)
+            ).filter(Emprestimo.id.in_(ids)).populate_existing().all()
+            self._registrar_alteracoes([
+                (EstadoEmprestimo.de(e)._replace(status=StatusEmprestimo.ATIVO), EstadoEmprestimo.de(e)) for e in emprestimos
+            ])
+            self.outbox.enfileirar(self._notificacoes_atraso(emprestimos, data_referencia))
+            self.db.commit()
+
+            emprestimos_atrasados.extend(emprestimos)
+            logger.info(f"{len(ids)} empréstimos marcados como atrasados")
 
-    def verificar_atrasos(self):
-        hoje = date.today()
-        emprestimos_atrasados = self.db.query(Emprestimo).filter(
-            Emprestimo.proximo_vencimento < hoje,
-            Emprestimo.status == StatusEmprestimo.ATIVO
-        ).all()
-        
-        for emprestimo in emprestimos_atrasados:
-            emprestimo.status = StatusEmprestimo.ATRASADO
-            self._notificar_cliente(emprestimo, "atraso")
-        
-        self.db.commit()
         return emprestimos_atrasados
 
+    def _notificacoes_atraso(self, emprestimos: List[Emprestimo], data_referencia: date) -> List[dict]:
+        valores_devidos = self.calcular_valores_devidos(emprestimos, data_referencia)
+        return [
+            {
+                "to": emprestimo.cliente.email,
+                "message": self._criar_mensagem_notificacao(emprestimo, "atraso", valor_devido),
+                "notification_type": "email"
+            }
+            for emprestimo, valor_devido in zip(emprestimos, valores_devidos)
+        ]
+
     def _criar_regras_pagamento(self, regras_dict: List[dict]):
         regras = []
         for regra in regras_dict:
@@ -165,19 +727,27 @@ class EmprestimoService(BaseService):
     def _calcular_proximo_vencimento(self, emprestimo: Emprestimo, data_base: date = None):
         if data_base is None:
             data_base = date.today()
-        return min(regra.proxima_data(data_base) for regra in emprestimo.regras_pagamento)
+        return self.calculo_juros.calcular_proximo_vencimento(self._regras_pagamento(emprestimo), data_base)
+
+    def _registrar_alteracoes(self, alteracoes: List[AlteracaoEmprestimo], recebido: Decimal = Decimal('0')):
+        # Chamado antes do commit, como _notificar_cliente: os totais mudam junto com a alteração
+        self.contadores.registrar_emprestimos(alteracoes)
+        self.contadores.registrar_recebimento(recebido)
+        self.resumos.registrar_emprestimos(alteracoes)
+        self.estatisticas_clientes.registrar_emprestimos(alteracoes)
+        self.rankings.registrar_clientes(estado.cliente_id for alteracao in alteracoes for estado in alteracao if estado is not None)
 
-    def _notificar_cliente(self, emprestimo: Emprestimo, tipo_notificacao: str):
+    def _notificar_cliente(self, emprestimo: Emprestimo, tipo_notificacao: str, valor_devido: Decimal = None):
+        # Chamado antes do commit: a notificação é gravada no outbox junto com a alteração
         cliente = emprestimo.cliente
         if not cliente:
             logger.warning(f"Cliente não encontrado para o empréstimo {emprestimo.id}")
             return
 
-        mensagem = self._criar_mensagem_notificacao(emprestimo, tipo_notificacao)
-        
-        enviar_notificacao_async.delay(cliente.email, mensagem, "email")
+        mensagem = self._criar_mensagem_notificacao(emprestimo, tipo_notificacao, valor_devido)
+        self.outbox.enfileirar([{"to": cliente.email, "message": mensagem, "notification_type": "email"}])
 
-    def _criar_mensagem_notificacao(self, emprestimo: Emprestimo, tipo_notificacao: str) -> str:
+    def _criar_mensagem_notificacao(self, emprestimo: Emprestimo, tipo_notificacao: str, valor_devido: Decimal = None) -> str:
         if tipo_notificacao == "criacao":
             return f"Seu empréstimo de R${emprestimo.valor:.2f} foi criado com sucesso. Próximo vencimento: {emprestimo.proximo_vencimento.strftime('%d/%m/%Y')}"
         elif tipo_notificacao == "atualizacao":
@@ -185,10 +755,13 @@ class EmprestimoService(BaseService):
         elif tipo_notificacao == "cancelamento":
             return f"Seu empréstimo de R${emprestimo.valor:.2f} foi cancelado."
         elif tipo_notificacao == "atraso":
-            valor_devido = self.calcular_valor_total_devido(emprestimo)
+            if valor_devido is None:
+                valor_devido = self.calcular_valor_total_devido(emprestimo)
             return f"Seu empréstimo está atrasado. Valor atual devido: R${valor_devido:.2f}. Por favor, entre em contato conosco."
         elif tipo_notificacao == "pagamento":
-            return f"Recebemos seu pagamento. Saldo atual do empréstimo: R${emprestimo.valor:.2f}"
+            if valor_devido is None:
+                valor_devido = self.calcular_valor_total_devido(emprestimo)
+            return f"Recebemos seu pagamento. Saldo atual do empréstimo: R${valor_devido:.2f}"
         else:
             return f"Atualização sobre seu empréstimo de R${emprestimo.valor:.2f}."
 
@@ -196,13 +769,16 @@ class EmprestimoService(BaseService):
         if data_fim is None:
             data_fim = date.today()
 
-        emprestimos = self.db.query(Emprestimo).filter(
-            Emprestimo.data_solicitacao >= data_inicio,
-            Emprestimo.data_solicitacao <= data_fim
-        ).all()
+        filtro = and_(Emprestimo.data_solicitacao >= data_inicio, Emprestimo.data_solicitacao <= data_fim)
+        emprestimos = self.db.query(Emprestimo).options(*_opcoes_relatorio()).filter(filtro).all()
+
+        valores_atuais = [
+            Decimal(str(valor))
+            for valor in self.calcular_valores_devidos(emprestimos, filtro_ids=select(Emprestimo.id).where(filtro))
+        ]
 
         total_emprestado = sum(e.valor for e in emprestimos)
-        total_a_receber = sum(self.calcular_valor_total_devido(e) for e in emprestimos if e.status != StatusEmprestimo.QUITADO)
+        total_a_receber = sum(v for e, v in zip(emprestimos, valores_atuais) if e.status != StatusEmprestimo.QUITADO)
         emprestimos_ativos = sum(1 for e in emprestimos if e.status == StatusEmprestimo.ATIVO)
         emprestimos_atrasados = sum(1 for e in emprestimos if e.status == StatusEmprestimo.ATRASADO)
 
@@ -212,11 +788,38 @@ class EmprestimoService(BaseService):
             "total_a_receber": total_a_receber,
             "emprestimos_ativos": emprestimos_ativos,
             "emprestimos_atrasados": emprestimos_atrasados,
-            "detalhes": [self._detalhe_emprestimo(e) for e in emprestimos]
+            "detalhes": [self._detalhe_emprestimo(e, v) for e, v in zip(emprestimos, valores_atuais)]
         }
 
-    def _detalhe_emprestimo(self, emprestimo: Emprestimo):
-        valor_atual = self.calcular_valor_total_devido(emprestimo)
+    def exportar_relatorio_emprestimos(self, data_inicio: date, data_fim: date = None, tamanho_lote: int = TAMANHO_LOTE_EXPORTACAO) -> Iterator[dict]:
+        """
+        Mesmas linhas de `detalhes` de gerar_relatorio_emprestimos, lidas por um cursor do
+        servidor em lotes de `tamanho_lote`. Cada lote sai da sessão depois de processado, então
+        a memória usada não cresce com o período exportado.
+        """
+        if data_fim is None:
+            data_fim = date.today()
+
+        consulta = select(Emprestimo).options(*_opcoes_relatorio()).where(
+            Emprestimo.data_solicitacao >= data_inicio,
+            Emprestimo.data_solicitacao <= data_fim
+        ).order_by(Emprestimo.id).execution_options(yield_per=tamanho_lote, stream_results=True)
+
+        total = 0
+        for lote in self.db.execute(consulta).scalars().partitions():
+            # Fora do memo da requisição, que cresceria com a exportação inteira
+            valores_atuais = self._calcular_valores_devidos(lote, date.today())
+            for emprestimo, valor in zip(lote, valores_atuais):
+                yield self._detalhe_emprestimo(emprestimo, Decimal(str(valor)))
+            for objeto in [*lote, *{e.cliente for e in lote if e.cliente is not None}]:
+                if objeto in self.db:
+                    self.db.expunge(objeto)
+            total += len(lote)
+        logger.info(f"Relatório de {data_inicio} a {data_fim} exportado: {total} empréstimos")
+
+    def _detalhe_emprestimo(self, emprestimo: Emprestimo, valor_atual: Decimal = None):
+        if valor_atual is None:
+            valor_atual = self.calcular_valor_total_devido(emprestimo)
         return {
             "id": emprestimo.id,
             "cliente": emprestimo.cliente.nome,
@@ -0,0 +1,82 @@
+#Emprestimo-Facil\app\services\emprestimo_service_async.py
+
+from sqlalchemy import select
+from app.models.emprestimo import Emprestimo, StatusEmprestimo
+from app.schemas.emprestimo import EmprestimoCreate, EmprestimoUpdate
+from app.services.emprestimo_service import EmprestimoService, ORDENACOES_EMPRESTIMO, _opcoes_listagem
+from app.services.contador_service import EstadoEmprestimo
+from app.services.cache import cache
+from datetime import datetime
+from .base_service import BaseServiceAsync
+from typing import List
+
+# Versão de EmprestimoService para as rotas assíncronas. Leituras e alterações simples são
+# consultas assíncronas; operações com regra de negócio (criação com cronograma de parcelas)
+# reaproveitam o serviço síncrono dentro da mesma transação via AsyncSession.run_sync
+class EmprestimoServiceAsync(BaseServiceAsync):
+    async def _executar(self, operacao):
+        return await self.db.run_sync(lambda sessao: operacao(EmprestimoService(sessao)))
+
+    def _consulta_listagem(self, filtros: dict = None):
+        query = select(Emprestimo).options(*_opcoes_listagem())
+        if filtros:
+            if 'status' in filtros:
+                query = query.where(Emprestimo.status == filtros['status'])
+            if 'cliente_id' in filtros:
+                query = query.where(Emprestimo.cliente_id == filtros['cliente_id'])
+        return query
+
+    async def obter_emprestimo(self, emprestimo_id: int) -> Emprestimo:
+        # populate_existing: recarrega as relações de um objeto alterado por run_sync na mesma sessão
+        resultado = await self.db.execute(
+            self._consulta_listagem().where(Emprestimo.id == emprestimo_id).execution_options(populate_existing=True)
+        )
+        emprestimo = resultado.scalars().unique().one_or_none()
+        if not emprestimo:
+            self.handle_not_found(f"Empréstimo com id {emprestimo_id} não encontrado")
+        return emprestimo
+
+    async def listar_emprestimos(self, page: int = 1, per_page: int = 20, filtros: dict = None, skip: int = None) -> List[Emprestimo]:
+        return await self.paginate(self._consulta_listagem(filtros).order_by(Emprestimo.id), page, per_page, skip)
+
+    async def listar_emprestimos_cursor(self, cursor: str = None, per_page: int = 20, ordenar_por: str = "id", filtros: dict = None) -> dict:
+        if ordenar_por not in ORDENACOES_EMPRESTIMO:
+            self.handle_exception(ValueError(f"Ordenação inválida: {ordenar_por}"), 400)
+        coluna = ORDENACOES_EMPRESTIMO[ordenar_por]
+        return await self.paginate_cursor(self._consulta_listagem(filtros), coluna, Emprestimo.id, cursor, per_page)
+
+    async def criar_emprestimo(self, emprestimo: EmprestimoCreate) -> Emprestimo:
+        db_emprestimo = await self._executar(lambda service: service.criar_emprestimo(emprestimo))
+        return await self.obter_emprestimo(db_emprestimo.id)
+
+    async def atualizar_emprestimo(self, emprestimo_id: int, emprestimo_update: EmprestimoUpdate) -> Emprestimo:
+        db_emprestimo = await self.obter_emprestimo(emprestimo_id)
+        anterior = EstadoEmprestimo.de(db_emprestimo)
+        for key, value in emprestimo_update.model_dump(exclude_unset=True).items():
+            setattr(db_emprestimo, key, value)
+        db_emprestimo.atualizado_em = datetime.utcnow()
+        await self._registrar_alteracao(anterior, db_emprestimo)
+        await self._notificar_cliente(db_emprestimo, "atualizacao")
+        await self.db.commit()
+        await cache.delete(f"emprestimo:{emprestimo_id}")
+        await cache.delete("lista_emprestimos")
+        return db_emprestimo
+
+    async def deletar_emprestimo(self, emprestimo_id: int) -> Emprestimo:
+        db_emprestimo = await self.obter_emprestimo(emprestimo_id)
+        anterior = EstadoEmprestimo.de(db_emprestimo)
+        db_emprestimo.status = StatusEmprestimo.CANCELADO
+        db_emprestimo.atualizado_em = datetime.utcnow()
+        await self._registrar_alteracao(anterior, db_emprestimo)
+        await self._notificar_cliente(db_emprestimo, "cancelamento")
+        await self.db.commit()
+        await cache.delete(f"emprestimo:{emprestimo_id}")
+        await cache.delete("lista_emprestimos")
+        return db_emprestimo
+
+    async def _notificar_cliente(self, emprestimo: Emprestimo, tipo_notificacao: str):
+        # Grava no outbox dentro da transação corrente, antes do commit
+        await self._executar(lambda service: service._notificar_cliente(emprestimo, tipo_notificacao))
+
+    async def _registrar_alteracao(self, anterior: EstadoEmprestimo, emprestimo: Emprestimo):
+        await self._executar(lambda service: service._registrar_alteracoes([(anterior, EstadoEmprestimo.de(emprestimo))]))
\ No newline at end of file
@@ -0,0 +1,133 @@
+#Emprestimo-Facil\app\services\estatistica_cliente_service.py
+
+from sqlalchemy import select, update, insert, func, case, bindparam
+from app.models.estatistica_cliente import EstatisticaCliente
+from app.models.emprestimo import Emprestimo, StatusEmprestimo
+from app.models.cliente import Cliente
+from app.services.contador_service import AlteracaoEmprestimo, EstadoEmprestimo
+from app.core.logger import get_logger
+from decimal import Decimal
+from typing import Dict, List
+from .base_service import BaseService
+
+logger = get_logger(__name__)
+
+# reconstruir: clientes recalculados por transação
+TAMANHO_LOTE_ESTATISTICAS = 1000
+
+COLUNAS_ESTATISTICA = (
+    "total_emprestimos",
+    "valor_total_emprestado",
+    "valor_total_pago",
+    "emprestimos_ativos",
+    "emprestimos_atrasados",
+)
+
+class EstatisticaClienteService(BaseService):
+    @staticmethod
+    def _contribuicao(estado: EstadoEmprestimo) -> Dict[str, Decimal]:
+        return {
+            "total_emprestimos": 1,
+            "valor_total_emprestado": estado.valor,
+            "valor_total_pago": estado.valor_pago or 0,
+            "emprestimos_ativos": int(estado.status == StatusEmprestimo.ATIVO),
+            "emprestimos_atrasados": int(estado.status == StatusEmprestimo.ATRASADO),
+        }
+
+    def criar(self, cliente_id: int) -> None:
+        # Cliente novo ainda não tem empréstimos: a linha já nasce completa
+        self.db.execute(insert(EstatisticaCliente), [{"cliente_id": cliente_id, **dict.fromkeys(COLUNAS_ESTATISTICA, 0)}])
+
+    def registrar_emprestimos(self, alteracoes: List[AlteracaoEmprestimo]) -> None:
+        """
+        Soma as alterações às estatísticas de cada cliente, na transação corrente e sem commit.
+        Só atualiza linhas existentes: uma linha criada a partir de deltas deixaria de fora os
+        empréstimos anteriores do cliente, que entram pelo backfill.
+        """
+        deltas = {}
+        for anterior, atual in alteracoes:
+            for estado, sinal in ((atual, 1), (anterior, -1)):
+                if estado is None:
+                    continue
+                linha = deltas.setdefault(estado.cliente_id, dict.fromkeys(COLUNAS_ESTATISTICA, 0))
+                for coluna, valor in self._contribuicao(estado).items():
+                    linha[coluna] += sinal * valor
+
+        # Clientes em ordem de id: transações concorrentes bloqueiam as linhas na mesma ordem
+        linhas = [
+            {"b_cliente_id": cliente_id, **{f"b_{coluna}": valor for coluna, valor in valores.items()}}
+            for cliente_id, valores in sorted(deltas.items())
+            if any(valores.values())
+        ]
+        if not linhas:
+            return
+        tabela = EstatisticaCliente.__table__
+        self.db.execute(
+            update(tabela)
+            .where(tabela.c.cliente_id == bindparam("b_cliente_id"))
+            .values({coluna: tabela.c[coluna] + bindparam(f"b_{coluna}") for coluna in COLUNAS_ESTATISTICA}),
+            linhas
+        )
+
+    def calcular(self, cliente_ids: List[int]) -> Dict[int, Dict[str, Decimal]]:
+        # Uma consulta agregada para todos os clientes pedidos, pelo índice (cliente_id, status)
+        resultados = self.db.execute(
+            select(
+                Emprestimo.cliente_id,
+                func.count(Emprestimo.id).label("total_emprestimos"),
+                func.coalesce(func.sum(Emprestimo.valor), 0).label("valor_total_emprestado"),
+                func.coalesce(func.sum(Emprestimo.valor_pago), 0).label("valor_total_pago"),
+                func.count(case((Emprestimo.status == StatusEmprestimo.ATIVO, 1))).label("emprestimos_ativos"),
+                func.count(case((Emprestimo.status == StatusEmprestimo.ATRASADO, 1))).label("emprestimos_atrasados"),
+            ).where(Emprestimo.cliente_id.in_(cliente_ids)).group_by(Emprestimo.cliente_id)
+        )
+        estatisticas = {cliente_id: dict.fromkeys(COLUNAS_ESTATISTICA, 0) for cliente_id in cliente_ids}
+        for resultado in resultados:
+            estatisticas[resultado.cliente_id] = {coluna: resultado._mapping[coluna] for coluna in COLUNAS_ESTATISTICA}
+        return estatisticas
+
+    def obter(self, cliente_id: int) -> Dict[str, Decimal]:
+        linha = self.db.execute(
+            select(*[EstatisticaCliente.__table__.c[coluna] for coluna in COLUNAS_ESTATISTICA])
+            .where(EstatisticaCliente.cliente_id == cliente_id)
+        ).one_or_none()
+        if linha is None:
+            # Cliente anterior ao backfill
+            return self.calcular([cliente_id])[cliente_id]
+        return dict(linha._mapping)
+
+    def reconstruir(self, tamanho_lote: int = TAMANHO_LOTE_ESTATISTICAS) -> int:
+        """
+        Backfill e reconciliação: recalcula as estatísticas de todos os clientes em lotes por id,
+        um commit por lote. As linhas do lote são bloqueadas antes do agregado e atualizadas no
+        lugar, como em ContadorService.reconciliar; uma nova execução corrige qualquer desvio.
+        """
+        total = 0
+        ultimo_id = 0
+        while True:
+            ids = self.db.execute(
+                select(Cliente.id).where(Cliente.id > ultimo_id).order_by(Cliente.id).limit(tamanho_lote)
+            ).scalars().all()
+            if not ids:
+                break
+            ultimo_id = ids[-1]
+
+            existentes = set(self.db.execute(
+                select(EstatisticaCliente.cliente_id)
+                .where(EstatisticaCliente.cliente_id.in_(ids))
+                .order_by(EstatisticaCliente.cliente_id)
+                .with_for_update()
+            ).scalars())
+            estatisticas = self.calcular(ids)
+            valores = [{"cliente_id": cliente_id, **estatisticas[cliente_id]} for cliente_id in ids]
+            atualizados = [v for v in valores if v["cliente_id"] in existentes]
+            novos = [v for v in valores if v["cliente_id"] not in existentes]
+            if atualizados:
+                self.db.execute(update(EstatisticaCliente), atualizados)
+            if novos:
+                self.db.execute(insert(EstatisticaCliente), novos)
+            self.db.commit()
+            total += len(ids)
+
+        logger.info(f"Estatísticas recalculadas para {total} clientes")
+        return total
\ No newline at end of file
@@ -1,71 +1,96 @@
 #Emprestimo-Facil\app\services\estatistica_service.py
 
 from sqlalchemy.orm import Session
-from sqlalchemy import func, and_, case
+from sqlalchemy import select, Select
 from app.models.emprestimo import Emprestimo, StatusEmprestimo
 from app.models.cliente import Cliente
-from app.models.pagamento import Pagamento
-from app.services.emprestimo_service import EmprestimoService
+from app.services.emprestimo_service import EmprestimoService, TAMANHO_LOTE_EXPORTACAO
+from app.services.contador_service import ContadorService
+from app.services.estatistica_cliente_service import EstatisticaClienteService
+from app.services.ranking_service import RankingService
+from app.models.estatistica_cliente import EstatisticaCliente
+from app.services.resumo_service import ResumoService, COLUNAS_STATUS
+from app.services.projecao_caixa_service import ProjecaoCaixaService, GranularidadeProjecao
+from app.models.resumo import GranularidadeResumo
+from app.services.exportacao import esquema_arrow, lote_arrow
 from app.core.logger import get_logger
-from typing import List, Dict, Any
-from datetime import datetime, timedelta
+from typing import Iterator, List, Dict, Any
+from datetime import date, timedelta
 from decimal import Decimal
+import pyarrow as pa
 
 logger = get_logger(__name__)
 
+COLUNAS_FILTRADAS = (
+    Emprestimo.id,
+    Emprestimo.valor,
+    Emprestimo.status,
+    Emprestimo.data_solicitacao,
+    Emprestimo.data_vencimento,
+    Emprestimo.valor_pago,
+    Emprestimo.cliente_id
+)
+ESQUEMA_FILTRADAS = esquema_arrow(COLUNAS_FILTRADAS)
+# Exportação colunar: linhas por partição do cursor, por record batch e por row group do Parquet
+TAMANHO_LOTE_COLUNAR = 50000
+
 class EstatisticaService:
     def __init__(self, db: Session):
         self.db = db
         self.emprestimo_service = EmprestimoService(db)
 
     def obter_estatisticas_gerais(self) -> Dict[str, Any]:
-        total_emprestimos = self.db.query(func.count(Emprestimo.id)).scalar()
-        valor_total_emprestado = self.db.query(func.sum(Emprestimo.valor)).scalar() or 0
-        valor_total_recebido = self.db.query(func.sum(Pagamento.valor)).scalar() or 0
-        emprestimos_ativos = self.db.query(func.count(Emprestimo.id)).filter(Emprestimo.status == StatusEmprestimo.ATIVO).scalar()
-        emprestimos_atrasados = self.db.query(func.count(Emprestimo.id)).filter(Emprestimo.status == StatusEmprestimo.ATRASADO).scalar()
+        # Contadores mantidos pelas escritas: o painel não varre emprestimos nem pagamentos
+        totais = ContadorService(self.db).obter()
+        total_emprestimos = int(totais["total_emprestimos"])
+        emprestimos_atrasados = int(totais["emprestimos_atrasados"])
 
         return {
             "total_emprestimos": total_emprestimos,
-            "valor_total_emprestado": float(valor_total_emprestado),
-            "valor_total_recebido": float(valor_total_recebido),
-            "emprestimos_ativos": emprestimos_ativos,
+            "valor_total_emprestado": float(totais["valor_total_emprestado"]),
+            "valor_total_recebido": float(totais["valor_total_recebido"]),
+            "emprestimos_ativos": int(totais["emprestimos_ativos"]),
             "emprestimos_atrasados": emprestimos_atrasados,
             "taxa_inadimplencia": (emprestimos_atrasados / total_emprestimos) * 100 if total_emprestimos > 0 else 0
         }
 
     def obter_estatisticas_cliente(self, cliente_id: int) -> Dict[str, Any]:
-        emprestimos = self.db.query(Emprestimo).filter(Emprestimo.cliente_id == cliente_id).all()
-        total_emprestimos = len(emprestimos)
-        valor_total_emprestado = sum(e.valor for e in emprestimos)
-        valor_total_pago = sum(e.valor_pago for e in emprestimos)
-        emprestimos_ativos = sum(1 for e in emprestimos if e.status == StatusEmprestimo.ATIVO)
-        emprestimos_atrasados = sum(1 for e in emprestimos if e.status == StatusEmprestimo.ATRASADO)
+        # Uma linha já agregada, qualquer que seja o número de empréstimos do cliente
+        estatisticas = EstatisticaClienteService(self.db).obter(cliente_id)
+        total_emprestimos = int(estatisticas["total_emprestimos"])
+        emprestimos_atrasados = int(estatisticas["emprestimos_atrasados"])
 
         return {
             "total_emprestimos": total_emprestimos,
-            "valor_total_emprestado": float(valor_total_emprestado),
-            "valor_total_pago": float(valor_total_pago),
-            "emprestimos_ativos": emprestimos_ativos,
+            "valor_total_emprestado": float(estatisticas["valor_total_emprestado"]),
+            "valor_total_pago": float(estatisticas["valor_total_pago"]),
+            "emprestimos_ativos": int(estatisticas["emprestimos_ativos"]),
             "emprestimos_atrasados": emprestimos_atrasados,
             "taxa_inadimplencia": (emprestimos_atrasados / total_emprestimos) * 100 if total_emprestimos > 0 else 0
         }
 
-    def obter_ranking_clientes(self, limite: int = 10, ordem: str = "desc") -> List[Dict[str, Any]]:
-        query = self.db.query(
-            Cliente.id,
-            Cliente.nome,
-            func.count(Emprestimo.id).label("total_emprestimos"),
-            func.sum(Emprestimo.valor).label("valor_total_emprestado"),
-            func.sum(Emprestimo.valor_pago).label("valor_total_pago")
-        ).join(Emprestimo).group_by(Cliente.id)
-
-        if ordem == "desc":
-            query = query.order_by(func.sum(Emprestimo.valor_pago).desc())
-        else:
-            query = query.order_by(func.sum(Emprestimo.valor_pago).asc())
+    def _clientes_do_ranking(self, ranking: str, limite: int, decrescente: bool = True) -> List[Any]:
+        # Os K primeiros vêm do ranking; nome e estatísticas deles, de uma consulta por chave primária
+        cliente_ids = [cliente_id for cliente_id, _ in RankingService(self.db).topo(ranking, limite, decrescente)]
+        if not cliente_ids:
+            return []
+        linhas = {
+            linha.id: linha
+            for linha in self.db.execute(
+                select(
+                    Cliente.id,
+                    Cliente.nome,
+                    EstatisticaCliente.total_emprestimos,
+                    EstatisticaCliente.valor_total_emprestado,
+                    EstatisticaCliente.valor_total_pago,
+                    EstatisticaCliente.emprestimos_atrasados
+                ).join(EstatisticaCliente, EstatisticaCliente.cliente_id == Cliente.id).where(Cliente.id.in_(cliente_ids))
+            )
+        }
+        return [linhas[cliente_id] for cliente_id in cliente_ids if cliente_id in linhas]
 
-        resultados = query.limit(limite).all()
+    def obter_ranking_clientes(self, limite: int = 10, ordem: str = "desc") -> List[Dict[str, Any]]:
+        resultados = self._clientes_do_ranking("valor_pago", limite, ordem == "desc")
 
         return [
             {
@@ -79,49 +104,54 @@ class EstatisticaService:
         ]
 
     def obter_estatisticas_filtradas(self, filtros: dict) -> List[Dict[str, Any]]:
-        query = self.db.query(Emprestimo)
+        emprestimos = self.db.execute(self._consulta_filtrada(filtros)).all()
+        return [self._linha_filtrada(e) for e in emprestimos]
+
+    def exportar_estatisticas_filtradas(self, filtros: dict, tamanho_lote: int = TAMANHO_LOTE_EXPORTACAO) -> Iterator[Dict[str, Any]]:
+        # Só colunas, sem entidades: nada fica no mapa de identidade durante a leitura do cursor
+        consulta = self._consulta_filtrada(filtros).order_by(Emprestimo.id).execution_options(
+            yield_per=tamanho_lote, stream_results=True
+        )
+        for linha in self.db.execute(consulta):
+            yield self._linha_filtrada(linha)
+
+    def exportar_estatisticas_filtradas_em_lotes(self, filtros: dict, tamanho_lote: int = TAMANHO_LOTE_COLUNAR) -> Iterator[pa.RecordBatch]:
+        # Mesma consulta da exportação por linhas; cada partição do cursor vira um record batch sem passar por dicts
+        consulta = self._consulta_filtrada(filtros).order_by(Emprestimo.id).execution_options(
+            yield_per=tamanho_lote, stream_results=True
+        )
+        for linhas in self.db.execute(consulta).partitions():
+            yield lote_arrow(linhas, ESQUEMA_FILTRADAS)
+
+    def _consulta_filtrada(self, filtros: dict) -> Select:
+        consulta = select(*COLUNAS_FILTRADAS)
 
         if 'valor_min' in filtros:
-            query = query.filter(Emprestimo.valor >= filtros['valor_min'])
+            consulta = consulta.where(Emprestimo.valor >= filtros['valor_min'])
         if 'valor_max' in filtros:
-            query = query.filter(Emprestimo.valor <= filtros['valor_max'])
+            consulta = consulta.where(Emprestimo.valor <= filtros['valor_max'])
         if 'data_inicio' in filtros:
-            query = query.filter(Emprestimo.data_solicitacao >= filtros['data_inicio'])
+            consulta = consulta.where(Emprestimo.data_solicitacao >= filtros['data_inicio'])
         if 'data_fim' in filtros:
-            query = query.filter(Emprestimo.data_solicitacao <= filtros['data_fim'])
+            consulta = consulta.where(Emprestimo.data_solicitacao <= filtros['data_fim'])
         if 'status' in filtros:
-            query = query.filter(Emprestimo.status == filtros['status'])
-
-        emprestimos = query.all()
+            consulta = consulta.where(Emprestimo.status == filtros['status'])
+        return consulta
 
-        return [
-            {
-                "id": e.id,
-                "valor": e.valor,
-                "status": e.status.value,
-                "data_solicitacao": e.data_solicitacao,
-                "data_vencimento": e.data_vencimento,
-                "valor_pago": e.valor_pago,
-                "cliente_id": e.cliente_id
-            }
-            for e in emprestimos
-        ]
+    @staticmethod
+    def _linha_filtrada(e) -> Dict[str, Any]:
+        return {
+            "id": e.id,
+            "valor": e.valor,
+            "status": e.status.value,
+            "data_solicitacao": e.data_solicitacao,
+            "data_vencimento": e.data_vencimento,
+            "valor_pago": e.valor_pago,
+            "cliente_id": e.cliente_id
+        }
 
     def identificar_bons_pagadores(self, limite: int = 10) -> List[Dict[str, Any]]:
-        query = self.db.query(
-            Cliente.id,
-            Cliente.nome,
-            func.count(Emprestimo.id).label("total_emprestimos"),
-            func.sum(Emprestimo.valor).label("valor_total_emprestado"),
-            func.sum(Emprestimo.valor_pago).label("valor_total_pago")
-        ).join(Emprestimo).group_by(Cliente.id).having(
-            and_(
-                func.count(Emprestimo.id) > 0,
-                func.sum(Emprestimo.valor_pago) >= func.sum(Emprestimo.valor)
-            )
-        ).order_by((func.sum(Emprestimo.valor_pago) / func.sum(Emprestimo.valor)).desc())
-
-        resultados = query.limit(limite).all()
+        resultados = self._clientes_do_ranking("bons_pagadores", limite)
 
         return [
             {
@@ -130,24 +160,13 @@ class EstatisticaService:
                 "total_emprestimos": r.total_emprestimos,
                 "valor_total_emprestado": float(r.valor_total_emprestado),
                 "valor_total_pago": float(r.valor_total_pago),
-                "taxa_pagamento": (r.valor_total_pago / r.valor_total_emprestado) * 100 if r.valor_total_emprestado > 0 else 0
+                "taxa_pagamento": float(r.valor_total_pago / r.valor_total_emprestado) * 100 if r.valor_total_emprestado > 0 else 0
             }
             for r in resultados
         ]
 
     def identificar_maus_pagadores(self, limite: int = 10) -> List[Dict[str, Any]]:
-        query = self.db.query(
-            Cliente.id,
-            Cliente.nome,
-            func.count(Emprestimo.id).label("total_emprestimos"),
-            func.sum(Emprestimo.valor).label("valor_total_emprestado"),
-            func.sum(Emprestimo.valor_pago).label("valor_total_pago"),
-            func.sum(case((Emprestimo.status == StatusEmprestimo.ATRASADO, 1), else_=0)).label("emprestimos_atrasados")
-        ).join(Emprestimo).group_by(Cliente.id).having(
-            func.count(Emprestimo.id) > 0
-        ).order_by(func.sum(case((Emprestimo.status == StatusEmprestimo.ATRASADO, 1), else_=0)).desc())
-
-        resultados = query.limit(limite).all()
+        resultados = self._clientes_do_ranking("maus_pagadores", limite)
 
         return [
             {
@@ -162,48 +181,26 @@ class EstatisticaService:
             for r in resultados
         ]
 
-    def projetar_fluxo_caixa(self, periodo_dias: int = 30) -> Dict[str, Any]:
-        data_limite = datetime.now() + timedelta(days=periodo_dias)
-        emprestimos_ativos = self.db.query(Emprestimo).filter(
-            Emprestimo.status.in_([StatusEmprestimo.ATIVO, StatusEmprestimo.ATRASADO])
-        ).all()
+    def projetar_fluxo_caixa(self, periodo_dias: int = 30, granularidade: GranularidadeProjecao = GranularidadeProjecao.DIA) -> Dict[str, Any]:
+        return ProjecaoCaixaService(self.db).projetar(periodo_dias, granularidade)
 
-        total_a_receber = Decimal(0)
-        projecao_por_dia = {}
+    def analisar_tendencias(self, periodo_meses: int = 12) -> List[Dict[str, Any]]:
+        # Os últimos `periodo_meses` meses, incluindo o atual, lidos dos resumos mensais
+        hoje = date.today()
+        ano, mes = divmod(hoje.year * 12 + hoje.month - periodo_meses, 12)
+        resumos = ResumoService(self.db).listar(GranularidadeResumo.MES, date(ano, mes + 1, 1))
+        return [dict(self._tendencia(r), mes=r.inicio.strftime("%Y-%m")) for r in resumos]
 
-        for emprestimo in emprestimos_ativos:
-            valor_devido = self.emprestimo_service.calcular_valor_total_devido(emprestimo, data_limite)
-            total_a_receber += valor_devido
-
-            data_vencimento = emprestimo.proximo_vencimento
-            if data_vencimento <= data_limite:
-                dia_vencimento = data_vencimento.strftime("%Y-%m-%d")
-                if dia_vencimento not in projecao_por_dia:
-                    projecao_por_dia[dia_vencimento] = Decimal(0)
-                projecao_por_dia[dia_vencimento] += valor_devido
+    def analisar_tendencias_diarias(self, periodo_dias: int = 30) -> List[Dict[str, Any]]:
+        data_inicio = date.today() - timedelta(days=periodo_dias - 1)
+        resumos = ResumoService(self.db).listar(GranularidadeResumo.DIA, data_inicio)
+        return [dict(self._tendencia(r), dia=r.inicio.strftime("%Y-%m-%d")) for r in resumos]
 
+    @staticmethod
+    def _tendencia(r) -> Dict[str, Any]:
         return {
-            "total_a_receber": float(total_a_receber),
-            "projecao_por_dia": {k: float(v) for k, v in projecao_por_dia.items()}
-        }
-
-    def analisar_tendencias(self, periodo_meses: int = 12) -> Dict[str, Any]:
-        data_inicio = datetime.now() - timedelta(days=30 * periodo_meses)
-        query = self.db.query(
-            func.date_trunc('month', Emprestimo.data_solicitacao).label('mes'),
-            func.count(Emprestimo.id).label('total_emprestimos'),
-            func.sum(Emprestimo.valor).label('valor_total_emprestado'),
-            func.avg(Emprestimo.taxa_juros).label('taxa_juros_media')
-        ).filter(Emprestimo.data_solicitacao >= data_inicio).group_by(func.date_trunc('month', Emprestimo.data_solicitacao)).order_by('mes')
-
-        resultados = query.all()
-
-        return [
-            {
-                "mes": r.mes.strftime("%Y-%m"),
-                "total_emprestimos": r.total_emprestimos,
-                "valor_total_emprestado": float(r.valor_total_emprestado),
-                "taxa_juros_media": float(r.taxa_juros_media)
-            }
-            for r in resultados
-        ]
\ No newline at end of file
+            "total_emprestimos": r.total_emprestimos,
+            "valor_total_emprestado": float(r.valor_total),
+            "taxa_juros_media": float(r.soma_taxas / r.total_emprestimos),
+            "por_status": {status.value: getattr(r, coluna) for status, coluna in COLUNAS_STATUS.items()}
+        }
\ No newline at end of file
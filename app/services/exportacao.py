@@ -0,0 +1,155 @@
+#Emprestimo-Facil\app\services\exportacao.py
+
+import csv
+import io
+import json
+from datetime import date
+from enum import Enum
+from typing import Iterable, Iterator, Sequence
+import pyarrow as pa
+import pyarrow.parquet as pq
+from sqlalchemy import types
+
+# Texto acumulado antes de cada envio ao cliente; evita um pedaço HTTP por linha
+TAMANHO_BUFFER = 64 * 1024
+
+# Compressão dos formatos colunares; pandas, DuckDB e Polars leem os dois sem configuração
+COMPRESSAO_COLUNAR = "zstd"
+
+class FormatoExportacao(str, Enum):
+    CSV = "csv"
+    NDJSON = "ndjson"
+
+# Formatos binários, montados em lotes de colunas (record batches) e não linha a linha
+class FormatoColunar(str, Enum):
+    ARROW = "arrow"
+    PARQUET = "parquet"
+
+TIPOS_MIDIA = {
+    FormatoExportacao.CSV: "text/csv",
+    FormatoExportacao.NDJSON: "application/x-ndjson",
+    FormatoColunar.ARROW: "application/vnd.apache.arrow.stream",
+    FormatoColunar.PARQUET: "application/vnd.apache.parquet",
+}
+
+def _serializar(valor):
+    # Decimal vira texto para não perder centavos no JSON
+    if isinstance(valor, date):
+        return valor.isoformat()
+    return valor.value if isinstance(valor, Enum) else str(valor)
+
+def formatar_csv(linhas: Iterable[dict]) -> Iterator[str]:
+    buffer = io.StringIO()
+    escritor = None
+    for linha in linhas:
+        if escritor is None:
+            # O cabeçalho sai das chaves da primeira linha
+            escritor = csv.DictWriter(buffer, fieldnames=list(linha))
+            escritor.writeheader()
+        escritor.writerow(linha)
+        if buffer.tell() >= TAMANHO_BUFFER:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue()
+
+def formatar_ndjson(linhas: Iterable[dict]) -> Iterator[str]:
+    pedacos, tamanho = [], 0
+    for linha in linhas:
+        texto = json.dumps(linha, default=_serializar, ensure_ascii=False) + "\n"
+        pedacos.append(texto)
+        tamanho += len(texto)
+        if tamanho >= TAMANHO_BUFFER:
+            yield "".join(pedacos)
+            pedacos, tamanho = [], 0
+    if pedacos:
+        yield "".join(pedacos)
+
+def formatar(linhas: Iterable[dict], formato: FormatoExportacao) -> Iterator[str]:
+    if formato == FormatoExportacao.CSV:
+        return formatar_csv(linhas)
+    return formatar_ndjson(linhas)
+
+def _tipo_arrow(tipo: types.TypeEngine) -> pa.DataType:
+    # Float antes de Numeric (é subclasse) e Enum antes de String; Numeric vira decimal exato
+    if isinstance(tipo, types.Float):
+        return pa.float64()
+    if isinstance(tipo, types.Numeric):
+        return pa.decimal128(tipo.precision, tipo.scale)
+    if isinstance(tipo, types.Integer):
+        return pa.int64()
+    if isinstance(tipo, types.Boolean):
+        return pa.bool_()
+    if isinstance(tipo, types.DateTime):
+        return pa.timestamp("us", tz="UTC" if tipo.timezone else None)
+    if isinstance(tipo, types.Date):
+        return pa.date32()
+    if isinstance(tipo, (types.Enum, types.String)):
+        return pa.string()
+    raise ValueError(f"Tipo sem correspondente no Arrow: {tipo!r}")
+
+def esquema_arrow(colunas) -> pa.Schema:
+    # Colunas de uma consulta (atributos dos modelos ou expressões rotuladas)
+    return pa.schema([pa.field(coluna.key, _tipo_arrow(coluna.type)) for coluna in colunas])
+
+def lote_arrow(linhas: Sequence[Sequence], esquema: pa.Schema) -> pa.RecordBatch:
+    # Linhas de uma partição do cursor, transpostas em colunas; enums entram pelo valor
+    colunas = list(zip(*linhas)) if linhas else [()] * len(esquema)
+    arrays = []
+    for campo, valores in zip(esquema, colunas):
+        if pa.types.is_string(campo.type):
+            valores = [v.value if isinstance(v, Enum) else v for v in valores]
+        arrays.append(pa.array(valores, type=campo.type))
+    return pa.RecordBatch.from_arrays(arrays, schema=esquema)
+
+class _SaidaBinaria:
+    # Destino dos escritores do Arrow: guarda os bytes até o próximo envio e mantém a posição
+    # absoluta, usada pelo Parquet nos offsets do rodapé
+    def __init__(self):
+        self.closed = False
+        self._pedacos = []
+        self._posicao = 0
+
+    def write(self, dados) -> int:
+        dados = bytes(dados)
+        self._pedacos.append(dados)
+        self._posicao += len(dados)
+        return len(dados)
+
+    def tell(self) -> int:
+        return self._posicao
+
+    def flush(self) -> None:
+        pass
+
+    def close(self) -> None:
+        self.closed = True
+
+    def drenar(self) -> bytes:
+        dados = b"".join(self._pedacos)
+        self._pedacos = []
+        return dados
+
+def formatar_colunar(lotes: Iterable[pa.RecordBatch], esquema: pa.Schema, formato: FormatoColunar) -> Iterator[bytes]:
+    """
+    Arrow IPC (stream) ou Parquet, um lote por vez: cada record batch vira uma mensagem do
+    stream ou um row group do Parquet e é enviado assim que escrito. O esquema sai antes dos
+    dados, então uma exportação sem linhas ainda é um arquivo válido.
+    """
+    saida = _SaidaBinaria()
+    if formato == FormatoColunar.PARQUET:
+        escritor = pq.ParquetWriter(saida, esquema, compression=COMPRESSAO_COLUNAR)
+    else:
+        escritor = pa.ipc.new_stream(saida, esquema, options=pa.ipc.IpcWriteOptions(compression=COMPRESSAO_COLUNAR))
+    try:
+        for lote in lotes:
+            escritor.write_batch(lote)
+            dados = saida.drenar()
+            if dados:
+                yield dados
+    finally:
+        escritor.close()
+    dados = saida.drenar()
+    if dados:
+        yield dados
\ No newline at end of file
@@ -0,0 +1,95 @@
+#Emprestimo-Facil\app\services\outbox_service.py
+
+from sqlalchemy import insert, select, update, delete
+from app.models.outbox import NotificacaoOutbox
+from app.core.celery_app import enviar_notificacoes_async
+from celery import group
+from datetime import datetime, timedelta
+from typing import List
+from .base_service import BaseService
+
+# Notificações lidas (e bloqueadas) pelo relay por transação
+TAMANHO_LOTE_OUTBOX = 500
+# Notificações por mensagem no broker
+TAMANHO_LOTE_NOTIFICACOES = 100
+# Notificações enviadas ficam na tabela por este período antes da limpeza
+RETENCAO_OUTBOX_DIAS = 7
+
+class OutboxService(BaseService):
+    def enfileirar(self, notificacoes: List[dict]) -> None:
+        """
+        Grava notificações (to, message, notification_type) na transação corrente, sem commit:
+        elas só existem se a alteração que as gerou for confirmada, e nenhuma requisição
+        espera pelo broker.
+        """
+        if not notificacoes:
+            return
+        self.db.execute(insert(NotificacaoOutbox), [
+            {
+                "destinatario": notificacao["to"],
+                "mensagem": notificacao["message"],
+                "tipo": notificacao.get("notification_type", "email"),
+            }
+            for notificacao in notificacoes
+        ])
+
+    def publicar_pendentes(self, tamanho_lote: int = TAMANHO_LOTE_OUTBOX) -> int:
+        """
+        Relay: publica as notificações pendentes em lotes e as marca como enviadas. Cada lote é
+        bloqueado com FOR UPDATE SKIP LOCKED, então vários relays dividem a fila sem publicar a
+        mesma linha. Se o commit falhar depois da publicação, o lote é publicado de novo
+        (entrega pelo menos uma vez).
+        """
+        publicadas = 0
+        while True:
+            pendentes = self.db.execute(
+                select(NotificacaoOutbox.id, NotificacaoOutbox.destinatario, NotificacaoOutbox.mensagem, NotificacaoOutbox.tipo)
+                .where(NotificacaoOutbox.enviado_em.is_(None))
+                .order_by(NotificacaoOutbox.id)
+                .limit(tamanho_lote)
+                .with_for_update(skip_locked=True)
+            ).all()
+            if not pendentes:
+                self.db.rollback()
+                break
+
+            ids = [pendente.id for pendente in pendentes]
+            try:
+                self._publicar([
+                    {"to": pendente.destinatario, "message": pendente.mensagem, "notification_type": pendente.tipo}
+                    for pendente in pendentes
+                ])
+            except Exception as e:
+                # Broker indisponível: as linhas continuam pendentes para a próxima execução
+                self.db.rollback()
+                self.db.execute(
+                    update(NotificacaoOutbox).where(NotificacaoOutbox.id.in_(ids))
+                    .values(tentativas=NotificacaoOutbox.tentativas + 1)
+                )
+                self.db.commit()
+                self.logger.error(f"Falha ao publicar {len(ids)} notificações do outbox: {str(e)}")
+                break
+
+            self.db.execute(
+                update(NotificacaoOutbox).where(NotificacaoOutbox.id.in_(ids))
+                .values(enviado_em=datetime.utcnow(), tentativas=NotificacaoOutbox.tentativas + 1)
+            )
+            self.db.commit()
+            publicadas += len(ids)
+
+        if publicadas:
+            self.logger.info(f"{publicadas} notificações do outbox publicadas")
+        return publicadas
+
+    def _publicar(self, notificacoes: List[dict]) -> None:
+        group(
+            enviar_notificacoes_async.s(notificacoes[inicio:inicio + TAMANHO_LOTE_NOTIFICACOES])
+            for inicio in range(0, len(notificacoes), TAMANHO_LOTE_NOTIFICACOES)
+        ).apply_async()
+
+    def remover_enviadas(self, dias: int = RETENCAO_OUTBOX_DIAS) -> int:
+        resultado = self.db.execute(
+            delete(NotificacaoOutbox).where(NotificacaoOutbox.enviado_em < datetime.utcnow() - timedelta(days=dias))
+        )
+        self.db.commit()
+        return resultado.rowcount
\ No newline at end of file
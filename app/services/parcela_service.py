@@ -0,0 +1,128 @@
+#Emprestimo-Facil\app\services\parcela_service.py
+
+from sqlalchemy import insert, update, select, func, exists
+from app.models.emprestimo import Emprestimo
+from app.models.parcela import Parcela, StatusParcela
+from app.services.contador_service import ContadorService, STATUS_EMPRESTIMO_EM_CURSO
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Dict, Iterable, List, Optional
+from .base_service import BaseService
+
+STATUS_EM_ABERTO = (StatusParcela.PENDENTE, StatusParcela.ATRASADA)
+
+class ParcelaService(BaseService):
+    def inserir_parcelas(self, emprestimo_id: int, cronograma: List[dict]) -> None:
+        # Um único INSERT com todas as parcelas; cada item de `cronograma` tem numero,
+        # data_vencimento, amortizado e juros
+        if not cronograma:
+            return
+        self.db.execute(insert(Parcela), [
+            {
+                "emprestimo_id": emprestimo_id,
+                "numero": parcela["numero"],
+                "data_vencimento": parcela["data_vencimento"],
+                "valor_principal": parcela["amortizado"],
+                "valor_juros": parcela["juros"],
+                "valor": parcela["amortizado"] + parcela["juros"],
+                "valor_pago": Decimal('0'),
+                "status": StatusParcela.PENDENTE,
+            }
+            for parcela in cronograma
+        ])
+        ContadorService(self.db).registrar_parcelas()
+
+    def abater_pagamento(self, emprestimo_id: int, valor: Decimal, quitado: bool = False) -> Optional[date]:
+        """
+        Distribui `valor` pelas parcelas em aberto, da mais antiga para a mais nova, e devolve
+        o vencimento da primeira parcela que continua em aberto (None se todas foram pagas).
+        `valor` é a parte do pagamento que o livro de apropriação aplicou a juros e principal:
+        a mora não está no cronograma e não paga parcela. Um empréstimo `quitado` no livro tem
+        todas as parcelas pagas, mesmo que os juros apropriados fiquem abaixo dos do cronograma.
+        """
+        return self.abater_pagamentos({emprestimo_id: valor}, {emprestimo_id} if quitado else ())[emprestimo_id]
+
+    def abater_pagamentos(self, valores: Dict[int, Decimal], quitados: Iterable[int] = ()) -> Dict[int, Optional[date]]:
+        # Como abater_pagamento, para vários empréstimos: um SELECT e um UPDATE em lote no total
+        parcelas = self.db.execute(
+            select(Parcela.id, Parcela.emprestimo_id, Parcela.valor, Parcela.valor_pago, Parcela.status, Parcela.data_vencimento)
+            .where(Parcela.emprestimo_id.in_(list(valores)), Parcela.status.in_(STATUS_EM_ABERTO))
+            .order_by(Parcela.emprestimo_id, Parcela.numero)
+        ).all()
+
+        quitados = set(quitados)
+        restantes = dict(valores)
+        proximos_vencimentos = dict.fromkeys(valores)
+        alteracoes = []
+        agora = datetime.utcnow()
+        for parcela in parcelas:
+            emprestimo_id = parcela.emprestimo_id
+            if proximos_vencimentos[emprestimo_id] is not None:
+                continue
+            pago = parcela.valor_pago
+            saldo = parcela.valor - pago
+            abatido = saldo if emprestimo_id in quitados else min(restantes[emprestimo_id], saldo)
+            restantes[emprestimo_id] -= abatido
+            if abatido > 0:
+                quitada = abatido == saldo
+                alteracoes.append({
+                    "id": parcela.id,
+                    "valor_pago": pago + abatido,
+                    "status": StatusParcela.PAGA if quitada else parcela.status,
+                    "pago_em": agora if quitada else None,
+                })
+                if quitada:
+                    continue
+            proximos_vencimentos[emprestimo_id] = parcela.data_vencimento
+
+        if alteracoes:
+            self.db.execute(update(Parcela), alteracoes)
+            ContadorService(self.db).registrar_parcelas()
+        return proximos_vencimentos
+
+    def marcar_atrasadas(self, data_referencia: date, tamanho_lote: int) -> int:
+        """
+        Marca como atrasadas as parcelas pendentes vencidas de empréstimos em curso, em lotes de
+        `tamanho_lote` com um commit por lote, como verificar_atrasos faz com os empréstimos.
+        Parcelas marcadas saem do filtro, então cada lote pega as próximas pela chave. Atrasadas
+        continuam a receber: os saldos não mudam e a versão das parcelas também não.
+        """
+        em_curso = exists().where(Emprestimo.id == Parcela.emprestimo_id, Emprestimo.status.in_(STATUS_EMPRESTIMO_EM_CURSO))
+        total = 0
+        while True:
+            # Faixa de datas coberta pelo índice (data_vencimento, status)
+            lote = select(Parcela.id).where(
+                Parcela.status == StatusParcela.PENDENTE,
+                Parcela.data_vencimento < data_referencia,
+                em_curso
+            ).order_by(Parcela.id).limit(tamanho_lote).scalar_subquery()
+            resultado = self.db.execute(
+                update(Parcela)
+                .where(Parcela.id.in_(lote))
+                .values(status=StatusParcela.ATRASADA)
+                .execution_options(synchronize_session=False)
+            )
+            self.db.commit()
+            if not resultado.rowcount:
+                break
+            total += resultado.rowcount
+        return total
+
+    def listar_vencimentos(self, data_inicio: date, data_fim: date) -> List[Parcela]:
+        return self.db.query(Parcela).join(Parcela.emprestimo).filter(
+            Parcela.data_vencimento.between(data_inicio, data_fim),
+            Parcela.status.in_(STATUS_EM_ABERTO),
+            Emprestimo.status.in_(STATUS_EMPRESTIMO_EM_CURSO)
+        ).order_by(Parcela.data_vencimento, Parcela.emprestimo_id).all()
+
+    def somar_a_receber_por_dia(self, data_fim: date) -> Dict[date, Decimal]:
+        # Saldo das parcelas em aberto até data_fim, agrupado no banco por vencimento
+        resultados = self.db.query(
+            Parcela.data_vencimento,
+            func.sum(Parcela.valor - Parcela.valor_pago)
+        ).join(Parcela.emprestimo).filter(
+            Parcela.data_vencimento <= data_fim,
+            Parcela.status.in_(STATUS_EM_ABERTO),
+            Emprestimo.status.in_(STATUS_EMPRESTIMO_EM_CURSO)
+        ).group_by(Parcela.data_vencimento).order_by(Parcela.data_vencimento)
+        return dict(resultados.all())
\ No newline at end of file
@@ -0,0 +1,117 @@
+#Emprestimo-Facil\app\services\projecao_caixa_service.py
+
+from app.services.parcela_service import ParcelaService
+from app.services.contador_service import ContadorService
+from app.core.logger import get_logger
+from collections import OrderedDict
+from datetime import date, timedelta
+from decimal import Decimal, ROUND_HALF_UP
+from typing import Any, Dict, Tuple
+from .base_service import BaseService
+import enum
+import threading
+import numpy as np
+
+logger = get_logger(__name__)
+
+# Projeções guardadas por processo, por (horizonte, data de referência)
+MAX_PROJECOES_EM_CACHE = 64
+
+class GranularidadeProjecao(str, enum.Enum):
+    DIA = "dia"
+    SEMANA = "semana"
+    MES = "mes"
+
+def agrupar_por_periodo(datas: np.ndarray, centavos: np.ndarray, granularidade: GranularidadeProjecao) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Soma `centavos` por dia, semana (a partir da segunda-feira) ou mês das `datas`
+    (datetime64[D], em ordem crescente). Devolve o início de cada período e o total em centavos.
+    """
+    if granularidade == GranularidadeProjecao.SEMANA:
+        # 1970-01-01 foi uma quinta-feira: +3 conta os dias desde a segunda-feira
+        chaves = datas - (datas.astype(np.int64) + 3) % 7
+    elif granularidade == GranularidadeProjecao.MES:
+        chaves = datas.astype('datetime64[M]').astype('datetime64[D]')
+    else:
+        chaves = datas
+    if not len(chaves):
+        return chaves, centavos
+    inicios = np.flatnonzero(np.r_[True, chaves[1:] != chaves[:-1]])
+    return chaves[inicios], np.add.reduceat(centavos, inicios)
+
+class _CacheProjecoes:
+    """
+    Saldos diários já lidos, por (horizonte, data de referência), com a versão das parcelas do
+    momento da leitura (ContadorService.versao_parcelas): toda escrita que muda os saldos a
+    receber, em qualquer processo, incrementa a versão, então uma entrada de outra versão é
+    descartada.
+    """
+    def __init__(self, tamanho: int = MAX_PROJECOES_EM_CACHE):
+        self.tamanho = tamanho
+        self._lock = threading.Lock()
+        self._entradas: "OrderedDict[tuple, tuple]" = OrderedDict()
+
+    def obter(self, chave: tuple, versao: tuple):
+        with self._lock:
+            entrada = self._entradas.get(chave)
+            if entrada is None or entrada[0] != versao:
+                return None
+            self._entradas.move_to_end(chave)
+            return entrada[1]
+
+    def guardar(self, chave: tuple, versao: tuple, valor) -> None:
+        with self._lock:
+            self._entradas[chave] = (versao, valor)
+            self._entradas.move_to_end(chave)
+            while len(self._entradas) > self.tamanho:
+                self._entradas.popitem(last=False)
+
+    def limpar(self) -> None:
+        with self._lock:
+            self._entradas.clear()
+
+projecoes_em_cache = _CacheProjecoes()
+
+class ProjecaoCaixaService(BaseService):
+    def _saldos_por_dia(self, periodo_dias: int, data_referencia: date) -> Tuple[np.ndarray, np.ndarray]:
+        # Uma linha por vencimento (no máximo o horizonte mais os dias em atraso), somada no banco
+        # a partir das parcelas em aberto: cada parcela futura cai no seu próprio vencimento
+        versao = ContadorService(self.db).versao_parcelas()
+        chave = (periodo_dias, data_referencia)
+        saldos = projecoes_em_cache.obter(chave, versao) if versao is not None else None
+        if saldos is None:
+            a_receber = ParcelaService(self.db).somar_a_receber_por_dia(data_referencia + timedelta(days=periodo_dias))
+            saldos = (
+                np.array(list(a_receber), dtype='datetime64[D]'),
+                np.array([
+                    int((Decimal(str(valor)) * 100).quantize(Decimal('1'), rounding=ROUND_HALF_UP))
+                    for valor in a_receber.values()
+                ], dtype=np.int64),
+            )
+            if versao is not None:
+                projecoes_em_cache.guardar(chave, versao, saldos)
+        return saldos
+
+    def projetar(
+        self,
+        periodo_dias: int = 30,
+        granularidade: GranularidadeProjecao = GranularidadeProjecao.DIA,
+        data_referencia: date = None
+    ) -> Dict[str, Any]:
+        """
+        Entradas previstas pelas parcelas em aberto que vencem de `data_referencia` (hoje) até o
+        horizonte, agrupadas por período. Parcelas já vencidas não são caixa previsto para uma
+        data: entram em total_em_atraso, fora da projeção.
+        """
+        data_referencia = data_referencia or date.today()
+        datas, centavos = self._saldos_por_dia(periodo_dias, data_referencia)
+        futuras = datas >= np.datetime64(data_referencia, 'D')
+        inicios, totais = agrupar_por_periodo(datas[futuras], centavos[futuras], granularidade)
+
+        return {
+            "total_a_receber": int(centavos.sum()) / 100,
+            "total_em_atraso": int(centavos[~futuras].sum()) / 100,
+            f"projecao_por_{granularidade.value}": {
+                str(inicio): int(total) / 100 for inicio, total in zip(inicios, totais)
+            }
+        }
\ No newline at end of file
@@ -0,0 +1,349 @@
+#Emprestimo-Facil\app\services\ranking_service.py
+
+from sqlalchemy import and_, select, event
+from sqlalchemy.orm import Session
+from app.models.estatistica_cliente import EstatisticaCliente
+from app.core.celery_app import celery_app
+from app.core.config import settings
+from app.core.logger import get_logger
+from app.db.database import SessionLocal
+from bisect import bisect_left, insort
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+from .base_service import BaseService
+import threading
+import time
+
+logger = get_logger(__name__)
+
+# Pontuações gravadas no Redis por comando do pipeline na reconstrução
+TAMANHO_LOTE_RANKING = 10000
+# Rankings em memória não veem as escritas de outros processos: são refeitos após este período
+VALIDADE_RANKING_MEMORIA = 300
+# Depois de uma falha do Redis, os rankings ficam em memória e o Redis só é tentado de novo após este intervalo
+INTERVALO_RECONEXAO_REDIS = 30
+# Uma reconstrução agendada no Redis bloqueia novos agendamentos por este período
+VALIDADE_AGENDAMENTO_RECONSTRUCAO = 300
+
+def _valor_pago(estatistica) -> Optional[float]:
+    return float(estatistica.valor_total_pago) if estatistica.total_emprestimos else None
+
+def _taxa_pagamento(estatistica) -> Optional[float]:
+    # Só entra quem já pagou ao menos o valor emprestado
+    if not estatistica.total_emprestimos or not estatistica.valor_total_emprestado:
+        return None
+    if estatistica.valor_total_pago < estatistica.valor_total_emprestado:
+        return None
+    return float(estatistica.valor_total_pago / estatistica.valor_total_emprestado)
+
+def _emprestimos_atrasados(estatistica) -> Optional[float]:
+    return estatistica.emprestimos_atrasados if estatistica.total_emprestimos else None
+
+# Pontuação de cada cliente por ranking, a partir da sua linha de estatisticas_clientes; None tira o cliente
+RANKINGS: Dict[str, Callable[[EstatisticaCliente], Optional[float]]] = {
+    "valor_pago": _valor_pago,
+    "bons_pagadores": _taxa_pagamento,
+    "maus_pagadores": _emprestimos_atrasados,
+}
+
+# Os mesmos rankings em SQL (pontuação e filtro), para ler o topo direto da tabela enquanto
+# nenhum ranking foi construído; devem concordar com RANKINGS
+RANKINGS_SQL = {
+    "valor_pago": (EstatisticaCliente.valor_total_pago, EstatisticaCliente.total_emprestimos > 0),
+    "bons_pagadores": (
+        EstatisticaCliente.valor_total_pago / EstatisticaCliente.valor_total_emprestado,
+        and_(
+            EstatisticaCliente.total_emprestimos > 0,
+            EstatisticaCliente.valor_total_emprestado > 0,
+            EstatisticaCliente.valor_total_pago >= EstatisticaCliente.valor_total_emprestado,
+        ),
+    ),
+    "maus_pagadores": (EstatisticaCliente.emprestimos_atrasados, EstatisticaCliente.total_emprestimos > 0),
+}
+
+class RankingMemoria:
+    """
+    Rankings no processo: pontuação por cliente e uma lista ordenada de (pontuação, cliente),
+    mantida com bisect. Usada quando o Redis não está disponível. Cada processo só aplica as
+    próprias escritas: as dos outros processos aparecem na reconstrução seguinte, até
+    VALIDADE_RANKING_MEMORIA segundos depois.
+    """
+    def __init__(self, validade: float = VALIDADE_RANKING_MEMORIA):
+        self.validade = validade
+        self._lock = threading.Lock()
+        self._reconstruindo = threading.Lock()
+        self._pontuacoes: Dict[str, Dict[int, float]] = {}
+        self._ordenados: Dict[str, List[Tuple[float, int]]] = {}
+        self._construidos: Dict[str, float] = {}
+
+    def existe(self, nome: str) -> bool:
+        construido = self._construidos.get(nome)
+        return construido is not None and time.monotonic() - construido < self.validade
+
+    def agendar_reconstrucao(self) -> None:
+        # Refeito em uma thread do processo, com sessão própria; as leituras seguem com o ranking anterior
+        if not self._reconstruindo.acquire(blocking=False):
+            return
+        def reconstruir():
+            db = SessionLocal()
+            try:
+                RankingService(db).reconstruir(self)
+            except Exception as e:
+                logger.error(f"Erro ao reconstruir os rankings em memória: {str(e)}")
+            finally:
+                db.close()
+                self._reconstruindo.release()
+        threading.Thread(target=reconstruir, name="reconstrucao-rankings", daemon=True).start()
+
+    def atualizar(self, nome: str, pontuacoes: Dict[int, Optional[float]]) -> None:
+        with self._lock:
+            if nome not in self._construidos:
+                return
+            atuais, ordenados = self._pontuacoes[nome], self._ordenados[nome]
+            for cliente_id, pontuacao in pontuacoes.items():
+                anterior = atuais.pop(cliente_id, None)
+                if anterior is not None:
+                    del ordenados[bisect_left(ordenados, (anterior, cliente_id))]
+                if pontuacao is not None:
+                    atuais[cliente_id] = pontuacao
+                    insort(ordenados, (pontuacao, cliente_id))
+
+    def substituir(self, nome: str, pontuacoes: Dict[int, float]) -> None:
+        ordenados = sorted((pontuacao, cliente_id) for cliente_id, pontuacao in pontuacoes.items())
+        with self._lock:
+            self._pontuacoes[nome] = dict(pontuacoes)
+            self._ordenados[nome] = ordenados
+            self._construidos[nome] = time.monotonic()
+
+    def topo(self, nome: str, limite: int, decrescente: bool = True) -> List[Tuple[int, float]]:
+        if limite <= 0:
+            return []
+        with self._lock:
+            ordenados = self._ordenados.get(nome, [])
+            selecionados = ordenados[:-limite - 1:-1] if decrescente else ordenados[:limite]
+        return [(cliente_id, pontuacao) for pontuacao, cliente_id in selecionados]
+
+class RankingRedis:
+    """
+    Rankings em sorted sets do Redis, compartilhados por todos os processos. A chave
+    `<ranking>:construido` marca um ranking completo: atualizações não criam rankings parciais.
+    """
+    def __init__(self, redis, prefixo: str = "ranking"):
+        self.redis = redis
+        self.prefixo = prefixo
+
+    def _chave(self, nome: str) -> str:
+        return f"{self.prefixo}:{nome}"
+
+    def existe(self, nome: str) -> bool:
+        return bool(self.redis.exists(f"{self._chave(nome)}:construido"))
+
+    def agendar_reconstrucao(self) -> None:
+        # Uma tarefa para todos os processos: a marca com expiração evita uma por leitura
+        if self.redis.set(f"{self.prefixo}:reconstrucao_agendada", 1, nx=True, ex=VALIDADE_AGENDAMENTO_RECONSTRUCAO):
+            celery_app.send_task("app.tasks.reconstruir_rankings")
+
+    def atualizar(self, nome: str, pontuacoes: Dict[int, Optional[float]]) -> None:
+        if not self.existe(nome):
+            return
+        chave = self._chave(nome)
+        pipeline = self.redis.pipeline(transaction=False)
+        novas = {cliente_id: pontuacao for cliente_id, pontuacao in pontuacoes.items() if pontuacao is not None}
+        removidos = [cliente_id for cliente_id, pontuacao in pontuacoes.items() if pontuacao is None]
+        if novas:
+            pipeline.zadd(chave, novas)
+        if removidos:
+            pipeline.zrem(chave, *removidos)
+        pipeline.execute()
+
+    def substituir(self, nome: str, pontuacoes: Dict[int, float]) -> None:
+        # Monta o ranking em uma chave temporária e troca de uma vez: leituras nunca veem um ranking pela metade
+        chave = self._chave(nome)
+        temporaria = f"{chave}:reconstrucao"
+        itens = list(pontuacoes.items())
+        pipeline = self.redis.pipeline(transaction=False)
+        pipeline.delete(temporaria)
+        for inicio in range(0, len(itens), TAMANHO_LOTE_RANKING):
+            pipeline.zadd(temporaria, dict(itens[inicio:inicio + TAMANHO_LOTE_RANKING]))
+        pipeline.execute()
+
+        pipeline = self.redis.pipeline()
+        if itens:
+            pipeline.rename(temporaria, chave)
+        else:
+            pipeline.delete(chave)
+        pipeline.set(f"{chave}:construido", 1)
+        pipeline.execute()
+
+    def topo(self, nome: str, limite: int, decrescente: bool = True) -> List[Tuple[int, float]]:
+        # ZREVRANGE/ZRANGE: O(log N + K)
+        if limite <= 0:
+            return []
+        ler = self.redis.zrevrange if decrescente else self.redis.zrange
+        return [(int(cliente_id), pontuacao) for cliente_id, pontuacao in ler(self._chave(nome), 0, limite - 1, withscores=True)]
+
+# Fallback do processo; também atende leituras quando o Redis falha
+rankings_memoria = RankingMemoria()
+
+class _ConexaoRankings:
+    """
+    Escolhe entre o Redis e os rankings em memória a cada uso. Uma falha (na conexão ou em uma
+    leitura) põe o processo em memória por INTERVALO_RECONEXAO_REDIS segundos; depois disso
+    o Redis é tentado de novo.
+    """
+    def __init__(self, intervalo: float = INTERVALO_RECONEXAO_REDIS):
+        self.intervalo = intervalo
+        self._lock = threading.Lock()
+        self._redis: Optional[RankingRedis] = None
+        self._proxima_tentativa = 0.0
+
+    def obter(self):
+        with self._lock:
+            if self._redis is not None:
+                return self._redis
+            if time.monotonic() < self._proxima_tentativa:
+                return rankings_memoria
+            try:
+                import redis
+                cliente = redis.Redis.from_url(settings.redis_ranking_url or settings.redis_url, socket_timeout=1, socket_connect_timeout=1)
+                cliente.ping()
+            except Exception as e:
+                self._proxima_tentativa = time.monotonic() + self.intervalo
+                logger.warning(f"Redis indisponível para os rankings, usando rankings em memória por {self.intervalo}s: {str(e)}")
+                return rankings_memoria
+            self._redis = RankingRedis(cliente)
+            return self._redis
+
+    def usando_redis(self) -> bool:
+        # Sem tentar conectar: usado no commit, que não deve esperar pelo Redis
+        return self._redis is not None
+
+    def falhou(self, erro: Exception) -> None:
+        with self._lock:
+            self._redis = None
+            self._proxima_tentativa = time.monotonic() + self.intervalo
+        logger.warning(f"Falha no Redis dos rankings, usando rankings em memória por {self.intervalo}s: {str(erro)}")
+
+conexao_rankings = _ConexaoRankings()
+
+def obter_rankings():
+    return conexao_rankings.obter()
+
+def _aplicar_pendentes(sessao: Session) -> None:
+    pendentes = sessao.info.pop("rankings_pendentes", None)
+    if not pendentes:
+        return
+    # O ranking em memória é atualizado no processo, sem E/S, se já foi construído; os outros
+    # processos só veem a escrita quando refazem o seu ranking (VALIDADE_RANKING_MEMORIA). O Redis é
+    # atualizado por um worker a partir de estatisticas_clientes: o commit, que pode rodar
+    # dentro de uma rota assíncrona, só publica uma mensagem
+    for nome, pontuacoes in pendentes.items():
+        rankings_memoria.atualizar(nome, pontuacoes)
+    if conexao_rankings.usando_redis():
+        cliente_ids = sorted({cliente_id for pontuacoes in pendentes.values() for cliente_id in pontuacoes})
+        try:
+            celery_app.send_task("app.tasks.atualizar_rankings", args=[cliente_ids])
+        except Exception as e:
+            logger.error(f"Erro ao enfileirar a atualização dos rankings: {str(e)}")
+
+def _descartar_pendentes(sessao: Session) -> None:
+    sessao.info.pop("rankings_pendentes", None)
+
+class RankingService(BaseService):
+    @property
+    def rankings(self):
+        # Resolvido a cada uso: o Redis volta a ser usado assim que responder
+        return obter_rankings()
+
+    def _pontuacoes(self, cliente_ids: List[int]) -> Dict[str, Dict[int, Optional[float]]]:
+        estatisticas = self.db.execute(
+            select(EstatisticaCliente).where(EstatisticaCliente.cliente_id.in_(cliente_ids))
+        ).scalars().all()
+        return {nome: {e.cliente_id: pontuacao(e) for e in estatisticas} for nome, pontuacao in RANKINGS.items()}
+
+    def registrar_clientes(self, cliente_ids: Iterable[int]) -> None:
+        """
+        Chamado na transação da escrita, depois de atualizar estatisticas_clientes: lê as linhas
+        dos clientes alterados (bloqueadas pela escrita até o commit) e guarda as pontuações na
+        sessão. Elas só chegam aos rankings no commit; um rollback as descarta.
+        """
+        cliente_ids = sorted(set(cliente_ids))
+        if not cliente_ids:
+            return
+        pontuacoes = self._pontuacoes(cliente_ids)
+        if not any(pontuacoes.values()):
+            return
+
+        if not self.db.info.get("rankings_ouvintes"):
+            event.listen(self.db, "after_commit", _aplicar_pendentes)
+            event.listen(self.db, "after_soft_rollback", lambda sessao, transacao: _descartar_pendentes(sessao))
+            self.db.info["rankings_ouvintes"] = True
+        pendentes = self.db.info.setdefault("rankings_pendentes", {})
+        for nome, do_ranking in pontuacoes.items():
+            pendentes.setdefault(nome, {}).update(do_ranking)
+
+    def atualizar_clientes(self, cliente_ids: Iterable[int]) -> int:
+        """
+        Executado pelo worker depois do commit das escritas: aplica as pontuações atuais dos
+        clientes, relidas de estatisticas_clientes. Como a leitura é posterior ao commit, duas
+        escritas no mesmo cliente não publicam fora de ordem.
+        """
+        cliente_ids = sorted(set(cliente_ids))
+        if not cliente_ids:
+            return 0
+        rankings = self.rankings
+        for nome, pontuacoes in self._pontuacoes(cliente_ids).items():
+            # Cliente sem linha de estatísticas sai do ranking
+            rankings.atualizar(nome, {cliente_id: pontuacoes.get(cliente_id) for cliente_id in cliente_ids})
+        return len(cliente_ids)
+
+    def reconstruir(self, rankings=None) -> int:
+        # Refaz todos os rankings a partir de estatisticas_clientes em uma única leitura
+        rankings = rankings or self.rankings
+        pontuacoes = {nome: {} for nome in RANKINGS}
+        total = 0
+        for estatistica in self.db.execute(
+            select(EstatisticaCliente).execution_options(yield_per=TAMANHO_LOTE_RANKING)
+        ).scalars():
+            total += 1
+            for nome, pontuacao in RANKINGS.items():
+                valor = pontuacao(estatistica)
+                if valor is not None:
+                    pontuacoes[nome][estatistica.cliente_id] = valor
+        for nome in RANKINGS:
+            rankings.substituir(nome, pontuacoes[nome])
+        logger.info(f"Rankings de clientes reconstruídos a partir de {total} clientes")
+        return total
+
+    def topo_sql(self, nome: str, limite: int, decrescente: bool = True) -> List[Tuple[int, float]]:
+        # ORDER BY ... LIMIT sobre estatisticas_clientes, com o desempate por cliente dos rankings
+        if limite <= 0:
+            return []
+        pontuacao, filtro = RANKINGS_SQL[nome]
+        ordem = (pontuacao.desc(), EstatisticaCliente.cliente_id.desc()) if decrescente else (pontuacao, EstatisticaCliente.cliente_id)
+        estatisticas = self.db.execute(
+            select(EstatisticaCliente).where(filtro).order_by(*ordem).limit(limite)
+        ).scalars().all()
+        return [(e.cliente_id, RANKINGS[nome](e)) for e in estatisticas]
+
+    def topo(self, nome: str, limite: int, decrescente: bool = True) -> List[Tuple[int, float]]:
+        """
+        Só lê: um ranking ausente ou vencido é reconstruído fora da requisição (tarefa
+        reconstruir_rankings, também agendada no beat, ou uma thread para o ranking em memória).
+        Enquanto isso vale o ranking em memória do processo, possivelmente defasado, ou, se ele
+        também não existe (início do processo, chave do Redis expirada), uma consulta limitada
+        a `limite` linhas de estatisticas_clientes.
+        """
+        rankings = self.rankings
+        try:
+            if rankings.existe(nome):
+                return rankings.topo(nome, limite, decrescente)
+            rankings.agendar_reconstrucao()
+        except Exception as e:
+            if rankings is rankings_memoria:
+                raise
+            conexao_rankings.falhou(e)
+        if rankings_memoria.existe(nome):
+            return rankings_memoria.topo(nome, limite, decrescente)
+        if rankings is not rankings_memoria:
+            rankings_memoria.agendar_reconstrucao()
+        return self.topo_sql(nome, limite, decrescente)
\ No newline at end of file
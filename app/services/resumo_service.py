@@ -0,0 +1,125 @@
+#Emprestimo-Facil\app\services\resumo_service.py
+
+from sqlalchemy import select, insert, delete, func, case, cast, literal, Date
+from sqlalchemy.dialects import postgresql, sqlite
+from app.models.emprestimo import Emprestimo, StatusEmprestimo
+from app.models.resumo import ResumoEmprestimos, GranularidadeResumo
+from app.services.contador_service import AlteracaoEmprestimo
+from app.core.logger import get_logger
+from datetime import date
+from typing import List
+from .base_service import BaseService
+
+logger = get_logger(__name__)
+
+COLUNAS_STATUS = {
+    StatusEmprestimo.PENDENTE: "emprestimos_pendentes",
+    StatusEmprestimo.APROVADO: "emprestimos_aprovados",
+    StatusEmprestimo.ATIVO: "emprestimos_ativos",
+    StatusEmprestimo.QUITADO: "emprestimos_quitados",
+    StatusEmprestimo.ATRASADO: "emprestimos_atrasados",
+    StatusEmprestimo.CANCELADO: "emprestimos_cancelados",
+}
+COLUNAS_RESUMO = ("total_emprestimos", "valor_total", "soma_taxas", *COLUNAS_STATUS.values())
+
+# INSERT ... ON CONFLICT DO UPDATE tem a mesma API nos dois bancos
+INSERTS_UPSERT = {
+    "postgresql": postgresql.insert,
+    "sqlite": sqlite.insert,
+}
+
+def inicio_periodo(data: date, granularidade: GranularidadeResumo) -> date:
+    return data.replace(day=1) if granularidade == GranularidadeResumo.MES else data
+
+def _inicio_periodo_sql(coluna, granularidade: GranularidadeResumo, dialeto: str):
+    # Mesmo período de inicio_periodo, calculado no banco; date_trunc só existe no PostgreSQL
+    if dialeto == "postgresql":
+        if granularidade == GranularidadeResumo.MES:
+            return cast(func.date_trunc("month", coluna), Date)
+        return cast(coluna, Date)
+    if granularidade == GranularidadeResumo.MES:
+        return func.date(coluna, "start of month")
+    return func.date(coluna)
+
+class ResumoService(BaseService):
+    def _dialeto(self) -> str:
+        return self.db.get_bind().dialect.name
+
+    def registrar_emprestimos(self, alteracoes: List[AlteracaoEmprestimo]) -> None:
+        """
+        Aplica as alterações aos resumos mensais e diários na transação corrente, sem commit:
+        o estado anterior de cada empréstimo sai do seu período e o atual entra. Um único
+        upsert para todos os períodos tocados.
+        """
+        deltas = {}
+        for anterior, atual in alteracoes:
+            for estado, sinal in ((atual, 1), (anterior, -1)):
+                if estado is None:
+                    continue
+                for granularidade in GranularidadeResumo:
+                    chave = (granularidade.value, inicio_periodo(estado.data_solicitacao, granularidade))
+                    linha = deltas.setdefault(chave, dict.fromkeys(COLUNAS_RESUMO, 0))
+                    linha["total_emprestimos"] += sinal
+                    linha["valor_total"] += sinal * estado.valor
+                    linha["soma_taxas"] += sinal * estado.taxa_juros
+                    linha[COLUNAS_STATUS[estado.status]] += sinal
+
+        # Períodos em ordem fixa: transações concorrentes bloqueiam as linhas na mesma ordem
+        linhas = [
+            {"granularidade": GranularidadeResumo(granularidade), "inicio": inicio, **valores}
+            for (granularidade, inicio), valores in sorted(deltas.items())
+            if any(valores.values())
+        ]
+        if not linhas:
+            return
+        tabela = ResumoEmprestimos.__table__
+        comando = INSERTS_UPSERT[self._dialeto()](tabela)
+        comando = comando.on_conflict_do_update(
+            index_elements=[tabela.c.granularidade, tabela.c.inicio],
+            set_={coluna: tabela.c[coluna] + comando.excluded[coluna] for coluna in COLUNAS_RESUMO}
+        )
+        self.db.execute(comando, linhas)
+
+    def reconstruir(self, data_inicio: date = None) -> int:
+        """
+        Backfill: recalcula os resumos a partir de emprestimos (todos, ou os meses desde
+        `data_inicio`) com um INSERT ... SELECT agrupado por período, em uma transação. Uma
+        escrita concorrente em período reconstruído espera o commit e soma sobre o valor novo.
+        """
+        dialeto = self._dialeto()
+        apagar = delete(ResumoEmprestimos)
+        corte = None
+        if data_inicio is not None:
+            corte = inicio_periodo(data_inicio, GranularidadeResumo.MES)
+            apagar = apagar.where(ResumoEmprestimos.inicio >= corte)
+        self.db.execute(apagar)
+
+        total = 0
+        for granularidade in GranularidadeResumo:
+            inicio = _inicio_periodo_sql(Emprestimo.data_solicitacao, granularidade, dialeto).label("inicio")
+            consulta = select(
+                literal(granularidade, ResumoEmprestimos.granularidade.type),
+                inicio,
+                func.count(Emprestimo.id),
+                func.coalesce(func.sum(Emprestimo.valor), 0),
+                func.coalesce(func.sum(Emprestimo.taxa_juros), 0),
+                *[func.count(case((Emprestimo.status == status, 1))) for status in COLUNAS_STATUS]
+            ).group_by(inicio)
+            if corte is not None:
+                consulta = consulta.where(Emprestimo.data_solicitacao >= corte)
+            resultado = self.db.execute(
+                insert(ResumoEmprestimos).from_select(["granularidade", "inicio", *COLUNAS_RESUMO], consulta)
+            )
+            total += resultado.rowcount
+        self.db.commit()
+
+        logger.info(f"Resumos de empréstimos reconstruídos: {total} períodos")
+        return total
+
+    def listar(self, granularidade: GranularidadeResumo, data_inicio: date) -> List[ResumoEmprestimos]:
+        # Uma linha por período: a consulta lê no máximo um resumo por mês ou dia pedido
+        return self.db.query(ResumoEmprestimos).filter(
+            ResumoEmprestimos.granularidade == granularidade,
+            ResumoEmprestimos.inicio >= inicio_periodo(data_inicio, granularidade),
+            ResumoEmprestimos.total_emprestimos > 0
+        ).order_by(ResumoEmprestimos.inicio).all()
\ No newline at end of file
@@ -0,0 +1,141 @@
+#Emprestimo-Facil\app\services\simulacao_service.py
+
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+from collections import deque
+from decimal import Decimal
+from itertools import islice
+from typing import Iterable, Iterator, Optional
+from fastapi import HTTPException
+from app.core.config import settings
+from app.core.logger import get_logger
+from app.schemas.simulacao import CenarioSimulacao
+from app.services.calculo_juros import BaseRegra, CalculoJuros, TipoJuros
+
+logger = get_logger(__name__)
+
+# Pool compartilhado por todas as requisições; criado no primeiro uso
+_pool: Optional[ProcessPoolExecutor] = None
+_lock_pool = threading.Lock()
+
+def _num_processos() -> int:
+    return settings.simulacao_processos or os.cpu_count() or 1
+
+def _obter_pool() -> ProcessPoolExecutor:
+    global _pool
+    with _lock_pool:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(max_workers=_num_processos())
+        return _pool
+
+def encerrar_pool(pool: Optional[ProcessPoolExecutor] = None, terminar_processos: bool = False) -> None:
+    # Com `pool`, só encerra se ele ainda for o pool atual: outra requisição pode já tê-lo trocado
+    global _pool
+    with _lock_pool:
+        if _pool is not None and (pool is None or _pool is pool):
+            processos = list((_pool._processes or {}).values())
+            _pool.shutdown(wait=False, cancel_futures=True)
+            if terminar_processos:
+                # Um cenário preso não é interrompido pelo shutdown: o processo é encerrado
+                for processo in processos:
+                    processo.terminate()
+            _pool = None
+
+def _reiniciar_pool(pool: ProcessPoolExecutor) -> ProcessPoolExecutor:
+    encerrar_pool(pool, terminar_processos=True)
+    return _obter_pool()
+
+def _interrompido(futuro) -> bool:
+    # Cancelado ou quebrado pelo reinício do pool, sem chegar a um resultado
+    return futuro.done() and (futuro.cancelled() or isinstance(futuro.exception(), BrokenProcessPool))
+
+def simular_cenario(cenario: dict, regra: BaseRegra, incluir_parcelas: bool = False) -> dict:
+    # Executada nos processos do pool: recebe e devolve apenas tipos serializáveis
+    valor_principal = Decimal(str(cenario['valor_principal']))
+    taxa_juros = Decimal(str(cenario['taxa_juros']))
+    tipo_juros = TipoJuros(cenario['tipo_juros'])
+    parcelas = CalculoJuros.calcular_amortizacao(valor_principal, taxa_juros, cenario['num_parcelas'], regra, tipo_juros)
+
+    resultado = {
+        "primeira_parcela": float(parcelas[0]["parcela"]),
+        "ultima_parcela": float(parcelas[-1]["parcela"]),
+        "total_pago": float(sum(p["parcela"] for p in parcelas)),
+        "total_juros": float(sum(p["juros"] for p in parcelas)),
+    }
+    if cenario.get('valor_maximo'):
+        resultado["prazo_maximo"] = CalculoJuros.calcular_prazo_maximo(
+            valor_principal, taxa_juros, Decimal(str(cenario['valor_maximo'])), regra, tipo_juros
+        )
+    if incluir_parcelas:
+        resultado["parcelas"] = [
+            {chave: valor if chave == "numero" else float(valor) for chave, valor in parcela.items()}
+            for parcela in parcelas
+        ]
+    return resultado
+
+class SimulacaoService:
+    def __init__(self, timeout: float = None, max_cenarios: int = None):
+        self.timeout = timeout or settings.simulacao_timeout_cenario
+        self.max_cenarios = max_cenarios or settings.simulacao_max_cenarios
+
+    def validar_tamanho(self, tamanho: int) -> None:
+        if tamanho > self.max_cenarios:
+            raise HTTPException(
+                status_code=400,
+                detail=f"A simulação tem {tamanho} cenários; o máximo permitido é {self.max_cenarios}"
+            )
+
+    def simular(self, cenarios: Iterable[CenarioSimulacao], regra: BaseRegra, incluir_parcelas: bool = False) -> Iterator[dict]:
+        """
+        Distribui os cenários pelo pool e devolve os resultados na ordem de entrada, à medida
+        que ficam prontos. Só uma janela de cenários fica pendente por vez, para que uma grade
+        grande não ocupe a fila do pool inteira.
+
+        Cada envio tem o seu próprio prazo, contado a partir do envio. Um cenário que perde o
+        prazo tem o processo encerrado e o pool recriado; os cenários da janela que ainda não
+        terminaram são reenviados ao pool novo com um prazo novo.
+        """
+        pool = _obter_pool()
+        janela = 2 * _num_processos()
+        cenarios = enumerate(cenarios)
+        pendentes = deque()
+
+        def enviar(dados: dict):
+            return pool.submit(simular_cenario, dados, regra, incluir_parcelas), time.monotonic() + self.timeout
+
+        while True:
+            for indice, cenario in islice(cenarios, janela - len(pendentes)):
+                dados = cenario.model_dump()
+                pendentes.append([indice, dados, *enviar(dados), False])
+            if not pendentes:
+                break
+
+            indice, dados, futuro, prazo, reenviado = pendentes[0]
+            concluidos, _ = wait([futuro], timeout=max(prazo - time.monotonic(), 0))
+            if concluidos and _interrompido(futuro) and not reenviado:
+                # O pool foi reiniciado (por este ou outro pedido) antes de o cenário terminar
+                pool = _obter_pool()
+                pendentes[0][2:] = [*enviar(dados), True]
+                continue
+
+            pendentes.popleft()
+            resultado = {"indice": indice, **dados, "tipo_juros": dados["tipo_juros"].value}
+            if not concluidos:
+                logger.warning(f"Cenário {indice} da simulação excedeu {self.timeout}s")
+                resultado["erro"] = "Tempo limite excedido"
+                pool = _reiniciar_pool(pool)
+                for pendente in pendentes:
+                    if not pendente[2].done() or _interrompido(pendente[2]):
+                        pendente[2:4] = enviar(pendente[1])
+            else:
+                try:
+                    resultado.update(futuro.result())
+                except BrokenProcessPool:
+                    encerrar_pool(pool)
+                    raise
+                except Exception as e:
+                    resultado["erro"] = str(e)
+            yield resultado
\ No newline at end of file
@@ -33,11 +33,16 @@ class UsuarioService(BaseService):
         return self.db.query(Usuario).filter(Usuario.email == email).first()
 
     def listar_usuarios(self, page: int = 1, per_page: int = None):
-        if per_page is None:
-            per_page = settings.get_pagination_settings()["PAGE_SIZE"]
+        paginacao = settings.get_pagination_settings()
+        per_page = min(per_page or paginacao["page_size"], paginacao["max_page_size"])
         query = self.db.query(Usuario)
         return self.paginate(query, page, per_page)
 
+    def listar_usuarios_cursor(self, cursor: str = None, per_page: int = None) -> dict:
+        paginacao = settings.get_pagination_settings()
+        per_page = min(per_page or paginacao["page_size"], paginacao["max_page_size"])
+        return self.paginate_cursor(self.db.query(Usuario), Usuario.id, Usuario.id, cursor, per_page)
+
     def atualizar_usuario(self, usuario_id: int, usuario: UsuarioUpdate):
         try:
             db_usuario = self.obter_usuario(usuario_id)
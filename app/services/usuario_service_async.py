@@ -0,0 +1,93 @@
+#Emprestimo-Facil\app\services\usuario_service_async.py
+
+from sqlalchemy import select
+from starlette.concurrency import run_in_threadpool
+from app.models.usuario import Usuario
+from app.schemas.usuario import UsuarioCreate, UsuarioUpdate
+from app.core.security import get_password_hash, verify_password
+from datetime import datetime
+from app.core.config import settings
+from .base_service import BaseServiceAsync
+from typing import List, Optional
+
+# Versão de UsuarioService para as rotas assíncronas. O hash de senha (bcrypt) é CPU pura e
+# roda no threadpool para não travar o event loop
+class UsuarioServiceAsync(BaseServiceAsync):
+    async def criar_usuario(self, usuario: UsuarioCreate):
+        try:
+            hashed_password = await run_in_threadpool(get_password_hash, usuario.senha)
+            db_usuario = Usuario(**usuario.model_dump(exclude={'senha'}), hashed_password=hashed_password)
+            self.db.add(db_usuario)
+            await self.db.commit()
+            await self.db.refresh(db_usuario)
+            self.logger.info(f"Usuário criado com sucesso: {db_usuario.email}")
+            return db_usuario
+        except Exception as e:
+            await self.db.rollback()
+            self.handle_exception(e, 400)
+
+    async def obter_usuario(self, usuario_id: int) -> Optional[Usuario]:
+        usuario = await self.db.get(Usuario, usuario_id)
+        if not usuario:
+            self.handle_not_found(f"Usuário com id {usuario_id} não encontrado")
+        return usuario
+
+    async def obter_usuario_por_email(self, email: str) -> Optional[Usuario]:
+        resultado = await self.db.execute(select(Usuario).where(Usuario.email == email))
+        return resultado.scalar_one_or_none()
+
+    async def listar_usuarios(self, page: int = 1, per_page: int = None, skip: int = None) -> List[Usuario]:
+        paginacao = settings.get_pagination_settings()
+        per_page = min(per_page or paginacao["page_size"], paginacao["max_page_size"])
+        return await self.paginate(select(Usuario).order_by(Usuario.id), page, per_page, skip)
+
+    async def listar_usuarios_cursor(self, cursor: str = None, per_page: int = None) -> dict:
+        paginacao = settings.get_pagination_settings()
+        per_page = min(per_page or paginacao["page_size"], paginacao["max_page_size"])
+        return await self.paginate_cursor(select(Usuario), Usuario.id, Usuario.id, cursor, per_page)
+
+    async def atualizar_usuario(self, usuario_id: int, usuario: UsuarioUpdate):
+        db_usuario = await self.obter_usuario(usuario_id)
+        try:
+            update_data = usuario.model_dump(exclude_unset=True)
+            if 'senha' in update_data:
+                update_data['hashed_password'] = await run_in_threadpool(get_password_hash, update_data.pop('senha'))
+            for key, value in update_data.items():
+                setattr(db_usuario, key, value)
+            db_usuario.updated_at = datetime.utcnow()
+            await self.db.commit()
+            await self.db.refresh(db_usuario)
+            self.logger.info(f"Usuário atualizado com sucesso: {db_usuario.email}")
+            return db_usuario
+        except Exception as e:
+            await self.db.rollback()
+            self.handle_exception(e, 400)
+
+    async def deletar_usuario(self, usuario_id: int):
+        db_usuario = await self.obter_usuario(usuario_id)
+        try:
+            db_usuario.is_active = False
+            db_usuario.updated_at = datetime.utcnow()
+            await self.db.commit()
+            self.logger.info(f"Usuário desativado com sucesso: {db_usuario.email}")
+            return db_usuario
+        except Exception as e:
+            await self.db.rollback()
+            self.handle_exception(e, 400)
+
+    async def autenticar_usuario(self, email: str, senha: str) -> Optional[Usuario]:
+        usuario = await self.obter_usuario_por_email(email)
+        if not usuario or not usuario.is_active:
+            return None
+        if not await run_in_threadpool(verify_password, senha, usuario.hashed_password):
+            return None
+        return usuario
+
+    async def atualizar_ultimo_login(self, usuario: Usuario):
+        try:
+            usuario.last_login = datetime.utcnow()
+            await self.db.commit()
+            self.logger.info(f"Último login atualizado para o usuário: {usuario.email}")
+        except Exception as e:
+            await self.db.rollback()
+            self.handle_exception(e, 400)
\ No newline at end of file
@@ -0,0 +1,140 @@
+# Emprestimo-Facil\app\tasks.py
+
+from fastapi.encoders import jsonable_encoder
+from datetime import date
+from app.core.celery_app import celery_app
+from app.db.database import SessionLocal
+from app.services.emprestimo_service import EmprestimoService
+from app.services.conciliacao_service import ConciliacaoService
+from app.services.outbox_service import OutboxService
+from app.services.contador_service import ContadorService
+from app.services.resumo_service import ResumoService
+from app.services.estatistica_cliente_service import EstatisticaClienteService
+from app.services.ranking_service import RankingService
+from app.core.logger import get_logger
+
+logger = get_logger(__name__)
+
+@celery_app.task
+def apropriar_juros_diario():
+    db = SessionLocal()
+    try:
+        return EmprestimoService(db).apropriar_juros()
+    except Exception as e:
+        logger.error(f"Erro na apropriação diária de juros: {str(e)}")
+        raise
+    finally:
+        db.close()
+
+
+@celery_app.task
+def gerar_parcelas_faltantes():
+    # Execução única, após criar a tabela de parcelas em uma base existente
+    db = SessionLocal()
+    try:
+        return EmprestimoService(db).gerar_parcelas_faltantes()
+    except Exception as e:
+        logger.error(f"Erro ao gerar parcelas faltantes: {str(e)}")
+        raise
+    finally:
+        db.close()
+
+@celery_app.task
+def importar_retorno_cnab(caminho: str):
+    # Para arquivos baixados do banco por SFTP; o relatório volta como resultado da tarefa
+    db = SessionLocal()
+    try:
+        with open(caminho, encoding="latin-1") as arquivo:
+            relatorio = ConciliacaoService(db).processar_retorno(arquivo)
+        return jsonable_encoder(relatorio)
+    except Exception as e:
+        logger.error(f"Erro ao importar retorno CNAB {caminho}: {str(e)}")
+        raise
+    finally:
+        db.close()
+
+@celery_app.task
+def publicar_outbox():
+    # Vários workers podem rodar a tarefa ao mesmo tempo: cada um bloqueia lotes diferentes
+    db = SessionLocal()
+    try:
+        return OutboxService(db).publicar_pendentes()
+    except Exception as e:
+        logger.error(f"Erro ao publicar o outbox de notificações: {str(e)}")
+        raise
+    finally:
+        db.close()
+
+@celery_app.task
+def limpar_outbox():
+    db = SessionLocal()
+    try:
+        return OutboxService(db).remover_enviadas()
+    except Exception as e:
+        logger.error(f"Erro ao limpar o outbox de notificações: {str(e)}")
+        raise
+    finally:
+        db.close()
+
+@celery_app.task
+def reconciliar_contadores():
+    # Corrige desvios dos totais do painel em relação ao agregado completo
+    db = SessionLocal()
+    try:
+        return {chave: str(diferenca) for chave, diferenca in ContadorService(db).reconciliar().items()}
+    except Exception as e:
+        logger.error(f"Erro ao reconciliar os contadores da carteira: {str(e)}")
+        raise
+    finally:
+        db.close()
+
+@celery_app.task
+def reconstruir_resumos(data_inicio: str = None):
+    # Backfill dos resumos mensais e diários; data_inicio (AAAA-MM-DD) limita aos meses a partir dela
+    db = SessionLocal()
+    try:
+        return ResumoService(db).reconstruir(date.fromisoformat(data_inicio) if data_inicio else None)
+    except Exception as e:
+        logger.error(f"Erro ao reconstruir os resumos de empréstimos: {str(e)}")
+        raise
+    finally:
+        db.close()
+
+@celery_app.task
+def reconstruir_estatisticas_clientes():
+    # Backfill das estatísticas por cliente e reconciliação periódica
+    db = SessionLocal()
+    try:
+        total = EstatisticaClienteService(db).reconstruir()
+        # Os rankings são derivados das estatísticas: refeitos sobre os valores corrigidos
+        RankingService(db).reconstruir()
+        return total
+    except Exception as e:
+        logger.error(f"Erro ao recalcular as estatísticas dos clientes: {str(e)}")
+        raise
+    finally:
+        db.close()
+
+@celery_app.task
+def atualizar_rankings(cliente_ids: list):
+    # Enfileirada no commit das escritas: leva ao Redis as pontuações atuais dos clientes alterados
+    db = SessionLocal()
+    try:
+        return RankingService(db).atualizar_clientes(cliente_ids)
+    except Exception as e:
+        logger.error(f"Erro ao atualizar os rankings de clientes: {str(e)}")
+        raise
+    finally:
+        db.close()
+
+@celery_app.task
+def reconstruir_rankings():
+    # Refaz os rankings de clientes do zero: no beat (corrige desvios) e quando uma leitura não encontra o ranking
+    db = SessionLocal()
+    try:
+        return RankingService(db).reconstruir()
+    except Exception as e:
+        logger.error(f"Erro ao reconstruir os rankings de clientes: {str(e)}")
+        raise
+    finally:
+        db.close()
\ No newline at end of file
@@ -0,0 +1,129 @@
+#Emprestimo-Facil\benchmarks\__main__.py
+"""
+Benchmarks de calculo_juros e dos caminhos quentes de EmprestimoService/EstatisticaService.
+
+    python -m benchmarks --tamanhos 1000 100000 1000000
+    python -m benchmarks --database-url postgresql://localhost/emprestimo_bench --referencia base.json
+
+Cada tamanho usa uma carteira sintética determinística (semente fixa). Sem --database-url,
+cada tamanho ganha um arquivo SQLite próprio em benchmarks/resultados/, reaproveitado nas
+rodadas seguintes. O resultado é gravado em JSON; com --referencia, casos mais lentos que a
+referência além da tolerância de benchmarks/limites.json fazem o comando sair com código 1.
+"""
+
+import argparse
+import os
+import platform
+import sys
+from datetime import datetime
+
+PASTA = os.path.dirname(os.path.abspath(__file__))
+PASTA_RESULTADOS = os.path.join(PASTA, "resultados")
+
+# Configuração mínima para rodar offline; variáveis já definidas no ambiente têm prioridade
+AMBIENTE_PADRAO = {
+    "secret_key": "benchmark",
+    "algorithm": "HS256",
+    "access_token_expire_minutes": "30",
+    "database_url": "sqlite:///" + os.path.join(PASTA_RESULTADOS, "app.db"),
+    "rate_limit_max_calls": "1000",
+    "rate_limit_time_frame": "60",
+    "logging_level": "WARNING",
+    "allowed_origins": "[]",
+    "environment": "testing",
+    "pagination_page_size": "20",
+    "max_pagination_page_size": "100",
+    "CELERY_BROKER_URL": "memory://",
+    "CELERY_RESULT_BACKEND": "cache+memory://",
+}
+
+def _argumentos():
+    parser = argparse.ArgumentParser(prog="python -m benchmarks")
+    parser.add_argument("--tamanhos", type=int, nargs="+", default=[1000, 100000])
+    parser.add_argument("--repeticoes", type=int, default=3)
+    parser.add_argument("--database-url", help="Banco usado nos casos de serviço (padrão: SQLite por tamanho)")
+    parser.add_argument("--somente-calculo", action="store_true", help="Pula os casos que usam banco de dados")
+    parser.add_argument("--saida", help="Arquivo JSON de resultados")
+    parser.add_argument("--referencia", help="Resultado anterior usado como linha de base")
+    parser.add_argument("--limites", default=os.path.join(PASTA, "limites.json"))
+    return parser.parse_args()
+
+def _sessao(url: str, tamanho: int):
+    from sqlalchemy import create_engine, func, inspect
+    from sqlalchemy.orm import sessionmaker
+    from app.db.database import Base
+    from app.models import apropriacao, garantia  # registra todas as tabelas no metadata
+    from app.models.emprestimo import Emprestimo
+    from benchmarks.carteira import popular_banco
+
+    engine = create_engine(url)
+    db = sessionmaker(bind=engine, autoflush=False)()
+    tabelas_existentes = set(inspect(engine).get_table_names())
+    Base.metadata.create_all(bind=engine)
+    # A carteira é refeita quando o tamanho ou o esquema das tabelas mudou (inclusive tabela nova)
+    esquema_atual = all(
+        tabela.name in tabelas_existentes
+        and {c["name"] for c in inspect(engine).get_columns(tabela.name)} == set(tabela.columns.keys())
+        for tabela in Base.metadata.sorted_tables
+    )
+    if not esquema_atual or db.query(func.count(Emprestimo.id)).scalar() != tamanho:
+        db.close()
+        Base.metadata.drop_all(bind=engine)
+        Base.metadata.create_all(bind=engine)
+        db = sessionmaker(bind=engine, autoflush=False)()
+        print(f"Populando carteira de {tamanho} empréstimos...", flush=True)
+        popular_banco(db, tamanho)
+    return db
+
+def main() -> int:
+    argumentos = _argumentos()
+    os.makedirs(PASTA_RESULTADOS, exist_ok=True)
+    for chave, valor in AMBIENTE_PADRAO.items():
+        os.environ.setdefault(chave, valor)
+
+    import numpy as np
+    import sqlalchemy
+    from benchmarks.casos import casos_calculo, casos_servico
+    from benchmarks.resultados import carregar, comparar, medir, salvar
+
+    resultados = []
+    for tamanho in argumentos.tamanhos:
+        casos = casos_calculo(tamanho)
+        db = None
+        if not argumentos.somente_calculo:
+            url = argumentos.database_url or "sqlite:///" + os.path.join(PASTA_RESULTADOS, f"carteira_{tamanho}.db")
+            db = _sessao(url, tamanho)
+            casos += casos_servico(db, tamanho)
+
+        for caso in casos:
+            resultado = medir(caso, tamanho, argumentos.repeticoes)
+            resultados.append(resultado)
+            tempo = resultado.get("erro") or f"{resultado['min_s']:.4f}s ({resultado['por_item_us']:.2f} µs/item)"
+            print(f"{caso.nome:<40} {tamanho:>9}  {tempo}", flush=True)
+        if db is not None:
+            db.close()
+
+    ambiente = {
+        "gerado_em": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "plataforma": platform.platform(),
+        "processador": platform.processor(),
+        "numpy": np.__version__,
+        "sqlalchemy": sqlalchemy.__version__,
+        "banco": argumentos.database_url.split(":")[0] if argumentos.database_url else "sqlite",
+    }
+    saida = argumentos.saida or os.path.join(PASTA_RESULTADOS, f"resultado-{datetime.now():%Y%m%d-%H%M%S}.json")
+    salvar(saida, ambiente, resultados)
+    print(f"Resultados gravados em {saida}")
+
+    if not argumentos.referencia:
+        return 0
+    limites = carregar(argumentos.limites) if os.path.exists(argumentos.limites) else {}
+    regressoes = comparar(resultados, carregar(argumentos.referencia)["resultados"], limites)
+    for resultado, base, limite in regressoes:
+        atual = resultado.get("erro") or f"{resultado['min_s']:.4f}s"
+        print(f"REGRESSÃO {resultado['caso']} ({resultado['tamanho']}): {atual} > {limite:.4f}s (referência {base['min_s']:.4f}s)")
+    return 1 if regressoes else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
\ No newline at end of file
@@ -0,0 +1,175 @@
+#Emprestimo-Facil\benchmarks\carteira.py
+
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+from typing import Dict, List
+import numpy as np
+from sqlalchemy import insert, update
+from app.models.cliente import Cliente
+from app.models.emprestimo import Emprestimo, Pagamento, StatusEmprestimo
+from app.models.parcela import Parcela, StatusParcela
+from app.services.calculo_juros import RegraFixa, RegraRecorrente, TipoJuros, TipoMora
+from app.services.resumo_service import ResumoService
+from app.services.estatistica_cliente_service import EstatisticaClienteService
+from app.services.ranking_service import RankingService
+
+# Data fixa para que as carteiras (e os tempos) não mudem de um dia para o outro
+DATA_REFERENCIA = date(2024, 6, 30)
+EMPRESTIMOS_POR_CLIENTE = 5
+TAMANHO_LOTE_INSERCAO = 10000
+MAX_PARCELAS = 12
+
+# Distribuição de status por id (id % 10), reaplicada antes de cada rodada de verificar_atrasos
+STATUS_POR_RESTO = (
+    [StatusEmprestimo.ATIVO] * 6
+    + [StatusEmprestimo.ATRASADO, StatusEmprestimo.QUITADO, StatusEmprestimo.PENDENTE, StatusEmprestimo.CANCELADO]
+)
+
+REGRAS = [RegraFixa(dia) for dia in (1, 5, 10, 15, 20, 28, 31)] + [
+    RegraFixa(10, 3),
+    RegraRecorrente(1, 'meses'),
+    RegraRecorrente(15, 'dias'),
+    RegraRecorrente(2, 'semanas'),
+    RegraRecorrente(1, 'anos'),
+]
+
+def _cpf(numero: int) -> str:
+    digitos = f"{numero:011d}"
+    return f"{digitos[:3]}.{digitos[3:6]}.{digitos[6:9]}-{digitos[9:]}"
+
+def gerar_regras(quantidade: int, semente: int = 42) -> Dict[str, list]:
+    """Empréstimos em memória, com regras fixas e recorrentes misturadas, no formato de CalculoJurosLote."""
+    rng = np.random.default_rng(semente)
+    valores = np.round(rng.uniform(500, 200000, quantidade), 2)
+    data_inicio = np.datetime64(DATA_REFERENCIA) - rng.integers(30, 720, quantidade).astype('timedelta64[D]')
+
+    juros = {'indice': [], 'taxa': [], 'regra': [], 'tipo': []}
+    mora = {'indice': [], 'taxa': [], 'regra': [], 'tipo': [], 'data_vencimento': []}
+    tipos_juros = list(TipoJuros)
+    tipos_mora = list(TipoMora)
+    for indice, (num_juros, num_mora) in enumerate(zip(rng.integers(1, 3, quantidade), rng.integers(0, 2, quantidade))):
+        for _ in range(num_juros):
+            juros['indice'].append(indice)
+            juros['taxa'].append(round(float(rng.uniform(0.5, 12)), 2))
+            juros['regra'].append(REGRAS[rng.integers(len(REGRAS))])
+            juros['tipo'].append(tipos_juros[rng.integers(len(tipos_juros))])
+        for _ in range(num_mora):
+            mora['indice'].append(indice)
+            mora['taxa'].append(round(float(rng.uniform(0.5, 3)), 2))
+            mora['regra'].append(REGRAS[rng.integers(len(REGRAS))])
+            mora['tipo'].append(tipos_mora[rng.integers(len(tipos_mora))])
+            mora['data_vencimento'].append((data_inicio[indice] + rng.integers(15, 400)).astype(object))
+
+    return {
+        'valores': valores,
+        'data_inicio': data_inicio,
+        'regras_juros': juros,
+        'regras_mora': mora,
+    }
+
+def regras_do_emprestimo(carteira: Dict[str, list], chave: str, campos: tuple) -> List[list]:
+    # Formato longo -> listas de dicts por empréstimo, como o caminho escalar espera
+    por_emprestimo = [[] for _ in range(len(carteira['valores']))]
+    colunas = carteira[chave]
+    for posicao, indice in enumerate(colunas['indice']):
+        por_emprestimo[indice].append({campo: colunas[campo][posicao] for campo in campos})
+    return por_emprestimo
+
+def argumentos_escalares(carteira: Dict[str, list], quantidade: int) -> List[tuple]:
+    juros = regras_do_emprestimo(carteira, 'regras_juros', ('taxa', 'regra', 'tipo'))
+    mora = regras_do_emprestimo(carteira, 'regras_mora', ('taxa', 'regra', 'tipo', 'data_vencimento'))
+    return [
+        (Decimal(str(carteira['valores'][i])), carteira['data_inicio'][i].astype(object), DATA_REFERENCIA, juros[i], mora[i])
+        for i in range(min(quantidade, len(carteira['valores'])))
+    ]
+
+def popular_banco(db, quantidade: int, semente: int = 42) -> None:
+    """Insere clientes, empréstimos e pagamentos sintéticos em lotes, sem passar pelo ORM."""
+    rng = np.random.default_rng(semente)
+    num_clientes = max(1, quantidade // EMPRESTIMOS_POR_CLIENTE)
+    agora = datetime.combine(DATA_REFERENCIA, datetime.min.time())
+
+    for inicio in range(0, num_clientes, TAMANHO_LOTE_INSERCAO):
+        db.execute(insert(Cliente), [
+            {
+                "id": i + 1,
+                "nome": f"Cliente {i + 1}",
+                "email": f"cliente{i + 1}@benchmark.local",
+                "cpf": _cpf(i),
+                "data_nascimento": datetime(1980, 1, 1),
+                "ativo": True,
+                "criado_em": agora,
+                "created_at": agora,
+            }
+            for i in range(inicio, min(inicio + TAMANHO_LOTE_INSERCAO, num_clientes))
+        ])
+
+    valores = np.round(rng.uniform(500, 200000, quantidade), 2)
+    taxas = np.round(rng.uniform(0.5, 12, quantidade), 2)
+    solicitacao = rng.integers(1, 720, quantidade)
+    prazo = rng.integers(30, 720, quantidade)
+    pago = np.round(valores * rng.uniform(0, 1.2, quantidade), 2)
+    # Cerca de dois terços vencidos na data de referência
+    proximo_vencimento = rng.integers(-60, 30, quantidade)
+    for inicio in range(0, quantidade, TAMANHO_LOTE_INSERCAO):
+        linhas = []
+        for i in range(inicio, min(inicio + TAMANHO_LOTE_INSERCAO, quantidade)):
+            data_solicitacao = agora - timedelta(days=int(solicitacao[i]))
+            linhas.append({
+                "id": i + 1,
+                "cliente_id": int(rng.integers(num_clientes)) + 1,
+                "valor": float(valores[i]),
+                "taxa_juros": float(taxas[i]),
+                "data_solicitacao": data_solicitacao,
+                "data_aprovacao": data_solicitacao,
+                "data_vencimento": (data_solicitacao + timedelta(days=int(prazo[i]))).date(),
+                "proximo_vencimento": DATA_REFERENCIA + timedelta(days=int(proximo_vencimento[i])),
+                "status": STATUS_POR_RESTO[(i + 1) % 10],
+                "valor_pago": float(pago[i]),
+                "criado_em": data_solicitacao,
+                "created_at": data_solicitacao,
+            })
+        db.execute(insert(Emprestimo), linhas)
+        db.execute(insert(Pagamento), [
+            {
+                "emprestimo_id": linha["id"],
+                "valor": linha["valor_pago"],
+                "data_pagamento": linha["data_solicitacao"] + timedelta(days=30),
+                "metodo_pagamento": "pix",
+            }
+            for linha in linhas if linha["valor_pago"] > 0
+        ])
+        db.execute(insert(Parcela), [parcela for linha in linhas for parcela in _parcelas(linha)])
+        db.commit()
+
+    # Como o backfill de uma base existente: resumos, estatísticas por cliente e rankings não passam pelos serviços
+    ResumoService(db).reconstruir()
+    EstatisticaClienteService(db).reconstruir()
+    RankingService(db).reconstruir()
+
+def _parcelas(linha: dict) -> List[dict]:
+    # Parcelas mensais iguais até o vencimento final; as primeiras ficam pagas na proporção do valor pago
+    inicio = linha["data_solicitacao"].date()
+    quantidade = min(MAX_PARCELAS, max(1, (linha["data_vencimento"] - inicio).days // 30))
+    principal = round(linha["valor"] / quantidade, 2)
+    juros = round(linha["valor"] * linha["taxa_juros"] / 1200, 2)
+    pagas = min(quantidade, int(quantidade * linha["valor_pago"] / linha["valor"]))
+    return [
+        {
+            "emprestimo_id": linha["id"],
+            "numero": numero,
+            "data_vencimento": inicio + timedelta(days=30 * numero),
+            "valor_principal": principal,
+            "valor_juros": juros,
+            "valor": principal + juros,
+            "valor_pago": principal + juros if numero <= pagas else 0.0,
+            "status": StatusParcela.PAGA if numero <= pagas else StatusParcela.PENDENTE,
+        }
+        for numero in range(1, quantidade + 1)
+    ]
+
+def restaurar_status(db) -> None:
+    for resto, status in enumerate(STATUS_POR_RESTO):
+        db.execute(update(Emprestimo).where(Emprestimo.id % 10 == resto).values(status=status))
+    db.execute(update(Parcela).where(Parcela.status == StatusParcela.ATRASADA).values(status=StatusParcela.PENDENTE))
+    db.commit()
\ No newline at end of file
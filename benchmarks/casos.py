@@ -0,0 +1,85 @@
+#Emprestimo-Facil\benchmarks\casos.py
+
+from dataclasses import dataclass
+from datetime import date, datetime
+from decimal import Decimal
+from itertools import islice
+from typing import Callable, List, Optional
+from app.services.calculo_juros import Aritmetica, CalculoJuros, RegraRecorrente, TipoJuros
+from app.services.calculo_juros_lote import CalculoJurosLote
+from app.services.emprestimo_service import EmprestimoService
+from app.services.estatistica_service import EstatisticaService
+from app.services.projecao_caixa_service import GranularidadeProjecao, projecoes_em_cache
+from benchmarks.carteira import DATA_REFERENCIA, argumentos_escalares, gerar_regras, restaurar_status
+
+# O caminho escalar é medido numa amostra da carteira; tempos por item ficam comparáveis entre tamanhos
+AMOSTRA_ESCALAR = 20000
+AMOSTRA_AMORTIZACAO = 200
+
+@dataclass
+class Caso:
+    nome: str
+    executar: Callable[[], object]
+    itens: int
+    preparar: Optional[Callable[[], None]] = None
+
+def casos_calculo(tamanho: int) -> List[Caso]:
+    carteira = gerar_regras(tamanho)
+    escalares = argumentos_escalares(carteira, AMOSTRA_ESCALAR)
+    regra_mensal = RegraRecorrente(1, 'meses')
+    amortizacoes = [
+        (Decimal(str(carteira['valores'][i])), Decimal('1.5'), 360, regra_mensal, tipo)
+        for i in range(min(AMOSTRA_AMORTIZACAO, tamanho)) for tipo in TipoJuros
+    ]
+
+    def valor_total_devido(aritmetica):
+        return lambda: [CalculoJuros.calcular_valor_total_devido(*args, aritmetica=aritmetica) for args in escalares]
+
+    return [
+        Caso("calculo.valor_total_devido.decimal", valor_total_devido(Aritmetica.DECIMAL), len(escalares)),
+        Caso("calculo.valor_total_devido.centavos", valor_total_devido(Aritmetica.CENTAVOS), len(escalares)),
+        Caso(
+            "calculo.valor_total_devido.lote",
+            lambda: CalculoJurosLote.calcular_valor_total_devido(
+                carteira['valores'], carteira['data_inicio'], DATA_REFERENCIA, carteira['regras_juros'], carteira['regras_mora']
+            ),
+            tamanho
+        ),
+        Caso("calculo.amortizacao", lambda: [CalculoJuros.calcular_amortizacao(*args) for args in amortizacoes], len(amortizacoes)),
+        Caso(
+            "calculo.cronograma_pagina",
+            lambda: [list(islice(CalculoJuros.gerar_cronograma(*args, parcela_inicial=301), 12)) for args in amortizacoes],
+            len(amortizacoes)
+        ),
+    ]
+
+def casos_servico(db, tamanho: int) -> List[Caso]:
+    emprestimo_service = EmprestimoService(db)
+    estatistica_service = EstatisticaService(db)
+    inicio = datetime(2000, 1, 1)
+
+    def sem_cache(executar):
+        # Cada rodada começa com a sessão vazia, como uma requisição nova
+        def rodada():
+            db.expunge_all()
+            return executar()
+        return rodada
+
+    return [
+        Caso("servico.relatorio_emprestimos", sem_cache(lambda: emprestimo_service.gerar_relatorio_emprestimos(inicio, DATA_REFERENCIA)), tamanho),
+        Caso("estatisticas.gerais", sem_cache(estatistica_service.obter_estatisticas_gerais), tamanho),
+        Caso("estatisticas.ranking_clientes", sem_cache(lambda: estatistica_service.obter_ranking_clientes(10)), tamanho),
+        Caso("estatisticas.filtradas", sem_cache(lambda: estatistica_service.obter_estatisticas_filtradas({"valor_min": 100000})), tamanho),
+        Caso("estatisticas.bons_pagadores", sem_cache(lambda: estatistica_service.identificar_bons_pagadores(10)), tamanho),
+        Caso("estatisticas.maus_pagadores", sem_cache(lambda: estatistica_service.identificar_maus_pagadores(10)), tamanho),
+        Caso("estatisticas.projecao_caixa", sem_cache(lambda: estatistica_service.projetar_fluxo_caixa(30)), tamanho, projecoes_em_cache.limpar),
+        Caso(
+            "estatisticas.projecao_caixa_anual",
+            sem_cache(lambda: estatistica_service.projetar_fluxo_caixa(365, GranularidadeProjecao.MES)),
+            tamanho,
+            projecoes_em_cache.limpar
+        ),
+        Caso("estatisticas.tendencias", sem_cache(lambda: estatistica_service.analisar_tendencias(12)), tamanho),
+        # Altera status; por isso roda por último e restaura a carteira antes de cada rodada
+        Caso("servico.verificar_atrasos", sem_cache(lambda: emprestimo_service.verificar_atrasos(DATA_REFERENCIA)), tamanho, lambda: restaurar_status(db)),
+    ]
\ No newline at end of file
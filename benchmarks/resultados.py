@@ -0,0 +1,55 @@
+#Emprestimo-Facil\benchmarks\resultados.py
+
+import json
+import statistics
+import time
+from typing import Dict, List, Tuple
+
+TOLERANCIA_PADRAO = 0.25
+
+def medir(caso, tamanho: int, repeticoes: int) -> dict:
+    tempos = []
+    resultado = {"caso": caso.nome, "tamanho": tamanho, "itens": caso.itens, "repeticoes": repeticoes}
+    try:
+        for _ in range(repeticoes):
+            if caso.preparar:
+                caso.preparar()
+            inicio = time.perf_counter()
+            caso.executar()
+            tempos.append(time.perf_counter() - inicio)
+    except Exception as e:
+        resultado["erro"] = f"{type(e).__name__}: {str(e).splitlines()[0] if str(e) else ''}"
+        return resultado
+
+    resultado["min_s"] = min(tempos)
+    resultado["mediana_s"] = statistics.median(tempos)
+    resultado["por_item_us"] = min(tempos) / max(caso.itens, 1) * 1e6
+    return resultado
+
+def salvar(caminho: str, ambiente: dict, resultados: List[dict]) -> None:
+    with open(caminho, "w", encoding="utf-8") as arquivo:
+        json.dump({"ambiente": ambiente, "resultados": resultados}, arquivo, indent=2, ensure_ascii=False)
+
+def carregar(caminho: str) -> dict:
+    with open(caminho, encoding="utf-8") as arquivo:
+        return json.load(arquivo)
+
+def comparar(atual: List[dict], referencia: List[dict], limites: Dict[str, float] = None) -> List[Tuple[dict, dict, float]]:
+    """
+    Devolve (resultado atual, referência, limite) para cada caso que ficou mais lento que a
+    referência além da tolerância do caso (limites[caso], ou limites["padrao"]). Casos que
+    passaram a falhar também contam como regressão.
+    """
+    limites = limites or {}
+    padrao = limites.get("padrao", TOLERANCIA_PADRAO)
+    por_chave = {(r["caso"], r["tamanho"]): r for r in referencia if "erro" not in r}
+
+    regressoes = []
+    for resultado in atual:
+        base = por_chave.get((resultado["caso"], resultado["tamanho"]))
+        if base is None:
+            continue
+        limite = base["min_s"] * (1 + limites.get(resultado["caso"], padrao))
+        if "erro" in resultado or resultado["min_s"] > limite:
+            regressoes.append((resultado, base, limite))
+    return regressoes
\ No newline at end of file
@@ -3,10 +3,13 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from contextlib import asynccontextmanager
-from app.api import auth, clientes, emprestimos, usuarios
+from app.api import auth, clientes, emprestimos, usuarios, monitoramento
 from app.core.config import settings
 from app.db.database import engine, Base
+from app.db.async_database import fechar_engine_assincrona
 from app.core.logger import get_logger
+from app.services.calculo_juros import definir_aritmetica_padrao
+from app.services.simulacao_service import encerrar_pool
 
 logger = get_logger(__name__)
 
@@ -25,7 +28,10 @@ async def lifespan(app: FastAPI):
     if settings.is_development:
         logger.info("Estamos em ambiente de desenvolvimento!")
     create_tables()
+    definir_aritmetica_padrao(settings.aritmetica_calculo)
     yield
+    encerrar_pool()
+    await fechar_engine_assincrona()
     logger.info("Encerrando a aplicação...")
 
 # Inicialização da aplicação
@@ -53,6 +59,7 @@ app.include_router(auth.router, prefix=settings.API_V1_STR + "/auth", tags=["Aut
 app.include_router(usuarios.router, prefix=settings.API_V1_STR + "/usuarios", tags=["Usuários"])
 app.include_router(clientes.router, prefix=settings.API_V1_STR + "/clientes", tags=["Clientes"])
 app.include_router(emprestimos.router, prefix=settings.API_V1_STR + "/emprestimos", tags=["Empréstimos"])
+app.include_router(monitoramento.router, prefix=settings.API_V1_STR + "/metricas", tags=["Monitoramento"])
 
 @app.get("/")
 def read_root():
@@ -1,6 +1,8 @@
 #Emprestimo-Facil\tests\conftest.py
 
 import pytest
+from datetime import date, datetime, timedelta
+from decimal import Decimal
 from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker
 from app.db.database import Base
@@ -9,6 +11,11 @@ from main import app
 from fastapi.testclient import TestClient
 from app.services import usuario_service
 from app.schemas.usuario import UsuarioCreate
+from app.models.emprestimo import StatusEmprestimo
+from app.schemas.cliente import ClienteCreate
+from app.schemas.emprestimo import EmprestimoCreate
+from app.services.cliente_service import ClienteService
+from app.services.emprestimo_service import EmprestimoService
 
 # Configuração do banco de dados de teste
 SQLALCHEMY_DATABASE_URL = "sqlite:///./test.db"
@@ -50,4 +57,32 @@ def test_auth_header(test_app, test_user):
     }
     response = test_app.post("/api/v1/auth/login", data=login_data)
     token = response.json()["access_token"]
-    return {"Authorization": f"Bearer {token}"}
\ No newline at end of file
+    return {"Authorization": f"Bearer {token}"}
+
+def criar_cliente(db, nome, email, cpf):
+    # Pelo serviço: o cliente já nasce com a sua linha de estatisticas_clientes
+    return ClienteService(db).criar_cliente(ClienteCreate(
+        nome=nome, email=email, telefone="11999990000", cpf=cpf, data_nascimento=datetime(1985, 5, 5)
+    ))
+
+@pytest.fixture
+def cliente(db_session):
+    return criar_cliente(db_session, "Maria", "maria@example.com", "987.654.321-00")
+
+@pytest.fixture
+def clientes(db_session):
+    return [
+        criar_cliente(db_session, nome, f"{nome.lower()}@example.com", f"{indice}{indice}{indice}.222.333-44")
+        for indice, nome in enumerate(["Ana", "Bruno", "Carla"], start=1)
+    ]
+
+@pytest.fixture
+def criar_emprestimo(db_session):
+    # Empréstimo de 90 dias criado pelo serviço, com contadores, resumos e rankings atualizados
+    service = EmprestimoService(db_session)
+    def criar(cliente, valor, status=StatusEmprestimo.ATIVO, taxa_juros=Decimal("2")):
+        return service.criar_emprestimo(EmprestimoCreate(
+            cliente_id=cliente.id, valor=valor, taxa_juros=taxa_juros, status=status,
+            data_vencimento=date.today() + timedelta(days=90)
+        ))
+    return criar
\ No newline at end of file
@@ -0,0 +1,33 @@
+#Emprestimo-Facil\tests\test_benchmarks.py
+
+from benchmarks.casos import Caso
+from benchmarks.resultados import comparar, medir
+
+def resultado(caso, tamanho, min_s=None, erro=None):
+    r = {"caso": caso, "tamanho": tamanho}
+    if erro:
+        r["erro"] = erro
+    else:
+        r["min_s"] = min_s
+    return r
+
+def test_comparar_aplica_tolerancia_por_caso():
+    referencia = [resultado("a", 1000, 1.0), resultado("b", 1000, 1.0), resultado("c", 1000, erro="falhou")]
+    atual = [resultado("a", 1000, 1.2), resultado("b", 1000, 1.2), resultado("c", 1000, 9.0), resultado("d", 1000, 9.0)]
+
+    regressoes = comparar(atual, referencia, {"padrao": 0.1, "b": 0.5})
+    assert [(r["caso"], limite) for r, _, limite in regressoes] == [("a", 1.1)]
+
+def test_comparar_trata_nova_falha_como_regressao():
+    regressoes = comparar([resultado("a", 1000, erro="ValueError")], [resultado("a", 1000, 1.0)])
+    assert len(regressoes) == 1
+
+def test_medir_registra_erro_sem_interromper():
+    chamadas = []
+    caso = Caso("ok", lambda: chamadas.append(1), itens=10, preparar=lambda: chamadas.append(0))
+    medido = medir(caso, 10, repeticoes=3)
+    assert chamadas == [0, 1] * 3
+    assert medido["repeticoes"] == 3 and medido["min_s"] <= medido["mediana_s"]
+
+    medido = medir(Caso("falha", lambda: 1 / 0, itens=10), 10, repeticoes=3)
+    assert medido["erro"].startswith("ZeroDivisionError")
\ No newline at end of file
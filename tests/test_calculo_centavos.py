@@ -0,0 +1,98 @@
+#Emprestimo-Facil\tests\test_calculo_centavos.py
+
+import random
+import pytest
+from datetime import date, timedelta
+from decimal import Decimal
+from app.services.calculo_juros import (
+    Aritmetica, CalculoJuros, TipoJuros, RegraFixa, RegraRecorrente,
+    definir_aritmetica_padrao, obter_aritmetica_padrao
+)
+from tests.test_calculo_juros import gerar_carteira
+
+@pytest.fixture
+def aritmetica_padrao():
+    anterior = obter_aritmetica_padrao()
+    yield
+    definir_aritmetica_padrao(anterior)
+
+@pytest.mark.parametrize("semente", [1, 7, 20240501])
+def test_centavos_confere_com_decimal(semente):
+    rng = random.Random(semente)
+    for emprestimo in gerar_carteira(rng, 1500):
+        principal = Decimal(str(emprestimo['valor']))
+        data_calculo = emprestimo['data_inicio'] + (date(2024, 9, 15) - date(2024, 1, 1)) * rng.random()
+        argumentos = (principal, emprestimo['data_inicio'], data_calculo, emprestimo['regras_juros'], emprestimo['regras_mora'])
+
+        total_decimal = CalculoJuros.calcular_valor_total_devido(*argumentos, aritmetica=Aritmetica.DECIMAL)
+        total_centavos = CalculoJuros.calcular_valor_total_devido(*argumentos, aritmetica=Aritmetica.CENTAVOS)
+        assert total_centavos == total_decimal
+
+        juros_decimal, mora_decimal = CalculoJuros.calcular_encargos(*argumentos, aritmetica=Aritmetica.DECIMAL)
+        juros_centavos, mora_centavos = CalculoJuros.calcular_encargos(*argumentos, aritmetica=Aritmetica.CENTAVOS)
+        assert (juros_centavos, mora_centavos) == (juros_decimal, mora_decimal)
+
+def test_centavos_aceita_taxas_e_principal_com_mais_casas():
+    regras_juros = [
+        {'taxa': Decimal('1.23456789'), 'regra': RegraRecorrente(1, 'meses'), 'tipo': TipoJuros.COMPOSTO},
+        {'taxa': 0.1, 'regra': RegraFixa(31), 'tipo': TipoJuros.SIMPLES},
+    ]
+    argumentos = (Decimal('1234.5678'), date(2024, 1, 31), date(2024, 7, 4), regras_juros, [])
+    assert CalculoJuros.calcular_valor_total_devido(*argumentos, aritmetica=Aritmetica.CENTAVOS) == (
+        CalculoJuros.calcular_valor_total_devido(*argumentos, aritmetica=Aritmetica.DECIMAL)
+    )
+
+@pytest.mark.parametrize("semente", [3, 11])
+def test_modos_arredondam_no_mesmo_ponto(semente):
+    # Taxas com mais casas que a escala fixa e principal com frações de centavo: os dois modos
+    # normalizam as entradas e arredondam o resultado da mesma forma
+    rng = random.Random(semente)
+    for emprestimo in gerar_carteira(rng, 500):
+        for regra in emprestimo['regras_juros'] + emprestimo['regras_mora']:
+            regra['taxa'] = Decimal(str(round(rng.uniform(0.1, 15), 11)))
+        principal = Decimal(str(round(rng.uniform(100, 500000), 4)))
+        data_calculo = emprestimo['data_inicio'] + timedelta(days=rng.randint(0, 600))
+        argumentos = (principal, emprestimo['data_inicio'], data_calculo, emprestimo['regras_juros'], emprestimo['regras_mora'])
+
+        for arredondar in (True, False):
+            juros_decimal, mora_decimal = CalculoJuros.calcular_encargos(*argumentos, aritmetica=Aritmetica.DECIMAL, arredondar=arredondar)
+            juros_centavos, mora_centavos = CalculoJuros.calcular_encargos(*argumentos, aritmetica=Aritmetica.CENTAVOS, arredondar=arredondar)
+            if arredondar:
+                assert (juros_centavos, mora_centavos) == (juros_decimal, mora_decimal)
+            else:
+                assert abs(juros_centavos - juros_decimal) < Decimal('1e-15')
+                assert abs(mora_centavos - mora_decimal) < Decimal('1e-15')
+        assert CalculoJuros.calcular_valor_total_devido(*argumentos, aritmetica=Aritmetica.CENTAVOS) == (
+            CalculoJuros.calcular_valor_total_devido(*argumentos, aritmetica=Aritmetica.DECIMAL)
+        )
+
+@pytest.mark.parametrize("aritmetica", list(Aritmetica))
+def test_arredonda_empate_para_cima(aritmetica):
+    regras_juros = [{'taxa': 2, 'regra': RegraRecorrente(30, 'dias'), 'tipo': TipoJuros.SIMPLES}]
+    juros, mora = CalculoJuros.calcular_encargos(
+        Decimal('100.50'), date(2024, 1, 1), date(2024, 1, 16), regras_juros, [], aritmetica=aritmetica
+    )
+    assert juros == Decimal('1.01')
+    assert mora == Decimal('0.00')
+
+def test_aritmetica_padrao_global(aritmetica_padrao, monkeypatch):
+    regras_juros = [{'taxa': 1, 'regra': RegraRecorrente(3, 'dias'), 'tipo': TipoJuros.SIMPLES}]
+    argumentos = (Decimal('100'), date(2024, 1, 1), date(2024, 1, 2), regras_juros, [])
+
+    definir_aritmetica_padrao("centavos")
+    assert obter_aritmetica_padrao() == Aritmetica.CENTAVOS
+    assert CalculoJuros.calcular_valor_total_devido(*argumentos) == Decimal('100.33')
+    # A escolha por chamada prevalece sobre a global
+    monkeypatch.setattr(CalculoJuros, "_encargos_centavos", staticmethod(lambda *args: pytest.fail("usou o modo CENTAVOS")))
+    assert CalculoJuros.calcular_valor_total_devido(*argumentos, aritmetica=Aritmetica.DECIMAL) == Decimal('100.33')
+
+    with pytest.raises(ValueError):
+        definir_aritmetica_padrao("float")
+
+def test_centavos_rejeita_tipo_invalido():
+    with pytest.raises(ValueError):
+        CalculoJuros.calcular_encargos(
+            Decimal('1000'), date(2024, 1, 1), date(2024, 2, 1),
+            [{'taxa': 1, 'regra': RegraFixa(10), 'tipo': 'invalido'}], [],
+            aritmetica=Aritmetica.CENTAVOS
+        )
\ No newline at end of file
@@ -0,0 +1,187 @@
+#Emprestimo-Facil\tests\test_calculo_juros.py
+
+import random
+import pytest
+from datetime import date, timedelta
+from decimal import Decimal, ROUND_HALF_UP
+from app.services.calculo_juros import CalculoJuros, TipoJuros, TipoMora, RegraFixa, RegraRecorrente
+from app.services.calculo_juros_lote import CalculoJurosLote
+
+def gerar_regra(rng):
+    if rng.random() < 0.5:
+        return RegraFixa(rng.randint(1, 31))
+    return RegraRecorrente(rng.randint(1, 3), rng.choice(['dias', 'semanas', 'meses', 'anos']))
+
+def gerar_carteira(rng, quantidade):
+    carteira = []
+    for _ in range(quantidade):
+        data_inicio = date(2023, 1, 1) + timedelta(days=rng.randint(0, 500))
+        regras_juros = [
+            {'taxa': round(rng.uniform(0.1, 15), 2), 'regra': gerar_regra(rng), 'tipo': rng.choice(list(TipoJuros))}
+            for _ in range(rng.randint(0, 3))
+        ]
+        regras_mora = [
+            {
+                'taxa': round(rng.uniform(0.1, 5), 2),
+                'data_vencimento': data_inicio + timedelta(days=rng.randint(0, 400)),
+                'regra': gerar_regra(rng),
+                'tipo': rng.choice(list(TipoMora))
+            }
+            for _ in range(rng.randint(0, 2))
+        ]
+        carteira.append({
+            'valor': round(rng.uniform(100, 500000), 2),
+            'data_inicio': data_inicio,
+            'regras_juros': regras_juros,
+            'regras_mora': regras_mora
+        })
+    return carteira
+
+def colunas_regras(carteira, chave, campos):
+    colunas = {'indice': []}
+    colunas.update({campo: [] for campo in campos})
+    for indice, emprestimo in enumerate(carteira):
+        for regra in emprestimo[chave]:
+            colunas['indice'].append(indice)
+            for campo in campos:
+                colunas[campo].append(regra[campo])
+    return colunas
+
+def test_lote_confere_com_calculo_escalar():
+    rng = random.Random(20240501)
+    carteira = gerar_carteira(rng, 2000)
+    data_calculo = date(2024, 9, 15)
+
+    resultado = CalculoJurosLote.calcular_valor_total_devido(
+        [e['valor'] for e in carteira],
+        [e['data_inicio'] for e in carteira],
+        data_calculo,
+        colunas_regras(carteira, 'regras_juros', ('taxa', 'regra', 'tipo')),
+        colunas_regras(carteira, 'regras_mora', ('taxa', 'data_vencimento', 'regra', 'tipo'))
+    )
+
+    for emprestimo, total in zip(carteira, resultado["total"]):
+        esperado = CalculoJuros.calcular_valor_total_devido(
+            Decimal(str(emprestimo['valor'])),
+            emprestimo['data_inicio'],
+            data_calculo,
+            emprestimo['regras_juros'],
+            emprestimo['regras_mora']
+        ).quantize(Decimal('.01'), rounding=ROUND_HALF_UP)
+        assert Decimal(str(total)) == esperado
+
+def test_lote_arredonda_empate_para_cima():
+    resultado = CalculoJurosLote.calcular_valor_total_devido(
+        [100.50],
+        [date(2024, 1, 1)],
+        date(2024, 1, 16),
+        {'indice': [0], 'taxa': [2], 'regra': [RegraRecorrente(30, 'dias')], 'tipo': [TipoJuros.SIMPLES]},
+        {'indice': [], 'taxa': [], 'data_vencimento': [], 'regra': [], 'tipo': []}
+    )
+    # 100,50 * 2% * 15/30 = 1,005, que em float64 fica ligeiramente abaixo de 1,005
+    assert resultado["juros"][0] == pytest.approx(1.01)
+    assert resultado["total"][0] == pytest.approx(101.51)
+
+def test_lote_rejeita_tipo_invalido():
+    with pytest.raises(ValueError):
+        CalculoJurosLote.calcular_valor_total_devido(
+            [1000.0],
+            [date(2024, 1, 1)],
+            date(2024, 2, 1),
+            {'indice': [0], 'taxa': [1], 'regra': [RegraFixa(10)], 'tipo': ['invalido']},
+            {'indice': [], 'taxa': [], 'data_vencimento': [], 'regra': [], 'tipo': []}
+        )
+
+def test_regra_fixa_dia_31_em_fevereiro():
+    regra = RegraFixa(31)
+    assert regra.proxima_data(date(2024, 2, 10)) == date(2024, 2, 29)
+    assert regra.proxima_data(date(2023, 2, 10)) == date(2023, 2, 28)
+    assert regra.proxima_data(date(2024, 4, 30)) == date(2024, 5, 31)
+    assert regra.proxima_data(date(2024, 1, 31)) == date(2024, 2, 29)
+    assert RegraFixa(29, 2).proxima_data(date(2023, 3, 1)) == date(2024, 2, 29)
+    assert RegraFixa(29, 2).proxima_data(date(2024, 3, 1)) == date(2025, 2, 28)
+
+@pytest.mark.parametrize("regra, data_base, esperado", [
+    (RegraFixa(10), date(2024, 1, 15), date(2024, 2, 10)),
+    (RegraFixa(10), date(2024, 1, 5), date(2024, 1, 10)),
+    (RegraFixa(10), date(2024, 12, 10), date(2025, 1, 10)),
+    (RegraFixa(5, 3), date(2024, 3, 5), date(2025, 3, 5)),
+    (RegraRecorrente(10, 'dias'), date(2024, 12, 25), date(2025, 1, 4)),
+    (RegraRecorrente(2, 'semanas'), date(2024, 1, 1), date(2024, 1, 15)),
+    (RegraRecorrente(1, 'meses'), date(2024, 1, 31), date(2024, 2, 29)),
+    (RegraRecorrente(1, 'anos'), date(2024, 2, 29), date(2025, 2, 28)),
+])
+def test_proxima_data(regra, data_base, esperado):
+    assert regra.proxima_data(data_base) == esperado
+    assert CalculoJuros.calcular_periodo_base(regra, data_base) == (esperado - data_base).days
+
+def test_proximas_datas_vetorizado_confere_com_escalar():
+    datas = [date(2023, 11, 1) + timedelta(days=i) for i in range(500)]
+    for regra in (RegraFixa(31), RegraFixa(15, 6), RegraRecorrente(3, 'meses'), RegraRecorrente(5, 'dias')):
+        proximas = regra.proximas_datas(datas).astype(object)
+        assert list(proximas) == [regra.proxima_data(d) for d in datas]
+
+def test_regras_sao_valores_imutaveis():
+    import pickle
+    assert RegraFixa(10) == RegraFixa(10)
+    assert RegraFixa(10) != RegraFixa(10, 1)
+    assert RegraRecorrente(1, 'meses') != RegraFixa(1)
+    assert len({RegraFixa(10), RegraFixa(10), RegraRecorrente(1, 'meses')}) == 2
+    assert pickle.loads(pickle.dumps(RegraFixa(31, 12))) == RegraFixa(31, 12)
+    with pytest.raises(AttributeError):
+        RegraFixa(10).dia = 11
+    with pytest.raises(ValueError):
+        RegraRecorrente(1, 'horas')
+    with pytest.raises(ValueError):
+        RegraFixa(32)
+
+@pytest.mark.parametrize("tipo_juros", [TipoJuros.SIMPLES, TipoJuros.COMPOSTO])
+def test_cronograma_a_partir_da_parcela_n(tipo_juros):
+    regra = RegraRecorrente(1, 'meses')
+    completo = CalculoJuros.calcular_amortizacao(Decimal('250000'), Decimal('11.5'), 360, regra, tipo_juros)
+    assert [p["numero"] for p in completo] == list(range(1, 361))
+    assert abs(completo[-1]["saldo_devedor"]) <= Decimal('0.01')
+
+    parcial = list(CalculoJuros.gerar_cronograma(Decimal('250000'), Decimal('11.5'), 360, regra, tipo_juros, parcela_inicial=301))
+    assert len(parcial) == 60
+    for parcela, esperada in zip(parcial, completo[300:]):
+        assert parcela["numero"] == esperada["numero"]
+        for chave in ("parcela", "juros", "amortizado", "saldo_devedor"):
+            assert abs(parcela[chave] - esperada[chave]) <= Decimal('0.01')
+
+def test_cronograma_price_sem_juros():
+    parcelas = CalculoJuros.calcular_amortizacao(Decimal('1200'), Decimal('0'), 12, RegraFixa(10), TipoJuros.COMPOSTO)
+    assert all(p["parcela"] == Decimal('100.00') for p in parcelas)
+    assert parcelas[-1]["saldo_devedor"] == Decimal('0.00')
+
+def test_gerar_vencimentos_usa_a_regra_mais_proxima():
+    from itertools import islice
+    vencimentos = CalculoJuros.gerar_vencimentos([RegraFixa(5), RegraFixa(20)], date(2024, 1, 10))
+    assert list(islice(vencimentos, 3)) == [date(2024, 1, 20), date(2024, 2, 5), date(2024, 2, 20)]
+
+
+@pytest.mark.parametrize("regra", [
+    RegraFixa(31), RegraFixa(10), RegraFixa(29, 2), RegraRecorrente(10, 'dias'),
+    RegraRecorrente(2, 'semanas'), RegraRecorrente(1, 'meses'), RegraRecorrente(3, 'meses'), RegraRecorrente(1, 'anos'),
+])
+def test_vencimento_n_e_contagem_diretos(regra):
+    data_base = date(2024, 1, 31)
+    vencimentos = CalculoJuros.gerar_vencimentos([regra], data_base)
+    datas = [next(vencimentos) for _ in range(60)]
+    assert datas == sorted(set(datas))
+    for n in (1, 2, 13, 60):
+        assert regra.enesima_data(data_base, n) == datas[n - 1]
+        assert next(CalculoJuros.gerar_vencimentos([regra], data_base, n)) == datas[n - 1]
+    for data_fim in (data_base, datas[0] - timedelta(days=1), datas[0], datas[17], datas[17] + timedelta(days=1), datas[58]):
+        assert CalculoJuros.contar_vencimentos([regra], data_base, data_fim) == sum(d <= data_fim for d in datas)
+
+def test_recorrente_mensal_conta_sempre_da_data_base():
+    regra = RegraRecorrente(1, 'meses')
+    # Fevereiro não arrasta os vencimentos seguintes para o dia 29
+    assert [regra.enesima_data(date(2024, 1, 31), n) for n in (1, 2, 3)] == [date(2024, 2, 29), date(2024, 3, 31), date(2024, 4, 30)]
+    assert CalculoJuros.contar_vencimentos([regra], date(2024, 1, 31), date(2024, 3, 30)) == 1
+
+def test_vencimentos_com_varias_regras_a_partir_da_n():
+    regras = [RegraFixa(5), RegraFixa(20)]
+    assert next(CalculoJuros.gerar_vencimentos(regras, date(2024, 1, 10), 3)) == date(2024, 2, 20)
+    assert CalculoJuros.contar_vencimentos(regras, date(2024, 1, 10), date(2024, 2, 20)) == 3
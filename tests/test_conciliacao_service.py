@@ -0,0 +1,126 @@
+#Emprestimo-Facil\tests\test_conciliacao_service.py
+
+import pytest
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+from app.models.cliente import Cliente
+from app.models.emprestimo import Emprestimo, StatusEmprestimo
+from app.services.cnab import ErroArquivoCnab, LayoutCnab240, LayoutCnab400, ler_retorno
+from app.services.conciliacao_service import ConciliacaoService
+
+def _preencher(tamanho: int, campos: list) -> str:
+    linha = [" "] * tamanho
+    for posicao, valor in campos:
+        linha[posicao.start:posicao.stop] = valor
+    return "".join(linha)
+
+def linha_400(nosso_numero: int, valor: Decimal, ocorrencia: str = "06", data: date = date(2024, 6, 28)) -> str:
+    layout = LayoutCnab400()
+    return _preencher(400, [
+        (slice(0, 1), "1"),
+        (layout.nosso_numero, f"{nosso_numero:012d}"),
+        (layout.ocorrencia, ocorrencia),
+        (layout.data_ocorrencia, data.strftime("%d%m%y")),
+        (layout.valor_pago, f"{int(valor * 100):013d}"),
+    ])
+
+def arquivo_400(*detalhes: str, nsa: int = 1) -> list:
+    # Header com o NSA e registros numerados em sequência, como no arquivo do banco
+    layout = LayoutCnab400()
+    linhas = [_preencher(400, [(slice(0, 1), "0"), (layout.nsa, f"{nsa:05d}")]), *detalhes, _preencher(400, [(slice(0, 1), "9")])]
+    return [linha[:394] + f"{numero:06d}" + "\r\n" for numero, linha in enumerate(linhas, start=1)]
+
+def test_ler_retorno_cnab_400():
+    registros = list(ler_retorno(arquivo_400(linha_400(42, Decimal("150.25")), linha_400(7, Decimal("10"), ocorrencia="02"))))
+    assert [(r.linha, r.nosso_numero, r.valor_pago, r.data_pagamento, r.liquidacao, r.nsa, r.sequencial) for r in registros] == [
+        (2, "000000000042", Decimal("150.25"), date(2024, 6, 28), True, "00001", "000002"),
+        (3, "000000000007", Decimal("10.00"), date(2024, 6, 28), False, "00001", "000003"),
+    ]
+
+def test_ler_retorno_cnab_240():
+    layout = LayoutCnab240()
+    linhas = [
+        _preencher(240, [(slice(7, 8), "0"), (layout.nsa, "000123")]),
+        _preencher(240, [(slice(7, 8), "1")]),
+        _preencher(240, [(slice(7, 8), "3"), (layout.lote, "0001"), (layout.sequencial, "00001"), (slice(13, 14), "T"), (layout.movimento, "06"), (layout.nosso_numero, f"{42:020d}")]),
+        _preencher(240, [(slice(7, 8), "3"), (slice(13, 14), "U"), (layout.valor_pago, f"{15025:015d}"), (layout.data_ocorrencia, "28062024")]),
+        _preencher(240, [(slice(7, 8), "5")]),
+        _preencher(240, [(slice(7, 8), "9")]),
+    ]
+    registros = list(ler_retorno(linhas))
+    assert len(registros) == 1
+    assert (registros[0].linha, registros[0].nosso_numero, registros[0].valor_pago, registros[0].data_pagamento) == (3, f"{42:020d}", Decimal("150.25"), date(2024, 6, 28))
+    assert (registros[0].nsa, registros[0].sequencial) == ("000123", "0001-00001")
+
+def test_ler_retorno_rejeita_linha_fora_do_layout():
+    with pytest.raises(ErroArquivoCnab):
+        list(ler_retorno(["1" * 399]))
+    with pytest.raises(ErroArquivoCnab):
+        list(ler_retorno(arquivo_400(linha_400(42, Decimal("1")))[:1] + ["1" * 240]))
+
+def test_processar_retorno_concilia_pagamentos(db_session):
+    cliente = Cliente(nome="Maria", email="maria@example.com", cpf="987.654.321-00", data_nascimento=datetime(1985, 5, 5))
+    db_session.add(cliente)
+    db_session.commit()
+    emprestimos = [
+        Emprestimo(cliente_id=cliente.id, valor=1000, taxa_juros=2, data_vencimento=date.today() + timedelta(days=90), status=status)
+        for status in (StatusEmprestimo.ATIVO, StatusEmprestimo.ATRASADO, StatusEmprestimo.QUITADO)
+    ]
+    db_session.add_all(emprestimos)
+    db_session.commit()
+    ativo, atrasado, quitado = (e.id for e in emprestimos)
+
+    arquivo = arquivo_400(
+        linha_400(ativo, Decimal("100")),
+        linha_400(atrasado, Decimal("50.50")),
+        linha_400(ativo, Decimal("100")),           # outra parcela do mesmo empréstimo, mesmo dia e valor
+        linha_400(quitado, Decimal("10")),
+        linha_400(999999, Decimal("10")),
+        linha_400(atrasado, Decimal("5000")),       # acima do saldo devedor
+        linha_400(ativo, Decimal("1"), ocorrencia="09"),
+    )
+    relatorio = ConciliacaoService(db_session).processar_retorno(arquivo, tamanho_lote=2)
+    assert (relatorio["registros"], relatorio["liquidacoes"], relatorio["ignorados"], relatorio["registrados"]) == (7, 6, 1, 3)
+    assert relatorio["valor_registrado"] == Decimal("250.50")
+    assert relatorio["duplicados"] == []
+    assert [i["linha"] for i in relatorio["nao_encontrados"]] == [5, 6]
+    assert [i["linha"] for i in relatorio["rejeitados"]] == [7]
+
+    # Reenviar o mesmo arquivo não registra nada de novo
+    relatorio = ConciliacaoService(db_session).processar_retorno(arquivo)
+    assert relatorio["registrados"] == 0
+    assert [i["linha"] for i in relatorio["duplicados"]] == [2, 3, 4]
+
+def test_processar_retorno_usa_a_data_da_liquidacao(db_session):
+    from app.models.apropriacao import ApropriacaoJuros, OrigemApropriacao
+    from app.models.pagamento import Pagamento
+    from app.services.emprestimo_service import EmprestimoService
+    cliente = Cliente(nome="Maria", email="maria@example.com", cpf="987.654.321-00", data_nascimento=datetime(1985, 5, 5))
+    db_session.add(cliente)
+    db_session.commit()
+    hoje = date.today()
+    emprestimo = Emprestimo(
+        cliente_id=cliente.id, valor=1000, taxa_juros=12, data_solicitacao=datetime.combine(hoje - timedelta(days=60), datetime.min.time()),
+        data_vencimento=hoje + timedelta(days=300), status=StatusEmprestimo.ATIVO
+    )
+    db_session.add(emprestimo)
+    db_session.commit()
+    emprestimo_id = emprestimo.id
+    # A apropriação da noite já passou da data da liquidação
+    EmprestimoService(db_session).apropriar_juros(hoje)
+
+    liquidacao = hoje - timedelta(days=3)
+    relatorio = ConciliacaoService(db_session).processar_retorno(arquivo_400(linha_400(emprestimo_id, Decimal("100"), data=liquidacao), nsa=7))
+    assert relatorio["registrados"] == 1
+
+    pagamento = db_session.query(Pagamento).one()
+    assert pagamento.data_pagamento.date() == liquidacao
+    checkpoints = db_session.query(ApropriacaoJuros).filter(ApropriacaoJuros.emprestimo_id == emprestimo_id).all()
+    assert [(c.origem, c.data_referencia) for c in checkpoints] == [(OrigemApropriacao.PAGAMENTO, liquidacao)]
+    # 57 dias de juros até a liquidação, abatidos do pagamento
+    assert checkpoints[0].juros_acumulados == 0
+    assert checkpoints[0].saldo_principal.quantize(Decimal(".01")) == (Decimal("1000") * (1 + Decimal("0.12") * 57 / 365) - 100).quantize(Decimal(".01"))
+
+    # O mesmo registro em outro arquivo (outro NSA) é outra liquidação
+    relatorio = ConciliacaoService(db_session).processar_retorno(arquivo_400(linha_400(emprestimo_id, Decimal("100"), data=liquidacao), nsa=8))
+    assert relatorio["registrados"] == 1
\ No newline at end of file
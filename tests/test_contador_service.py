@@ -0,0 +1,44 @@
+#Emprestimo-Facil\tests\test_contador_service.py
+
+from datetime import date, timedelta
+from decimal import Decimal
+from sqlalchemy import update
+from app.models.emprestimo import Emprestimo, StatusEmprestimo
+from app.schemas.emprestimo import PagamentoCreate, PagamentoLoteItem
+from app.services.contador_service import ContadorService
+from app.services.emprestimo_service import EmprestimoService
+from app.services.estatistica_service import EstatisticaService
+
+def test_contadores_acompanham_as_escritas(db_session, cliente, criar_emprestimo):
+    contadores = ContadorService(db_session)
+    assert contadores.reconciliar() == {}
+    service = EmprestimoService(db_session)
+    primeiro = criar_emprestimo(cliente, Decimal("1000"))
+    segundo = criar_emprestimo(cliente, Decimal("500.10"), StatusEmprestimo.PENDENTE)
+    service.registrar_pagamento(primeiro.id, PagamentoCreate(emprestimo_id=primeiro.id, valor=100, metodo_pagamento="pix"))
+    service.registrar_pagamentos([PagamentoLoteItem(emprestimo_id=primeiro.id, valor=50.5, metodo_pagamento="boleto", chave_idempotencia="b1")])
+
+    db_session.execute(update(Emprestimo).where(Emprestimo.id == primeiro.id).values(proximo_vencimento=date.today() - timedelta(days=1)))
+    db_session.commit()
+    service.verificar_atrasos()
+
+    esperado = {
+        "total_emprestimos": 2, "valor_total_emprestado": Decimal("1500.10"), "valor_total_recebido": Decimal("150.50"),
+        "emprestimos_ativos": 0, "emprestimos_atrasados": 1,
+    }
+    assert contadores.obter() == contadores.calcular() == esperado
+    assert EstatisticaService(db_session).obter_estatisticas_gerais()["taxa_inadimplencia"] == 50
+    assert segundo.status == StatusEmprestimo.PENDENTE
+
+def test_reconciliacao_corrige_escritas_fora_do_servico(db_session, cliente, criar_emprestimo):
+    criar_emprestimo(cliente, Decimal("1000"))
+    contadores = ContadorService(db_session)
+    # Sem reconciliação, os contadores não existem e a leitura usa o agregado completo
+    assert contadores.obter()["total_emprestimos"] == 1
+    assert contadores.reconciliar() == {chave: valor for chave, valor in contadores.calcular().items() if valor}
+
+    db_session.execute(update(Emprestimo).values(status=StatusEmprestimo.ATRASADO))
+    db_session.commit()
+    assert contadores.obter()["emprestimos_atrasados"] == 0
+    assert contadores.reconciliar() == {"emprestimos_ativos": -1, "emprestimos_atrasados": 1}
+    assert contadores.obter() == contadores.calcular()
\ No newline at end of file
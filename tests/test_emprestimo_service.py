@@ -1,7 +1,8 @@
 #Emprestimo-Facil\tests\test_emprestimo_service.py
 
 import pytest
-from datetime import date, timedelta
+from fastapi import HTTPException
+from datetime import date, datetime, timedelta
 from decimal import Decimal
 from app.services.emprestimo_service import EmprestimoService
 from app.models.emprestimo import Emprestimo, StatusEmprestimo
@@ -73,6 +74,16 @@ def test_deletar_emprestimo(emprestimo_service, emprestimo_fixture):
     emprestimo_deletado = emprestimo_service.deletar_emprestimo(emprestimo_fixture.id)
     assert emprestimo_deletado.status == StatusEmprestimo.CANCELADO
 
+def test_listar_garantias(emprestimo_service, emprestimo_fixture):
+    from app.models.garantia import Garantia, TipoGarantia
+    garantia = Garantia(emprestimo_id=emprestimo_fixture.id, tipo=TipoGarantia.VEICULO, descricao="Carro popular", valor=30000.00)
+    emprestimo_service.db.add(garantia)
+    emprestimo_service.db.commit()
+    assert [g.id for g in emprestimo_service.listar_garantias(emprestimo_fixture.id)] == [garantia.id]
+
+    with pytest.raises(HTTPException):
+        emprestimo_service.listar_garantias(999999)
+
 def test_registrar_pagamento(emprestimo_service, emprestimo_fixture):
     pagamento_data = PagamentoCreate(
         emprestimo_id=emprestimo_fixture.id,
@@ -105,4 +116,379 @@ def test_gerar_relatorio_emprestimos(emprestimo_service, emprestimo_fixture):
     assert "total_a_receber" in relatorio
     assert "emprestimos_ativos" in relatorio
     assert "emprestimos_atrasados" in relatorio
-    assert "detalhes" in relatorio
\ No newline at end of file
+    assert "detalhes" in relatorio
+
+def test_obter_cronograma(emprestimo_service, emprestimo_fixture):
+    cronograma = emprestimo_service.obter_cronograma(emprestimo_fixture.id, page=1, per_page=1)
+    assert cronograma["total_parcelas"] >= 1
+    assert len(cronograma["parcelas"]) == 1
+    assert cronograma["parcelas"][0]["numero"] == 1
+    assert "data_vencimento" in cronograma["parcelas"][0]
+
+def test_abater_pagamento_quita_mora_e_juros_antes_do_principal():
+    from app.services.apropriacao_service import ApropriacaoService
+    posicao = {"saldo_principal": Decimal("1000"), "juros": Decimal("50"), "mora": Decimal("10"), "total": Decimal("1060")}
+    nova_posicao = ApropriacaoService.abater_pagamento(posicao, Decimal("100"))
+    assert nova_posicao["mora"] == Decimal("0")
+    assert nova_posicao["juros"] == Decimal("0")
+    assert nova_posicao["saldo_principal"] == Decimal("960")
+    assert nova_posicao["total"] == Decimal("960")
+
+def test_apropriar_juros_preserva_valor_devido(emprestimo_service, emprestimo_fixture):
+    data_calculo = date.today() + timedelta(days=20)
+    emprestimo_id = emprestimo_fixture.id
+    valor_sem_checkpoint = emprestimo_service.calcular_valor_total_devido(emprestimo_fixture, data_calculo)
+    emprestimo_fixture.status = StatusEmprestimo.ATIVO
+    emprestimo_service.db.commit()
+
+    assert emprestimo_service.apropriar_juros(date.today()) >= 1
+    posicao = emprestimo_service.obter_saldo(emprestimo_id, data_calculo)
+    assert abs(posicao["total"] - valor_sem_checkpoint) < Decimal("0.01")
+
+def test_apropriar_juros_em_dias_arbitrarios_igual_ao_calculo_completo(emprestimo_service, cliente_fixture):
+    # Abertura no fim do mês: os períodos mensais contados de cada ponto de controle teriam 29, 30 ou 31 dias
+    emprestimo = Emprestimo(
+        cliente_id=cliente_fixture.id, valor=Decimal("1000.00"), taxa_juros=Decimal("2"),
+        data_solicitacao=datetime(2024, 1, 31), data_vencimento=date(2024, 12, 31), status=StatusEmprestimo.ATIVO
+    )
+    emprestimo_service.db.add(emprestimo)
+    emprestimo_service.db.commit()
+    emprestimo_id = emprestimo.id
+
+    datas_calculo = [date(2024, 2, 20), date(2024, 3, 31), date(2024, 6, 1), date(2024, 9, 17)]
+    esperados = [emprestimo_service._calcular_posicao(emprestimo, d, None)["total"].quantize(Decimal(".01")) for d in datas_calculo]
+
+    for data_checkpoint in [date(2024, 2, 13), date(2024, 2, 29), date(2024, 4, 30), date(2024, 7, 4)]:
+        assert emprestimo_service.apropriar_juros(data_checkpoint) == 1
+
+    emprestimo = emprestimo_service.db.get(Emprestimo, emprestimo_id)
+    for data_calculo, esperado in zip(datas_calculo, esperados):
+        assert emprestimo_service.obter_saldo(emprestimo_id, data_calculo)["total"].quantize(Decimal(".01")) == esperado
+        emprestimo_service._valores_devidos.clear()
+        assert emprestimo_service.calcular_valores_devidos([emprestimo], data_calculo)[0] == float(esperado)
+
+def test_taxa_juros_anual_na_apropriacao_e_na_amortizacao(emprestimo_service, cliente_fixture):
+    from app.services.calculo_juros import RegraRecorrente, TipoJuros
+    emprestimo = Emprestimo(
+        cliente_id=cliente_fixture.id, valor=Decimal("1000.00"), taxa_juros=Decimal("12"),
+        data_solicitacao=datetime(2024, 1, 10), data_vencimento=date(2024, 12, 10), status=StatusEmprestimo.ATIVO
+    )
+    emprestimo_service.db.add(emprestimo)
+    emprestimo_service.db.commit()
+
+    # 12% a.a.: um ano de 365 dias rende 12% do principal
+    posicao = emprestimo_service._calcular_posicao(emprestimo, date(2024, 1, 10) + timedelta(days=365), None)
+    assert posicao["juros"] == Decimal("120")
+
+    # A primeira parcela de um cronograma de 30 em 30 dias cobra os juros apropriados em 30 dias
+    parcela = next(emprestimo_service.calculo_juros.gerar_cronograma(
+        emprestimo.valor, emprestimo.taxa_juros, 12, RegraRecorrente(30, 'dias'), TipoJuros.SIMPLES
+    ))
+    posicao = emprestimo_service._calcular_posicao(emprestimo, date(2024, 1, 10) + timedelta(days=30), None)
+    assert parcela["juros"] == posicao["juros"].quantize(Decimal(".01"))
+
+def test_verificar_atrasos_em_lotes(emprestimo_service, cliente_fixture):
+    hoje = date.today()
+    emprestimos = [
+        Emprestimo(
+            cliente_id=cliente_fixture.id,
+            valor=1000,
+            taxa_juros=2,
+            data_vencimento=hoje + timedelta(days=365),
+            proximo_vencimento=hoje + timedelta(days=dias),
+            status=StatusEmprestimo.ATIVO
+        )
+        for dias in (-10, -3, -1, 5)
+    ]
+    emprestimo_service.db.add_all(emprestimos)
+    emprestimo_service.db.commit()
+
+    atrasados = emprestimo_service.verificar_atrasos(hoje, tamanho_lote=2)
+    assert sorted(e.id for e in atrasados) == sorted(e.id for e in emprestimos[:3])
+    assert [e.status for e in emprestimos] == [StatusEmprestimo.ATRASADO] * 3 + [StatusEmprestimo.ATIVO]
+    assert emprestimo_service.verificar_atrasos(hoje) == []
+
+def test_verificar_atrasos_marca_so_parcelas_de_emprestimos_em_curso(emprestimo_service, cliente_fixture):
+    from sqlalchemy import update
+    from app.models.parcela import Parcela, StatusParcela
+    dados = dict(criar_dados_emprestimo(cliente_fixture.id), data_vencimento=date.today() + timedelta(days=180))
+    ativo = emprestimo_service.criar_emprestimo(EmprestimoCreate(**dict(dados, status=StatusEmprestimo.ATIVO)))
+    pendente = emprestimo_service.criar_emprestimo(EmprestimoCreate(**dados))
+    # Todas as parcelas já vencidas
+    emprestimo_service.db.execute(update(Parcela).values(data_vencimento=date.today() - timedelta(days=1)))
+    emprestimo_service.db.commit()
+
+    total = emprestimo_service.parcelas.marcar_atrasadas(date.today(), tamanho_lote=2)
+    emprestimo_service.db.expire_all()
+    assert total == len(ativo.parcelas) > 2
+    assert {p.status for p in ativo.parcelas} == {StatusParcela.ATRASADA}
+    assert {p.status for p in pendente.parcelas} == {StatusParcela.PENDENTE}
+
+def test_relatorio_usa_numero_constante_de_consultas(emprestimo_service, cliente_fixture):
+    from sqlalchemy import event
+    from app.models.pagamento import Pagamento
+    consultas = []
+    def contar(*args):
+        consultas.append(1)
+    cliente_id, nome = cliente_fixture.id, cliente_fixture.nome
+
+    def consultas_relatorio(quantidade):
+        emprestimos = [
+            Emprestimo(cliente_id=cliente_id, valor=1000, taxa_juros=2, data_vencimento=date.today() + timedelta(days=30), status=StatusEmprestimo.ATIVO)
+            for _ in range(quantidade)
+        ]
+        for emprestimo in emprestimos:
+            emprestimo.pagamentos.append(Pagamento(valor=10, metodo_pagamento="pix"))
+        emprestimo_service.db.add_all(emprestimos)
+        emprestimo_service.db.commit()
+        emprestimo_service.db.expunge_all()
+        consultas.clear()
+        engine = emprestimo_service.db.get_bind()
+        event.listen(engine, "before_cursor_execute", contar)
+        try:
+            relatorio = emprestimo_service.gerar_relatorio_emprestimos(date.today() - timedelta(days=1), date.today() + timedelta(days=1))
+            no_relatorio = len(consultas)
+            emprestimo_service.db.expunge_all()
+            consultas.clear()
+            # A listagem já traz cliente, pagamentos e garantias de cada empréstimo
+            listados = emprestimo_service.listar_emprestimos(per_page=100)
+            assert all(e.cliente.nome == nome and len(e.pagamentos) == 1 and e.garantias == [] for e in listados)
+            na_listagem = len(consultas)
+        finally:
+            event.remove(engine, "before_cursor_execute", contar)
+        assert all(d["cliente"] == nome for d in relatorio["detalhes"])
+        return no_relatorio, na_listagem
+
+    assert consultas_relatorio(2) == consultas_relatorio(20)
+
+def test_valor_devido_memorizado_na_requisicao(emprestimo_service, cliente_fixture):
+    hoje = date.today()
+    emprestimo = Emprestimo(cliente_id=cliente_fixture.id, valor=1000, taxa_juros=2, data_solicitacao=datetime.now() - timedelta(days=40),
+                            data_vencimento=hoje + timedelta(days=30), status=StatusEmprestimo.ATIVO)
+    emprestimo_service.db.add(emprestimo)
+    emprestimo_service.db.commit()
+
+    valor = emprestimo_service.calcular_valor_total_devido(emprestimo, hoje)
+    emprestimo.valor = emprestimo.valor * 2
+    assert emprestimo_service.calcular_valor_total_devido(emprestimo, hoje) == valor
+    assert emprestimo_service.calcular_valores_devidos([emprestimo], hoje)[0] == float(valor)
+
+def test_exportar_relatorio_em_lotes(emprestimo_service, cliente_fixture):
+    emprestimo_service.db.add_all([
+        Emprestimo(cliente_id=cliente_fixture.id, valor=1000 + i, taxa_juros=2, data_vencimento=date.today() + timedelta(days=30), status=StatusEmprestimo.ATIVO)
+        for i in range(5)
+    ])
+    emprestimo_service.db.commit()
+    inicio, fim = date.today() - timedelta(days=1), date.today() + timedelta(days=1)
+
+    linhas = list(emprestimo_service.exportar_relatorio_emprestimos(inicio, fim, tamanho_lote=2))
+    relatorio = emprestimo_service.gerar_relatorio_emprestimos(inicio, fim)
+    assert linhas == sorted(relatorio["detalhes"], key=lambda d: d["id"])
+    assert not any(isinstance(objeto, Emprestimo) for objeto in emprestimo_service.db)
+
+def test_exportar_estatisticas_filtradas_em_lotes(emprestimo_service, cliente_fixture):
+    from app.services.estatistica_service import EstatisticaService, ESQUEMA_FILTRADAS
+    emprestimo_service.db.add_all([
+        Emprestimo(cliente_id=cliente_fixture.id, valor=1000 + i, taxa_juros=2, data_vencimento=date.today() + timedelta(days=30), status=StatusEmprestimo.ATIVO)
+        for i in range(5)
+    ])
+    emprestimo_service.db.commit()
+    estatisticas = EstatisticaService(emprestimo_service.db)
+
+    lotes = list(estatisticas.exportar_estatisticas_filtradas_em_lotes({"valor_min": 1001}, tamanho_lote=2))
+    assert [lote.num_rows for lote in lotes] == [2, 2]
+    assert all(lote.schema == ESQUEMA_FILTRADAS for lote in lotes)
+    linhas = [linha for lote in lotes for linha in lote.to_pylist()]
+    esperado = sorted(estatisticas.obter_estatisticas_filtradas({"valor_min": 1001}), key=lambda d: d["id"])
+    assert [(l["id"], l["valor"], l["status"], l["valor_pago"]) for l in linhas] == [
+        (e["id"], e["valor"], e["status"], e["valor_pago"]) for e in esperado
+    ]
+
+def test_criar_emprestimo_grava_parcelas(emprestimo_service, cliente_fixture):
+    dados = dict(criar_dados_emprestimo(cliente_fixture.id), data_vencimento=date.today() + timedelta(days=180))
+    emprestimo = emprestimo_service.criar_emprestimo(EmprestimoCreate(**dados))
+
+    parcelas = emprestimo.parcelas
+    cronograma = emprestimo_service.obter_cronograma(emprestimo.id, page=1, per_page=120)
+    assert len(parcelas) == cronograma["total_parcelas"] > 1
+    assert [p.data_vencimento for p in parcelas] == [p["data_vencimento"] for p in cronograma["parcelas"]]
+    assert sum(Decimal(str(p.valor_principal)) for p in parcelas) == Decimal("1000.00")
+    assert emprestimo.proximo_vencimento == parcelas[0].data_vencimento
+
+def test_registrar_pagamento_abate_parcelas(emprestimo_service, cliente_fixture):
+    from app.models.parcela import StatusParcela
+    dados = dict(criar_dados_emprestimo(cliente_fixture.id), data_vencimento=date.today() + timedelta(days=180))
+    emprestimo = emprestimo_service.criar_emprestimo(EmprestimoCreate(**dados))
+    primeira, segunda = emprestimo.parcelas[:2]
+    valor = primeira.valor + segunda.valor / 2
+
+    emprestimo = emprestimo_service.registrar_pagamento(emprestimo.id, PagamentoCreate(emprestimo_id=emprestimo.id, valor=valor, metodo_pagamento="pix"))
+    emprestimo_service.db.refresh(primeira)
+    emprestimo_service.db.refresh(segunda)
+    assert primeira.status == StatusParcela.PAGA and primeira.pago_em is not None
+    assert segunda.status == StatusParcela.PENDENTE
+    assert abs(segunda.valor_pago - segunda.valor / 2) < 0.01
+    assert emprestimo.proximo_vencimento == segunda.data_vencimento
+
+def test_parcelas_recebem_so_juros_e_principal_do_pagamento():
+    from app.services.apropriacao_service import ApropriacaoService
+    posicao = {"saldo_principal": Decimal("1000"), "juros": Decimal("50"), "mora": Decimal("10"), "total": Decimal("1060")}
+    # Dos 100 pagos, 10 quitam a mora: só 90 abatem parcelas
+    assert EmprestimoService._valor_das_parcelas(posicao, ApropriacaoService.abater_pagamento(posicao, Decimal("100"))) == Decimal("90.00")
+    assert EmprestimoService._valor_das_parcelas(posicao, ApropriacaoService.abater_pagamento(posicao, Decimal("10"))) == Decimal("0.00")
+
+def test_quitacao_paga_todas_as_parcelas(emprestimo_service, cliente_fixture):
+    from app.models.parcela import StatusParcela
+    from app.schemas.emprestimo import PagamentoLoteItem
+    dados = dict(criar_dados_emprestimo(cliente_fixture.id), data_vencimento=date.today() + timedelta(days=180), status=StatusEmprestimo.ATIVO)
+    avulso = emprestimo_service.criar_emprestimo(EmprestimoCreate(**dados))
+    em_lote = emprestimo_service.criar_emprestimo(EmprestimoCreate(**dados))
+    # Quitados no dia da abertura: os juros apropriados ficam abaixo dos juros do cronograma
+    devidos = {e.id: emprestimo_service.calcular_valor_total_devido(e) for e in (avulso, em_lote)}
+    assert devidos[avulso.id] < sum(p.valor for p in avulso.parcelas)
+
+    emprestimo_service.registrar_pagamento(avulso.id, PagamentoCreate(emprestimo_id=avulso.id, valor=devidos[avulso.id], metodo_pagamento="pix"))
+    emprestimo_service.registrar_pagamentos([
+        PagamentoLoteItem(emprestimo_id=em_lote.id, valor=devidos[em_lote.id], metodo_pagamento="boleto", chave_idempotencia="quitacao")
+    ])
+    for emprestimo in (avulso, em_lote):
+        emprestimo_service.db.refresh(emprestimo)
+        assert emprestimo.status == StatusEmprestimo.QUITADO and emprestimo.proximo_vencimento is None
+        assert all(p.status == StatusParcela.PAGA and p.valor_pago == p.valor for p in emprestimo.parcelas)
+
+def test_listar_vencimentos_e_projecao_por_parcelas(emprestimo_service, cliente_fixture):
+    from app.services.estatistica_service import EstatisticaService
+    dados = dict(criar_dados_emprestimo(cliente_fixture.id), data_vencimento=date.today() + timedelta(days=180))
+    emprestimo = emprestimo_service.criar_emprestimo(EmprestimoCreate(**dados))
+    parcelas = emprestimo.parcelas
+    primeira = parcelas[0].data_vencimento
+
+    assert emprestimo_service.listar_vencimentos(primeira, primeira) == []  # empréstimo ainda pendente
+    emprestimo.status = StatusEmprestimo.ATIVO
+    emprestimo_service.db.commit()
+    assert [p.id for p in emprestimo_service.listar_vencimentos(primeira, primeira)] == [parcelas[0].id]
+
+    projecao = EstatisticaService(emprestimo_service.db).projetar_fluxo_caixa(180)
+    esperado = {p.data_vencimento.strftime("%Y-%m-%d"): float(p.valor) for p in parcelas if p.data_vencimento <= date.today() + timedelta(days=180)}
+    assert projecao["projecao_por_dia"] == esperado
+
+def test_registrar_pagamentos_em_lote(emprestimo_service, cliente_fixture):
+    from app.models.pagamento import Pagamento
+    from app.schemas.emprestimo import PagamentoLoteItem
+    dados = dict(criar_dados_emprestimo(cliente_fixture.id), status=StatusEmprestimo.ATIVO)
+    primeiro = emprestimo_service.criar_emprestimo(EmprestimoCreate(**dados)).id
+    segundo = emprestimo_service.criar_emprestimo(EmprestimoCreate(**dados)).id
+
+    def item(chave, emprestimo_id, valor):
+        return PagamentoLoteItem(chave_idempotencia=chave, emprestimo_id=emprestimo_id, valor=valor, metodo_pagamento="boleto")
+
+    lote = [
+        item("a", primeiro, 100), item("b", segundo, 50), item("c", primeiro, 200),
+        item("a", primeiro, 100), item("d", 999999, 10), item("e", segundo, 1000000),
+    ]
+    resultados = emprestimo_service.registrar_pagamentos(lote, tamanho_lote=2)
+    assert [r["status"] for r in resultados] == ["registrado", "registrado", "registrado", "duplicado", "rejeitado", "rejeitado"]
+
+    emprestimo_service.db.expire_all()
+    assert emprestimo_service.db.get(Emprestimo, primeiro).valor_pago == 300
+    assert emprestimo_service.db.get(Emprestimo, segundo).valor_pago == 50
+    assert emprestimo_service.db.query(Pagamento).count() == 3
+
+    # Reenvio do lote inteiro não gera pagamentos novos
+    reenvio = emprestimo_service.registrar_pagamentos(lote[:3])
+    assert [r["status"] for r in reenvio] == ["duplicado"] * 3
+    assert emprestimo_service.db.query(Pagamento).count() == 3
+
+def test_registrar_pagamento_idempotente(emprestimo_service, cliente_fixture):
+    from app.models.pagamento import Pagamento
+    dados = dict(criar_dados_emprestimo(cliente_fixture.id), status=StatusEmprestimo.ATIVO)
+    emprestimo_id = emprestimo_service.criar_emprestimo(EmprestimoCreate(**dados)).id
+    pagamento = PagamentoCreate(emprestimo_id=emprestimo_id, valor=100, metodo_pagamento="pix", chave_idempotencia="pix-1")
+
+    emprestimo_service.registrar_pagamento(emprestimo_id, pagamento)
+    emprestimo = emprestimo_service.registrar_pagamento(emprestimo_id, pagamento)
+    assert emprestimo.valor_pago == 100
+    assert emprestimo_service.db.query(Pagamento).count() == 1
+
+def test_registrar_pagamento_acima_do_devido(emprestimo_service, cliente_fixture):
+    from app.models.pagamento import Pagamento
+    dados = dict(criar_dados_emprestimo(cliente_fixture.id), status=StatusEmprestimo.ATIVO)
+    emprestimo_id = emprestimo_service.criar_emprestimo(EmprestimoCreate(**dados)).id
+
+    with pytest.raises(HTTPException) as excinfo:
+        emprestimo_service.registrar_pagamento(emprestimo_id, PagamentoCreate(emprestimo_id=emprestimo_id, valor=10 ** 6, metodo_pagamento="pix"))
+    assert excinfo.value.status_code == 400
+    # O bloqueio do empréstimo não fica preso à sessão
+    assert not emprestimo_service.db.in_transaction()
+    assert emprestimo_service.db.query(Pagamento).count() == 0
+
+def test_registrar_pagamento_chave_gravada_em_paralelo(emprestimo_service, cliente_fixture, monkeypatch):
+    from app.models.pagamento import Pagamento
+    from app.schemas.emprestimo import PagamentoLoteItem
+    dados = dict(criar_dados_emprestimo(cliente_fixture.id), status=StatusEmprestimo.ATIVO)
+    emprestimo_id = emprestimo_service.criar_emprestimo(EmprestimoCreate(**dados)).id
+    emprestimo_service.registrar_pagamento(emprestimo_id, PagamentoCreate(emprestimo_id=emprestimo_id, valor=100, metodo_pagamento="pix", chave_idempotencia="pix-1"))
+
+    # A checagem não vê a chave, como se outro worker a gravasse logo depois: o INSERT esbarra na unicidade
+    chaves_registradas = emprestimo_service._chaves_registradas
+    leituras = []
+    def checagem_atrasada(chaves):
+        leituras.append(chaves)
+        return set() if len(leituras) == 1 else chaves_registradas(chaves)
+    monkeypatch.setattr(emprestimo_service, "_chaves_registradas", checagem_atrasada)
+
+    emprestimo = emprestimo_service.registrar_pagamento(emprestimo_id, PagamentoCreate(emprestimo_id=emprestimo_id, valor=100, metodo_pagamento="pix", chave_idempotencia="pix-1"))
+    assert emprestimo.id == emprestimo_id
+    assert emprestimo.valor_pago == 100
+
+    leituras.clear()
+    lote = [
+        PagamentoLoteItem(emprestimo_id=emprestimo_id, valor=100, metodo_pagamento="pix", chave_idempotencia="pix-1"),
+        PagamentoLoteItem(emprestimo_id=emprestimo_id, valor=50, metodo_pagamento="pix", chave_idempotencia="pix-2"),
+    ]
+    resultados = emprestimo_service.registrar_pagamentos(lote)
+    assert [r["status"] for r in resultados] == ["duplicado", "registrado"]
+
+    emprestimo_service.db.expire_all()
+    assert emprestimo_service.db.get(Emprestimo, emprestimo_id).valor_pago == 150
+    assert emprestimo_service.db.query(Pagamento).count() == 2
+
+def test_listar_emprestimos_cursor(emprestimo_service, cliente_fixture):
+    hoje = date.today()
+    # Vencimentos repetidos obrigam o desempate pelo id
+    emprestimo_service.db.add_all([
+        Emprestimo(cliente_id=cliente_fixture.id, valor=100 + i, taxa_juros=2, data_vencimento=hoje + timedelta(days=i % 3), status=StatusEmprestimo.ATIVO)
+        for i in range(7)
+    ])
+    emprestimo_service.db.commit()
+    esperado = [e.id for e in emprestimo_service.db.query(Emprestimo).order_by(Emprestimo.data_vencimento, Emprestimo.id)]
+
+    pagina = emprestimo_service.listar_emprestimos_cursor(per_page=3, ordenar_por="data_vencimento")
+    assert pagina["anterior"] is None
+    vistos = [e.id for e in pagina["itens"]]
+    # Um empréstimo inserido antes do cursor não desloca as páginas seguintes
+    emprestimo_service.db.add(Emprestimo(cliente_id=cliente_fixture.id, valor=1, taxa_juros=2, data_vencimento=hoje - timedelta(days=1), status=StatusEmprestimo.ATIVO))
+    emprestimo_service.db.commit()
+    while pagina["proximo"]:
+        pagina = emprestimo_service.listar_emprestimos_cursor(pagina["proximo"], per_page=3, ordenar_por="data_vencimento")
+        vistos += [e.id for e in pagina["itens"]]
+    assert vistos == esperado
+
+    anterior = emprestimo_service.listar_emprestimos_cursor(pagina["anterior"], per_page=3, ordenar_por="data_vencimento")
+    assert [e.id for e in anterior["itens"]] == esperado[3:6]
+    assert anterior["proximo"] and anterior["anterior"]
+
+    with pytest.raises(HTTPException):
+        emprestimo_service.listar_emprestimos_cursor(pagina["anterior"], per_page=3, ordenar_por="data_solicitacao")
+
+def test_valores_em_decimal_e_somas_exatas(emprestimo_service, cliente_fixture):
+    from sqlalchemy import func
+    ids = [
+        emprestimo_service.criar_emprestimo(EmprestimoCreate(**dict(criar_dados_emprestimo(cliente_fixture.id), valor=valor))).id
+        for valor in (0.1, 0.2, 100.15)
+    ]
+    emprestimo = emprestimo_service.db.get(Emprestimo, ids[0])
+    assert emprestimo.valor == Decimal("0.10") and isinstance(emprestimo.parcelas[0].valor, Decimal)
+    # Em float, 0.1 + 0.2 + 100.15 não fecha em 100.45
+    total = emprestimo_service.db.query(func.sum(Emprestimo.valor)).filter(Emprestimo.id.in_(ids)).scalar()
+    assert total == Decimal("100.45")
\ No newline at end of file
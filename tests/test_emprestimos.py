@@ -1,6 +1,7 @@
 #Emprestimo-Facil\tests\test_emprestimos.py
 
 import pytest
+from datetime import date, timedelta
 from app.core.config import settings
 from app.schemas.emprestimo import StatusEmprestimo
 
@@ -100,4 +101,48 @@ def test_atualizar_emprestimo(test_app, test_db, test_auth_header):
     assert data["status"] == StatusEmprestimo.ATIVO.value
     assert data["valor"] == 3500.00
 
+def test_listar_vencimentos(test_app, test_db, test_auth_header):
+    cliente_data = {
+        "nome": "Cliente Vencimentos",
+        "email": "emprestimo.vencimentos@example.com",
+        "telefone": "222222222",
+        "cpf": "789.789.789-78",
+        "data_nascimento": "1991-01-01"
+    }
+    cliente_response = test_app.post(f"{settings.API_V1_STR}/clientes/", json=cliente_data, headers=test_auth_header)
+    cliente_id = cliente_response.json()["id"]
+
+    vencimento = date.today() + timedelta(days=90)
+    emprestimo_data = {
+        "cliente_id": cliente_id,
+        "valor": 1200.00,
+        "taxa_juros": 1,
+        "data_vencimento": vencimento.isoformat(),
+        "status": StatusEmprestimo.ATIVO.value
+    }
+    create_response = test_app.post(f"{settings.API_V1_STR}/emprestimos/", json=emprestimo_data, headers=test_auth_header)
+    emprestimo_id = create_response.json()["id"]
+
+    # Parcelas saem das linhas do ORM (from_attributes)
+    response = test_app.get(
+        f"{settings.API_V1_STR}/emprestimos/parcelas/vencimentos",
+        params={"data_inicio": date.today().isoformat(), "data_fim": vencimento.isoformat()},
+        headers=test_auth_header
+    )
+    assert response.status_code == 200
+    parcelas = [p for p in response.json() if p["emprestimo_id"] == emprestimo_id]
+    assert parcelas
+    assert all(p["status"] == "pendente" and p["valor_pago"] == 0 for p in parcelas)
+
+def test_registrar_pagamentos_em_lote(test_app, test_db, test_auth_header):
+    # Rota síncrona: a sessão vem de get_db, também usada por get_current_user
+    lote = {"pagamentos": [
+        {"chave_idempotencia": "lote-rota-1", "emprestimo_id": 999999, "valor": 10, "metodo_pagamento": "pix"}
+    ]}
+    response = test_app.post(f"{settings.API_V1_STR}/emprestimos/pagamentos/lote", json=lote, headers=test_auth_header)
+    assert response.status_code == 200
+    data = response.json()
+    assert data["rejeitado"] == 1
+    assert data["resultados"][0]["status"] == "rejeitado"
+
 # Adicione mais testes conforme necessário
\ No newline at end of file
@@ -0,0 +1,49 @@
+#Emprestimo-Facil\tests\test_estatistica_cliente_service.py
+
+from datetime import date, timedelta
+from decimal import Decimal
+from sqlalchemy import delete, update
+from app.models.emprestimo import Emprestimo, StatusEmprestimo
+from app.models.estatistica_cliente import EstatisticaCliente
+from app.schemas.emprestimo import PagamentoCreate, PagamentoLoteItem
+from app.services.emprestimo_service import EmprestimoService
+from app.services.estatistica_cliente_service import EstatisticaClienteService
+from app.services.estatistica_service import EstatisticaService
+
+def test_estatisticas_acompanham_as_escritas(db_session, cliente, criar_emprestimo):
+    estatisticas = EstatisticaClienteService(db_session)
+    assert db_session.get(EstatisticaCliente, cliente.id).total_emprestimos == 0
+
+    service = EmprestimoService(db_session)
+    primeiro = criar_emprestimo(cliente, Decimal("1000"))
+    segundo = criar_emprestimo(cliente, Decimal("300"))
+    criar_emprestimo(cliente, Decimal("200"), StatusEmprestimo.PENDENTE)
+    service.registrar_pagamento(primeiro.id, PagamentoCreate(emprestimo_id=primeiro.id, valor=100, metodo_pagamento="pix"))
+    service.registrar_pagamentos([PagamentoLoteItem(emprestimo_id=segundo.id, valor=50.5, metodo_pagamento="boleto", chave_idempotencia="c1")])
+
+    db_session.execute(update(Emprestimo).where(Emprestimo.id == primeiro.id).values(proximo_vencimento=date.today() - timedelta(days=1)))
+    db_session.commit()
+    service.verificar_atrasos()
+
+    esperado = {
+        "total_emprestimos": 3, "valor_total_emprestado": Decimal("1500"), "valor_total_pago": Decimal("150.50"),
+        "emprestimos_ativos": 1, "emprestimos_atrasados": 1,
+    }
+    assert estatisticas.obter(cliente.id) == estatisticas.calcular([cliente.id])[cliente.id] == esperado
+    resultado = EstatisticaService(db_session).obter_estatisticas_cliente(cliente.id)
+    assert (resultado["total_emprestimos"], resultado["valor_total_pago"]) == (3, 150.5)
+
+def test_reconstrucao_cria_linhas_faltantes_e_corrige_desvios(db_session, cliente, criar_emprestimo):
+    criar_emprestimo(cliente, Decimal("1000"))
+    db_session.execute(delete(EstatisticaCliente))
+    db_session.commit()
+    estatisticas = EstatisticaClienteService(db_session)
+    # Sem a linha, a leitura agrega os empréstimos do cliente
+    assert estatisticas.obter(cliente.id)["total_emprestimos"] == 1
+
+    assert estatisticas.reconstruir() == 1
+    db_session.execute(update(Emprestimo).values(status=StatusEmprestimo.ATRASADO))
+    db_session.commit()
+    assert estatisticas.obter(cliente.id)["emprestimos_atrasados"] == 0
+    estatisticas.reconstruir(tamanho_lote=1)
+    assert estatisticas.obter(cliente.id) == estatisticas.calcular([cliente.id])[cliente.id]
\ No newline at end of file
@@ -0,0 +1,71 @@
+#Emprestimo-Facil\tests\test_exportacao.py
+
+import csv
+import io
+import json
+from datetime import date
+from decimal import Decimal
+from enum import Enum
+import pyarrow as pa
+import pyarrow.parquet as pq
+from sqlalchemy import column
+from sqlalchemy import types
+from app.services import exportacao
+from app.services.exportacao import FormatoColunar, FormatoExportacao, esquema_arrow, formatar, formatar_colunar, lote_arrow
+
+LINHAS = [
+    {"id": i, "valor_atual": Decimal("1000.10") + i, "status": "ativo", "proximo_vencimento": date(2024, 6, 30)}
+    for i in range(50)
+]
+
+def test_formatar_csv():
+    texto = "".join(formatar(iter(LINHAS), FormatoExportacao.CSV))
+    linhas = list(csv.DictReader(io.StringIO(texto)))
+    assert len(linhas) == 50
+    assert linhas[3] == {"id": "3", "valor_atual": "1003.10", "status": "ativo", "proximo_vencimento": "2024-06-30"}
+
+def test_formatar_ndjson():
+    texto = "".join(formatar(iter(LINHAS), FormatoExportacao.NDJSON))
+    linhas = [json.loads(linha) for linha in texto.splitlines()]
+    assert len(linhas) == 50
+    assert linhas[3] == {"id": 3, "valor_atual": "1003.10", "status": "ativo", "proximo_vencimento": "2024-06-30"}
+
+def test_formatar_envia_em_pedacos(monkeypatch):
+    monkeypatch.setattr(exportacao, "TAMANHO_BUFFER", 200)
+    for formato in FormatoExportacao:
+        pedacos = list(formatar(iter(LINHAS), formato))
+        assert len(pedacos) > 1
+        assert all(len(p) < 400 for p in pedacos)
+
+def test_formatar_sem_linhas():
+    assert list(formatar(iter([]), FormatoExportacao.CSV)) == []
+    assert list(formatar(iter([]), FormatoExportacao.NDJSON)) == []
+
+
+class Status(Enum):
+    ATIVO = "ativo"
+
+ESQUEMA = esquema_arrow([column("id", types.Integer()), column("valor", types.Numeric(14, 2)), column("status", types.Enum(Status))])
+
+def _ler(dados: bytes, formato: FormatoColunar) -> pa.Table:
+    if formato == FormatoColunar.PARQUET:
+        return pq.read_table(pa.BufferReader(dados))
+    return pa.ipc.open_stream(dados).read_all()
+
+def test_formatar_colunar_em_lotes():
+    lotes = [
+        lote_arrow([(i, Decimal("10.25") + i, Status.ATIVO) for i in range(inicio, inicio + 3)], ESQUEMA)
+        for inicio in (0, 3)
+    ]
+    for formato in FormatoColunar:
+        pedacos = list(formatar_colunar(iter(lotes), ESQUEMA, formato))
+        # Um envio por lote, mais o fim do stream (ou o rodapé do Parquet)
+        assert len(pedacos) == 3
+        tabela = _ler(b"".join(pedacos), formato)
+        assert tabela.schema == ESQUEMA
+        assert tabela.to_pylist()[4] == {"id": 4, "valor": Decimal("14.25"), "status": "ativo"}
+
+def test_formatar_colunar_sem_linhas():
+    for formato in FormatoColunar:
+        tabela = _ler(b"".join(formatar_colunar(iter([]), ESQUEMA, formato)), formato)
+        assert tabela.num_rows == 0 and tabela.schema == ESQUEMA
\ No newline at end of file
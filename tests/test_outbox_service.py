@@ -0,0 +1,38 @@
+#Emprestimo-Facil\tests\test_outbox_service.py
+
+from decimal import Decimal
+from app.models.outbox import NotificacaoOutbox
+from app.models.emprestimo import StatusEmprestimo
+from app.services.emprestimo_service import EmprestimoService
+from app.services.outbox_service import OutboxService
+
+def test_notificacao_gravada_na_transacao(db_session, cliente, criar_emprestimo):
+    criar_emprestimo(cliente, Decimal("1000"), StatusEmprestimo.PENDENTE)
+    service = EmprestimoService(db_session)
+    pendentes = db_session.query(NotificacaoOutbox).filter(NotificacaoOutbox.enviado_em.is_(None)).all()
+    assert [(n.destinatario, n.tipo) for n in pendentes] == [("maria@example.com", "email")]
+
+    # Uma alteração desfeita não deixa notificação para trás
+    service.outbox.enfileirar([{"to": "outro@example.com", "message": "x"}])
+    db_session.rollback()
+    assert db_session.query(NotificacaoOutbox).count() == 1
+
+def test_publicar_pendentes(db_session, monkeypatch):
+    outbox = OutboxService(db_session)
+    outbox.enfileirar([{"to": f"c{i}@example.com", "message": f"m{i}", "notification_type": "email"} for i in range(5)])
+    db_session.commit()
+
+    def broker_fora(notificacoes):
+        raise ConnectionError("broker indisponível")
+
+    monkeypatch.setattr(outbox, "_publicar", broker_fora)
+    assert outbox.publicar_pendentes(tamanho_lote=2) == 0
+    assert db_session.query(NotificacaoOutbox).filter(NotificacaoOutbox.enviado_em.is_(None)).count() == 5
+
+    publicadas = []
+    monkeypatch.setattr(outbox, "_publicar", publicadas.append)
+    assert outbox.publicar_pendentes(tamanho_lote=2) == 5
+    assert [len(lote) for lote in publicadas] == [2, 2, 1]
+    assert [n["to"] for lote in publicadas for n in lote] == [f"c{i}@example.com" for i in range(5)]
+    assert db_session.query(NotificacaoOutbox).filter(NotificacaoOutbox.enviado_em.is_(None)).count() == 0
+    assert outbox.publicar_pendentes() == 0
\ No newline at end of file
@@ -0,0 +1,57 @@
+#Emprestimo-Facil\tests\test_pool.py
+
+import pytest
+from sqlalchemy import text
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from app.db.pool import criar_engine, metricas_pools, opcoes_pool
+
+POOL = {"pool_size": 1, "max_overflow": 0, "pool_timeout": 0.05, "pool_recycle": 1800, "statement_timeout_ms": 15000, "pool_pre_ping": True}
+
+def test_opcoes_pool():
+    assert opcoes_pool("postgresql://u:s@db/app", POOL) == {
+        "pool_pre_ping": True, "pool_size": 1, "max_overflow": 0, "pool_timeout": 0.05, "pool_recycle": 1800,
+        "connect_args": {"options": "-c statement_timeout=15000"},
+    }
+    assert opcoes_pool("sqlite://", POOL) == {"pool_pre_ping": True}
+
+def test_metricas_do_pool(tmp_path):
+    engine = criar_engine(f"sqlite:///{tmp_path / 'pool.db'}", {"echo": False, "pool": POOL}, nome="teste")
+    try:
+        with engine.connect() as conexao:
+            conexao.execute(text("SELECT 1"))
+            resumo = metricas_pools["teste"].resumo()
+            assert (resumo["em_uso"], resumo["capacidade"], resumo["checkouts"]) == (1, 1, 1)
+            # Pool esgotado: a segunda conexão espera pool_timeout e o timeout é contado
+            with pytest.raises(PoolTimeoutError):
+                engine.connect()
+
+        resumo = metricas_pools["teste"].resumo()
+        assert (resumo["em_uso"], resumo["livres"], resumo["timeouts"], resumo["conexoes_abertas"]) == (0, 1, 1, 1)
+        assert resumo["espera_checkout"]["max_ms"] >= 50
+        assert resumo["tempo_em_uso"]["max_ms"] > 0
+    finally:
+        engine.dispose()
+
+def test_metricas_do_pool_assincrono(tmp_path, monkeypatch):
+    import asyncio
+    from app.core.config import settings
+    from app.db.async_database import obter_engine_assincrona
+    # Settings é um modelo pydantic: o método é trocado na classe, não na instância
+    monkeypatch.setattr(type(settings), "get_database_settings", lambda self: {"url": f"sqlite:///{tmp_path / 'async.db'}", "echo": False, "pool": POOL})
+    obter_engine_assincrona.cache_clear()
+
+    async def cenario():
+        engine = obter_engine_assincrona()
+        try:
+            async with engine.connect() as conexao:
+                await conexao.execute(text("SELECT 1"))
+                resumo = metricas_pools["principal_assincrono"].resumo()
+                assert (resumo["em_uso"], resumo["capacidade"], resumo["checkouts"]) == (1, 1, 1)
+            assert metricas_pools["principal_assincrono"].resumo()["livres"] == 1
+        finally:
+            await engine.dispose()
+
+    try:
+        asyncio.run(cenario())
+    finally:
+        obter_engine_assincrona.cache_clear()
\ No newline at end of file
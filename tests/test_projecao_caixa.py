@@ -0,0 +1,104 @@
+#Emprestimo-Facil\tests\test_projecao_caixa.py
+
+import numpy as np
+import pytest
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+from sqlalchemy import delete, update
+from app.models.cliente import Cliente
+from app.models.parcela import Parcela
+from app.models.emprestimo import StatusEmprestimo
+from app.schemas.emprestimo import EmprestimoCreate, PagamentoCreate
+from app.services.contador_service import ContadorService
+from app.services.emprestimo_service import EmprestimoService
+from app.services.projecao_caixa_service import GranularidadeProjecao, ProjecaoCaixaService, agrupar_por_periodo, projecoes_em_cache
+
+def test_agrupar_por_periodo():
+    # 2024-01-01 é uma segunda-feira
+    datas = np.array(["2024-01-01", "2024-01-07", "2024-01-08", "2024-01-31", "2024-02-01"], dtype="datetime64[D]")
+    centavos = np.array([100, 200, 300, 400, 500], dtype=np.int64)
+
+    inicios, totais = agrupar_por_periodo(datas, centavos, GranularidadeProjecao.SEMANA)
+    assert [str(d) for d in inicios] == ["2024-01-01", "2024-01-08", "2024-01-29"]
+    assert totais.tolist() == [300, 300, 900]
+
+    inicios, totais = agrupar_por_periodo(datas, centavos, GranularidadeProjecao.MES)
+    assert [str(d) for d in inicios] == ["2024-01-01", "2024-02-01"]
+    assert totais.tolist() == [1000, 500]
+
+    inicios, totais = agrupar_por_periodo(datas[:0], centavos[:0], GranularidadeProjecao.DIA)
+    assert len(inicios) == len(totais) == 0
+
+@pytest.fixture
+def emprestimo(db_session):
+    cliente = Cliente(nome="Rita", email="rita@example.com", cpf="555.666.777-88", data_nascimento=datetime(1980, 1, 1))
+    db_session.add(cliente)
+    db_session.commit()
+    return EmprestimoService(db_session).criar_emprestimo(EmprestimoCreate(
+        cliente_id=cliente.id, valor=Decimal("1200"), taxa_juros=Decimal("0"), status=StatusEmprestimo.ATIVO,
+        data_vencimento=date.today() + timedelta(days=200)
+    ))
+
+def test_projecao_por_parcela_e_periodo(db_session, emprestimo):
+    projecoes_em_cache.limpar()
+    parcelas = sorted(emprestimo.parcelas, key=lambda p: p.numero)
+    # A primeira parcela fica vencida: sai da projeção e entra no total em atraso
+    db_session.execute(update(Parcela).where(Parcela.id == parcelas[0].id).values(data_vencimento=date.today() - timedelta(days=3)))
+    db_session.commit()
+
+    projecao = ProjecaoCaixaService(db_session)
+    diaria = projecao.projetar(365)
+    futuras = parcelas[1:]
+    assert diaria["projecao_por_dia"] == {p.data_vencimento.strftime("%Y-%m-%d"): float(p.valor) for p in futuras}
+    assert diaria["total_em_atraso"] == float(parcelas[0].valor)
+    assert diaria["total_a_receber"] == 1200.0
+
+    mensal = projecao.projetar(365, GranularidadeProjecao.MES)
+    esperado = {}
+    for p in futuras:
+        mes = p.data_vencimento.replace(day=1).strftime("%Y-%m-%d")
+        esperado[mes] = esperado.get(mes, 0) + float(p.valor)
+    assert mensal["projecao_por_mes"] == pytest.approx(esperado)
+
+def test_cache_da_projecao_acompanha_pagamentos(db_session, emprestimo):
+    projecoes_em_cache.limpar()
+    # A versão das parcelas existe depois da primeira reconciliação
+    ContadorService(db_session).reconciliar()
+    projecao = ProjecaoCaixaService(db_session)
+    assert projecao.projetar(365)["total_a_receber"] == 1200.0
+
+    # Alteração fora dos serviços: o cache continua válido para a mesma versão
+    db_session.execute(update(Parcela).values(valor=Decimal("0")))
+    db_session.commit()
+    assert projecao.projetar(365)["total_a_receber"] == 1200.0
+    assert projecao.projetar(30)["total_a_receber"] == 0
+
+    # Um pagamento muda a versão e a projeção é lida de novo
+    db_session.execute(update(Parcela).values(valor=Parcela.valor_principal + Parcela.valor_juros))
+    db_session.commit()
+    EmprestimoService(db_session).registrar_pagamento(emprestimo.id, PagamentoCreate(emprestimo_id=emprestimo.id, valor=200, metodo_pagamento="pix"))
+    assert projecao.projetar(365)["total_a_receber"] == 1000.0
+
+def test_cache_da_projecao_acompanha_parcelas_geradas(db_session, emprestimo):
+    projecoes_em_cache.limpar()
+    ContadorService(db_session).reconciliar()
+    projecao = ProjecaoCaixaService(db_session)
+    # Empréstimo anterior à tabela de parcelas: a projeção lida fica em cache vazia
+    db_session.execute(delete(Parcela))
+    db_session.commit()
+    assert projecao.projetar(365)["total_a_receber"] == 0
+
+    # Gerar as parcelas não muda os totais da carteira, mas muda a versão das parcelas
+    contadores = ContadorService(db_session).obter()
+    assert EmprestimoService(db_session).gerar_parcelas_faltantes() == 1
+    assert ContadorService(db_session).obter() == contadores
+    assert projecao.projetar(365)["total_a_receber"] == 1200.0
+
+def test_projecao_sem_versao_nao_usa_cache(db_session, emprestimo):
+    # Antes da primeira reconciliação não há versão das parcelas: cada leitura vai ao banco
+    projecoes_em_cache.limpar()
+    projecao = ProjecaoCaixaService(db_session)
+    assert projecao.projetar(365)["total_a_receber"] == 1200.0
+    db_session.execute(update(Parcela).values(valor=Decimal("0")))
+    db_session.commit()
+    assert projecao.projetar(365)["total_a_receber"] == 0
\ No newline at end of file
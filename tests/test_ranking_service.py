@@ -0,0 +1,113 @@
+#Emprestimo-Facil\tests\test_ranking_service.py
+
+import time
+from datetime import date, timedelta
+from decimal import Decimal
+from sqlalchemy import update
+from app.models.emprestimo import Emprestimo
+from app.schemas.emprestimo import PagamentoCreate, PagamentoLoteItem
+from app.services.contador_service import EstadoEmprestimo
+from app.services.emprestimo_service import EmprestimoService
+from app.services.estatistica_service import EstatisticaService
+from app.services import ranking_service
+from app.services.ranking_service import RankingMemoria, RankingService
+
+def test_ranking_memoria():
+    ranking = RankingMemoria()
+    # Antes da reconstrução, atualizações não criam um ranking parcial
+    ranking.atualizar("teste", {1: 5.0})
+    assert not ranking.existe("teste")
+
+    ranking.substituir("teste", {1: 5.0, 2: 1.0, 3: 3.0})
+    ranking.atualizar("teste", {2: 9.0, 3: None, 4: 0.5})
+    assert ranking.topo("teste", 2) == [(2, 9.0), (1, 5.0)]
+    assert ranking.topo("teste", 10, decrescente=False) == [(4, 0.5), (1, 5.0), (2, 9.0)]
+    assert ranking.topo("teste", 0) == []
+
+def test_rankings_acompanham_pagamentos_e_atrasos(db_session, clientes, criar_emprestimo):
+    ana, bruno, carla = clientes
+    service = EmprestimoService(db_session)
+    da_ana = criar_emprestimo(ana, Decimal("100"), taxa_juros=Decimal("0"))
+    do_bruno = criar_emprestimo(bruno, Decimal("200"), taxa_juros=Decimal("0"))
+    criar_emprestimo(carla, Decimal("300"), taxa_juros=Decimal("0"))
+    RankingService(db_session).reconstruir()
+
+    service.registrar_pagamento(da_ana.id, PagamentoCreate(emprestimo_id=da_ana.id, valor=100, metodo_pagamento="pix"))
+    service.registrar_pagamentos([PagamentoLoteItem(emprestimo_id=do_bruno.id, valor=150, metodo_pagamento="boleto", chave_idempotencia="r1")])
+    db_session.execute(update(Emprestimo).where(Emprestimo.id != da_ana.id).values(proximo_vencimento=date.today() - timedelta(days=1)))
+    db_session.commit()
+    service.verificar_atrasos()
+
+    estatisticas = EstatisticaService(db_session)
+    assert [r["nome"] for r in estatisticas.obter_ranking_clientes(2)] == ["Bruno", "Ana"]
+    assert [r["nome"] for r in estatisticas.obter_ranking_clientes(3, ordem="asc")] == ["Carla", "Ana", "Bruno"]
+    bons = estatisticas.identificar_bons_pagadores()
+    assert [(r["nome"], r["taxa_pagamento"]) for r in bons] == [("Ana", 100.0)]
+    maus = estatisticas.identificar_maus_pagadores(2)
+    assert [r["emprestimos_atrasados"] for r in maus] == [1, 1]
+    assert {r["nome"] for r in maus} == {"Bruno", "Carla"}
+
+    # Os rankings incrementais coincidem com uma reconstrução do zero
+    rankings = RankingService(db_session)
+    antes = {nome: rankings.topo(nome, 10) for nome in ("valor_pago", "bons_pagadores", "maus_pagadores")}
+    rankings.reconstruir()
+    assert antes == {nome: rankings.topo(nome, 10) for nome in antes}
+    # A consulta usada antes da primeira reconstrução devolve os mesmos rankings
+    for nome in antes:
+        for decrescente in (True, False):
+            assert rankings.topo_sql(nome, 2, decrescente) == rankings.topo(nome, 2, decrescente)
+
+def test_rollback_descarta_pontuacoes_pendentes(db_session, clientes, criar_emprestimo):
+    ana = clientes[0]
+    service = EmprestimoService(db_session)
+    emprestimo = criar_emprestimo(ana, Decimal("100"), taxa_juros=Decimal("0"))
+    RankingService(db_session).reconstruir()
+
+    db_emprestimo = db_session.get(Emprestimo, emprestimo.id)
+    anterior = db_emprestimo.valor_pago
+    db_emprestimo.valor_pago = Decimal("500")
+    service._registrar_alteracoes([(EstadoEmprestimo.de(db_emprestimo)._replace(valor_pago=anterior), EstadoEmprestimo.de(db_emprestimo))])
+    db_session.rollback()
+    # O próximo commit da sessão não publica as pontuações da transação desfeita
+    db_session.commit()
+    assert RankingService(db_session).topo("valor_pago", 1) == [(ana.id, 0.0)]
+
+def test_redis_tentado_de_novo_apos_falha(monkeypatch):
+    import sys, types
+    respostas = [ConnectionError("recusada"), True]
+    class Cliente:
+        def ping(self):
+            resposta = respostas.pop(0)
+            if isinstance(resposta, Exception):
+                raise resposta
+            return resposta
+    modulo = types.SimpleNamespace(Redis=types.SimpleNamespace(from_url=lambda url, **opcoes: Cliente()))
+    monkeypatch.setitem(sys.modules, "redis", modulo)
+
+    conexao = ranking_service._ConexaoRankings(intervalo=0)
+    assert conexao.obter() is ranking_service.rankings_memoria
+    assert isinstance(conexao.obter(), ranking_service.RankingRedis)
+    conexao.falhou(ConnectionError("caiu"))
+    assert not conexao.usando_redis()
+
+def test_leitura_nao_reconstroi_o_ranking(db_session, clientes, criar_emprestimo, monkeypatch):
+    criar_emprestimo(clientes[0], Decimal("100"), taxa_juros=Decimal("0"))
+    memoria = RankingMemoria()
+    monkeypatch.setattr(ranking_service, "rankings_memoria", memoria)
+    monkeypatch.setattr(ranking_service, "obter_rankings", lambda: memoria)
+
+    # Sem ranking construído, a leitura consulta a tabela e agenda a reconstrução em segundo plano
+    assert RankingService(db_session).topo("valor_pago", 5) == [(clientes[0].id, 0.0)]
+    for _ in range(100):
+        if memoria.existe("valor_pago"):
+            break
+        time.sleep(0.05)
+    assert RankingService(db_session).topo("valor_pago", 5) == [(clientes[0].id, 0.0)]
+
+def test_commit_enfileira_atualizacao_do_redis(db_session, clientes, criar_emprestimo, monkeypatch):
+    enviadas = []
+    monkeypatch.setattr(ranking_service.conexao_rankings, "usando_redis", lambda: True)
+    monkeypatch.setattr(ranking_service.celery_app, "send_task", lambda nome, args=None: enviadas.append((nome, args)))
+
+    criar_emprestimo(clientes[1], Decimal("100"), taxa_juros=Decimal("0"))
+    assert enviadas == [("app.tasks.atualizar_rankings", [[clientes[1].id]])]
\ No newline at end of file
@@ -0,0 +1,60 @@
+#Emprestimo-Facil\tests\test_replicas.py
+
+import pytest
+from datetime import date, datetime, timedelta
+from sqlalchemy import create_engine
+from app.db.database import Base
+from app.db.replicas import RoteadorLeitura
+from app.models.cliente import Cliente
+from app.models.emprestimo import Emprestimo, StatusEmprestimo
+from app.services.estatistica_service import EstatisticaService
+
+def banco_com_emprestimos(caminho, quantidade: int):
+    engine = create_engine(f"sqlite:///{caminho}")
+    Base.metadata.create_all(engine)
+    with engine.begin() as conexao:
+        conexao.execute(Cliente.__table__.insert(), {
+            "nome": "Maria", "email": "maria@example.com", "cpf": "987.654.321-00", "data_nascimento": datetime(1985, 5, 5), "ativo": True
+        })
+        if quantidade:
+            conexao.execute(Emprestimo.__table__.insert(), [
+                {"cliente_id": 1, "valor": 100, "taxa_juros": 2, "data_vencimento": date.today() + timedelta(days=30), "status": StatusEmprestimo.ATIVO.name}
+                for _ in range(quantidade)
+            ])
+    return engine
+
+@pytest.fixture
+def bancos(tmp_path):
+    # O principal e a réplica têm dados diferentes para saber de onde veio cada leitura
+    primario = banco_com_emprestimos(tmp_path / "primario.db", 3)
+    replica = banco_com_emprestimos(tmp_path / "replica.db", 1)
+    yield primario, replica
+    primario.dispose()
+    replica.dispose()
+
+def total_emprestimos(roteador: RoteadorLeitura) -> int:
+    db = roteador.sessao()
+    try:
+        return EstatisticaService(db).obter_estatisticas_gerais()["total_emprestimos"]
+    finally:
+        db.close()
+
+def test_leitura_vai_para_replica_em_dia(bancos):
+    primario, replica = bancos
+    assert total_emprestimos(RoteadorLeitura(primario, [replica])) == 1
+    assert total_emprestimos(RoteadorLeitura(primario, [])) == 3
+
+def test_replica_atrasada_ou_fora_do_ar_usa_primario(bancos, tmp_path, monkeypatch):
+    primario, replica = bancos
+    roteador = RoteadorLeitura(primario, [replica], atraso_maximo=5, intervalo_verificacao=60)
+    monkeypatch.setattr(roteador, "_medir_atraso", lambda engine: 30.0)
+    assert total_emprestimos(roteador) == 3
+
+    # A medição fica em cache pelo intervalo de verificação
+    monkeypatch.setattr(roteador, "_medir_atraso", lambda engine: 0.0)
+    assert total_emprestimos(roteador) == 3
+    roteador.intervalo_verificacao = 0
+    assert total_emprestimos(roteador) == 1
+
+    fora_do_ar = create_engine(f"sqlite:///{tmp_path / 'inexistente' / 'replica.db'}")
+    assert total_emprestimos(RoteadorLeitura(primario, [fora_do_ar])) == 3
\ No newline at end of file
@@ -0,0 +1,50 @@
+#Emprestimo-Facil\tests\test_resumo_service.py
+
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+from sqlalchemy import update
+from app.models.emprestimo import Emprestimo
+from app.models.resumo import ResumoEmprestimos, GranularidadeResumo
+from app.schemas.emprestimo import PagamentoCreate
+from app.services.emprestimo_service import EmprestimoService
+from app.services.estatistica_service import EstatisticaService
+from app.services.resumo_service import ResumoService
+
+def resumos(db_session):
+    return [
+        (r.granularidade, r.inicio, r.total_emprestimos, r.valor_total, r.soma_taxas, r.emprestimos_ativos, r.emprestimos_atrasados, r.emprestimos_quitados)
+        for r in db_session.query(ResumoEmprestimos).filter(ResumoEmprestimos.total_emprestimos > 0).order_by(ResumoEmprestimos.granularidade, ResumoEmprestimos.inicio)
+    ]
+
+def test_resumos_incrementais_iguais_ao_backfill(db_session, cliente, criar_emprestimo):
+    service = EmprestimoService(db_session)
+    ids = [
+        criar_emprestimo(cliente, valor, taxa_juros=taxa).id
+        for valor, taxa in ((Decimal("1000"), Decimal("2")), (Decimal("500.50"), Decimal("3.5")), (Decimal("10"), Decimal("1")))
+    ]
+    # Solicitado em outro mês: entra em outro período mensal e diário
+    db_session.execute(update(Emprestimo).where(Emprestimo.id == ids[2]).values(data_solicitacao=datetime(2024, 1, 15, 10, 30)))
+    db_session.commit()
+    assert ResumoService(db_session).reconstruir() == 4
+
+    db_session.execute(update(Emprestimo).where(Emprestimo.id == ids[0]).values(proximo_vencimento=date.today() - timedelta(days=1)))
+    db_session.commit()
+    service.verificar_atrasos()
+    emprestimo = db_session.get(Emprestimo, ids[1])
+    total = service.calcular_valor_total_devido(emprestimo)
+    service.registrar_pagamento(ids[1], PagamentoCreate(emprestimo_id=ids[1], valor=total, metodo_pagamento="pix"))
+
+    incrementais = resumos(db_session)
+    assert ResumoService(db_session).reconstruir() == 4
+    assert resumos(db_session) == incrementais
+
+    tendencias = EstatisticaService(db_session).analisar_tendencias(12)
+    assert tendencias == [{
+        "mes": date.today().strftime("%Y-%m"),
+        "total_emprestimos": 2,
+        "valor_total_emprestado": 1500.5,
+        "taxa_juros_media": 2.75,
+        "por_status": {"pendente": 0, "aprovado": 0, "ativo": 0, "quitado": 1, "atrasado": 1, "cancelado": 0},
+    }]
+    assert [r.inicio for r in ResumoService(db_session).listar(GranularidadeResumo.MES, date(2024, 1, 1))][0] == date(2024, 1, 1)
+    assert [t["dia"] for t in EstatisticaService(db_session).analisar_tendencias_diarias(1)] == [date.today().isoformat()]
\ No newline at end of file
@@ -0,0 +1,114 @@
+#Emprestimo-Facil\tests\test_servicos_async.py
+
+import asyncio
+import pytest
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+from sqlalchemy import select, func
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+from app.db.database import Base
+from app.db.async_database import url_assincrona
+from app.models.cliente import Cliente
+from app.models.emprestimo import StatusEmprestimo
+from app.models.parcela import Parcela
+from app.schemas.cliente import ClienteCreate, ClienteUpdate
+from app.schemas.emprestimo import EmprestimoCreate, EmprestimoUpdate
+from app.services.cliente_service_async import ClienteServiceAsync
+from app.services.emprestimo_service_async import EmprestimoServiceAsync
+from app.services.usuario_service_async import UsuarioServiceAsync
+
+@pytest.fixture
+def sessao_async(tmp_path):
+    engine = create_async_engine(url_assincrona(f"sqlite:///{tmp_path / 'async.db'}"))
+    fabrica = async_sessionmaker(bind=engine, autoflush=False, expire_on_commit=False)
+
+    async def criar_tabelas():
+        async with engine.begin() as conexao:
+            await conexao.run_sync(Base.metadata.create_all)
+
+    asyncio.run(criar_tabelas())
+    yield fabrica
+    asyncio.run(engine.dispose())
+
+def novo_cliente(indice: int = 0) -> ClienteCreate:
+    return ClienteCreate(
+        nome=f"Cliente {indice}",
+        cpf=f"123.456.789-{indice:02d}",
+        email=f"cliente{indice}@example.com",
+        telefone="(11) 98765-4321",
+        data_nascimento=date(1990, 1, 1)
+    )
+
+def test_url_assincrona():
+    assert url_assincrona("postgresql://u:s@db/app") == "postgresql+asyncpg://u:s@db/app"
+    assert url_assincrona("postgresql+psycopg2://u:s@db/app") == "postgresql+asyncpg://u:s@db/app"
+    assert url_assincrona("sqlite:///./app.db") == "sqlite+aiosqlite:///./app.db"
+
+def test_cliente_service_async(sessao_async):
+    async def cenario():
+        async with sessao_async() as db:
+            service = ClienteServiceAsync(db)
+            ids = [(await service.criar_cliente(novo_cliente(i))).id for i in range(5)]
+
+            atualizado = await service.atualizar_cliente(ids[0], ClienteUpdate(nome="Renomeado"))
+            assert atualizado.nome == "Renomeado"
+            await service.deletar_cliente(ids[1])
+            assert await service.obter_cliente(ids[1]) is None
+
+            pagina = await service.listar_clientes_cursor(per_page=2)
+            vistos = [c.id for c in pagina["itens"]]
+            while pagina["proximo"]:
+                pagina = await service.listar_clientes_cursor(pagina["proximo"], per_page=2)
+                vistos += [c.id for c in pagina["itens"]]
+            assert vistos == [ids[0]] + ids[2:]
+            assert [c.id for c in await service.listar_clientes(page=2, per_page=2)] == ids[3:]
+            # ?skip=1&limit=2 das rotas: deslocamento exato, não arredondado para a página
+            assert [c.id for c in await service.listar_clientes(per_page=2, skip=1)] == ids[2:4]
+
+    asyncio.run(cenario())
+
+def test_emprestimo_service_async(sessao_async):
+    async def cenario():
+        async with sessao_async() as db:
+            cliente = await ClienteServiceAsync(db).criar_cliente(novo_cliente())
+            service = EmprestimoServiceAsync(db)
+            # A criação passa pelo serviço síncrono (cronograma e parcelas) na mesma sessão
+            emprestimo = await service.criar_emprestimo(EmprestimoCreate(
+                cliente_id=cliente.id,
+                valor=Decimal("1200.00"),
+                taxa_juros=Decimal("2"),
+                data_vencimento=date.today() + timedelta(days=180)
+            ))
+            assert emprestimo.cliente.id == cliente.id and emprestimo.garantias == []
+            parcelas = await db.scalar(select(func.count()).select_from(Parcela).where(Parcela.emprestimo_id == emprestimo.id))
+            assert parcelas > 0
+
+            atualizado = await service.atualizar_emprestimo(emprestimo.id, EmprestimoUpdate(status=StatusEmprestimo.ATIVO))
+            assert atualizado.status == StatusEmprestimo.ATIVO
+            cancelado = await service.deletar_emprestimo(emprestimo.id)
+            assert cancelado.status == StatusEmprestimo.CANCELADO
+
+            pagina = await service.listar_emprestimos_cursor(ordenar_por="data_vencimento")
+            assert [e.id for e in pagina["itens"]] == [emprestimo.id] and pagina["proximo"] is None
+
+    asyncio.run(cenario())
+
+def test_usuario_service_async_tamanho_pagina(sessao_async, monkeypatch):
+    from app.core.config import settings
+    from app.models.usuario import Usuario
+    monkeypatch.setattr(settings, "pagination_page_size", 2)
+    monkeypatch.setattr(settings, "max_pagination_page_size", 3)
+
+    async def cenario():
+        async with sessao_async() as db:
+            db.add_all([Usuario(email=f"usuario{i}@example.com", nome_completo=f"Usuário {i}", hashed_password="x") for i in range(5)])
+            await db.commit()
+            service = UsuarioServiceAsync(db)
+
+            # Sem per_page vale page_size; acima do máximo, max_page_size
+            assert len(await service.listar_usuarios()) == 2
+            assert len(await service.listar_usuarios(per_page=50)) == 3
+            assert len((await service.listar_usuarios_cursor())["itens"]) == 2
+            assert len((await service.listar_usuarios_cursor(per_page=50))["itens"]) == 3
+
+    asyncio.run(cenario())
\ No newline at end of file
@@ -0,0 +1,66 @@
+#Emprestimo-Facil\tests\test_simulacao_service.py
+
+import time
+import pytest
+from fastapi import HTTPException
+from app.schemas.simulacao import SimulacaoLote, GradeSimulacao, CenarioSimulacao
+from app.services import simulacao_service
+from app.services.simulacao_service import SimulacaoService, simular_cenario
+from app.services.calculo_juros import RegraRecorrente, TipoJuros
+
+REGRA_MENSAL = RegraRecorrente(1, 'meses')
+
+def simular_cenario_lento(cenario, regra, incluir_parcelas=False):
+    # Um cenário que prende o processo muito além do prazo
+    if cenario['valor_principal'] == 666:
+        time.sleep(60)
+    return simular_cenario(cenario, regra, incluir_parcelas)
+
+def test_simulacao_grade_devolve_resultados_em_ordem():
+    simulacao = SimulacaoLote(grade=GradeSimulacao(valores=[1000, 5000], taxas=[0, 12], prazos=[6, 12]))
+    assert simulacao.tamanho == 16
+
+    resultados = list(SimulacaoService().simular(simulacao.expandir(), REGRA_MENSAL))
+    assert [r["indice"] for r in resultados] == list(range(16))
+    for resultado, cenario in zip(resultados, simulacao.expandir()):
+        assert "erro" not in resultado
+        assert resultado["valor_principal"] == cenario.valor_principal
+        assert resultado == {"indice": resultado["indice"], **cenario.model_dump(mode="json"), **simular_cenario(cenario.model_dump(), REGRA_MENSAL)}
+
+def test_simulacao_registra_erro_por_cenario():
+    cenarios = [
+        CenarioSimulacao(valor_principal=1000, taxa_juros=0, num_parcelas=12, valor_maximo=2000),
+        CenarioSimulacao(valor_principal=1000, taxa_juros=10, num_parcelas=12, tipo_juros=TipoJuros.SIMPLES),
+    ]
+    resultados = list(SimulacaoService().simular(cenarios, REGRA_MENSAL))
+    assert "erro" in resultados[0]
+    assert "erro" not in resultados[1]
+
+def test_simulacao_limita_tamanho_da_grade():
+    simulacao = SimulacaoLote(grade=GradeSimulacao(valores=[1000] * 10, taxas=[1] * 10, prazos=[12] * 10))
+    with pytest.raises(HTTPException) as excinfo:
+        SimulacaoService(max_cenarios=1000).validar_tamanho(simulacao.tamanho)
+    assert excinfo.value.status_code == 400
+
+def test_simulacao_exige_cenarios_ou_grade():
+    with pytest.raises(ValueError):
+        SimulacaoLote()
+
+def test_cenario_lento_nao_atrasa_os_seguintes(monkeypatch):
+    # Um único processo: sem reiniciar o pool, os cenários seguintes esperariam o lento
+    simulacao_service.encerrar_pool()
+    monkeypatch.setattr(simulacao_service.settings, "simulacao_processos", 1)
+    monkeypatch.setattr(simulacao_service, "simular_cenario", simular_cenario_lento)
+    cenarios = [CenarioSimulacao(valor_principal=666, taxa_juros=1, num_parcelas=12)] + [
+        CenarioSimulacao(valor_principal=1000 + i, taxa_juros=1, num_parcelas=12) for i in range(5)
+    ]
+    try:
+        inicio = time.monotonic()
+        resultados = list(SimulacaoService(timeout=1).simular(cenarios, REGRA_MENSAL))
+        duracao = time.monotonic() - inicio
+    finally:
+        simulacao_service.encerrar_pool()
+
+    assert resultados[0]["erro"] == "Tempo limite excedido"
+    assert all("erro" not in resultado for resultado in resultados[1:])
+    assert duracao < 10
\ No newline at end of file